@@ -14,9 +14,11 @@
     limitations under the License.
 */
 
+import batect.buildtools.JmhBaselineComparisonTask
 import com.github.jengelman.gradle.plugins.shadow.tasks.ShadowJar
 
 plugins {
+    alias(libs.plugins.jmh)
     alias(libs.plugins.shadow)
     id("batect-kotlin")
     application
@@ -65,6 +67,8 @@ dependencies {
     testImplementation(libs.jimfs)
     testImplementation(project(":libs:test-utils"))
     testImplementation(project(":libs:logging-test-utils"))
+
+    jmhImplementation(libs.mockito.kotlin)
 }
 
 tasks.named("check").configure {
@@ -93,6 +97,44 @@ checkUnitTestLayout {
     )
 }
 
+jmh {
+    jmhVersion.set(libs.versions.jmh)
+    resultFormat.set("JSON")
+    resultsFile.set(layout.buildDirectory.file("reports/jmh/results.json"))
+
+    // For example: ./gradlew jmh -PjmhInclude=ConfigurationLoaderBenchmark -PjmhProjectSizes=10,1000
+    providers.gradleProperty("jmhInclude").orNull?.let { includes.add(it) }
+
+    providers.gradleProperty("jmhProjectSizes").orNull?.let { sizes ->
+        benchmarkParameters.put("projectSize", objects.listProperty<String>().value(sizes.split(',').map { it.trim() }))
+    }
+}
+
+val jmhBaselineFile = layout.projectDirectory.file("src/jmh/baseline.json")
+
+val jmhCompareWithBaseline by tasks.registering(JmhBaselineComparisonTask::class) {
+    description = "Compares the results of the last JMH run against the stored baseline and fails if any benchmark has regressed."
+    group = "Verification"
+
+    resultsFile.set(jmh.resultsFile)
+    baselineFile.set(providers.gradleProperty("jmhBaseline").map { layout.projectDirectory.file(it) }.orElse(jmhBaselineFile))
+    regressionThresholdPercentage.set(providers.gradleProperty("jmhRegressionThreshold").map { it.toDouble() }.orElse(10.0))
+    reportFile.set(layout.buildDirectory.file("reports/jmh/comparison.json"))
+
+    mustRunAfter("jmh")
+}
+
+val jmhUpdateBaseline by tasks.registering(Copy::class) {
+    description = "Stores the results of the last JMH run as the baseline used by jmhCompareWithBaseline."
+    group = "Verification"
+
+    from(jmh.resultsFile)
+    into(jmhBaselineFile.asFile.parentFile)
+    rename { jmhBaselineFile.asFile.name }
+
+    mustRunAfter("jmh")
+}
+
 apply {
     from("gradle/completionTest.gradle.kts")
     from("gradle/journeyTest.gradle.kts")
@@ -20,11 +20,16 @@ class CompletionTestBase(ABC):
         results = self.run_completions_for("./batect -", "/app/bin")
         self.assertEqual([
             "--cache-type",
+            "--capture-output-compression",
+            "--capture-output-dir",
+            "--capture-output-max-file-size",
+            "--capture-output-only",
             "--clean",
             '--clean-cache',
             "--config-file",
             "--config-var",
             "--config-vars-file",
+            "--defer-cleanup",
             "--disable-ports",
             "--docker-cert-path",
             "--docker-config",
@@ -36,10 +41,13 @@ class CompletionTestBase(ABC):
             "--docker-tls-key",
             "--docker-tls-verify",
             "--enable-buildkit",
+            "--export-caches",
             "--help",
             "--list-tasks",
             "--log-file",
             "--max-parallelism",
+            "--metrics-file",
+            "--network-pool-size",
             "--no-cleanup",
             "--no-cleanup-after-failure",
             "--no-cleanup-after-success",
@@ -48,7 +56,10 @@ class CompletionTestBase(ABC):
             "--no-update-notification",
             "--no-wrapper-cache-cleanup",
             "--output",
+            "--output-buffer-size",
+            "--output-flush-interval",
             "--override-image",
+            "--restore-caches",
             "--skip-prerequisites",
             "--tag-image",
             "--upgrade",
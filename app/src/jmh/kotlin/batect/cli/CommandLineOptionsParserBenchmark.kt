@@ -0,0 +1,103 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.cli
+
+import batect.cli.options.defaultvalues.EnvironmentVariableDefaultValueProviderFactory
+import batect.docker.DockerHttpConfigDefaults
+import batect.dockerclient.DockerCLIContext
+import batect.os.HostEnvironmentVariables
+import batect.os.OperatingSystem
+import batect.os.PathResolverFactory
+import batect.os.SystemInfo
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.mock
+import org.openjdk.jmh.annotations.Benchmark
+import org.openjdk.jmh.annotations.BenchmarkMode
+import org.openjdk.jmh.annotations.Fork
+import org.openjdk.jmh.annotations.Level
+import org.openjdk.jmh.annotations.Measurement
+import org.openjdk.jmh.annotations.Mode
+import org.openjdk.jmh.annotations.OutputTimeUnit
+import org.openjdk.jmh.annotations.Param
+import org.openjdk.jmh.annotations.Scope
+import org.openjdk.jmh.annotations.Setup
+import org.openjdk.jmh.annotations.State
+import org.openjdk.jmh.annotations.Warmup
+import java.nio.file.FileSystems
+import java.util.concurrent.TimeUnit
+
+// Each parser instance can only parse once, so this includes creating the parser and registering all of its options, just
+// as happens on every invocation of Batect.
+@State(Scope.Benchmark)
+@BenchmarkMode(Mode.AverageTime)
+@OutputTimeUnit(TimeUnit.MICROSECONDS)
+@Warmup(iterations = 3, time = 2)
+@Measurement(iterations = 5, time = 2)
+@Fork(1)
+open class CommandLineOptionsParserBenchmark {
+    @Param("taskNameOnly", "typical", "many")
+    var arguments: String = ""
+
+    private lateinit var args: List<String>
+
+    private val fileSystem = FileSystems.getDefault()
+    private val pathResolverFactory = PathResolverFactory(fileSystem)
+    private val environmentVariableDefaultValueProviderFactory = EnvironmentVariableDefaultValueProviderFactory(HostEnvironmentVariables("DOCKER_HOST" to "unix:///var/run/docker.sock"))
+
+    private val systemInfo = mock<SystemInfo>(stubOnly = true) {
+        on { operatingSystem } doReturn OperatingSystem.Linux
+        on { homeDirectory } doReturn fileSystem.getPath("/home/some-user")
+    }
+
+    private val dockerHttpConfigDefaults = DockerHttpConfigDefaults(systemInfo)
+
+    @Setup(Level.Trial)
+    fun setUp() {
+        args = when (arguments) {
+            "taskNameOnly" -> listOf("the-task")
+            "typical" -> listOf("--output=fancy", "--config-var", "region=ap-southeast-2", "the-task", "--", "--verbose")
+            "many" -> listOf(
+                "--output=all",
+                "--output-buffer-size=65536",
+                "--no-update-notification",
+                "--no-wrapper-cache-cleanup",
+                "--max-parallelism=4",
+                "--config-var", "region=ap-southeast-2",
+                "--config-var", "log_level=debug",
+                "--override-image", "database=postgres:15",
+                "--tag-image", "app=my-app:latest",
+                "--log-file=/tmp/batect.log",
+                "--cache-type=directory",
+                "--docker-host=tcp://1.2.3.4:2376",
+                "--no-cleanup-after-success",
+                "--disable-ports",
+                "the-task",
+                "--",
+                "--verbose",
+                "--some-other-argument",
+            )
+            else -> throw IllegalArgumentException("Unknown argument set: $arguments")
+        }
+    }
+
+    @Benchmark
+    fun parse(): CommandLineOptionsParsingResult {
+        val parser = CommandLineOptionsParser(pathResolverFactory, environmentVariableDefaultValueProviderFactory, dockerHttpConfigDefaults, systemInfo) { DockerCLIContext.default }
+
+        return parser.parse(args)
+    }
+}
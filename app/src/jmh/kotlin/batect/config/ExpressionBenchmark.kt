@@ -0,0 +1,70 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.config
+
+import batect.os.HostEnvironmentVariables
+import org.openjdk.jmh.annotations.Benchmark
+import org.openjdk.jmh.annotations.BenchmarkMode
+import org.openjdk.jmh.annotations.Fork
+import org.openjdk.jmh.annotations.Level
+import org.openjdk.jmh.annotations.Measurement
+import org.openjdk.jmh.annotations.Mode
+import org.openjdk.jmh.annotations.OutputTimeUnit
+import org.openjdk.jmh.annotations.Param
+import org.openjdk.jmh.annotations.Scope
+import org.openjdk.jmh.annotations.Setup
+import org.openjdk.jmh.annotations.State
+import org.openjdk.jmh.annotations.Warmup
+import java.util.concurrent.TimeUnit
+
+@State(Scope.Benchmark)
+@BenchmarkMode(Mode.AverageTime)
+@OutputTimeUnit(TimeUnit.NANOSECONDS)
+@Warmup(iterations = 3, time = 2)
+@Measurement(iterations = 5, time = 2)
+@Fork(1)
+open class ExpressionBenchmark {
+    @Param("literal", "environmentVariable", "configVariable", "concatenated")
+    var expressionType: String = ""
+
+    private lateinit var source: String
+    private lateinit var expression: Expression
+
+    private val context = ExpressionEvaluationContext(
+        HostEnvironmentVariables("HOME" to "/home/some-user", "API_HOST" to "api.example.com"),
+        mapOf("log_level" to "debug", "region" to "ap-southeast-2"),
+    )
+
+    @Setup(Level.Trial)
+    fun setUp() {
+        source = when (expressionType) {
+            "literal" -> "some-literal-value-that-is-not-too-short"
+            "environmentVariable" -> "\${API_HOST:-localhost}"
+            "configVariable" -> "<{log_level}"
+            "concatenated" -> "https://\${API_HOST:-api.example.com}/<{region}/v1?user=\$HOME&level=<log_level"
+            else -> throw IllegalArgumentException("Unknown expression type: $expressionType")
+        }
+
+        expression = Expression.parse(source)
+    }
+
+    @Benchmark
+    fun parse(): Expression = Expression.parse(source)
+
+    @Benchmark
+    fun evaluate(): String = expression.evaluate(context)
+}
@@ -0,0 +1,129 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.config
+
+import java.nio.file.Files
+import java.nio.file.Path
+
+// Generates projects of a given size for benchmarks. Container N depends on containers N - 1 and N / 2, so the dependency graph
+// is both deep and wide, and the last container (which the task runs) transitively depends on every other container.
+class SyntheticProject(private val containerCount: Int) {
+    private val containerNames = (0 until containerCount).map { "container-$it" }
+    private val taskContainerName = containerNames.last()
+
+    private fun dependenciesOf(index: Int): Set<String> = when (index) {
+        0 -> emptySet()
+        else -> setOf(containerNames[index - 1], containerNames[index / 2])
+    }
+
+    private fun imageFor(index: Int): String = "some-registry.example.com/image-${index % 10}:1.2.3"
+
+    val task: Task = Task("the-task", TaskRunConfiguration(taskContainerName))
+
+    val taskSpecialisedConfiguration: TaskSpecialisedConfiguration by lazy {
+        val containers = containerNames.mapIndexed { index, name ->
+            Container(
+                name,
+                PullImage(imageFor(index)),
+                environment = mapOf("SOME_VAR" to LiteralValue("some value")),
+                portMappings = setOf(PortMapping(10000 + index, 8080)),
+                dependencies = dependenciesOf(index),
+            )
+        }
+
+        TaskSpecialisedConfiguration("synthetic-project", TaskMap(task), ContainerMap(containers))
+    }
+
+    // Writes the project as a root configuration file that defines the tasks and config variables, plus one included file for
+    // every 25 containers. Returns the path to the root configuration file.
+    fun writeTo(directory: Path): Path {
+        val containersPerFile = 25
+        val includeFiles = containerNames.indices.chunked(containersPerFile).mapIndexed { fileIndex, indices ->
+            val fileName = "includes/containers-$fileIndex.yml"
+            val path = directory.resolve(fileName)
+            Files.createDirectories(path.parent)
+            Files.writeString(path, containersYaml(indices))
+
+            fileName
+        }
+
+        val rootFile = directory.resolve("batect.yml")
+        Files.writeString(rootFile, rootYaml(includeFiles))
+
+        return rootFile
+    }
+
+    private fun rootYaml(includeFiles: List<String>): String = buildString {
+        appendLine("project_name: synthetic-project")
+        appendLine()
+        appendLine("include:")
+        includeFiles.forEach { appendLine("  - $it") }
+        appendLine()
+        appendLine("config_variables:")
+        appendLine("  log_level:")
+        appendLine("    description: The log level to use")
+        appendLine("    default: info")
+        appendLine("  region: {}")
+        appendLine()
+        appendLine("tasks:")
+
+        containerNames.forEach { name ->
+            appendLine("  run-$name:")
+            appendLine("    description: Runs $name")
+            appendLine("    group: Generated tasks")
+            appendLine("    run:")
+            appendLine("      container: $name")
+            appendLine("      command: ./run.sh --verbose")
+            appendLine("      environment:")
+            appendLine("        TASK_NAME: run-$name")
+        }
+    }
+
+    private fun containersYaml(indices: List<Int>): String = buildString {
+        appendLine("containers:")
+
+        indices.forEach { index ->
+            appendLine("  ${containerNames[index]}:")
+            appendLine("    image: ${imageFor(index)}")
+            appendLine("    command: sh -c 'echo \"Starting\" && exec ./server --port 8080'")
+            appendLine("    environment:")
+            appendLine("      HOME_DIR: \$HOME")
+            appendLine("      LOG_LEVEL: <{log_level}")
+            appendLine("      ENDPOINT: https://\${API_HOST:-api.example.com}/<{region}/v1")
+            appendLine("    volumes:")
+            appendLine("      - local: .")
+            appendLine("        container: /code")
+            appendLine("        options: cached")
+            appendLine("      - type: cache")
+            appendLine("        name: cache-$index")
+            appendLine("        container: /root/.cache")
+            appendLine("    ports:")
+            appendLine("      - ${10000 + index}:8080")
+            appendLine("    health_check:")
+            appendLine("      interval: 2s")
+            appendLine("      retries: 3")
+            appendLine("    working_directory: /code")
+
+            val dependencies = dependenciesOf(index)
+
+            if (dependencies.isNotEmpty()) {
+                appendLine("    dependencies:")
+                dependencies.forEach { appendLine("      - $it") }
+            }
+        }
+    }
+}
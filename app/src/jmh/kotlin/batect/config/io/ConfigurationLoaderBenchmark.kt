@@ -0,0 +1,82 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.config.io
+
+import batect.config.SyntheticProject
+import batect.config.includes.GitRepositoryCacheNotificationListener
+import batect.config.includes.IncludeResolver
+import batect.logging.Logger
+import batect.logging.NullLogSink
+import batect.os.PathResolverFactory
+import batect.telemetry.TelemetryCaptor
+import org.mockito.kotlin.mock
+import org.openjdk.jmh.annotations.Benchmark
+import org.openjdk.jmh.annotations.BenchmarkMode
+import org.openjdk.jmh.annotations.Fork
+import org.openjdk.jmh.annotations.Level
+import org.openjdk.jmh.annotations.Measurement
+import org.openjdk.jmh.annotations.Mode
+import org.openjdk.jmh.annotations.OutputTimeUnit
+import org.openjdk.jmh.annotations.Param
+import org.openjdk.jmh.annotations.Scope
+import org.openjdk.jmh.annotations.Setup
+import org.openjdk.jmh.annotations.State
+import org.openjdk.jmh.annotations.TearDown
+import org.openjdk.jmh.annotations.Warmup
+import java.nio.file.FileSystems
+import java.nio.file.Files
+import java.nio.file.Path
+import java.util.concurrent.TimeUnit
+
+// Loads a generated project from disk, including parsing the root file and all of its file includes and merging them.
+@State(Scope.Benchmark)
+@BenchmarkMode(Mode.AverageTime)
+@OutputTimeUnit(TimeUnit.MILLISECONDS)
+@Warmup(iterations = 3, time = 2)
+@Measurement(iterations = 5, time = 2)
+@Fork(1)
+open class ConfigurationLoaderBenchmark {
+    @Param("10", "100", "500")
+    var projectSize: Int = 0
+
+    private lateinit var projectDirectory: Path
+    private lateinit var rootConfigFile: Path
+    private lateinit var loader: ConfigurationLoader
+
+    @Setup(Level.Trial)
+    fun setUp() {
+        projectDirectory = Files.createTempDirectory("batect-configuration-loader-benchmark")
+        rootConfigFile = SyntheticProject(projectSize).writeTo(projectDirectory)
+
+        // Only file includes are used, so the Git repository cache is never touched.
+        val includeResolver = IncludeResolver(mock())
+        val logger = Logger("benchmark", NullLogSink())
+
+        // Stub-only mocks don't record invocations, so they don't accumulate garbage across iterations.
+        val telemetryCaptor = mock<TelemetryCaptor>(stubOnly = true)
+
+        loader = ConfigurationLoader(includeResolver, PathResolverFactory(FileSystems.getDefault()), telemetryCaptor, mock<GitRepositoryCacheNotificationListener>(), logger)
+    }
+
+    @TearDown(Level.Trial)
+    fun tearDown() {
+        projectDirectory.toFile().deleteRecursively()
+    }
+
+    @Benchmark
+    fun loadConfig(): ConfigurationLoadResult = loader.loadConfig(rootConfigFile)
+}
@@ -0,0 +1,90 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.docker
+
+import batect.dockerclient.ImagePullProgressDetail
+import batect.dockerclient.ImagePullProgressUpdate
+import org.openjdk.jmh.annotations.Benchmark
+import org.openjdk.jmh.annotations.BenchmarkMode
+import org.openjdk.jmh.annotations.Fork
+import org.openjdk.jmh.annotations.Level
+import org.openjdk.jmh.annotations.Measurement
+import org.openjdk.jmh.annotations.Mode
+import org.openjdk.jmh.annotations.OutputTimeUnit
+import org.openjdk.jmh.annotations.Param
+import org.openjdk.jmh.annotations.Scope
+import org.openjdk.jmh.annotations.Setup
+import org.openjdk.jmh.annotations.State
+import org.openjdk.jmh.annotations.Warmup
+import org.openjdk.jmh.infra.Blackhole
+import java.util.concurrent.TimeUnit
+
+// Replays the sequence of progress messages the Docker daemon sends while pulling an image: every layer is announced, then layers
+// download and extract concurrently, each sending many progress updates along the way, with their messages interleaved.
+@State(Scope.Benchmark)
+@BenchmarkMode(Mode.AverageTime)
+@OutputTimeUnit(TimeUnit.MICROSECONDS)
+@Warmup(iterations = 3, time = 2)
+@Measurement(iterations = 5, time = 2)
+@Fork(1)
+open class ImagePullProgressAggregatorBenchmark {
+    @Param("5", "20")
+    var layerCount: Int = 0
+
+    @Param("100")
+    var updatesPerLayer: Int = 0
+
+    private lateinit var updates: List<ImagePullProgressUpdate>
+
+    @Setup(Level.Trial)
+    fun setUp() {
+        val layerIds = (1..layerCount).map { "%012x".format(it * 0x1234567L) }
+        val layerSizes = layerIds.indices.map { 1_000_000L + it * 2_500_000L }
+
+        val perLayerUpdates = layerIds.mapIndexed { index, id ->
+            val size = layerSizes[index]
+
+            listOf(ImagePullProgressUpdate("Waiting", null, id)) +
+                (1..updatesPerLayer).map { ImagePullProgressUpdate("Downloading", ImagePullProgressDetail(size * it / updatesPerLayer, size), id) } +
+                ImagePullProgressUpdate("Verifying Checksum", null, id) +
+                ImagePullProgressUpdate("Download complete", null, id) +
+                (1..updatesPerLayer / 2).map { ImagePullProgressUpdate("Extracting", ImagePullProgressDetail(size * it / (updatesPerLayer / 2), size), id) } +
+                ImagePullProgressUpdate("Pull complete", null, id)
+        }
+
+        updates = listOf(ImagePullProgressUpdate("Pulling from library/some-image", null, "latest")) +
+            layerIds.map { ImagePullProgressUpdate("Pulling fs layer", null, it) } +
+            interleave(perLayerUpdates) +
+            ImagePullProgressUpdate("Digest: sha256:e6b798f4eeb4e6334d195cdeabc18d07dc5158aa88ad5d83670462852b431a71", null, "") +
+            ImagePullProgressUpdate("Status: Downloaded newer image for some-image:latest", null, "")
+    }
+
+    private fun interleave(lists: List<List<ImagePullProgressUpdate>>): List<ImagePullProgressUpdate> {
+        val longest = lists.maxOf { it.size }
+
+        return (0 until longest).flatMap { index -> lists.mapNotNull { it.getOrNull(index) } }
+    }
+
+    @Benchmark
+    fun processAllUpdates(blackhole: Blackhole) {
+        val aggregator = ImagePullProgressAggregator()
+
+        updates.forEach { update ->
+            blackhole.consume(aggregator.processProgressUpdate(update))
+        }
+    }
+}
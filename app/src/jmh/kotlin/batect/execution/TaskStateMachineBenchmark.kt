@@ -0,0 +1,132 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.config.SyntheticProject
+import batect.docker.DockerContainer
+import batect.dockerclient.ContainerReference
+import batect.dockerclient.ImageReference
+import batect.dockerclient.NetworkReference
+import batect.execution.model.events.ContainerBecameHealthyEvent
+import batect.execution.model.events.ContainerBecameReadyEvent
+import batect.execution.model.events.ContainerCreatedEvent
+import batect.execution.model.events.ContainerRemovedEvent
+import batect.execution.model.events.ContainerStartedEvent
+import batect.execution.model.events.ContainerStoppedEvent
+import batect.execution.model.events.ImageBuiltEvent
+import batect.execution.model.events.ImagePulledEvent
+import batect.execution.model.events.RunningContainerExitedEvent
+import batect.execution.model.events.TaskNetworkCreatedEvent
+import batect.execution.model.events.TaskNetworkDeletedEvent
+import batect.execution.model.stages.CleanupStagePlanner
+import batect.execution.model.stages.RunStage
+import batect.execution.model.stages.RunStagePlanner
+import batect.execution.model.steps.BuildImageStep
+import batect.execution.model.steps.CreateContainerStep
+import batect.execution.model.steps.DeleteTaskNetworkStep
+import batect.execution.model.steps.PrepareTaskNetworkStep
+import batect.execution.model.steps.PullImageStep
+import batect.execution.model.steps.RemoveContainerStep
+import batect.execution.model.steps.RunContainerSetupCommandsStep
+import batect.execution.model.steps.RunContainerStep
+import batect.execution.model.steps.StopContainerStep
+import batect.execution.model.steps.TaskStep
+import batect.execution.model.steps.WaitForContainerToBecomeHealthyStep
+import batect.logging.Logger
+import batect.logging.NullLogSink
+import batect.primitives.CancellationContext
+import org.openjdk.jmh.annotations.Benchmark
+import org.openjdk.jmh.annotations.BenchmarkMode
+import org.openjdk.jmh.annotations.Fork
+import org.openjdk.jmh.annotations.Level
+import org.openjdk.jmh.annotations.Measurement
+import org.openjdk.jmh.annotations.Mode
+import org.openjdk.jmh.annotations.OutputTimeUnit
+import org.openjdk.jmh.annotations.Param
+import org.openjdk.jmh.annotations.Scope
+import org.openjdk.jmh.annotations.Setup
+import org.openjdk.jmh.annotations.State
+import org.openjdk.jmh.annotations.Warmup
+import java.util.concurrent.TimeUnit
+
+// Plans the run stage for a generated project, and drives a task state machine through a complete, successful run and cleanup
+// by responding to every step it hands out with the events the real step runners would post. The benchmark runs each step as
+// soon as it is returned, so this measures the cost of the state machine's scheduling decisions rather than any parallelism.
+@State(Scope.Benchmark)
+@BenchmarkMode(Mode.AverageTime)
+@OutputTimeUnit(TimeUnit.MICROSECONDS)
+@Warmup(iterations = 3, time = 2)
+@Measurement(iterations = 5, time = 2)
+@Fork(1)
+open class TaskStateMachineBenchmark {
+    @Param("10", "50", "200")
+    var projectSize: Int = 0
+
+    private val logger = Logger("benchmark", NullLogSink())
+    private val runOptions = RunOptions(isMainTask = true, behaviourAfterSuccess = CleanupOption.Cleanup, behaviourAfterFailure = CleanupOption.Cleanup)
+    private val network = NetworkReference("the-network")
+
+    private lateinit var graph: ContainerDependencyGraph
+
+    @Setup(Level.Trial)
+    fun setUp() {
+        val project = SyntheticProject(projectSize)
+        graph = ContainerDependencyGraph(project.taskSpecialisedConfiguration, project.task)
+    }
+
+    @Benchmark
+    fun createRunStage(): RunStage = RunStagePlanner(graph, logger).createStage()
+
+    @Benchmark
+    fun runTaskToCompletion(): Int {
+        val stateMachine = TaskStateMachine(graph, runOptions, RunStagePlanner(graph, logger), CleanupStagePlanner(graph, logger), CancellationContext(), logger)
+        var stepsRun = 0
+
+        while (true) {
+            val step = stateMachine.popNextStep(false) ?: break
+            postEventsFor(step, stateMachine)
+            stepsRun++
+        }
+
+        if (stateMachine.taskHasFailed) {
+            throw IllegalStateException("Task failed after $stepsRun steps.")
+        }
+
+        return stepsRun
+    }
+
+    private fun postEventsFor(step: TaskStep, stateMachine: TaskStateMachine) {
+        when (step) {
+            is BuildImageStep -> stateMachine.postEvent(ImageBuiltEvent(step.container, ImageReference("built-image-${step.container.name}")))
+            is PullImageStep -> stateMachine.postEvent(ImagePulledEvent(step.source, ImageReference(step.source.imageName)))
+            is PrepareTaskNetworkStep -> stateMachine.postEvent(TaskNetworkCreatedEvent(network))
+            is CreateContainerStep -> stateMachine.postEvent(ContainerCreatedEvent(step.container, DockerContainer(ContainerReference("id-${step.container.name}"), step.container.name)))
+            is RunContainerStep -> stateMachine.postEvent(ContainerStartedEvent(step.container))
+            is WaitForContainerToBecomeHealthyStep -> stateMachine.postEvent(ContainerBecameHealthyEvent(step.container))
+            is RunContainerSetupCommandsStep -> {
+                stateMachine.postEvent(ContainerBecameReadyEvent(step.container))
+
+                if (step.container == graph.taskContainerNode.container) {
+                    stateMachine.postEvent(RunningContainerExitedEvent(step.container, 0))
+                }
+            }
+            is StopContainerStep -> stateMachine.postEvent(ContainerStoppedEvent(step.container))
+            is RemoveContainerStep -> stateMachine.postEvent(ContainerRemovedEvent(step.container))
+            is DeleteTaskNetworkStep -> stateMachine.postEvent(TaskNetworkDeletedEvent)
+        }
+    }
+}
@@ -0,0 +1,78 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.logging
+
+import kotlinx.serialization.builtins.ListSerializer
+import kotlinx.serialization.builtins.MapSerializer
+import kotlinx.serialization.builtins.serializer
+import org.openjdk.jmh.annotations.Benchmark
+import org.openjdk.jmh.annotations.BenchmarkMode
+import org.openjdk.jmh.annotations.Fork
+import org.openjdk.jmh.annotations.Level
+import org.openjdk.jmh.annotations.Measurement
+import org.openjdk.jmh.annotations.Mode
+import org.openjdk.jmh.annotations.OutputTimeUnit
+import org.openjdk.jmh.annotations.Param
+import org.openjdk.jmh.annotations.Scope
+import org.openjdk.jmh.annotations.Setup
+import org.openjdk.jmh.annotations.State
+import org.openjdk.jmh.annotations.Warmup
+import java.io.OutputStream
+import java.time.ZoneOffset
+import java.time.ZonedDateTime
+import java.util.concurrent.TimeUnit
+
+@State(Scope.Benchmark)
+@BenchmarkMode(Mode.AverageTime)
+@OutputTimeUnit(TimeUnit.NANOSECONDS)
+@Warmup(iterations = 3, time = 2)
+@Measurement(iterations = 5, time = 2)
+@Fork(1)
+open class LogMessageWriterBenchmark {
+    @Param("0", "5", "20")
+    var additionalDataCount: Int = 0
+
+    private val writer = LogMessageWriter()
+    private lateinit var message: LogMessage
+
+    @Setup(Level.Trial)
+    fun setUp() {
+        // Cycle through the kinds of data that are commonly logged: plain strings, numbers, lists and maps.
+        val additionalData = (0 until additionalDataCount).associate { index ->
+            val value: Jsonable = when (index % 4) {
+                0 -> JsonableObject("/some/path/to/a/file-$index.yml", String.serializer())
+                1 -> JsonableObject(index * 1234L, Long.serializer())
+                2 -> JsonableObject(listOf("--output=all", "--config-var", "region=ap-southeast-2", "the-task"), ListSerializer(String.serializer()))
+                else -> JsonableObject(mapOf("HOME" to "/home/some-user", "PATH" to "/usr/local/bin:/usr/bin:/bin"), MapSerializer(String.serializer(), String.serializer()))
+            }
+
+            "data$index" to value
+        }
+
+        message = LogMessage(Severity.Info, "Something happened that is worth logging.", ZonedDateTime.of(2022, 10, 8, 1, 2, 3, 456_000_000, ZoneOffset.UTC), additionalData)
+    }
+
+    @Benchmark
+    fun writeTo() {
+        writer.writeTo(message, DiscardingOutputStream)
+    }
+
+    private object DiscardingOutputStream : OutputStream() {
+        override fun write(b: Int) {}
+        override fun write(b: ByteArray, off: Int, len: Int) {}
+    }
+}
@@ -0,0 +1,102 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.interleaved
+
+import batect.config.Container
+import batect.config.PullImage
+import batect.os.ConsoleDimensions
+import batect.ui.Console
+import okio.Buffer
+import org.mockito.kotlin.mock
+import org.openjdk.jmh.annotations.Benchmark
+import org.openjdk.jmh.annotations.BenchmarkMode
+import org.openjdk.jmh.annotations.Fork
+import org.openjdk.jmh.annotations.Level
+import org.openjdk.jmh.annotations.Measurement
+import org.openjdk.jmh.annotations.Mode
+import org.openjdk.jmh.annotations.OutputTimeUnit
+import org.openjdk.jmh.annotations.Param
+import org.openjdk.jmh.annotations.Scope
+import org.openjdk.jmh.annotations.Setup
+import org.openjdk.jmh.annotations.State
+import org.openjdk.jmh.annotations.Warmup
+import java.io.OutputStream
+import java.io.PrintStream
+import java.time.Duration
+import java.util.concurrent.TimeUnit
+
+// Pipes a large amount of synthetic container output through the interleaved output path (--output=all) and, for comparison,
+// through the simple path used by the other output styles, where the task container's output is copied directly to stdout.
+@State(Scope.Benchmark)
+@BenchmarkMode(Mode.Throughput)
+@OutputTimeUnit(TimeUnit.SECONDS)
+@Warmup(iterations = 3, time = 2)
+@Measurement(iterations = 5, time = 2)
+@Fork(1)
+open class InterleavedOutputBenchmark {
+    @Param("80", "1000")
+    var lineLength: Int = 0
+
+    @Param("0", "65536")
+    var bufferSize: Long = 0
+
+    private val container = Container("some-container", PullImage("some-image"))
+    private val totalOutputSize = 16 * 1024 * 1024
+    private val chunkSize = 32 * 1024
+
+    private lateinit var chunks: List<ByteArray>
+    private lateinit var outputStream: PrintStream
+    private lateinit var console: Console
+
+    @Setup(Level.Trial)
+    fun setUp() {
+        val line = "x".repeat(lineLength - 1) + "\n"
+        val output = line.repeat(totalOutputSize / lineLength).toByteArray(Charsets.UTF_8)
+
+        // The Docker attach stream delivers output in chunks that do not line up with line boundaries, so we do the same.
+        chunks = output.asList().chunked(chunkSize).map { it.toByteArray() }
+        outputStream = PrintStream(DiscardingOutputStream, false)
+        console = Console(outputStream, enableComplexOutput = true, consoleDimensions = mock<ConsoleDimensions>())
+    }
+
+    @Benchmark
+    fun interleavedOutput() {
+        val output = InterleavedOutput("some-task", setOf(container), console, InterleavedOutputBuffering(bufferSize, Duration.ofMillis(100)))
+        val sink = InterleavedContainerOutputSink(container, output)
+
+        chunks.forEach { chunk ->
+            val buffer = Buffer().write(chunk)
+            sink.write(buffer, buffer.size)
+        }
+
+        sink.close()
+    }
+
+    @Benchmark
+    fun simpleOutput() {
+        chunks.forEach { chunk ->
+            outputStream.write(chunk)
+        }
+
+        outputStream.flush()
+    }
+
+    private object DiscardingOutputStream : OutputStream() {
+        override fun write(b: Int) {}
+        override fun write(b: ByteArray, off: Int, len: Int) {}
+    }
+}
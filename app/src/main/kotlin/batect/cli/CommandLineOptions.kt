@@ -23,6 +23,7 @@ import batect.logging.FileLogSink
 import batect.logging.LogSink
 import batect.logging.NullLogSink
 import batect.ui.OutputStyle
+import batect.ui.containerio.OutputCaptureCompression
 import org.kodein.di.DirectDI
 import org.kodein.di.bind
 import org.kodein.di.direct
@@ -42,11 +43,19 @@ data class CommandLineOptions(
     val configVariablesSourceFile: Path? = null,
     val logFileName: Path? = null,
     val requestedOutputStyle: OutputStyle? = null,
+    val interleavedOutputBufferSize: Int = 0,
+    val interleavedOutputFlushInterval: Int = 100,
+    val captureOutputDirectory: Path? = null,
+    val captureOutputCompression: OutputCaptureCompression = OutputCaptureCompression.None,
+    val captureOutputMaximumFileSize: Int = 0,
+    val suppressConsoleOutputWhileCapturing: Boolean = false,
+    val metricsFileName: Path? = null,
     val disableColorOutput: Boolean = false,
     val disableUpdateNotification: Boolean = false,
     val disableWrapperCacheCleanup: Boolean = false,
     val disableCleanupAfterFailure: Boolean = false,
     val disableCleanupAfterSuccess: Boolean = false,
+    val deferCleanup: Boolean = false,
     val disablePortMappings: Boolean = false,
     val dontPropagateProxyEnvironmentVariables: Boolean = false,
     val taskName: String? = null,
@@ -61,8 +70,12 @@ data class CommandLineOptions(
     val enableBuildKit: Boolean? = null,
     val generateShellTabCompletionScript: Shell? = null,
     val generateShellTabCompletionTaskInformation: Shell? = null,
+    val deferredCleanupToFinish: Path? = null,
     val maximumLevelOfParallelism: Int? = null,
+    val networkPoolSize: Int? = null,
     val cleanCaches: Set<String> = emptySet(),
+    val exportCachesDirectory: Path? = null,
+    val restoreCachesDirectory: Path? = null,
 ) {
     fun extend(originalKodein: DirectDI): DirectDI = subDI(originalKodein.di) {
         bind<CommandLineOptions>() with instance(this@CommandLineOptions)
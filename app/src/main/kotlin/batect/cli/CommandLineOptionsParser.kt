@@ -31,6 +31,7 @@ import batect.execution.CacheType
 import batect.os.PathResolverFactory
 import batect.os.SystemInfo
 import batect.ui.OutputStyle
+import batect.ui.containerio.OutputCaptureCompression
 import okio.Path.Companion.toOkioPath
 import java.nio.file.Path
 import java.nio.file.Paths
@@ -48,6 +49,7 @@ class CommandLineOptionsParser(
         const val disableCleanupAfterFailureFlagName = "no-cleanup-after-failure"
         const val disableCleanupAfterSuccessFlagName = "no-cleanup-after-success"
         const val disableCleanupFlagName = "no-cleanup"
+        const val finishDeferredCleanupOptionName = "finish-deferred-cleanup"
         const val upgradeFlagName = "upgrade"
         const val configVariableOptionName = "config-var"
         const val enableBuildKitFlagName = "enable-buildkit"
@@ -76,6 +78,7 @@ class CommandLineOptionsParser(
     private val existingNetworkToUse: String? by valueOption(executionOptionsGroup, "use-network", "Existing Docker network to use for all tasks. If not set, a new network is created for each task.")
     private val skipPrerequisites: Boolean by flagOption(executionOptionsGroup, "skip-prerequisites", "Don't run prerequisites for the named task.")
     private val maximumLevelOfParallelism: Int? by valueOption(executionOptionsGroup, "max-parallelism", "Maximum number of setup or cleanup steps to run in parallel when running a task", ValueConverters.positiveInteger)
+    private val networkPoolSize: Int? by valueOption(executionOptionsGroup, "network-pool-size", "Reuse task networks from a pool of up to this many pre-created networks, rather than creating a new network for each task.", ValueConverters.positiveInteger)
 
     private val configurationFileName: Path by valueOption(
         executionOptionsGroup,
@@ -132,6 +135,60 @@ class CommandLineOptionsParser(
         'o',
     )
 
+    private val interleavedOutputBufferSize: Int by valueOption(
+        outputOptionsGroup,
+        "output-buffer-size",
+        "Number of bytes of complete lines to buffer for each container before printing them when using --output=all. 0 prints each line as soon as it is received.",
+        0,
+        ValueConverters.nonNegativeInteger,
+    )
+
+    private val interleavedOutputFlushInterval: Int by valueOption(
+        outputOptionsGroup,
+        "output-flush-interval",
+        "Maximum time, in milliseconds, to hold buffered lines for a container before printing them when using --output=all with --output-buffer-size.",
+        100,
+        ValueConverters.positiveInteger,
+    )
+
+    private val captureOutputDirectoryOption = valueOption(
+        outputOptionsGroup,
+        "capture-output-dir",
+        "Write the stdout and stderr of each container to files in this directory, in addition to the console. Output from a container attached to a TTY is only captured with --capture-output-only.",
+        ValueConverters.pathToDirectory(pathResolverFactory),
+    )
+
+    private val captureOutputDirectory: Path? by captureOutputDirectoryOption
+
+    private val captureOutputCompression: OutputCaptureCompression by valueOption(
+        outputOptionsGroup,
+        "capture-output-compression",
+        "Compression to use for files written by ${captureOutputDirectoryOption.longOption}. Valid values are: none or gzip.",
+        OutputCaptureCompression.None,
+        ValueConverters.enum(),
+    )
+
+    private val captureOutputMaximumFileSize: Int by valueOption(
+        outputOptionsGroup,
+        "capture-output-max-file-size",
+        "Start a new file once this many bytes of output have been written to a file by ${captureOutputDirectoryOption.longOption}. 0 means files are never rotated.",
+        0,
+        ValueConverters.nonNegativeInteger,
+    )
+
+    private val suppressConsoleOutputWhileCapturing: Boolean by flagOption(
+        outputOptionsGroup,
+        "capture-output-only",
+        "Don't print container output to the console when using ${captureOutputDirectoryOption.longOption}.",
+    )
+
+    private val metricsFileName: Path? by valueOption(
+        outputOptionsGroup,
+        "metrics-file",
+        "Record task, image and container timings to this file in Prometheus text format after each task. Values are added to those already in the file.",
+        ValueConverters.pathToFile(pathResolverFactory),
+    )
+
     private val disableCleanupAfterFailure: Boolean by flagOption(
         executionOptionsGroup,
         disableCleanupAfterFailureFlagName,
@@ -139,6 +196,12 @@ class CommandLineOptionsParser(
     )
     private val disableCleanupAfterSuccess: Boolean by flagOption(executionOptionsGroup, disableCleanupAfterSuccessFlagName, "If the main task succeeds, leave all containers created for that task running.")
     private val disableCleanup: Boolean by flagOption(executionOptionsGroup, disableCleanupFlagName, "Equivalent to providing both --$disableCleanupAfterFailureFlagName and --$disableCleanupAfterSuccessFlagName.")
+    private val deferCleanup: Boolean by flagOption(
+        executionOptionsGroup,
+        "defer-cleanup",
+        "Report the result of the main task as soon as it finishes, and clean up its containers and other temporary resources in the background.",
+    )
+
     private val dontPropagateProxyEnvironmentVariables: Boolean by flagOption(executionOptionsGroup, "no-proxy-vars", "Don't propagate proxy-related environment variables such as http_proxy and no_proxy to image builds or containers.")
 
     private val cacheType: CacheType by valueOption(
@@ -253,12 +316,34 @@ class CommandLineOptionsParser(
         showInHelp = false,
     )
 
+    private val deferredCleanupToFinish: Path? by valueOption(
+        hiddenOptionsGroup,
+        finishDeferredCleanupOptionName,
+        "Finish the deferred cleanup recorded in the given file.",
+        ValueConverters.pathToFile(pathResolverFactory),
+        showInHelp = false,
+    )
+
     private val cleanCaches: Set<String> by setOption(
         group = cacheOptionsGroup,
         longName = "clean-cache",
         description = "Clean given cache(s) and exit.",
     )
 
+    private val exportCachesDirectory: Path? by valueOption(
+        cacheOptionsGroup,
+        "export-caches",
+        "Export all caches for this project to compressed archives in the given directory and exit. Caches that have not changed since they were last exported to the directory are skipped.",
+        ValueConverters.pathToDirectory(pathResolverFactory),
+    )
+
+    private val restoreCachesDirectory: Path? by valueOption(
+        cacheOptionsGroup,
+        "restore-caches",
+        "Restore caches for this project from archives created with --export-caches in the given directory before running the task.",
+        ValueConverters.pathToDirectory(pathResolverFactory, mustExist = true),
+    )
+
     fun parse(args: Iterable<String>): CommandLineOptionsParsingResult {
         return when (val result = optionParser.parseOptions(args)) {
             is OptionsParsingResult.InvalidOptions -> CommandLineOptionsParsingResult.Failed(result.message)
@@ -276,6 +361,10 @@ class CommandLineOptionsParser(
             return CommandLineOptionsParsingResult.Failed("Fancy output mode cannot be used when color output has been disabled.")
         }
 
+        if (suppressConsoleOutputWhileCapturing && captureOutputDirectory == null) {
+            return CommandLineOptionsParsingResult.Failed("--capture-output-only cannot be used without ${captureOutputDirectoryOption.longOption}.")
+        }
+
         val taggedAndOverriddenImages = imageTags.keys.intersect(imageOverrides.keys)
 
         if (taggedAndOverriddenImages.isNotEmpty()) {
@@ -312,7 +401,9 @@ class CommandLineOptionsParser(
             runCleanup ||
             generateShellTabCompletionScript != null ||
             generateShellTabCompletionTaskInformation != null ||
-            cleanCaches.isNotEmpty()
+            deferredCleanupToFinish != null ||
+            cleanCaches.isNotEmpty() ||
+            exportCachesDirectory != null
         ) {
             return CommandLineOptionsParsingResult.Succeeded(createOptionsObject(null, emptyList()))
         }
@@ -378,11 +469,19 @@ class CommandLineOptionsParser(
         imageTags = imageTags,
         logFileName = logFileName,
         requestedOutputStyle = requestedOutputStyle,
+        interleavedOutputBufferSize = interleavedOutputBufferSize,
+        interleavedOutputFlushInterval = interleavedOutputFlushInterval,
+        captureOutputDirectory = captureOutputDirectory,
+        captureOutputCompression = captureOutputCompression,
+        captureOutputMaximumFileSize = captureOutputMaximumFileSize,
+        suppressConsoleOutputWhileCapturing = suppressConsoleOutputWhileCapturing,
+        metricsFileName = metricsFileName,
         disableColorOutput = disableColorOutput,
         disableUpdateNotification = disableUpdateNotification,
         disableWrapperCacheCleanup = disableWrapperCacheCleanup,
         disableCleanupAfterFailure = disableCleanupAfterFailure || disableCleanup,
         disableCleanupAfterSuccess = disableCleanupAfterSuccess || disableCleanup,
+        deferCleanup = deferCleanup,
         disablePortMappings = disablePortMappings,
         dontPropagateProxyEnvironmentVariables = dontPropagateProxyEnvironmentVariables,
         taskName = taskName,
@@ -404,8 +503,12 @@ class CommandLineOptionsParser(
         enableBuildKit = enableBuildKit,
         generateShellTabCompletionScript = generateShellTabCompletionScript,
         generateShellTabCompletionTaskInformation = generateShellTabCompletionTaskInformation,
+        deferredCleanupToFinish = deferredCleanupToFinish,
         maximumLevelOfParallelism = maximumLevelOfParallelism,
+        networkPoolSize = networkPoolSize,
         cleanCaches = cleanCaches,
+        exportCachesDirectory = exportCachesDirectory,
+        restoreCachesDirectory = restoreCachesDirectory,
     )
 }
 
@@ -20,6 +20,7 @@ import batect.config.ProjectPaths
 import batect.dockerclient.DockerClient
 import batect.execution.CacheManager
 import batect.execution.CacheType
+import batect.execution.DeferredCleanupRunner
 import batect.os.deleteDirectory
 import batect.ui.Console
 import kotlinx.coroutines.runBlocking
@@ -39,6 +40,8 @@ class CleanupCachesCommand(
             val dockerClient = kodein.instance<DockerClient>()
             val cacheManager = kodein.instance<CacheManager>()
 
+            finishDeferredCleanups(kodein.instance())
+
             when (cacheManager.cacheType) {
                 CacheType.Volume -> runForVolumes(dockerClient, cacheManager, cachesToClean)
                 CacheType.Directory -> runForDirectories(cachesToClean)
@@ -48,6 +51,14 @@ class CleanupCachesCommand(
         }
     }
 
+    private fun finishDeferredCleanups(deferredCleanupRunner: DeferredCleanupRunner) {
+        when (val cleanupsFinished = deferredCleanupRunner.finishAllPending()) {
+            0 -> {}
+            1 -> console.println("Finished cleaning up after 1 previous task.")
+            else -> console.println("Finished cleaning up after $cleanupsFinished previous tasks.")
+        }
+    }
+
     private suspend fun runForVolumes(dockerClient: DockerClient, cacheManager: CacheManager, cachesToClean: Set<String>) {
         val prefix = "batect-cache-${cacheManager.projectCacheKey}-"
 
@@ -25,11 +25,13 @@ import org.kodein.di.instance
 class CommandFactory {
     fun createCommand(options: CommandLineOptions, kodein: DirectDI): Command {
         return when {
+            options.deferredCleanupToFinish != null -> kodein.instance<FinishDeferredCleanupCommand>()
             options.showHelp -> kodein.instance<HelpCommand>()
             options.showVersionInfo -> kodein.instance<VersionInfoCommand>()
             options.listTasks -> kodein.instance<ListTasksCommand>()
             options.runUpgrade -> kodein.instance<UpgradeCommand>()
             options.runCleanup || options.cleanCaches.isNotEmpty() -> kodein.instance<CleanupCachesCommand>()
+            options.exportCachesDirectory != null -> kodein.instance<ExportCachesCommand>()
             options.generateShellTabCompletionScript != null -> kodein.instance<GenerateShellTabCompletionScriptCommand>()
             options.generateShellTabCompletionTaskInformation != null -> kodein.instance<GenerateShellTabCompletionTaskInformationCommand>()
             else -> kodein.instance<RunTaskCommand>()
@@ -30,6 +30,7 @@ import batect.logging.Logger
 import batect.primitives.Version
 import batect.primitives.VersionComparisonMode
 import batect.telemetry.AttributeValue
+import batect.telemetry.DockerApiMetricsReporter
 import batect.telemetry.DockerTelemetryCollector
 import batect.telemetry.TelemetryCaptor
 import batect.telemetry.addUnhandledExceptionEvent
@@ -45,6 +46,7 @@ class DockerConnectivity(
     private val errorConsole: Console,
     private val commandLineOptions: CommandLineOptions,
     private val telemetryCaptor: TelemetryCaptor,
+    private val dockerApiMetricsReporter: DockerApiMetricsReporter,
     private val logger: Logger,
 ) {
     fun checkAndRun(task: TaskWithKodein): Int {
@@ -107,7 +109,11 @@ class DockerConnectivity(
         val kodein = dockerConfigurationKodeinFactory.create(dockerClient, connectivityCheckResult.containerType, builderVersion)
         kodein.instance<DockerTelemetryCollector>().collectTelemetry(connectivityCheckResult, builderVersion)
 
-        return task(kodein)
+        try {
+            return task(kodein)
+        } finally {
+            dockerApiMetricsReporter.report()
+        }
     }
 
     private fun Version.isBefore(minimumVersion: Version): Boolean {
@@ -0,0 +1,61 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.cli.commands
+
+import batect.cli.CommandLineOptions
+import batect.dockerclient.DockerClientException
+import batect.execution.CacheArchiveException
+import batect.execution.CacheArchiveOutcome
+import batect.execution.CacheArchiver
+import batect.ui.Console
+import batect.ui.text.Text
+import kotlinx.coroutines.runBlocking
+import org.kodein.di.instance
+
+class ExportCachesCommand(
+    private val dockerConnectivity: DockerConnectivity,
+    private val commandLineOptions: CommandLineOptions,
+    private val console: Console,
+    private val errorConsole: Console,
+) : Command {
+    override fun run(): Int = dockerConnectivity.checkAndRun { kodein ->
+        val archiveDirectory = commandLineOptions.exportCachesDirectory!!
+
+        console.println("Exporting caches to '$archiveDirectory'...")
+
+        try {
+            val results = runBlocking { kodein.instance<CacheArchiver>().export(archiveDirectory) }
+            results.forEach { console.println(it.toHumanReadableString()) }
+
+            val exportedCount = results.count { it.outcome == CacheArchiveOutcome.Exported }
+
+            if (exportedCount == 1) {
+                console.println("Done! Exported 1 cache, ${results.size - exportedCount} unchanged.")
+            } else {
+                console.println("Done! Exported $exportedCount caches, ${results.size - exportedCount} unchanged.")
+            }
+
+            0
+        } catch (e: CacheArchiveException) {
+            errorConsole.println(Text.red("Could not export caches: ${e.message}"))
+            -1
+        } catch (e: DockerClientException) {
+            errorConsole.println(Text.red("Could not export caches: ${e.message}"))
+            -1
+        }
+    }
+}
@@ -0,0 +1,33 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.cli.commands
+
+import batect.cli.CommandLineOptions
+import batect.execution.DeferredCleanupRunner
+import org.kodein.di.instance
+
+// This command is run by a background process started by DeferredCleanupScheduler, not by users directly.
+class FinishDeferredCleanupCommand(
+    private val dockerConnectivity: DockerConnectivity,
+    private val commandLineOptions: CommandLineOptions,
+) : Command {
+    override fun run(): Int = dockerConnectivity.checkAndRun { kodein ->
+        kodein.instance<DeferredCleanupRunner>().finish(commandLineOptions.deferredCleanupToFinish!!)
+
+        0
+    }
+}
@@ -19,12 +19,20 @@ package batect.cli.commands
 import batect.cli.CommandLineOptions
 import batect.config.RawConfiguration
 import batect.config.io.ConfigurationLoader
+import batect.dockerclient.DockerClientException
+import batect.execution.CacheArchiveException
+import batect.execution.CacheArchiver
+import batect.execution.DeferredCleanupRunner
 import batect.execution.SessionRunner
 import batect.ioc.SessionKodeinFactory
+import batect.ui.Console
 import batect.ui.OutputStyle
+import batect.ui.text.Text
 import batect.updates.UpdateNotifier
+import kotlinx.coroutines.runBlocking
 import org.kodein.di.DirectDI
 import org.kodein.di.instance
+import java.nio.file.Path
 
 class RunTaskCommand(
     private val commandLineOptions: CommandLineOptions,
@@ -32,6 +40,7 @@ class RunTaskCommand(
     private val updateNotifier: UpdateNotifier,
     private val backgroundTaskManager: BackgroundTaskManager,
     private val dockerConnectivity: DockerConnectivity,
+    private val console: Console,
 ) : Command {
     override fun run(): Int {
         val config = configLoader.loadConfig(commandLineOptions.configurationFileName).configuration
@@ -52,10 +61,37 @@ class RunTaskCommand(
     }
 
     private fun runFromConfig(kodein: DirectDI, config: RawConfiguration): Int {
+        // Finish cleaning up after any previous tasks whose background cleanup did not finish.
+        kodein.instance<DeferredCleanupRunner>().finishAllPendingInBackground()
+
+        if (commandLineOptions.restoreCachesDirectory != null) {
+            restoreCaches(kodein.instance(), commandLineOptions.restoreCachesDirectory)
+        }
+
         val sessionKodeinFactory = kodein.instance<SessionKodeinFactory>()
         val sessionKodein = sessionKodeinFactory.create(config)
         val sessionRunner = sessionKodein.instance<SessionRunner>()
 
         return sessionRunner.runTaskAndPrerequisites(commandLineOptions.taskName!!)
     }
+
+    private fun restoreCaches(cacheArchiver: CacheArchiver, archiveDirectory: Path) {
+        val showProgress = commandLineOptions.requestedOutputStyle != OutputStyle.Quiet
+
+        if (showProgress) {
+            console.println("Restoring caches from '$archiveDirectory'...")
+        }
+
+        try {
+            val results = runBlocking { cacheArchiver.restore(archiveDirectory) }
+
+            if (showProgress) {
+                results.forEach { console.println(it.toHumanReadableString()) }
+            }
+        } catch (e: CacheArchiveException) {
+            console.println(Text.yellow("Could not restore caches, continuing without them: ${e.message}"))
+        } catch (e: DockerClientException) {
+            console.println(Text.yellow("Could not restore caches, continuing without them: ${e.message}"))
+        }
+    }
 }
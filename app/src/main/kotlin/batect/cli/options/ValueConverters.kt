@@ -51,6 +51,20 @@ object ValueConverters {
         }
     }
 
+    val nonNegativeInteger: ValueConverter<Int> = ValueConverter { value ->
+        try {
+            val parsedValue = Integer.parseInt(value)
+
+            if (parsedValue < 0) {
+                ValueConversionResult.ConversionFailed("Value must not be negative.")
+            } else {
+                ValueConversionResult.ConversionSucceeded(parsedValue)
+            }
+        } catch (_: NumberFormatException) {
+            ValueConversionResult.ConversionFailed("Value is not a valid integer.")
+        }
+    }
+
     inline fun <reified T : Enum<T>> enum(): ValueConverter<T> {
         val valueMap = enumValues<T>().associateBy { it.name.lowercase(Locale.ROOT) }
 
@@ -65,6 +65,7 @@ data class Container(
     val logOptions: Map<String, String> = emptyMap(),
     val shmSize: BinarySize? = null,
     val labels: Map<String, String> = emptyMap(),
+    val readinessCheckConfig: ReadinessCheckConfig? = null,
 ) {
     @OptIn(ExperimentalSerializationApi::class)
     companion object : KSerializer<Container> {
@@ -99,6 +100,7 @@ data class Container(
         private const val imagePullPolicyFieldName = "image_pull_policy"
         private const val shmSizeFieldName = "shm_size"
         private const val labelsFieldName = "labels"
+        private const val readinessCheckConfigFieldName = "readiness_check"
 
         override val descriptor: SerialDescriptor = buildClassSerialDescriptor("Container") {
             element(buildDirectoryFieldName, Expression.serializer().descriptor, isOptional = true)
@@ -130,6 +132,7 @@ data class Container(
             element(imagePullPolicyFieldName, ImagePullPolicy.serializer().descriptor, isOptional = true)
             element(shmSizeFieldName, BinarySize.serializer().descriptor, isOptional = true)
             element(labelsFieldName, MapSerializer(String.serializer(), String.serializer()).descriptor, isOptional = true)
+            element(readinessCheckConfigFieldName, ReadinessCheckConfig.serializer().descriptor, isOptional = true)
         }
 
         private val buildDirectoryFieldIndex = descriptor.getElementIndex(buildDirectoryFieldName)
@@ -161,6 +164,7 @@ data class Container(
         private val imagePullPolicyFieldIndex = descriptor.getElementIndex(imagePullPolicyFieldName)
         private val shmSizeFieldIndex = descriptor.getElementIndex(shmSizeFieldName)
         private val labelsFieldIndex = descriptor.getElementIndex(labelsFieldName)
+        private val readinessCheckConfigFieldIndex = descriptor.getElementIndex(readinessCheckConfigFieldName)
 
         override fun deserialize(decoder: Decoder): Container {
             val input = decoder.beginStructure(descriptor) as YamlInput
@@ -198,6 +202,8 @@ data class Container(
             var imagePullPolicy = ImagePullPolicy.IfNotPresent
             var shmSize: BinarySize? = null
             var labels = emptyMap<String, String>()
+            var readinessCheckConfig: ReadinessCheckConfig? = null
+            var readinessCheckConfigPath: YamlPath? = null
 
             loop@ while (true) {
                 when (val i = input.decodeElementIndex(descriptor)) {
@@ -238,11 +244,20 @@ data class Container(
                     imagePullPolicyFieldIndex -> imagePullPolicy = input.decodeSerializableElement(descriptor, i, ImagePullPolicy.serializer())
                     shmSizeFieldIndex -> shmSize = input.decodeSerializableElement(descriptor, i, BinarySize.serializer())
                     labelsFieldIndex -> labels = input.decodeSerializableElement(descriptor, i, MapSerializer(String.serializer(), String.serializer()))
+                    readinessCheckConfigFieldIndex -> {
+                        val path = input.getCurrentPath()
+                        readinessCheckConfig = decodeReadinessCheckConfig(input, i, path)
+                        readinessCheckConfigPath = path
+                    }
 
                     else -> throw SerializationException("Unknown index $i")
                 }
             }
 
+            if (readinessCheckConfig != null) {
+                checkReadinessCheckPortIsPublished(readinessCheckConfig, portMappings, readinessCheckConfigPath!!)
+            }
+
             return Container(
                 "UNNAMED-FROM-CONFIG-FILE",
                 resolveImageSource(input, buildDirectory, buildArgs, buildTarget, dockerfilePath, buildSSHAgents, buildSecrets, imageName, imagePullPolicy, input.node.path),
@@ -267,6 +282,7 @@ data class Container(
                 logOptions,
                 shmSize,
                 labels,
+                readinessCheckConfig,
             )
         }
 
@@ -329,6 +345,23 @@ data class Container(
             }
         }
 
+        private fun decodeReadinessCheckConfig(input: YamlInput, index: Int, path: YamlPath): ReadinessCheckConfig {
+            try {
+                return input.decodeSerializableElement(descriptor, index, ReadinessCheckConfig.serializer())
+            } catch (e: InvalidReadinessCheckConfigException) {
+                throw ConfigurationException(e.message!!, path, e)
+            }
+        }
+
+        // Readiness checks are run from the host against the port published for the container, so the port must be published.
+        private fun checkReadinessCheckPortIsPublished(config: ReadinessCheckConfig, portMappings: Set<PortMapping>, path: YamlPath) {
+            val isPublished = portMappings.any { it.protocol.equals(PortMapping.defaultProtocol, ignoreCase = true) && config.port in it.container.ports }
+
+            if (!isPublished) {
+                throw ConfigurationException("The readiness check uses port ${config.port}, but that port is not published. Add a TCP port mapping for port ${config.port} to 'ports'.", path)
+            }
+        }
+
         private fun checkForDuplicateSSHAgents(buildSSHAgents: Iterable<SSHAgent>?, path: YamlPath) {
             if (buildSSHAgents == null) {
                 return
@@ -381,6 +414,7 @@ data class Container(
             output.encodeStringElement(descriptor, logDriverFieldIndex, value.logDriver)
             output.encodeSerializableElement(descriptor, logOptionsFieldIndex, MapSerializer(String.serializer(), String.serializer()), value.logOptions)
             output.encodeSerializableElement(descriptor, shmSizeFieldIndex, BinarySize.serializer().nullable, value.shmSize)
+            output.encodeSerializableElement(descriptor, readinessCheckConfigFieldIndex, ReadinessCheckConfig.serializer().nullable, value.readinessCheckConfig)
 
             output.endStructure(descriptor)
         }
@@ -21,4 +21,16 @@ import batect.os.HostEnvironmentVariables
 data class ExpressionEvaluationContext(
     val hostEnvironmentVariables: HostEnvironmentVariables,
     val configVariables: Map<String, String?>,
-)
+) {
+    // Host environment variables and config variables don't change once the context has been created, so the result of
+    // evaluating an expression in this context never changes either.
+    private val evaluatedExpressions = MemoisationCache<Expression, String>()
+
+    fun evaluate(expression: Expression): String = when (expression) {
+        is LiteralValue -> expression.value
+        else -> evaluatedExpressions.getOrCompute(expression) { expression.evaluate(this) }
+    }
+
+    val evaluationStatistics: MemoisationStatistics
+        get() = evaluatedExpressions.statistics
+}
@@ -0,0 +1,67 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.config
+
+import kotlinx.serialization.Serializable
+import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.atomic.AtomicLong
+
+// Remembers the result of a computation for each key, along with how long the computation took, so that we can report how
+// much time was saved by reusing results.
+// Failed computations are not cached.
+class MemoisationCache<K : Any, V : Any>(private val timeSource: () -> Long = System::nanoTime) {
+    private val entries = ConcurrentHashMap<K, Entry<V>>()
+    private val hits = AtomicLong()
+    private val misses = AtomicLong()
+    private val timeSavedNanoseconds = AtomicLong()
+
+    fun getOrCompute(key: K, onHit: (V) -> Unit = {}, compute: () -> V): V {
+        val existing = entries[key]
+
+        if (existing != null) {
+            hits.incrementAndGet()
+            timeSavedNanoseconds.addAndGet(existing.computationDurationNanoseconds)
+            onHit(existing.value)
+
+            return existing.value
+        }
+
+        val startTime = timeSource()
+        val value = compute()
+        val duration = timeSource() - startTime
+
+        misses.incrementAndGet()
+
+        return entries.putIfAbsent(key, Entry(value, duration))?.value ?: value
+    }
+
+    val statistics: MemoisationStatistics
+        get() = MemoisationStatistics(hits.get(), misses.get(), timeSavedNanoseconds.get() / nanosecondsPerMicrosecond)
+
+    private data class Entry<V>(val value: V, val computationDurationNanoseconds: Long)
+
+    companion object {
+        private const val nanosecondsPerMicrosecond = 1000
+    }
+}
+
+@Serializable
+data class MemoisationStatistics(
+    val hits: Long,
+    val misses: Long,
+    val timeSavedMicroseconds: Long,
+)
@@ -24,4 +24,5 @@ data class ProjectPaths(
     val projectRootDirectory: Path by lazy { configurationFileName.toAbsolutePath().parent }
     val batectDirectory: Path by lazy { projectRootDirectory.resolve(".batect") }
     val cacheDirectory: Path by lazy { batectDirectory.resolve("caches") }
+    val deferredCleanupDirectory: Path by lazy { batectDirectory.resolve("deferred-cleanup") }
 }
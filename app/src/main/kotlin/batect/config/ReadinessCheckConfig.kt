@@ -0,0 +1,78 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.config
+
+import batect.config.io.deserializers.DurationSerializer
+import kotlinx.serialization.SerialName
+import kotlinx.serialization.Serializable
+import kotlin.time.Duration
+import kotlin.time.Duration.Companion.milliseconds
+import kotlin.time.Duration.Companion.minutes
+import kotlin.time.Duration.Companion.seconds
+
+@Serializable
+data class ReadinessCheckConfig(
+    val type: ReadinessCheckType,
+
+    val port: Int,
+
+    val path: String = "/",
+
+    @SerialName("initial_interval")
+    @Serializable(with = DurationSerializer::class)
+    val initialInterval: Duration = 100.milliseconds,
+
+    @SerialName("max_interval")
+    @Serializable(with = DurationSerializer::class)
+    val maximumInterval: Duration = 2.seconds,
+
+    @Serializable(with = DurationSerializer::class)
+    val timeout: Duration = 1.minutes,
+) {
+    init {
+        if (port !in 1..65535) {
+            throw InvalidReadinessCheckConfigException("Port $port is not a valid port number. It must be between 1 and 65535.")
+        }
+
+        if (!initialInterval.isPositive()) {
+            throw InvalidReadinessCheckConfigException("The initial interval must be greater than zero.")
+        }
+
+        if (!maximumInterval.isPositive()) {
+            throw InvalidReadinessCheckConfigException("The maximum interval must be greater than zero.")
+        }
+
+        if (initialInterval > maximumInterval) {
+            throw InvalidReadinessCheckConfigException("The initial interval ($initialInterval) must not be greater than the maximum interval ($maximumInterval).")
+        }
+
+        if (!timeout.isPositive()) {
+            throw InvalidReadinessCheckConfigException("The timeout must be greater than zero.")
+        }
+    }
+}
+
+@Serializable
+enum class ReadinessCheckType {
+    @SerialName("tcp")
+    Tcp,
+
+    @SerialName("http")
+    Http,
+}
+
+class InvalidReadinessCheckConfigException(message: String) : RuntimeException(message)
@@ -27,23 +27,48 @@ class TaskSpecialisedConfigurationFactory(
     private val commandLineOptions: CommandLineOptions,
     private val logger: Logger,
 ) {
-    fun create(task: Task): TaskSpecialisedConfiguration {
+    // Image overrides come from the command line, so they're the same for every task in the session and are applied once.
+    // Tasks that don't change any containers share the resulting map.
+    private val containersWithImageOverrides: ContainerMap by lazy {
         val overrides = commandLineOptions.imageOverrides.mapValues { PullImage(it.value) }
-        val updatedContainers = rawConfiguration.containers
-            .applyImageOverrides(overrides)
+
+        rawConfiguration.containers.applyImageOverrides(overrides)
+    }
+
+    private val cache = MemoisationCache<Task, TaskSpecialisedConfiguration>()
+
+    fun create(task: Task): TaskSpecialisedConfiguration = cache.getOrCompute(task, onHit = { logCacheHit(task) }) { createUncached(task) }
+
+    private fun createUncached(task: Task): TaskSpecialisedConfiguration {
+        val updatedContainers = containersWithImageOverrides
             .applyMainTaskContainerOverrides(task)
             .applyDependencyCustomisations(task)
 
         val taskSpecialisedConfiguration = TaskSpecialisedConfiguration(rawConfiguration.projectName, rawConfiguration.tasks, updatedContainers, rawConfiguration.configVariables)
 
-        logger.info {
-            message("Created task-specialised configuration.")
-            data("config", taskSpecialisedConfiguration, TaskSpecialisedConfiguration.serializer())
+        if (updatedContainers === containersWithImageOverrides) {
+            logger.info {
+                message("Created task-specialised configuration, task does not change any containers.")
+                data("taskName", task.name)
+            }
+        } else {
+            logger.info {
+                message("Created task-specialised configuration.")
+                data("config", taskSpecialisedConfiguration, TaskSpecialisedConfiguration.serializer())
+            }
         }
 
         return taskSpecialisedConfiguration
     }
 
+    private fun logCacheHit(task: Task) {
+        logger.info {
+            message("Reusing previously created task-specialised configuration.")
+            data("taskName", task.name)
+            data("cacheStatistics", cache.statistics, MemoisationStatistics.serializer())
+        }
+    }
+
     private fun ContainerMap.applyImageOverrides(overrides: Map<String, ImageSource>): ContainerMap =
         applyChanges(overrides, "override image for container") { container, override ->
             container.copy(imageSource = override)
@@ -64,7 +89,7 @@ class TaskSpecialisedConfigurationFactory(
             portMappings = originalContainer.portMappings + task.runConfiguration.additionalPortMappings,
         )
 
-        return ContainerMap(values - originalContainer + updatedContainer)
+        return withReplacements(listOf(updatedContainer))
     }
 
     private fun resolveCommandForMainContainer(container: Container, task: Task): Command? {
@@ -97,15 +122,27 @@ class TaskSpecialisedConfigurationFactory(
     }
 
     private fun <C> ContainerMap.applyChanges(source: Map<String, C>, changeDescription: String, generator: (Container, C) -> Container): ContainerMap {
-        val updatedValues = source.entries.fold(values) { updatedContainers, change ->
-            val containerName = change.key
+        val updatedContainers = source.map { (containerName, change) ->
             val oldContainer = this[containerName] ?: throw ConfigurationException("Cannot $changeDescription '$containerName' because there is no container named '$containerName' defined.")
-            val newContainer = generator(oldContainer, change.value)
 
-            updatedContainers - oldContainer + newContainer
+            generator(oldContainer, change)
+        }
+
+        return withReplacements(updatedContainers)
+    }
+
+    // Returns this map as-is if no container actually changes, and otherwise builds the new map in a single pass rather than copying it for each replacement.
+    private fun ContainerMap.withReplacements(replacements: Collection<Container>): ContainerMap {
+        val changedContainers = replacements.filter { this[it.name] != it }
+
+        if (changedContainers.isEmpty()) {
+            return this
         }
 
-        return ContainerMap(updatedValues)
+        val updatedContainers = LinkedHashMap<String, Container>(this)
+        changedContainers.forEach { updatedContainers[it.name] = it }
+
+        return ContainerMap(updatedContainers.values)
     }
 }
 
@@ -64,4 +64,14 @@ sealed class ActiveImageBuildStep {
             return "$name: ${humanReadableStringForDownloadProgress(operation, completedBytes, totalBytes)}"
         }
     }
+
+    @Serializable
+    @SerialName("UploadingBuildContext")
+    data class UploadingBuildContext(
+        override val stepIndex: Long,
+        override val name: String,
+        val bytesUploaded: Long,
+    ) : ActiveImageBuildStep() {
+        override fun toHumanReadableString(): String = "$name: ${humaniseBytes(bytesUploaded)} uploaded"
+    }
 }
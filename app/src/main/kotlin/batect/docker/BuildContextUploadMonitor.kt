@@ -0,0 +1,57 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.docker
+
+import batect.dockerclient.ImageBuildContextUploadProgress
+import batect.dockerclient.ImageBuildProgressUpdate
+import batect.dockerclient.StepContextUploadProgress
+import java.time.Duration
+
+// Measures how large the build context for an image build was, and how long it took to send it to the daemon.
+// Create one immediately before starting the build, as the upload starts as soon as the build is requested.
+//
+// BuildKit may upload context for more than one step, so we track the largest value reported for each step and sum them.
+class BuildContextUploadMonitor(private val timeSource: () -> Long = System::nanoTime) {
+    private val startTime = timeSource()
+    private val bytesUploadedByStep = mutableMapOf<Long?, Long>()
+    private var lastUpdateTime: Long? = null
+
+    fun processProgressUpdate(progressUpdate: ImageBuildProgressUpdate) {
+        when (progressUpdate) {
+            is ImageBuildContextUploadProgress -> onUploadProgress(null, progressUpdate.bytesUploaded)
+            is StepContextUploadProgress -> onUploadProgress(progressUpdate.stepNumber, progressUpdate.bytesUploaded)
+            else -> {}
+        }
+    }
+
+    private fun onUploadProgress(stepNumber: Long?, bytesUploaded: Long) {
+        lastUpdateTime = timeSource()
+        bytesUploadedByStep.merge(stepNumber, bytesUploaded) { previous, current -> maxOf(previous, current) }
+    }
+
+    val statistics: BuildContextUploadStatistics?
+        get() {
+            val last = lastUpdateTime ?: return null
+
+            return BuildContextUploadStatistics(bytesUploadedByStep.values.sum(), Duration.ofNanos(last - startTime))
+        }
+}
+
+data class BuildContextUploadStatistics(val bytesUploaded: Long, val duration: Duration) {
+    val bytesPerSecond: Long?
+        get() = if (duration.isZero) null else (bytesUploaded * 1_000_000_000.0 / duration.toNanos()).toLong()
+}
@@ -0,0 +1,114 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.docker
+
+import kotlinx.serialization.Serializable
+import java.util.concurrent.ConcurrentHashMap
+import kotlin.math.ceil
+
+class DockerApiMetrics {
+    private val operations = ConcurrentHashMap<String, OperationMetrics>()
+
+    fun record(operation: String, durationNanoseconds: Long, succeeded: Boolean, bytesTransferred: Long = 0) {
+        operations.computeIfAbsent(operation) { OperationMetrics() }.record(durationNanoseconds, succeeded, bytesTransferred)
+    }
+
+    val summary: List<DockerApiOperationSummary>
+        get() = operations.entries
+            .map { (operation, metrics) -> metrics.summarise(operation) }
+            .sortedBy { it.operation }
+
+    private class OperationMetrics {
+        private var calls = 0L
+        private var failures = 0L
+        private var bytesTransferred = 0L
+        private var totalDurationNanoseconds = 0L
+        private var maximumDurationNanoseconds = 0L
+        private val bucketCounts = LongArray(latencyBucketUpperBoundsMilliseconds.size + 1)
+
+        @Synchronized
+        fun record(durationNanoseconds: Long, succeeded: Boolean, bytes: Long) {
+            calls++
+            bytesTransferred += bytes
+            totalDurationNanoseconds += durationNanoseconds
+            maximumDurationNanoseconds = maxOf(maximumDurationNanoseconds, durationNanoseconds)
+
+            if (!succeeded) {
+                failures++
+            }
+
+            bucketCounts[bucketIndexFor(durationNanoseconds)]++
+        }
+
+        @Synchronized
+        fun summarise(operation: String): DockerApiOperationSummary = DockerApiOperationSummary(
+            operation,
+            calls,
+            failures,
+            bytesTransferred,
+            totalDurationNanoseconds / nanosecondsPerMillisecond,
+            maximumDurationNanoseconds / nanosecondsPerMillisecond,
+            estimatePercentile(0.5),
+            estimatePercentile(0.95),
+            bucketCounts.toList(),
+        )
+
+        private fun bucketIndexFor(durationNanoseconds: Long): Int {
+            val durationMilliseconds = durationNanoseconds / nanosecondsPerMillisecond
+            val index = latencyBucketUpperBoundsMilliseconds.indexOfFirst { durationMilliseconds <= it }
+
+            return if (index == -1) latencyBucketUpperBoundsMilliseconds.size else index
+        }
+
+        // Reports the upper bound of the bucket containing the percentile, or the slowest call if the percentile falls in the overflow bucket.
+        private fun estimatePercentile(percentile: Double): Long {
+            val target = ceil(calls * percentile).toLong().coerceAtLeast(1)
+            var seen = 0L
+
+            bucketCounts.forEachIndexed { index, count ->
+                seen += count
+
+                if (seen >= target) {
+                    return latencyBucketUpperBoundsMilliseconds.getOrNull(index) ?: (maximumDurationNanoseconds / nanosecondsPerMillisecond)
+                }
+            }
+
+            return maximumDurationNanoseconds / nanosecondsPerMillisecond
+        }
+    }
+
+    companion object {
+        val latencyBucketUpperBoundsMilliseconds: List<Long> = listOf(1, 2, 5, 10, 25, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 30_000, 60_000)
+
+        private const val nanosecondsPerMillisecond = 1_000_000L
+    }
+}
+
+// bucketCounts has one entry per bound in DockerApiMetrics.latencyBucketUpperBoundsMilliseconds (calls taking at most that long, but
+// longer than the previous bound), followed by the number of calls slower than the last bound.
+@Serializable
+data class DockerApiOperationSummary(
+    val operation: String,
+    val calls: Long,
+    val failures: Long,
+    val bytesTransferred: Long,
+    val totalDurationMilliseconds: Long,
+    val maximumDurationMilliseconds: Long,
+    val estimatedMedianDurationMilliseconds: Long,
+    val estimated95thPercentileDurationMilliseconds: Long,
+    val bucketCounts: List<Long>,
+)
@@ -16,12 +16,24 @@
 
 package batect.docker
 
+import batect.cli.CommandLineOptions
 import batect.dockerclient.DockerClient
+import batect.telemetry.TelemetryConsent
 
 class DockerClientFactory(
     private val dockerClientConfigurationFactory: DockerClientConfigurationFactory,
+    private val commandLineOptions: CommandLineOptions,
+    private val telemetryConsent: TelemetryConsent,
+    private val metrics: DockerApiMetrics,
 ) {
     fun create(): DockerClient {
-        return DockerClient.create(dockerClientConfigurationFactory.createConfiguration())
+        val client = DockerClient.create(dockerClientConfigurationFactory.createConfiguration())
+
+        // The metrics are only ever reported to the log file or with telemetry, so don't pay for collecting them if neither is in use.
+        if (commandLineOptions.logFileName == null && !telemetryConsent.telemetryAllowed) {
+            return client
+        }
+
+        return InstrumentedDockerClient(client, metrics)
     }
 }
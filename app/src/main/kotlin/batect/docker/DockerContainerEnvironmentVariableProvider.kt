@@ -58,7 +58,7 @@ class DockerContainerEnvironmentVariableProvider(
 
     private fun evaluateEnvironmentVariableValue(name: String, expression: Expression): String {
         try {
-            return expression.evaluate(expressionEvaluationContext)
+            return expressionEvaluationContext.evaluate(expression)
         } catch (e: ExpressionEvaluationException) {
             throw ExpressionEvaluationException("The value for the environment variable '$name' cannot be evaluated: ${e.message}", e)
         }
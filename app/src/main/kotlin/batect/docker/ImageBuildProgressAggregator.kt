@@ -30,14 +30,15 @@ import batect.primitives.mapToSet
 
 class ImageBuildProgressAggregator {
     private val activeSteps = mutableMapOf<Long, StepState>()
+    private var buildContextBytesUploaded: Long? = null
 
     fun processProgressUpdate(progressUpdate: ImageBuildProgressUpdate): AggregatedImageBuildProgress? {
         return when (progressUpdate) {
             is StepOutput -> null
             is BuildComplete -> null
             is BuildFailed -> null
-            is ImageBuildContextUploadProgress -> null // TODO: add support for reporting build context upload progress
-            is StepContextUploadProgress -> null // TODO: add support for reporting build context upload progress
+            is ImageBuildContextUploadProgress -> processBuildContextUploadProgress(progressUpdate)
+            is StepContextUploadProgress -> processStepContextUploadProgress(progressUpdate)
             is StepStarting -> processStepStarting(progressUpdate)
             is StepFinished -> processStepFinished(progressUpdate)
             is StepDownloadProgressUpdate -> processStepDownloadProgressUpdate(progressUpdate)
@@ -45,7 +46,23 @@ class ImageBuildProgressAggregator {
         }
     }
 
+    // The legacy builder uploads the entire build context before any steps start.
+    private fun processBuildContextUploadProgress(progressUpdate: ImageBuildContextUploadProgress): AggregatedImageBuildProgress {
+        buildContextBytesUploaded = progressUpdate.bytesUploaded
+
+        return calculateCurrentProgress()
+    }
+
+    // BuildKit uploads the build context as part of a step.
+    private fun processStepContextUploadProgress(progressUpdate: StepContextUploadProgress): AggregatedImageBuildProgress? {
+        val previousValue = activeSteps[progressUpdate.stepNumber] ?: return null
+        activeSteps[progressUpdate.stepNumber] = previousValue.copy(detail = StepDetail.UploadingBuildContext(progressUpdate.bytesUploaded))
+
+        return calculateCurrentProgress()
+    }
+
     private fun processStepStarting(progressUpdate: StepStarting): AggregatedImageBuildProgress {
+        buildContextBytesUploaded = null
         activeSteps[progressUpdate.stepNumber] = StepState(progressUpdate.stepNumber, progressUpdate.stepName)
 
         return calculateCurrentProgress()
@@ -81,8 +98,9 @@ class ImageBuildProgressAggregator {
 
     private fun calculateCurrentProgress(): AggregatedImageBuildProgress {
         val steps = activeSteps.values.mapToSet { it.toActiveImageBuildStep() }
+        val contextUpload = buildContextBytesUploaded?.let { ActiveImageBuildStep.UploadingBuildContext(buildContextUploadStepIndex, "build context", it) }
 
-        return AggregatedImageBuildProgress(steps)
+        return AggregatedImageBuildProgress(if (contextUpload == null) steps else steps + contextUpload)
     }
 
     private data class StepState(val stepNumber: Long, val name: String, val detail: StepDetail? = null) {
@@ -91,6 +109,7 @@ class ImageBuildProgressAggregator {
                 null -> ActiveImageBuildStep.NotDownloading(stepNumber, name)
                 is StepDetail.Downloading -> ActiveImageBuildStep.Downloading(stepNumber, name, DownloadOperation.Downloading, detail.completedBytes, detail.totalBytes)
                 is StepDetail.PullingImage -> ActiveImageBuildStep.Downloading(stepNumber, name, detail.operation, detail.completedBytes, detail.totalBytes)
+                is StepDetail.UploadingBuildContext -> ActiveImageBuildStep.UploadingBuildContext(stepNumber, name, detail.bytesUploaded)
             }
         }
     }
@@ -98,5 +117,11 @@ class ImageBuildProgressAggregator {
     private sealed class StepDetail {
         data class Downloading(val completedBytes: Long, val totalBytes: Long?) : StepDetail()
         class PullingImage(val operation: DownloadOperation, val completedBytes: Long, val totalBytes: Long, val aggregator: ImagePullProgressAggregator) : StepDetail()
+        data class UploadingBuildContext(val bytesUploaded: Long) : StepDetail()
+    }
+
+    companion object {
+        // Sorts before all real steps, so that the upload is what is shown while it is in progress.
+        private const val buildContextUploadStepIndex = -1L
     }
 }
@@ -0,0 +1,152 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.docker
+
+import batect.dockerclient.ContainerCreationSpec
+import batect.dockerclient.ContainerExecInspectionResult
+import batect.dockerclient.ContainerExecReference
+import batect.dockerclient.ContainerExecSpec
+import batect.dockerclient.ContainerInspectionResult
+import batect.dockerclient.ContainerReference
+import batect.dockerclient.DaemonVersionInformation
+import batect.dockerclient.DockerClient
+import batect.dockerclient.EventHandler
+import batect.dockerclient.ImageBuildProgressReceiver
+import batect.dockerclient.ImageBuildSpec
+import batect.dockerclient.ImagePullProgressReceiver
+import batect.dockerclient.ImageReference
+import batect.dockerclient.NetworkReference
+import batect.dockerclient.PingResponse
+import batect.dockerclient.ReadyNotification
+import batect.dockerclient.VolumeReference
+import batect.dockerclient.io.SinkTextOutput
+import batect.dockerclient.io.TextInput
+import batect.dockerclient.io.TextOutput
+import kotlinx.datetime.Instant
+import okio.Buffer
+import okio.ForwardingSink
+import okio.Sink
+import kotlin.time.Duration
+
+// Records the number of calls, failures, latency and (where it can be observed cheaply) bytes transferred for each Docker API
+// operation Batect uses. For streaming operations such as run, buildImage and pullImage, the recorded latency is the duration of
+// the whole stream.
+// Anything not overridden here is passed straight through to the underlying client without being recorded.
+class InstrumentedDockerClient(
+    private val delegate: DockerClient,
+    private val metrics: DockerApiMetrics,
+) : DockerClient by delegate {
+    override suspend fun ping(): PingResponse = instrument("ping") { delegate.ping() }
+    override suspend fun getDaemonVersionInformation(): DaemonVersionInformation = instrument("getDaemonVersionInformation") { delegate.getDaemonVersionInformation() }
+
+    override suspend fun listAllVolumes(): Set<VolumeReference> = instrument("listAllVolumes") { delegate.listAllVolumes() }
+    override suspend fun deleteVolume(volume: VolumeReference) = instrument("deleteVolume") { delegate.deleteVolume(volume) }
+
+    override suspend fun createNetwork(name: String, driver: String): NetworkReference = instrument("createNetwork") { delegate.createNetwork(name, driver) }
+    override suspend fun deleteNetwork(network: NetworkReference) = instrument("deleteNetwork") { delegate.deleteNetwork(network) }
+    override suspend fun getNetworkByNameOrID(searchFor: String): NetworkReference? = instrument("getNetworkByNameOrID") { delegate.getNetworkByNameOrID(searchFor) }
+
+    override suspend fun getImage(name: String): ImageReference? = instrument("getImage") { delegate.getImage(name) }
+
+    override suspend fun pullImage(name: String, onProgressUpdate: ImagePullProgressReceiver): ImageReference {
+        val downloadedBytesPerLayer = mutableMapOf<String, Long>()
+
+        return instrument("pullImage", { downloadedBytesPerLayer.values.sum() }) {
+            delegate.pullImage(name) { update ->
+                val downloadedBytes = update.detail?.current
+
+                if (downloadedBytes != null && update.message.equals("downloading", ignoreCase = true)) {
+                    downloadedBytesPerLayer.merge(update.id, downloadedBytes, ::maxOf)
+                }
+
+                onProgressUpdate(update)
+            }
+        }
+    }
+
+    override suspend fun buildImage(spec: ImageBuildSpec, output: TextOutput, onProgressUpdate: ImageBuildProgressReceiver): ImageReference {
+        val countingOutput = output.counting()
+
+        return instrument("buildImage", { countingOutput.bytesWritten }) { delegate.buildImage(spec, countingOutput.output, onProgressUpdate) }
+    }
+
+    override suspend fun createContainer(spec: ContainerCreationSpec): ContainerReference = instrument("createContainer") { delegate.createContainer(spec) }
+    override suspend fun inspectContainer(container: ContainerReference): ContainerInspectionResult = instrument("inspectContainer") { delegate.inspectContainer(container) }
+    override suspend fun stopContainer(container: ContainerReference, timeout: Duration) = instrument("stopContainer") { delegate.stopContainer(container, timeout) }
+
+    override suspend fun removeContainer(container: ContainerReference, force: Boolean, removeVolumes: Boolean) =
+        instrument("removeContainer") { delegate.removeContainer(container, force, removeVolumes) }
+
+    override suspend fun run(container: ContainerReference, stdout: TextOutput?, stderr: TextOutput?, stdin: TextInput?, startedNotification: ReadyNotification): Long {
+        val countingStdout = stdout?.counting()
+        val countingStderr = stderr?.counting()
+
+        return instrument("run", { (countingStdout?.bytesWritten ?: 0) + (countingStderr?.bytesWritten ?: 0) }) {
+            delegate.run(container, countingStdout?.output, countingStderr?.output, stdin, startedNotification)
+        }
+    }
+
+    override suspend fun streamEvents(since: Instant?, until: Instant?, filters: Map<String, Set<String>>, eventHandler: EventHandler) =
+        instrument("streamEvents") { delegate.streamEvents(since, until, filters, eventHandler) }
+
+    override suspend fun createExec(spec: ContainerExecSpec): ContainerExecReference = instrument("createExec") { delegate.createExec(spec) }
+    override suspend fun inspectExec(exec: ContainerExecReference): ContainerExecInspectionResult = instrument("inspectExec") { delegate.inspectExec(exec) }
+
+    override suspend fun startAndAttachToExec(exec: ContainerExecReference, attachTTY: Boolean, stdout: TextOutput?, stderr: TextOutput?, stdin: TextInput?) {
+        val countingStdout = stdout?.counting()
+        val countingStderr = stderr?.counting()
+
+        instrument("startAndAttachToExec", { (countingStdout?.bytesWritten ?: 0) + (countingStderr?.bytesWritten ?: 0) }) {
+            delegate.startAndAttachToExec(exec, attachTTY, countingStdout?.output, countingStderr?.output, stdin)
+        }
+    }
+
+    private inline fun <T> instrument(operation: String, noinline bytesTransferred: () -> Long = { 0 }, block: () -> T): T {
+        val startTime = System.nanoTime()
+        var succeeded = false
+
+        try {
+            val result = block()
+            succeeded = true
+            return result
+        } finally {
+            metrics.record(operation, System.nanoTime() - startTime, succeeded, bytesTransferred())
+        }
+    }
+
+    // Only outputs backed by a sink can be counted - any other kind of output is passed through untouched.
+    private fun TextOutput.counting(): CountingTextOutput = CountingTextOutput(this)
+
+    private class CountingTextOutput(original: TextOutput) {
+        private val countingSink = (original as? SinkTextOutput)?.let { CountingSink(it.sink) }
+
+        val output: TextOutput = if (countingSink == null) original else SinkTextOutput(countingSink)
+        val bytesWritten: Long
+            get() = countingSink?.bytesWritten ?: 0
+    }
+
+    private class CountingSink(delegate: Sink) : ForwardingSink(delegate) {
+        @Volatile
+        var bytesWritten: Long = 0
+            private set
+
+        override fun write(source: Buffer, byteCount: Long) {
+            super.write(source, byteCount)
+            bytesWritten += byteCount
+        }
+    }
+}
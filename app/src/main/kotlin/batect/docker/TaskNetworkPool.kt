@@ -0,0 +1,405 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.docker
+
+import batect.cli.DockerCommandLineOptions
+import batect.dockerclient.DockerCLIContext
+import batect.dockerclient.DockerClient
+import batect.dockerclient.DockerClientException
+import batect.dockerclient.NetworkReference
+import batect.io.ApplicationPaths
+import batect.logging.Logger
+import batect.utils.Json
+import kotlinx.coroutines.runBlocking
+import kotlinx.serialization.SerializationException
+import kotlinx.serialization.Serializable
+import okio.ByteString.Companion.encodeUtf8
+import java.io.IOException
+import java.nio.channels.FileChannel
+import java.nio.channels.FileLock
+import java.nio.channels.OverlappingFileLockException
+import java.nio.file.Files
+import java.nio.file.Path
+import java.nio.file.StandardOpenOption
+import java.time.Duration
+import java.time.Instant
+import kotlin.streams.toList
+
+// A pool of pre-created task networks (enabled with --network-pool-size) that tasks lease instead of creating and deleting a
+// network each time.
+//
+// Each slot in the pool is a network with a well-known name, a lock file and a state file in Batect's local storage directory.
+// Network names and local state are namespaced by the Docker daemon in use, so pools for different daemons don't interfere.
+// A process holds the lock on a slot's lock file for as long as it has the network leased, so leases are exclusive across
+// all Batect processes on this machine, and are released by the operating system if the process dies.
+//
+// The daemon may be shared with other machines, whose locks we can't see. So a network is only ever reused, deleted or
+// recreated if this machine's state for the slot records that we created it. A pool network we have no record of belongs to
+// someone else and its slot is skipped, and failing to create a network because its name is already taken is treated the same
+// way.
+//
+// The state for a slot is written before its network is created, so that if we crash before recording the new network's ID (or
+// the state can't be read), the network is still recognised as ours: it is deleted and recreated on the next lease rather than
+// being skipped (and leaked) forever.
+//
+// A network is only marked as available again once the task has removed all of its containers from it. If a previous holder
+// on this machine didn't return a network (eg. because it crashed or cleanup was disabled), the network is deleted and
+// recreated before it is used again, and the slot is skipped if that fails because containers are still attached.
+//
+// Networks that haven't been used for longer than the idle timeout are deleted when another network is returned.
+class TaskNetworkPool(
+    private val poolSize: Int?,
+    applicationPaths: ApplicationPaths,
+    dockerOptions: DockerCommandLineOptions,
+    private val client: DockerClient,
+    private val containerType: DockerContainerType,
+    private val logger: Logger,
+    private val idleTimeout: Duration = Duration.ofHours(1),
+    private val timeSource: () -> Instant = Instant::now,
+) {
+    private val daemonKey = daemonKeyFor(dockerOptions)
+    private val poolDirectory = applicationPaths.rootLocalStorageDirectory.resolve("network-pool").resolve(daemonKey).toAbsolutePath()
+    private val leases = mutableMapOf<String, Lease>()
+
+    // Returns null if the pool is disabled or every network in it is in use, in which case the caller should create its own network.
+    @Synchronized
+    fun lease(): NetworkReference? {
+        if (poolSize == null) {
+            return null
+        }
+
+        try {
+            Files.createDirectories(poolDirectory)
+
+            (0 until poolSize).forEach { index ->
+                val network = tryToLease(PoolSlot(index))
+
+                if (network != null) {
+                    return network
+                }
+            }
+        } catch (e: IOException) {
+            logger.warn {
+                message("Could not lease network from task network pool.")
+                exception(e)
+            }
+
+            return null
+        } catch (e: DockerClientException) {
+            logger.warn {
+                message("Could not lease network from task network pool.")
+                exception(e)
+            }
+
+            return null
+        }
+
+        logger.info {
+            message("All networks in the task network pool are in use.")
+            data("poolSize", poolSize)
+        }
+
+        return null
+    }
+
+    private fun tryToLease(slot: PoolSlot): NetworkReference? {
+        if (leases.values.any { it.slot.networkName == slot.networkName }) {
+            return null
+        }
+
+        val channel = FileChannel.open(slot.lockPath, StandardOpenOption.CREATE, StandardOpenOption.WRITE)
+        val lock = tryLock(channel)
+
+        if (lock == null) {
+            channel.close()
+            return null
+        }
+
+        try {
+            val network = prepareNetworkFor(slot) ?: return releaseWithoutLeasing(lock, channel)
+
+            writeState(slot, PoolSlotState(network.id, leased = true, lastUsed = timeSource().toEpochMilli()))
+            leases[network.id] = Lease(slot, lock, channel)
+
+            logger.info {
+                message("Leased network from task network pool.")
+                data("networkName", slot.networkName)
+                data("networkId", network.id)
+            }
+
+            return network
+        } catch (t: Throwable) {
+            releaseWithoutLeasing(lock, channel)
+            throw t
+        }
+    }
+
+    private fun releaseWithoutLeasing(lock: FileLock, channel: FileChannel): NetworkReference? {
+        lock.release()
+        channel.close()
+
+        return null
+    }
+
+    private fun prepareNetworkFor(slot: PoolSlot): NetworkReference? {
+        val state = readState(slot)
+        val existingNetwork = runBlocking { client.getNetworkByNameOrID(slot.networkName) } ?: return tryToCreate(slot)
+
+        if (state == null || (state.networkId != null && state.networkId != existingNetwork.id)) {
+            logger.info {
+                message("Network in task network pool was not created by this machine, skipping it.")
+                data("networkName", slot.networkName)
+                data("networkId", existingNetwork.id)
+            }
+
+            return null
+        }
+
+        if (state.networkId == null) {
+            logger.info {
+                message("Network in task network pool was created by this machine but its ID was not recorded, recreating it.")
+                data("networkName", slot.networkName)
+                data("networkId", existingNetwork.id)
+            }
+        } else if (!state.leased) {
+            return existingNetwork
+        }
+
+        if (!tryToDelete(existingNetwork, slot)) {
+            return null
+        }
+
+        return tryToCreate(slot)
+    }
+
+    // The network's name acts as a lock on the daemon: if another machine creates a network with the same name first, either
+    // creating it fails, or (on daemons that allow duplicate names) the name doesn't resolve to our network.
+    private fun tryToCreate(slot: PoolSlot): NetworkReference? {
+        writeState(slot, PoolSlotState(networkId = null, leased = true, lastUsed = timeSource().toEpochMilli()))
+
+        val network = try {
+            runBlocking { client.createNetwork(slot.networkName, networkDriver) }
+        } catch (e: DockerClientException) {
+            logger.info {
+                message("Could not create network in task network pool, it may have been created by another machine.")
+                exception(e)
+                data("networkName", slot.networkName)
+            }
+
+            Files.deleteIfExists(slot.statePath)
+
+            return null
+        }
+
+        val resolvedNetwork = runBlocking { client.getNetworkByNameOrID(slot.networkName) }
+
+        if (resolvedNetwork?.id != network.id) {
+            logger.info {
+                message("Another network with the same name as the network just created exists, skipping it.")
+                data("networkName", slot.networkName)
+                data("networkId", network.id)
+            }
+
+            tryToDelete(network, slot)
+            Files.deleteIfExists(slot.statePath)
+
+            return null
+        }
+
+        return network
+    }
+
+    // Returns false if the network wasn't leased from this pool, in which case the caller should delete it as normal.
+    @Synchronized
+    fun release(network: NetworkReference): Boolean {
+        val lease = leases.remove(network.id) ?: return false
+
+        try {
+            writeState(lease.slot, PoolSlotState(network.id, leased = false, lastUsed = timeSource().toEpochMilli()))
+        } finally {
+            lease.lock.release()
+            lease.channel.close()
+        }
+
+        logger.info {
+            message("Returned network to task network pool.")
+            data("networkName", lease.slot.networkName)
+            data("networkId", network.id)
+        }
+
+        collectIdleNetworks()
+
+        return true
+    }
+
+    // Returns a network leased by a task whose cleanup was deferred, once all of the task's containers have been removed.
+    // This may happen in a different process to the one that leased the network, and without the pool being enabled.
+    //
+    // Returns false if the network can't be returned yet because the process that leased it still holds it.
+    @Synchronized
+    fun returnAfterDeferredCleanup(network: NetworkReference): Boolean {
+        if (leases.containsKey(network.id)) {
+            return false
+        }
+
+        val slot = slotWithNetwork(network) ?: return true
+
+        FileChannel.open(slot.lockPath, StandardOpenOption.CREATE, StandardOpenOption.WRITE).use { channel ->
+            val lock = tryLock(channel) ?: return false
+
+            lock.use {
+                // Check again now that we hold the lock, in case the slot was reused for another network in the meantime.
+                val state = readState(slot)
+
+                if (state != null && state.networkId == network.id && state.leased) {
+                    writeState(slot, PoolSlotState(network.id, leased = false, lastUsed = timeSource().toEpochMilli()))
+                }
+            }
+        }
+
+        logger.info {
+            message("Returned network to task network pool after deferred cleanup.")
+            data("networkName", slot.networkName)
+            data("networkId", network.id)
+        }
+
+        return true
+    }
+
+    private fun slotWithNetwork(network: NetworkReference): PoolSlot? {
+        if (!Files.isDirectory(poolDirectory)) {
+            return null
+        }
+
+        val slots = Files.list(poolDirectory).use { files ->
+            files
+                .map { it.fileName.toString() }
+                .filter { it.endsWith(".json") }
+                .map { PoolSlot(it.removeSuffix(".json")) }
+                .toList()
+        }
+
+        return slots.firstOrNull { readState(it)?.networkId == network.id }
+    }
+
+    private fun collectIdleNetworks() {
+        val size = poolSize ?: return
+        val oldestAllowedLastUse = timeSource().minus(idleTimeout).toEpochMilli()
+
+        (0 until size).map { PoolSlot(it) }.forEach { slot ->
+            val state = readState(slot)
+
+            if (state == null || state.networkId == null || state.leased || state.lastUsed >= oldestAllowedLastUse) {
+                return@forEach
+            }
+
+            FileChannel.open(slot.lockPath, StandardOpenOption.CREATE, StandardOpenOption.WRITE).use { channel ->
+                tryLock(channel)?.use {
+                    // Check again now that we hold the lock, in case another process leased the network in the meantime.
+                    val lockedState = readState(slot)
+
+                    val networkId = lockedState?.networkId
+
+                    if (lockedState != null && networkId != null && !lockedState.leased && lockedState.lastUsed < oldestAllowedLastUse && tryToDelete(NetworkReference(networkId), slot)) {
+                        Files.deleteIfExists(slot.statePath)
+
+                        logger.info {
+                            message("Deleted idle network from task network pool.")
+                            data("networkName", slot.networkName)
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    private fun tryToDelete(network: NetworkReference, slot: PoolSlot): Boolean {
+        return try {
+            runBlocking { client.deleteNetwork(network) }
+            true
+        } catch (e: DockerClientException) {
+            logger.warn {
+                message("Could not delete network in task network pool, it may still be in use.")
+                exception(e)
+                data("networkName", slot.networkName)
+            }
+
+            false
+        }
+    }
+
+    // Returns null if this machine has no record of the slot's network. State that exists but can't be read is treated as
+    // a network of ours with an unknown ID, so that it is recreated rather than skipped.
+    private fun readState(slot: PoolSlot): PoolSlotState? {
+        if (!Files.exists(slot.statePath)) {
+            return null
+        }
+
+        return try {
+            Json.default.decodeFromString(PoolSlotState.serializer(), Files.readAllBytes(slot.statePath).toString(Charsets.UTF_8))
+        } catch (e: SerializationException) {
+            logger.warn {
+                message("Could not read state for network in task network pool.")
+                exception(e)
+                data("networkName", slot.networkName)
+            }
+
+            PoolSlotState(networkId = null, leased = true, lastUsed = 0)
+        }
+    }
+
+    private fun writeState(slot: PoolSlot, state: PoolSlotState) {
+        Files.write(slot.statePath, Json.default.encodeToString(PoolSlotState.serializer(), state).toByteArray(Charsets.UTF_8))
+    }
+
+    private fun tryLock(channel: FileChannel): FileLock? = try {
+        channel.tryLock()
+    } catch (e: OverlappingFileLockException) {
+        null
+    }
+
+    private val networkDriver: String
+        get() = when (containerType) {
+            DockerContainerType.Linux -> "bridge"
+            DockerContainerType.Windows -> "nat"
+        }
+
+    private inner class PoolSlot(val networkName: String) {
+        constructor(index: Int) : this("batect-pool-$daemonKey-$index")
+
+        val lockPath: Path = poolDirectory.resolve("$networkName.lock")
+        val statePath: Path = poolDirectory.resolve("$networkName.json")
+    }
+
+    private class Lease(val slot: PoolSlot, val lock: FileLock, val channel: FileChannel)
+
+    // networkId is null while the network is being created, before its ID is known.
+    @Serializable
+    private data class PoolSlotState(val networkId: String?, val leased: Boolean, val lastUsed: Long)
+
+    companion object {
+        // The daemon doesn't expose a stable identifier, so the daemon is identified by how we connect to it.
+        fun daemonKeyFor(dockerOptions: DockerCommandLineOptions): String {
+            val connection = when (dockerOptions.contextName) {
+                DockerCLIContext.default.name -> "host:${dockerOptions.host}"
+                else -> "context:${dockerOptions.contextName}"
+            }
+
+            return connection.encodeUtf8().sha256().hex().take(8)
+        }
+    }
+}
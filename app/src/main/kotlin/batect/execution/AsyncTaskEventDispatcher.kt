@@ -0,0 +1,221 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.execution.model.events.ImageBuildProgressEvent
+import batect.execution.model.events.ImagePullProgressEvent
+import batect.execution.model.events.TaskEvent
+import batect.execution.model.events.TaskEventSink
+import batect.logging.Logger
+import kotlinx.serialization.Serializable
+import java.util.concurrent.locks.ReentrantLock
+import kotlin.concurrent.thread
+import kotlin.concurrent.withLock
+
+// Delivers events to a consumer on a dedicated thread, in the order they were posted, so that a slow consumer (eg. one
+// writing to the console) doesn't hold up the thread that posted the event.
+//
+// At most `capacity` events are buffered: once the buffer is full, posting blocks until the consumer catches up.
+// Progress events replace any earlier progress event for the same image or container that has not been delivered yet,
+// as consumers only ever care about the latest progress.
+//
+// Once closed, any remaining buffered events are delivered, and any events posted afterwards are delivered synchronously.
+class AsyncTaskEventDispatcher(
+    private val consumer: TaskEventSink,
+    private val consumerName: String,
+    private val logger: Logger,
+    private val capacity: Int = defaultCapacity,
+    private val timeSource: () -> Long = System::nanoTime,
+) : TaskEventSink, AutoCloseable {
+    private val lock = ReentrantLock()
+    private val eventAvailable = lock.newCondition()
+    private val spaceAvailable = lock.newCondition()
+    private val eventDelivered = lock.newCondition()
+
+    private val pending = ArrayDeque<PendingEvent>()
+    private val pendingProgressEvents = mutableMapOf<Any, PendingEvent>()
+    private var lastQueuedSequenceNumber = 0L
+    private var lastDeliveredSequenceNumber = 0L
+    private var closed = false
+
+    private var eventsPosted = 0L
+    private var eventsCoalesced = 0L
+    private var maximumQueueDepth = 0
+    private var totalPostDurationNanoseconds = 0L
+    private var maximumPostDurationNanoseconds = 0L
+    private var totalDeliveryDelayNanoseconds = 0L
+    private var maximumDeliveryDelayNanoseconds = 0L
+
+    private val deliveryThread = thread(isDaemon = true, name = "${AsyncTaskEventDispatcher::class.qualifiedName}-$consumerName") { deliverEvents() }
+
+    override fun postEvent(event: TaskEvent) {
+        post(event, waitForDelivery = false)
+    }
+
+    // Returns once the consumer has processed the event (and therefore every event posted before it).
+    fun postEventAndWait(event: TaskEvent) {
+        post(event, waitForDelivery = true)
+    }
+
+    private fun post(event: TaskEvent, waitForDelivery: Boolean) {
+        val startTime = timeSource()
+
+        lock.withLock {
+            if (closed) {
+                deliver(event)
+                recordPost(startTime)
+                return
+            }
+
+            eventsPosted++
+
+            val sequenceNumber = enqueue(event, startTime)
+
+            if (waitForDelivery) {
+                while (lastDeliveredSequenceNumber < sequenceNumber) {
+                    eventDelivered.await()
+                }
+            }
+
+            recordPost(startTime)
+        }
+    }
+
+    private fun enqueue(event: TaskEvent, postedAt: Long): Long {
+        val coalescingKey = coalescingKeyFor(event)
+        val existing = coalescingKey?.let { pendingProgressEvents[it] }
+
+        if (existing != null) {
+            existing.event = event
+            eventsCoalesced++
+
+            return existing.sequenceNumber
+        }
+
+        while (pending.size >= capacity) {
+            spaceAvailable.await()
+        }
+
+        val pendingEvent = PendingEvent(event, ++lastQueuedSequenceNumber, postedAt)
+        pending.addLast(pendingEvent)
+        maximumQueueDepth = maxOf(maximumQueueDepth, pending.size)
+
+        if (coalescingKey != null) {
+            pendingProgressEvents[coalescingKey] = pendingEvent
+        }
+
+        eventAvailable.signal()
+
+        return pendingEvent.sequenceNumber
+    }
+
+    private fun recordPost(startTime: Long) {
+        val duration = timeSource() - startTime
+        totalPostDurationNanoseconds += duration
+        maximumPostDurationNanoseconds = maxOf(maximumPostDurationNanoseconds, duration)
+    }
+
+    private fun deliverEvents() {
+        while (true) {
+            val next = lock.withLock {
+                while (pending.isEmpty() && !closed) {
+                    eventAvailable.await()
+                }
+
+                val next = pending.removeFirstOrNull() ?: return
+
+                coalescingKeyFor(next.event)?.let { pendingProgressEvents.remove(it) }
+                spaceAvailable.signal()
+
+                val delay = timeSource() - next.postedAt
+                totalDeliveryDelayNanoseconds += delay
+                maximumDeliveryDelayNanoseconds = maxOf(maximumDeliveryDelayNanoseconds, delay)
+
+                next
+            }
+
+            deliver(next.event)
+
+            lock.withLock {
+                lastDeliveredSequenceNumber = next.sequenceNumber
+                eventDelivered.signalAll()
+            }
+        }
+    }
+
+    private fun deliver(event: TaskEvent) {
+        try {
+            consumer.postEvent(event)
+        } catch (t: Throwable) {
+            logger.error {
+                message("Event consumer threw an exception while processing an event.")
+                exception(t)
+                data("consumer", consumerName)
+                data("event", event.toString())
+            }
+        }
+    }
+
+    // Delivers all buffered events and then stops the delivery thread.
+    override fun close() {
+        lock.withLock {
+            closed = true
+            eventAvailable.signalAll()
+        }
+
+        deliveryThread.join()
+    }
+
+    val statistics: EventDispatchStatistics
+        get() = lock.withLock {
+            EventDispatchStatistics(
+                consumerName,
+                eventsPosted,
+                eventsCoalesced,
+                maximumQueueDepth,
+                totalPostDurationNanoseconds / nanosecondsPerMicrosecond,
+                maximumPostDurationNanoseconds / nanosecondsPerMicrosecond,
+                totalDeliveryDelayNanoseconds / nanosecondsPerMicrosecond,
+                maximumDeliveryDelayNanoseconds / nanosecondsPerMicrosecond,
+            )
+        }
+
+    private class PendingEvent(var event: TaskEvent, val sequenceNumber: Long, val postedAt: Long)
+
+    companion object {
+        const val defaultCapacity = 1000
+        private const val nanosecondsPerMicrosecond = 1000
+
+        private fun coalescingKeyFor(event: TaskEvent): Any? = when (event) {
+            is ImagePullProgressEvent -> event.source
+            is ImageBuildProgressEvent -> event.container
+            else -> null
+        }
+    }
+}
+
+@Serializable
+data class EventDispatchStatistics(
+    val consumer: String,
+    val eventsPosted: Long,
+    val eventsCoalesced: Long,
+    val maximumQueueDepth: Int,
+    val totalPostDurationMicroseconds: Long,
+    val maximumPostDurationMicroseconds: Long,
+    val totalDeliveryDelayMicroseconds: Long,
+    val maximumDeliveryDelayMicroseconds: Long,
+)
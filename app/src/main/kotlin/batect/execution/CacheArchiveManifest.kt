@@ -0,0 +1,38 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import kotlinx.serialization.Serializable
+
+@Serializable
+data class CacheArchiveManifest(
+    val caches: List<CacheArchiveManifestEntry> = emptyList(),
+) {
+    fun entryFor(cacheName: String): CacheArchiveManifestEntry? = caches.singleOrNull { it.name == cacheName }
+}
+
+@Serializable
+data class CacheArchiveManifestEntry(
+    val name: String,
+    val digest: String,
+    val archiveSizeBytes: Long,
+    val exportDurationMilliseconds: Long,
+) {
+    // Archives are named after the digest of their contents, so caches with identical contents share a single archive.
+    val archiveFileName: String
+        get() = "$digest.tar.gz"
+}
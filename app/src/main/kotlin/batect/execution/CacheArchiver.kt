@@ -0,0 +1,280 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.config.ProjectPaths
+import batect.docker.DockerContainerType
+import batect.docker.humaniseBytes
+import batect.dockerclient.BindMount
+import batect.dockerclient.DockerClient
+import batect.dockerclient.HostMount
+import batect.dockerclient.VolumeMount
+import batect.dockerclient.VolumeReference
+import batect.logging.Logger
+import batect.os.NativeMethods
+import batect.os.OperatingSystem
+import batect.os.SystemInfo
+import batect.ui.humanise
+import batect.utils.Json
+import okio.Buffer
+import okio.Path.Companion.toOkioPath
+import okio.sink
+import okio.source
+import java.nio.file.Files
+import java.nio.file.Path
+import java.nio.file.StandardCopyOption
+import java.time.Duration
+import java.time.Instant
+import kotlin.io.path.name
+import kotlin.streams.toList
+
+// Exports a project's caches to, and restores them from, a directory of compressed archives, such as a directory
+// saved and restored between CI jobs.
+//
+// Each cache is archived separately and the archive is named after a digest of the cache's contents, so caches that have
+// not changed since they were last exported or restored can be skipped. Archives are streamed to and from a helper
+// container, so they are never staged anywhere other than their final location.
+class CacheArchiver(
+    private val dockerClient: DockerClient,
+    private val helperContainer: CacheHelperContainer,
+    private val cacheManager: CacheManager,
+    private val projectPaths: ProjectPaths,
+    private val containerType: DockerContainerType,
+    private val systemInfo: SystemInfo,
+    private val nativeMethods: NativeMethods,
+    private val logger: Logger,
+) {
+    suspend fun export(archiveDirectory: Path): List<CacheArchiveResult> {
+        checkContainerTypeSupported()
+
+        Files.createDirectories(archiveDirectory)
+
+        val previousManifest = readManifest(archiveDirectory) ?: CacheArchiveManifest()
+        val exported = listCaches().map { cacheName -> exportCache(cacheName, archiveDirectory, previousManifest) }
+
+        val manifest = CacheArchiveManifest(exported.map { it.first })
+        writeManifest(archiveDirectory, manifest)
+        deleteSupersededArchives(archiveDirectory, previousManifest, manifest)
+
+        return exported.map { it.second }
+    }
+
+    private suspend fun exportCache(cacheName: String, archiveDirectory: Path, previousManifest: CacheArchiveManifest): Pair<CacheArchiveManifestEntry, CacheArchiveResult> {
+        val startTime = Instant.now()
+        val mount = mountFor(cacheName, readOnly = true)
+        val digest = digestOf(mount)
+        val previousEntry = previousManifest.entryFor(cacheName)
+        val archivePath = archiveDirectory.resolve("$digest.tar.gz")
+
+        if (previousEntry != null && previousEntry.digest == digest && Files.exists(archivePath)) {
+            logger.info {
+                message("Cache has not changed since it was last exported, skipping.")
+                data("cacheName", cacheName)
+                data("digest", digest)
+            }
+
+            return previousEntry to CacheArchiveResult(cacheName, CacheArchiveOutcome.Unchanged, previousEntry.archiveSizeBytes, Duration.between(startTime, Instant.now()))
+        }
+
+        // Another cache with identical contents may have already been exported during this run.
+        if (!Files.exists(archivePath)) {
+            val partialPath = archiveDirectory.resolve(".$cacheName.tar.gz.partial")
+
+            try {
+                Files.newOutputStream(partialPath).sink().use { sink -> helperContainer.run(mount, exportCommand, sink) }
+                Files.move(partialPath, archivePath, StandardCopyOption.REPLACE_EXISTING)
+            } finally {
+                Files.deleteIfExists(partialPath)
+            }
+        }
+
+        val duration = Duration.between(startTime, Instant.now())
+        val entry = CacheArchiveManifestEntry(cacheName, digest, Files.size(archivePath), duration.toMillis())
+
+        logger.info {
+            message("Exported cache.")
+            data("cache", entry, CacheArchiveManifestEntry.serializer())
+        }
+
+        return entry to CacheArchiveResult(cacheName, CacheArchiveOutcome.Exported, entry.archiveSizeBytes, duration)
+    }
+
+    suspend fun restore(archiveDirectory: Path): List<CacheArchiveResult> {
+        checkContainerTypeSupported()
+
+        val manifest = readManifest(archiveDirectory) ?: throw CacheArchiveException("The directory '$archiveDirectory' does not contain any exported caches.")
+
+        return manifest.caches.map { entry -> restoreCache(entry, archiveDirectory) }
+    }
+
+    private suspend fun restoreCache(entry: CacheArchiveManifestEntry, archiveDirectory: Path): CacheArchiveResult {
+        val startTime = Instant.now()
+        val archivePath = archiveDirectory.resolve(entry.archiveFileName)
+
+        if (!Files.exists(archivePath)) {
+            throw CacheArchiveException("The archive for cache '${entry.name}' ('$archivePath') does not exist.")
+        }
+
+        val mount = mountFor(entry.name, readOnly = false)
+
+        if (digestOf(mount) == entry.digest) {
+            logger.info {
+                message("Cache is already up to date, skipping.")
+                data("cacheName", entry.name)
+                data("digest", entry.digest)
+            }
+
+            return CacheArchiveResult(entry.name, CacheArchiveOutcome.AlreadyUpToDate, entry.archiveSizeBytes, Duration.between(startTime, Instant.now()))
+        }
+
+        Files.newInputStream(archivePath).source().use { source -> helperContainer.run(mount, restoreCommand(), Buffer(), source) }
+
+        val duration = Duration.between(startTime, Instant.now())
+
+        logger.info {
+            message("Restored cache.")
+            data("cache", entry, CacheArchiveManifestEntry.serializer())
+            data("durationMilliseconds", duration.toMillis())
+        }
+
+        return CacheArchiveResult(entry.name, CacheArchiveOutcome.Restored, entry.archiveSizeBytes, duration)
+    }
+
+    private fun checkContainerTypeSupported() {
+        if (containerType == DockerContainerType.Windows) {
+            throw CacheArchiveException("Exporting and restoring caches is not supported with Windows containers.")
+        }
+    }
+
+    private val volumeNamePrefix: String
+        get() = "batect-cache-${cacheManager.projectCacheKey}-"
+
+    private suspend fun listCaches(): List<String> = when (cacheManager.cacheType) {
+        CacheType.Volume -> dockerClient.listAllVolumes()
+            .map { it.name }
+            .filter { it.startsWith(volumeNamePrefix) }
+            .map { it.removePrefix(volumeNamePrefix) }
+            .sorted()
+        CacheType.Directory -> if (Files.isDirectory(projectPaths.cacheDirectory)) {
+            Files.list(projectPaths.cacheDirectory).use { paths ->
+                paths.filter { Files.isDirectory(it) }.map { it.name }.toList().sorted()
+            }
+        } else {
+            emptyList()
+        }
+    }
+
+    private fun mountFor(cacheName: String, readOnly: Boolean): BindMount {
+        val options = if (readOnly) "ro" else null
+
+        return when (cacheManager.cacheType) {
+            CacheType.Volume -> VolumeMount(VolumeReference(volumeNamePrefix + cacheName), CacheHelperContainer.cacheMountPath, options)
+            CacheType.Directory -> {
+                val path = projectPaths.cacheDirectory.resolve(cacheName)
+                Files.createDirectories(path)
+
+                HostMount(path.toOkioPath(), CacheHelperContainer.cacheMountPath, options)
+            }
+        }
+    }
+
+    // The helper container runs as root, so files restored into a directory cache would otherwise be owned by root and not
+    // the user running batect.
+    private fun restoreCommand(): List<String> {
+        val extractCommand = "find ${CacheHelperContainer.cacheMountPath} -mindepth 1 -delete && tar -C ${CacheHelperContainer.cacheMountPath} -xzf -"
+
+        if (cacheManager.cacheType == CacheType.Volume || systemInfo.operatingSystem == OperatingSystem.Windows) {
+            return listOf("sh", "-c", extractCommand)
+        }
+
+        return listOf("sh", "-c", "$extractCommand && chown -R ${nativeMethods.getUserId()}:${nativeMethods.getGroupId()} ${CacheHelperContainer.cacheMountPath}")
+    }
+
+    private suspend fun digestOf(mount: BindMount): String {
+        val output = Buffer()
+        helperContainer.run(mount, digestCommand, output)
+
+        return output.readUtf8().trim()
+    }
+
+    private fun readManifest(archiveDirectory: Path): CacheArchiveManifest? {
+        val manifestPath = archiveDirectory.resolve(manifestFileName)
+
+        if (!Files.exists(manifestPath)) {
+            return null
+        }
+
+        return Json.ignoringUnknownKeys.decodeFromString(CacheArchiveManifest.serializer(), Files.readAllBytes(manifestPath).toString(Charsets.UTF_8))
+    }
+
+    private fun writeManifest(archiveDirectory: Path, manifest: CacheArchiveManifest) {
+        val manifestPath = archiveDirectory.resolve(manifestFileName)
+        val temporaryPath = archiveDirectory.resolve(".$manifestFileName.partial")
+
+        Files.write(temporaryPath, Json.default.encodeToString(CacheArchiveManifest.serializer(), manifest).toByteArray(Charsets.UTF_8))
+        Files.move(temporaryPath, manifestPath, StandardCopyOption.REPLACE_EXISTING, StandardCopyOption.ATOMIC_MOVE)
+    }
+
+    // Only archives we previously wrote (ie. those in the previous manifest) are deleted: the directory may contain other files
+    // that have nothing to do with us.
+    private fun deleteSupersededArchives(archiveDirectory: Path, previousManifest: CacheArchiveManifest, newManifest: CacheArchiveManifest) {
+        val stillReferenced = newManifest.caches.map { it.archiveFileName }.toSet()
+
+        previousManifest.caches
+            .map { it.archiveFileName }
+            .filter { it !in stillReferenced }
+            .distinct()
+            .forEach { Files.deleteIfExists(archiveDirectory.resolve(it)) }
+    }
+
+    companion object {
+        const val manifestFileName = "manifest.json"
+
+        // The digest covers the names of all files and directories in the cache and the contents of all files, but not
+        // permissions or timestamps, which are not expected to differ between otherwise identical caches.
+        private val digestCommand = listOf(
+            "sh",
+            "-c",
+            "cd ${CacheHelperContainer.cacheMountPath} && { find . -print0 | LC_ALL=C sort -z | tr '\\0' '\\n'; find . -type f -print0 | LC_ALL=C sort -z | xargs -0 -r sha256sum; } | sha256sum | cut -d ' ' -f 1",
+        )
+
+        private val exportCommand = listOf("tar", "-C", CacheHelperContainer.cacheMountPath, "-czf", "-", ".")
+    }
+}
+
+data class CacheArchiveResult(
+    val cacheName: String,
+    val outcome: CacheArchiveOutcome,
+    val archiveSizeBytes: Long,
+    val duration: Duration,
+) {
+    fun toHumanReadableString(): String = when (outcome) {
+        CacheArchiveOutcome.Exported -> "Exported cache '$cacheName' (${humaniseBytes(archiveSizeBytes)}) in ${duration.humanise()}."
+        CacheArchiveOutcome.Unchanged -> "Cache '$cacheName' has not changed since it was last exported."
+        CacheArchiveOutcome.Restored -> "Restored cache '$cacheName' (${humaniseBytes(archiveSizeBytes)}) in ${duration.humanise()}."
+        CacheArchiveOutcome.AlreadyUpToDate -> "Cache '$cacheName' is already up to date."
+    }
+}
+
+enum class CacheArchiveOutcome {
+    Exported,
+    Unchanged,
+    Restored,
+    AlreadyUpToDate,
+}
+
+class CacheArchiveException(message: String) : RuntimeException(message)
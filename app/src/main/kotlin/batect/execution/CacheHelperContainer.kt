@@ -0,0 +1,92 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.dockerclient.BindMount
+import batect.dockerclient.ContainerCreationSpec
+import batect.dockerclient.DockerClient
+import batect.dockerclient.HostMount
+import batect.dockerclient.ImageReference
+import batect.dockerclient.ReadyNotification
+import batect.dockerclient.VolumeMount
+import batect.dockerclient.io.SinkTextOutput
+import batect.dockerclient.io.SourceTextInput
+import batect.logging.Logger
+import okio.Buffer
+import okio.Sink
+import okio.Source
+
+// Runs short-lived commands in a small container with a cache mounted at cacheMountPath, streaming data through the
+// container's stdin and stdout. This allows caches stored in Docker volumes to be read and written without needing
+// access to the Docker host's filesystem.
+class CacheHelperContainer(
+    private val client: DockerClient,
+    private val logger: Logger,
+) {
+    suspend fun run(cacheMount: BindMount, command: List<String>, stdout: Sink, stdin: Source? = null) {
+        val image = client.getImage(imageName) ?: pullImage()
+        val builder = ContainerCreationSpec.Builder(image)
+            .withCommand(command)
+
+        when (cacheMount) {
+            is HostMount -> builder.withHostMount(cacheMount)
+            is VolumeMount -> builder.withVolumeMount(cacheMount)
+        }
+
+        if (stdin != null) {
+            builder.withStdinAttached()
+        }
+
+        val container = client.createContainer(builder.build())
+
+        try {
+            val stderr = Buffer()
+            val exitCode = client.run(container, SinkTextOutput(stdout), SinkTextOutput(stderr), stdin?.let { SourceTextInput(it) }, ReadyNotification())
+
+            if (exitCode != 0L) {
+                val error = stderr.readUtf8().trim()
+
+                logger.error {
+                    message("Cache helper container exited with non-zero exit code.")
+                    data("command", command)
+                    data("exitCode", exitCode)
+                    data("stderr", error)
+                }
+
+                val details = if (error.isEmpty()) "." else ": $error"
+
+                throw CacheArchiveException("Command '${command.joinToString(" ")}' exited with code $exitCode$details")
+            }
+        } finally {
+            client.removeContainer(container, force = true, removeVolumes = false)
+        }
+    }
+
+    private suspend fun pullImage(): ImageReference {
+        logger.info {
+            message("Pulling cache helper image.")
+            data("imageName", imageName)
+        }
+
+        return client.pullImage(imageName) {}
+    }
+
+    companion object {
+        const val imageName = "alpine:3.18.4"
+        const val cacheMountPath = "/cache"
+    }
+}
@@ -19,4 +19,5 @@ package batect.execution
 enum class CleanupOption {
     Cleanup,
     DontCleanup,
+    DeferCleanup,
 }
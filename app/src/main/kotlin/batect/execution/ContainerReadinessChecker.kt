@@ -0,0 +1,248 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.cli.CommandLineOptions
+import batect.config.Container
+import batect.config.PortMapping
+import batect.config.ReadinessCheckConfig
+import batect.config.ReadinessCheckType
+import batect.docker.DockerClientConfigurationFactory
+import batect.logging.Logger
+import batect.utils.pluralize
+import kotlinx.coroutines.Dispatchers
+import kotlinx.coroutines.delay
+import kotlinx.coroutines.withContext
+import okhttp3.OkHttpClient
+import okhttp3.Request
+import java.io.IOException
+import java.net.InetSocketAddress
+import java.net.Proxy
+import java.net.Socket
+import java.net.SocketTimeoutException
+import java.net.URI
+import java.net.URISyntaxException
+import java.util.concurrent.TimeUnit
+import kotlin.time.Duration
+import kotlin.time.Duration.Companion.milliseconds
+import kotlin.time.Duration.Companion.nanoseconds
+import kotlin.time.Duration.Companion.seconds
+
+// Probes run from the host against the port published for the container: container IP addresses on the
+// task network are not reachable from the host on Docker Desktop, so the published port is the only
+// address that works everywhere. If published ports can't be reached (because port mappings are disabled,
+// or the daemon isn't reachable over TCP), the check is skipped rather than failing the task. TaskRunner
+// warns about this before the task starts, using reasonChecksCannotRun.
+class ContainerReadinessChecker(
+    private val httpClient: OkHttpClient,
+    private val commandLineOptions: CommandLineOptions,
+    private val dockerClientConfigurationFactory: DockerClientConfigurationFactory,
+    private val logger: Logger,
+) {
+    private val probeHost: ProbeHostResolution by lazy { resolveProbeHost() }
+
+    // Returns null if readiness checks can run.
+    val reasonChecksCannotRun: String?
+        get() = when (val host = probeHost) {
+            is ProbeHostResolution.Resolved -> null
+            is ProbeHostResolution.Unavailable -> host.reason
+        }
+
+    private val probeClient: OkHttpClient by lazy {
+        httpClient.newBuilder()
+            .proxy(Proxy.NO_PROXY)
+            .followRedirects(false)
+            .followSslRedirects(false)
+            .retryOnConnectionFailure(false)
+            .build()
+    }
+
+    suspend fun waitForContainerToBecomeReady(container: Container, config: ReadinessCheckConfig): ReadinessCheckResult {
+        val address = when (val resolution = resolveAddress(container, config)) {
+            is AddressResolution.Resolved -> resolution
+            is AddressResolution.Unavailable -> {
+                logger.warn {
+                    message("Skipping readiness check.")
+                    data("container", container.name)
+                    data("reason", resolution.reason)
+                }
+
+                return ReadinessCheckResult.Skipped(resolution.reason)
+            }
+        }
+
+        val deadline = System.nanoTime() + config.timeout.inWholeNanoseconds
+        fun remainingTime() = (deadline - System.nanoTime()).nanoseconds
+
+        var interval = config.initialInterval
+        var attempts = 0
+
+        while (true) {
+            attempts++
+
+            val attemptTimeout = minOf(maximumAttemptTimeout, remainingTime()).coerceAtLeast(minimumAttemptTimeout)
+            val failure = probe(config, address, attemptTimeout)
+
+            if (failure == null) {
+                logger.info {
+                    message("Container became ready.")
+                    data("container", container.name)
+                    data("attempts", attempts)
+                }
+
+                return ReadinessCheckResult.Ready
+            }
+
+            val remaining = remainingTime()
+
+            if (!remaining.isPositive()) {
+                logger.warn {
+                    message("Container did not become ready before the timeout elapsed.")
+                    data("container", container.name)
+                    data("attempts", attempts)
+                    data("lastFailure", failure)
+                }
+
+                return ReadinessCheckResult.NotReady("The ${config.type.displayName} readiness check on port ${config.port} did not succeed within ${config.timeout} (${pluralize(attempts, "attempt")}). The last attempt failed: $failure")
+            }
+
+            delay(minOf(interval, remaining))
+            interval = minOf(interval * 2, config.maximumInterval)
+        }
+    }
+
+    private fun resolveAddress(container: Container, config: ReadinessCheckConfig): AddressResolution {
+        val host = when (val resolution = probeHost) {
+            is ProbeHostResolution.Resolved -> resolution.host
+            is ProbeHostResolution.Unavailable -> return AddressResolution.Unavailable("The readiness check for container '${container.name}' cannot run because ${resolution.reason}")
+        }
+
+        val mapping = container.portMappings.firstOrNull { it.protocol.equals(PortMapping.defaultProtocol, ignoreCase = true) && config.port in it.container.ports }
+            ?: return AddressResolution.Unavailable("The readiness check for container '${container.name}' cannot run because container port ${config.port} is not published to the host. Add a TCP port mapping for port ${config.port} to the container's 'ports'.")
+
+        val localPort = mapping.local.from + (config.port - mapping.container.from)
+
+        return AddressResolution.Resolved(host, localPort)
+    }
+
+    // Published ports are bound on the machine running the daemon. The host is taken from the configuration the Docker
+    // client uses, so that the active Docker context is taken into account.
+    private fun resolveProbeHost(): ProbeHostResolution {
+        if (commandLineOptions.disablePortMappings) {
+            return ProbeHostResolution.Unavailable("port mappings are disabled with --disable-ports.")
+        }
+
+        val dockerHost = dockerClientConfigurationFactory.createConfiguration().host
+        val uri = try {
+            URI(dockerHost)
+        } catch (e: URISyntaxException) {
+            return ProbeHostResolution.Unavailable("the address of the Docker daemon '$dockerHost' could not be determined.")
+        }
+
+        return when (uri.scheme) {
+            "unix", "npipe" -> ProbeHostResolution.Resolved("localhost")
+            "tcp" -> uri.host?.let { ProbeHostResolution.Resolved(it) } ?: ProbeHostResolution.Unavailable("the address of the Docker daemon '$dockerHost' could not be determined.")
+            else -> ProbeHostResolution.Unavailable("the Docker daemon '$dockerHost' is not reachable over TCP, so its published ports cannot be reached.")
+        }
+    }
+
+    private suspend fun probe(config: ReadinessCheckConfig, address: AddressResolution.Resolved, timeout: Duration): String? = withContext(Dispatchers.IO) {
+        when (config.type) {
+            ReadinessCheckType.Tcp -> probeTcp(address, timeout)
+            ReadinessCheckType.Http -> probeHttp(address, config.path, timeout)
+        }
+    }
+
+    // docker-proxy accepts connections on published ports even when nothing is listening in the container,
+    // and then immediately closes them. So a connection only counts as ready if it stays open for a moment.
+    private fun probeTcp(address: AddressResolution.Resolved, timeout: Duration): String? {
+        return try {
+            Socket().use { socket ->
+                socket.connect(InetSocketAddress(address.host, address.port), timeout.inWholeMilliseconds.toInt())
+                socket.soTimeout = tcpSettleTime.inWholeMilliseconds.toInt()
+
+                if (connectionStaysOpen(socket)) {
+                    null
+                } else {
+                    "The connection to ${address.host}:${address.port} was closed immediately."
+                }
+            }
+        } catch (e: IOException) {
+            "Could not connect to ${address.host}:${address.port}: ${e.message}"
+        }
+    }
+
+    private fun connectionStaysOpen(socket: Socket): Boolean {
+        return try {
+            socket.getInputStream().read() != -1
+        } catch (e: SocketTimeoutException) {
+            true
+        } catch (e: IOException) {
+            false
+        }
+    }
+
+    private fun probeHttp(address: AddressResolution.Resolved, path: String, timeout: Duration): String? {
+        val url = "http://${address.host}:${address.port}/${path.removePrefix("/")}"
+        val request = Request.Builder().get().url(url).build()
+        val call = probeClient.newCall(request)
+        call.timeout().timeout(timeout.inWholeMilliseconds, TimeUnit.MILLISECONDS)
+
+        return try {
+            call.execute().use { response ->
+                if (response.code in 200..399) {
+                    null
+                } else {
+                    "GET $url returned HTTP ${response.code}."
+                }
+            }
+        } catch (e: IOException) {
+            "GET $url failed: ${e.message}"
+        }
+    }
+
+    private val ReadinessCheckType.displayName: String
+        get() = when (this) {
+            ReadinessCheckType.Tcp -> "TCP"
+            ReadinessCheckType.Http -> "HTTP"
+        }
+
+    private sealed class ProbeHostResolution {
+        data class Resolved(val host: String) : ProbeHostResolution()
+        data class Unavailable(val reason: String) : ProbeHostResolution()
+    }
+
+    private sealed class AddressResolution {
+        data class Resolved(val host: String, val port: Int) : AddressResolution()
+        data class Unavailable(val reason: String) : AddressResolution()
+    }
+
+    companion object {
+        private val maximumAttemptTimeout = 1.seconds
+        private val minimumAttemptTimeout = 50.milliseconds
+        private val tcpSettleTime = 200.milliseconds
+    }
+}
+
+sealed class ReadinessCheckResult {
+    object Ready : ReadinessCheckResult() {
+        override fun toString(): String = this::class.simpleName!!
+    }
+
+    data class NotReady(val message: String) : ReadinessCheckResult()
+    data class Skipped(val reason: String) : ReadinessCheckResult()
+}
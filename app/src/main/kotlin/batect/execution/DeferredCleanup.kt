@@ -0,0 +1,29 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import kotlinx.serialization.Serializable
+
+@Serializable
+data class DeferredCleanup(
+    val containerIds: List<String>,
+    val networkIds: List<String>,
+    val manualCleanupCommands: List<String>,
+    val attempts: Int = 0,
+    // Networks leased from the task network pool, which are returned to the pool rather than deleted.
+    val pooledNetworkIds: List<String> = emptyList(),
+)
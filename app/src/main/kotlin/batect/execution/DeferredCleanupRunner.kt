@@ -0,0 +1,161 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.docker.TaskNetworkPool
+import batect.dockerclient.ContainerReference
+import batect.dockerclient.DockerClient
+import batect.dockerclient.DockerClientException
+import batect.dockerclient.NetworkReference
+import batect.logging.Logger
+import kotlinx.coroutines.async
+import kotlinx.coroutines.awaitAll
+import kotlinx.coroutines.coroutineScope
+import kotlinx.coroutines.runBlocking
+import java.nio.file.Path
+import kotlin.concurrent.thread
+import kotlin.time.Duration.Companion.seconds
+
+// Finishes cleanups recorded in a DeferredCleanupStore: stops and removes containers, then deletes networks (or returns them
+// to the task network pool), in the same order the cleanup stage would have.
+class DeferredCleanupRunner(
+    private val client: DockerClient,
+    private val store: DeferredCleanupStore,
+    private val networkPool: TaskNetworkPool,
+    private val logger: Logger,
+) {
+    // Returns the number of cleanups that this process finished or made progress on.
+    fun finishAllPending(): Int = store.listPending().count { finish(it) }
+
+    fun finishAllPendingInBackground() {
+        thread(isDaemon = true, name = DeferredCleanupRunner::class.qualifiedName) {
+            try {
+                finishAllPending()
+            } catch (e: Throwable) {
+                logger.warn {
+                    message("Finishing pending deferred cleanups failed.")
+                    exception(e)
+                }
+            }
+        }
+    }
+
+    fun finish(path: Path): Boolean = store.withExclusiveAccess(path) { cleanup ->
+        logger.info {
+            message("Finishing deferred cleanup.")
+            data("path", path)
+            data("cleanup", cleanup, DeferredCleanup.serializer())
+        }
+
+        val remaining = runBlocking { run(cleanup) }
+
+        when {
+            remaining == null -> {
+                logger.info {
+                    message("Deferred cleanup finished.")
+                    data("path", path)
+                }
+
+                null
+            }
+            remaining.attempts >= maximumAttempts -> {
+                logger.warn {
+                    message("Deferred cleanup did not finish, giving up.")
+                    data("path", path)
+                    data("remaining", remaining, DeferredCleanup.serializer())
+                }
+
+                null
+            }
+            else -> {
+                logger.warn {
+                    message("Deferred cleanup did not finish, will try again later.")
+                    data("path", path)
+                    data("remaining", remaining, DeferredCleanup.serializer())
+                }
+
+                remaining
+            }
+        }
+    }
+
+    private suspend fun run(cleanup: DeferredCleanup): DeferredCleanup? {
+        val containersNotRemoved = coroutineScope {
+            cleanup.containerIds
+                .map { id -> async { if (stopAndRemoveContainer(ContainerReference(id))) null else id } }
+                .awaitAll()
+                .filterNotNull()
+        }
+
+        // Networks can't be deleted or reused while containers are still attached to them.
+        if (containersNotRemoved.isNotEmpty()) {
+            return cleanup.copy(containerIds = containersNotRemoved, attempts = cleanup.attempts + 1)
+        }
+
+        val networksNotDeleted = cleanup.networkIds.filterNot { deleteNetwork(NetworkReference(it)) }
+        val pooledNetworksNotReturned = cleanup.pooledNetworkIds.filterNot { networkPool.returnAfterDeferredCleanup(NetworkReference(it)) }
+
+        if (networksNotDeleted.isEmpty() && pooledNetworksNotReturned.isEmpty()) {
+            return null
+        }
+
+        return cleanup.copy(containerIds = emptyList(), networkIds = networksNotDeleted, pooledNetworkIds = pooledNetworksNotReturned, attempts = cleanup.attempts + 1)
+    }
+
+    private suspend fun stopAndRemoveContainer(container: ContainerReference): Boolean {
+        try {
+            client.stopContainer(container, 10.seconds)
+        } catch (e: DockerClientException) {
+            // The container may have already stopped or been removed. If something else is wrong, removing the container will fail below.
+            logger.info {
+                message("Stopping container failed.")
+                exception(e)
+                data("containerId", container.id)
+            }
+        }
+
+        return try {
+            client.removeContainer(container, force = true, removeVolumes = true)
+            true
+        } catch (e: DockerClientException) {
+            logger.warn {
+                message("Removing container failed.")
+                exception(e)
+                data("containerId", container.id)
+            }
+
+            false
+        }
+    }
+
+    private suspend fun deleteNetwork(network: NetworkReference): Boolean = try {
+        client.deleteNetwork(network)
+        true
+    } catch (e: DockerClientException) {
+        logger.warn {
+            message("Deleting network failed.")
+            exception(e)
+            data("networkId", network.id)
+        }
+
+        false
+    }
+
+    companion object {
+        const val maximumAttempts: Int = 3
+    }
+}
@@ -0,0 +1,102 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.cli.CommandLineOptionsParser
+import batect.cli.DockerCommandLineOptions
+import batect.dockerclient.DockerCLIContext
+import batect.logging.Logger
+import batect.os.ProcessRunner
+import java.nio.file.Path
+
+// Records a deferred cleanup and starts a copy of this process in the background to finish it.
+//
+// The background process is started with only the options it needs to connect to Docker in the same way as this one: it
+// doesn't need the task name, task arguments or any other options, and mustn't share things like the log file with this process.
+// If it can't be started, or doesn't finish, the cleanup will be finished by the next invocation of Batect for this project.
+class DeferredCleanupScheduler(
+    private val store: DeferredCleanupStore,
+    private val processRunner: ProcessRunner,
+    private val currentProcess: ProcessHandle.Info,
+    private val dockerOptions: DockerCommandLineOptions,
+    private val logger: Logger,
+) {
+    fun schedule(cleanup: DeferredCleanup): PostTaskManualCleanup {
+        try {
+            val path = store.record(cleanup)
+            val command = reaperCommandFor(path)
+
+            if (command == null) {
+                logger.warn {
+                    message("Could not determine how this process was started, so could not start process to finish cleanup in the background.")
+                }
+
+                return PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(cleanup.manualCleanupCommands)
+            }
+
+            processRunner.startDetached(command)
+
+            return PostTaskManualCleanup.NotRequired
+        } catch (e: Throwable) {
+            logger.error {
+                message("Could not schedule deferred cleanup.")
+                exception(e)
+            }
+
+            return PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(cleanup.manualCleanupCommands)
+        }
+    }
+
+    private fun reaperCommandFor(cleanupPath: Path): List<String>? {
+        val executable = currentProcess.command().orElse(null) ?: return null
+        val arguments = currentProcess.arguments().orElse(null)?.toList() ?: return null
+        val jarIndex = arguments.indexOf("-jar") + 1
+
+        if (jarIndex == 0 || jarIndex >= arguments.size) {
+            return null
+        }
+
+        // Keep the JVM options and JAR path, but replace all of Batect's own options.
+        return listOf(executable) +
+            arguments.subList(0, jarIndex + 1) +
+            "--${CommandLineOptionsParser.finishDeferredCleanupOptionName}=$cleanupPath" +
+            dockerConnectionArguments()
+    }
+
+    private fun dockerConnectionArguments(): List<String> {
+        val configDirectory = "--docker-config=${dockerOptions.configDirectory}"
+
+        if (dockerOptions.contextName != DockerCLIContext.default.name) {
+            return listOf("--docker-context=${dockerOptions.contextName}", configDirectory)
+        }
+
+        val hostAndConfig = listOf("--docker-host=${dockerOptions.host}", configDirectory)
+
+        if (!dockerOptions.useTLS) {
+            return hostAndConfig
+        }
+
+        val tlsMode = if (dockerOptions.verifyTLS) "--docker-tls-verify" else "--docker-tls"
+
+        return hostAndConfig + listOf(
+            tlsMode,
+            "--docker-tls-ca-cert=${dockerOptions.tlsCACertificatePath}",
+            "--docker-tls-cert=${dockerOptions.tlsCertificatePath}",
+            "--docker-tls-key=${dockerOptions.tlsKeyPath}",
+        )
+    }
+}
@@ -0,0 +1,135 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.config.ProjectPaths
+import batect.logging.Logger
+import batect.utils.Json
+import java.nio.ByteBuffer
+import java.nio.channels.Channels
+import java.nio.channels.FileChannel
+import java.nio.channels.FileLock
+import java.nio.channels.OverlappingFileLockException
+import java.nio.file.Files
+import java.nio.file.NoSuchFileException
+import java.nio.file.Path
+import java.nio.file.StandardCopyOption
+import java.nio.file.StandardOpenOption
+import java.util.UUID
+import kotlin.streams.toList
+
+// Records cleanups that have been deferred until after a task has finished, so that they can be finished by a
+// background process or, if that process does not finish, by a later invocation of Batect.
+//
+// Whoever is finishing a cleanup holds a lock on its file while they do so, which allows other processes to skip over
+// cleanups that are already in progress.
+class DeferredCleanupStore(
+    private val projectPaths: ProjectPaths,
+    private val logger: Logger,
+) {
+    private val directory: Path by lazy { projectPaths.deferredCleanupDirectory }
+
+    fun record(cleanup: DeferredCleanup): Path {
+        Files.createDirectories(directory)
+
+        val path = directory.resolve("${UUID.randomUUID()}.json")
+        val temporaryPath = directory.resolve("${path.fileName}.tmp")
+
+        Files.write(temporaryPath, serialize(cleanup))
+        Files.move(temporaryPath, path, StandardCopyOption.ATOMIC_MOVE)
+
+        logger.info {
+            message("Recorded deferred cleanup.")
+            data("path", path)
+            data("cleanup", cleanup, DeferredCleanup.serializer())
+        }
+
+        return path
+    }
+
+    fun listPending(): List<Path> {
+        if (!Files.isDirectory(directory)) {
+            return emptyList()
+        }
+
+        return Files.list(directory).use { files ->
+            files
+                .filter { it.fileName.toString().endsWith(".json") }
+                .sorted()
+                .toList()
+        }
+    }
+
+    // Returns false if the cleanup has already been finished or is currently being finished by someone else.
+    //
+    // action should return whatever remains to be cleaned up, or null if nothing remains.
+    fun withExclusiveAccess(path: Path, action: (DeferredCleanup) -> DeferredCleanup?): Boolean {
+        val channel = try {
+            FileChannel.open(path, StandardOpenOption.READ, StandardOpenOption.WRITE)
+        } catch (e: NoSuchFileException) {
+            return false
+        }
+
+        val remaining = channel.use {
+            val lock = tryLock(channel) ?: return logAlreadyInProgress(path)
+
+            lock.use {
+                // The file might have been finished and deleted between us opening it and taking the lock.
+                if (!Files.exists(path)) {
+                    return false
+                }
+
+                val content = Channels.newInputStream(channel).readBytes().toString(Charsets.UTF_8)
+                val cleanup = Json.default.decodeFromString(DeferredCleanup.serializer(), content)
+                val remaining = action(cleanup)
+
+                if (remaining != null) {
+                    channel.truncate(0)
+                    channel.write(ByteBuffer.wrap(serialize(remaining)), 0)
+                }
+
+                remaining
+            }
+        }
+
+        // We can't delete the file while it is open on Windows, so we have to wait until after we've released the lock.
+        // This means that another process could start finishing this cleanup again in the meantime, but cleaning up
+        // is idempotent, so this is harmless.
+        if (remaining == null) {
+            Files.deleteIfExists(path)
+        }
+
+        return true
+    }
+
+    private fun logAlreadyInProgress(path: Path): Boolean {
+        logger.info {
+            message("Deferred cleanup is already being finished by another process.")
+            data("path", path)
+        }
+
+        return false
+    }
+
+    private fun tryLock(channel: FileChannel): FileLock? = try {
+        channel.tryLock()
+    } catch (e: OverlappingFileLockException) {
+        null
+    }
+
+    private fun serialize(cleanup: DeferredCleanup): ByteArray = Json.default.encodeToString(DeferredCleanup.serializer(), cleanup).toByteArray(Charsets.UTF_8)
+}
@@ -17,6 +17,7 @@
 package batect.execution
 
 import batect.execution.model.events.ExecutionFailedEvent
+import batect.execution.model.events.RunningSetupCommandEvent
 import batect.execution.model.events.StepStartingEvent
 import batect.execution.model.events.TaskEvent
 import batect.execution.model.events.TaskEventSink
@@ -45,6 +46,7 @@ class ParallelExecutionManager(
     private val eventLogger: EventLogger,
     private val taskStepRunner: TaskStepRunner,
     private val stateMachine: TaskStateMachine,
+    private val taskMetricsCollector: TaskMetricsCollector,
     private val telemetryCaptor: TelemetryCaptor,
     private val maximumLevelOfParallelism: Int?,
     private val logger: Logger,
@@ -53,19 +55,34 @@ class ParallelExecutionManager(
     private val workManagementLock = Object()
     private val finishedSignal = CountDownLatch(1)
     private val runningSteps = ConcurrentHashMap.newKeySet<TaskStep>()
+    private val eventLoggerDispatcher = AsyncTaskEventDispatcher(eventLogger, eventLogger::class.simpleName ?: "event-logger", logger)
 
     fun run() {
-        startNewWorkIfPossible()
+        try {
+            startNewWorkIfPossible()
+
+            finishedSignal.await()
+
+            logger.info { message("Shutting down thread pool.") }
+            threadPool.shutdown()
 
-        finishedSignal.await()
+            logger.info { message("Waiting for thread pool to terminate.") }
+            threadPool.awaitTermination(Long.MAX_VALUE, TimeUnit.NANOSECONDS)
 
-        logger.info { message("Shutting down thread pool.") }
-        threadPool.shutdown()
+            logger.info { message("Thread pool terminated.") }
+        } finally {
+            flushEventLogger()
+        }
+    }
 
-        logger.info { message("Waiting for thread pool to terminate.") }
-        threadPool.awaitTermination(Long.MAX_VALUE, TimeUnit.NANOSECONDS)
+    private fun flushEventLogger() {
+        logger.info { message("Waiting for all events to be delivered to the event logger.") }
+        eventLoggerDispatcher.close()
 
-        logger.info { message("Thread pool terminated.") }
+        logger.info {
+            message("All events delivered to the event logger.")
+            data("statistics", eventLoggerDispatcher.statistics, EventDispatchStatistics.serializer())
+        }
     }
 
     private fun createThreadPool() =
@@ -88,7 +105,13 @@ class ParallelExecutionManager(
         }
 
     override fun postEvent(event: TaskEvent) {
-        eventLogger.postEvent(event)
+        if (event.mustBeDisplayedBeforeContinuing) {
+            eventLoggerDispatcher.postEventAndWait(event)
+        } else {
+            eventLoggerDispatcher.postEvent(event)
+        }
+
+        taskMetricsCollector.postEvent(event)
 
         if (!event.isInformationalEvent) {
             stateMachine.postEvent(event)
@@ -112,7 +135,7 @@ class ParallelExecutionManager(
                 }
 
                 telemetryCaptor.addUnhandledExceptionEvent(e, isUserFacing = true)
-                eventLogger.postEvent(ExecutionFailedEvent("Could not schedule new work: $e"))
+                eventLoggerDispatcher.postEvent(ExecutionFailedEvent("Could not schedule new work: $e"))
 
                 throw e
             } finally {
@@ -147,7 +170,7 @@ class ParallelExecutionManager(
                     data("step", step)
                 }
 
-                eventLogger.postEvent(StepStartingEvent(step))
+                postEvent(StepStartingEvent(step))
                 taskStepRunner.run(step, this)
 
                 logger.info {
@@ -177,6 +200,10 @@ class ParallelExecutionManager(
         }
     }
 
+    // Event loggers print a line when these events occur, and any output from the step must appear after that line.
+    private val TaskEvent.mustBeDisplayedBeforeContinuing: Boolean
+        get() = this is StepStartingEvent || this is RunningSetupCommandEvent
+
     private fun logCancellationException(step: TaskStep, ex: Throwable) {
         logger.info {
             message("Step was cancelled and threw an exception.")
@@ -0,0 +1,246 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import java.util.concurrent.ConcurrentHashMap
+
+// A set of counters and histograms that can be rendered in the Prometheus text exposition format (as read by the node_exporter
+// textfile collector), and parsed back again so that values can be accumulated across runs.
+class PerformanceMetrics {
+    private val counters = ConcurrentHashMap<Series, Double>()
+    private val histograms = ConcurrentHashMap<Series, HistogramValues>()
+
+    fun increment(family: CounterFamily, labels: Map<String, String>, amount: Double = 1.0) {
+        counters.merge(Series(family.name, labels), amount) { existing, added -> existing + added }
+    }
+
+    fun observe(family: HistogramFamily, labels: Map<String, String>, value: Double) {
+        histograms.computeIfAbsent(Series(family.name, labels)) { HistogramValues(family.buckets.size) }
+            .observe(family.bucketIndexFor(value), value)
+    }
+
+    fun counterValue(family: CounterFamily, labels: Map<String, String>): Double? = counters[Series(family.name, labels)]
+    fun histogramCount(family: HistogramFamily, labels: Map<String, String>): Long? = histograms[Series(family.name, labels)]?.count
+
+    val isEmpty: Boolean
+        get() = counters.isEmpty() && histograms.isEmpty()
+
+    fun add(other: PerformanceMetrics) {
+        other.counters.forEach { (series, value) -> counters.merge(series, value) { existing, added -> existing + added } }
+        other.histograms.forEach { (series, values) -> histograms.computeIfAbsent(series) { HistogramValues(values.bucketCounts.size - 1) }.add(values) }
+    }
+
+    fun render(): String = buildString {
+        PerformanceMetricFamilies.all.forEach { family ->
+            val counterSeries = counters.filterKeys { it.familyName == family.name }.toSortedMap(seriesOrder)
+            val histogramSeries = histograms.filterKeys { it.familyName == family.name }.toSortedMap(seriesOrder)
+
+            if (counterSeries.isEmpty() && histogramSeries.isEmpty()) {
+                return@forEach
+            }
+
+            when (family) {
+                is CounterFamily -> {
+                    appendLine("# HELP ${family.sampleName} ${family.help}")
+                    appendLine("# TYPE ${family.sampleName} counter")
+                    counterSeries.forEach { (series, value) -> appendSample(family.sampleName, series.labels, value) }
+                }
+                is HistogramFamily -> {
+                    appendLine("# HELP ${family.name} ${family.help}")
+                    appendLine("# TYPE ${family.name} histogram")
+                    histogramSeries.forEach { (series, values) -> appendHistogram(family, series.labels, values) }
+                }
+            }
+        }
+    }
+
+    private fun StringBuilder.appendHistogram(family: HistogramFamily, labels: Map<String, String>, values: HistogramValues) {
+        var cumulativeCount = 0L
+
+        family.buckets.forEachIndexed { index, upperBound ->
+            cumulativeCount += values.bucketCounts[index]
+            appendSample("${family.name}_bucket", labels + ("le" to upperBound.toString()), cumulativeCount.toDouble())
+        }
+
+        appendSample("${family.name}_bucket", labels + ("le" to "+Inf"), values.count.toDouble())
+        appendSample("${family.name}_sum", labels, values.sum)
+        appendSample("${family.name}_count", labels, values.count.toDouble())
+    }
+
+    private fun StringBuilder.appendSample(name: String, labels: Map<String, String>, value: Double) {
+        append(name)
+
+        if (labels.isNotEmpty()) {
+            append(labels.entries.joinToString(",", "{", "}") { (key, labelValue) -> "$key=\"${escapeLabelValue(labelValue)}\"" })
+        }
+
+        append(' ')
+        appendLine(formatValue(value))
+    }
+
+    private data class Series(val familyName: String, val labels: Map<String, String>)
+
+    private class HistogramValues(bucketCount: Int) {
+        // One entry per bucket (not cumulative), followed by the count of values greater than the largest bucket.
+        val bucketCounts = LongArray(bucketCount + 1)
+        var sum = 0.0
+            private set
+
+        val count: Long
+            get() = bucketCounts.sum()
+
+        @Synchronized
+        fun observe(bucketIndex: Int, value: Double) {
+            bucketCounts[bucketIndex]++
+            sum += value
+        }
+
+        @Synchronized
+        fun add(other: HistogramValues) {
+            other.bucketCounts.forEachIndexed { index, count -> bucketCounts[index] += count }
+            sum += other.sum
+        }
+
+        @Synchronized
+        fun set(bucketIndex: Int, count: Long) {
+            bucketCounts[bucketIndex] = count
+        }
+
+        @Synchronized
+        fun setSum(value: Double) {
+            sum = value
+        }
+    }
+
+    companion object {
+        private val seriesOrder = compareBy<Series> { it.labels.entries.joinToString(",") { (key, value) -> "$key=$value" } }
+        private val sampleLineRegex = """^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$""".toRegex()
+        private val labelRegex = """([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)",?""".toRegex()
+
+        // Parses a file previously produced by render(). Samples for families that aren't known, or histograms whose buckets
+        // have changed, are dropped rather than failing, so that changes to the set of metrics don't prevent new values being written.
+        fun parse(text: String): PerformanceMetrics {
+            val metrics = PerformanceMetrics()
+            val cumulativeBuckets = mutableMapOf<Series, MutableMap<Double, Long>>()
+            val sums = mutableMapOf<Series, Double>()
+
+            text.lineSequence()
+                .filterNot { it.isBlank() || it.startsWith("#") }
+                .mapNotNull { sampleLineRegex.matchEntire(it.trim()) }
+                .forEach { match ->
+                    val (name, labelText, valueText) = match.destructured
+                    val value = valueText.toDoubleOrNull() ?: return@forEach
+                    val labels = parseLabels(labelText)
+
+                    val counterFamily = PerformanceMetricFamilies.all.filterIsInstance<CounterFamily>().singleOrNull { it.sampleName == name }
+
+                    if (counterFamily != null) {
+                        metrics.counters[Series(counterFamily.name, labels)] = value
+                        return@forEach
+                    }
+
+                    val histogramFamily = PerformanceMetricFamilies.all.filterIsInstance<HistogramFamily>().singleOrNull { name.startsWith(it.name + "_") } ?: return@forEach
+                    val series = Series(histogramFamily.name, labels - "le")
+
+                    when (name.removePrefix(histogramFamily.name)) {
+                        "_bucket" -> {
+                            val upperBound = labels["le"]?.let { if (it == "+Inf") Double.POSITIVE_INFINITY else it.toDoubleOrNull() } ?: return@forEach
+                            cumulativeBuckets.getOrPut(series) { mutableMapOf() }[upperBound] = value.toLong()
+                        }
+                        "_sum" -> sums[series] = value
+                    }
+                }
+
+            cumulativeBuckets.forEach { (series, buckets) ->
+                val family = PerformanceMetricFamilies.all.filterIsInstance<HistogramFamily>().single { it.name == series.familyName }
+                val expectedBounds = family.buckets + Double.POSITIVE_INFINITY
+
+                if (buckets.keys != expectedBounds.toSet()) {
+                    return@forEach
+                }
+
+                val values = HistogramValues(family.buckets.size)
+                var previousCumulativeCount = 0L
+
+                expectedBounds.forEachIndexed { index, bound ->
+                    val cumulativeCount = buckets.getValue(bound)
+                    values.set(index, cumulativeCount - previousCumulativeCount)
+                    previousCumulativeCount = cumulativeCount
+                }
+
+                values.setSum(sums[series] ?: 0.0)
+                metrics.histograms[series] = values
+            }
+
+            return metrics
+        }
+
+        private fun parseLabels(text: String): Map<String, String> =
+            labelRegex.findAll(text).associate { match -> match.groupValues[1] to unescapeLabelValue(match.groupValues[2]) }
+
+        private fun escapeLabelValue(value: String): String = value
+            .replace("\\", "\\\\")
+            .replace("\"", "\\\"")
+            .replace("\n", "\\n")
+
+        private fun unescapeLabelValue(value: String): String = buildString {
+            var index = 0
+
+            while (index < value.length) {
+                val char = value[index]
+
+                if (char == '\\' && index + 1 < value.length) {
+                    append(if (value[index + 1] == 'n') '\n' else value[index + 1])
+                    index += 2
+                } else {
+                    append(char)
+                    index++
+                }
+            }
+        }
+
+        private fun formatValue(value: Double): String = if (value == Math.floor(value) && !value.isInfinite() && Math.abs(value) < 1e15) value.toLong().toString() else value.toString()
+    }
+}
+
+sealed class PerformanceMetricFamily(val name: String, val help: String)
+
+class CounterFamily(name: String, help: String) : PerformanceMetricFamily(name, help) {
+    val sampleName: String = "${name}_total"
+}
+
+class HistogramFamily(name: String, help: String, val buckets: List<Double> = defaultDurationBucketsInSeconds) : PerformanceMetricFamily(name, help) {
+    fun bucketIndexFor(value: Double): Int = buckets.indexOfFirst { value <= it }.let { if (it == -1) buckets.size else it }
+
+    companion object {
+        val defaultDurationBucketsInSeconds = listOf(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+    }
+}
+
+object PerformanceMetricFamilies {
+    val taskRuns = CounterFamily("batect_task_runs", "Number of tasks run, by task and result.")
+    val taskDuration = HistogramFamily("batect_task_duration_seconds", "Time taken to run each task, including starting and cleaning up dependencies.")
+    val imagePulls = CounterFamily("batect_image_pulls", "Number of images required by tasks, by image and whether the image was pulled, already present or failed to pull.")
+    val imagePullDuration = HistogramFamily("batect_image_pull_duration_seconds", "Time taken to pull images that were not already present.")
+    val imageBuilds = CounterFamily("batect_image_builds", "Number of image builds, by container and result.")
+    val imageBuildDuration = HistogramFamily("batect_image_build_duration_seconds", "Time taken to build images.")
+    val healthWaits = CounterFamily("batect_container_health_waits", "Number of times a task waited for a container to become healthy, by container and result.")
+    val healthWaitDuration = HistogramFamily("batect_container_health_wait_duration_seconds", "Time spent waiting for containers to become healthy.")
+    val cacheMounts = CounterFamily("batect_cache_mounts", "Number of times a cache was mounted into a container, by cache name and cache type.")
+
+    val all: List<PerformanceMetricFamily> = listOf(taskRuns, taskDuration, imagePulls, imagePullDuration, imageBuilds, imageBuildDuration, healthWaits, healthWaitDuration, cacheMounts)
+}
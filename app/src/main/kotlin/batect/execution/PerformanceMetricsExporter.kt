@@ -0,0 +1,118 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.logging.Logger
+import java.nio.channels.FileChannel
+import java.nio.channels.FileLock
+import java.nio.channels.OverlappingFileLockException
+import java.nio.file.Files
+import java.nio.file.Path
+import java.nio.file.StandardCopyOption
+import java.nio.file.StandardOpenOption
+
+// Adds the metrics from a task to those already in the metrics file (if one was requested with --metrics-file).
+//
+// The file is replaced atomically so that anything scraping it (eg. the node_exporter textfile collector) never sees a partially
+// written file, and a lock file alongside it prevents concurrent invocations of Batect from losing each other's values.
+// Failing to write metrics never fails the task: we log a warning and carry on.
+class PerformanceMetricsExporter(
+    private val metricsFile: Path?,
+    private val logger: Logger,
+    private val lockAttempts: Int = 25,
+    private val lockRetryIntervalMilliseconds: Long = 20,
+) {
+    fun export(metrics: PerformanceMetrics) {
+        if (metricsFile == null || metrics.isEmpty) {
+            return
+        }
+
+        try {
+            exportTo(metricsFile, metrics)
+        } catch (t: Throwable) {
+            logger.warn {
+                message("Could not write metrics file.")
+                exception(t)
+                data("path", metricsFile)
+            }
+        }
+    }
+
+    private fun exportTo(path: Path, metrics: PerformanceMetrics) {
+        val directory = path.toAbsolutePath().parent
+        Files.createDirectories(directory)
+
+        val lockPath = directory.resolve("${path.fileName}.lock")
+
+        FileChannel.open(lockPath, StandardOpenOption.CREATE, StandardOpenOption.WRITE).use { channel ->
+            val lock = acquireLock(channel)
+
+            if (lock == null) {
+                logger.warn {
+                    message("Could not acquire lock on metrics file in time, not writing metrics.")
+                    data("path", path)
+                }
+
+                return
+            }
+
+            lock.use {
+                val combined = readExisting(path)
+                combined.add(metrics)
+
+                val temporaryPath = directory.resolve("${path.fileName}.tmp")
+                Files.write(temporaryPath, combined.render().toByteArray(Charsets.UTF_8))
+                Files.move(temporaryPath, path, StandardCopyOption.REPLACE_EXISTING, StandardCopyOption.ATOMIC_MOVE)
+            }
+        }
+
+        logger.info {
+            message("Wrote metrics file.")
+            data("path", path)
+        }
+    }
+
+    private fun readExisting(path: Path): PerformanceMetrics {
+        if (!Files.exists(path)) {
+            return PerformanceMetrics()
+        }
+
+        return PerformanceMetrics.parse(Files.readAllBytes(path).toString(Charsets.UTF_8))
+    }
+
+    private fun acquireLock(channel: FileChannel): FileLock? {
+        repeat(lockAttempts) { attempt ->
+            val lock = tryLock(channel)
+
+            if (lock != null) {
+                return lock
+            }
+
+            if (attempt < lockAttempts - 1) {
+                Thread.sleep(lockRetryIntervalMilliseconds)
+            }
+        }
+
+        return null
+    }
+
+    private fun tryLock(channel: FileChannel): FileLock? = try {
+        channel.tryLock()
+    } catch (e: OverlappingFileLockException) {
+        null
+    }
+}
@@ -23,5 +23,6 @@ sealed class PostTaskManualCleanup {
         data class DueToCleanupFailure(val manualCleanupCommands: List<String>) : PostTaskManualCleanup.Required()
         data class DueToTaskFailureWithCleanupDisabled(val manualCleanupCommands: List<String>) : PostTaskManualCleanup.Required()
         data class DueToTaskSuccessWithCleanupDisabled(val manualCleanupCommands: List<String>) : PostTaskManualCleanup.Required()
+        data class DueToDeferredCleanupFailure(val manualCleanupCommands: List<String>) : PostTaskManualCleanup.Required()
     }
 }
@@ -26,9 +26,14 @@ data class RunOptions(
     constructor(isMainTask: Boolean, commandLineOptions: CommandLineOptions) : this(
         isMainTask,
         when (isMainTask) {
-            true -> if (commandLineOptions.disableCleanupAfterSuccess) CleanupOption.DontCleanup else CleanupOption.Cleanup
-            false -> CleanupOption.Cleanup
+            true -> if (commandLineOptions.disableCleanupAfterSuccess) CleanupOption.DontCleanup else cleanupOption(isMainTask, commandLineOptions)
+            false -> cleanupOption(isMainTask, commandLineOptions)
         },
-        if (commandLineOptions.disableCleanupAfterFailure) CleanupOption.DontCleanup else CleanupOption.Cleanup,
+        if (commandLineOptions.disableCleanupAfterFailure) CleanupOption.DontCleanup else cleanupOption(isMainTask, commandLineOptions),
     )
 }
+
+// Cleanup is only ever deferred for the main task: a prerequisite's containers must be stopped before the next task starts,
+// otherwise they could still be holding ports or other resources the next task needs.
+private fun cleanupOption(isMainTask: Boolean, commandLineOptions: CommandLineOptions): CleanupOption =
+    if (commandLineOptions.deferCleanup && isMainTask) CleanupOption.DeferCleanup else CleanupOption.Cleanup
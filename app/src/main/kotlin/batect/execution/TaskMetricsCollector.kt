@@ -0,0 +1,130 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.config.CacheMount
+import batect.config.Container
+import batect.config.PullImage
+import batect.execution.model.events.ContainerBecameHealthyEvent
+import batect.execution.model.events.ContainerCreatedEvent
+import batect.execution.model.events.ContainerDidNotBecomeHealthyEvent
+import batect.execution.model.events.ImageBuildFailedEvent
+import batect.execution.model.events.ImageBuiltEvent
+import batect.execution.model.events.ImagePullFailedEvent
+import batect.execution.model.events.ImagePulledEvent
+import batect.execution.model.events.StepStartingEvent
+import batect.execution.model.events.TaskEvent
+import batect.execution.model.events.TaskEventSink
+import batect.execution.model.steps.BuildImageStep
+import batect.execution.model.steps.PullImageStep
+import batect.execution.model.steps.WaitForContainerToBecomeHealthyStep
+import java.time.Duration
+import java.util.concurrent.ConcurrentHashMap
+
+// Derives performance metrics for a single task from the events posted during its execution.
+class TaskMetricsCollector(
+    private val enabled: Boolean,
+    private val cacheType: CacheType,
+    private val timeSource: () -> Long = System::nanoTime,
+) : TaskEventSink {
+    val metrics = PerformanceMetrics()
+
+    private val imagePullStartTimes = ConcurrentHashMap<PullImage, Long>()
+    private val imageBuildStartTimes = ConcurrentHashMap<Container, Long>()
+    private val healthWaitStartTimes = ConcurrentHashMap<Container, Long>()
+
+    override fun postEvent(event: TaskEvent) {
+        if (!enabled) {
+            return
+        }
+
+        when (event) {
+            is StepStartingEvent -> onStepStarting(event)
+            is ImagePulledEvent -> onImagePullFinished(event.source, if (event.alreadyPresent) "already_present" else "pulled", recordDuration = !event.alreadyPresent)
+            is ImagePullFailedEvent -> onImagePullFinished(event.source, "failed", recordDuration = false)
+            is ImageBuiltEvent -> onImageBuildFinished(event.container, "succeeded")
+            is ImageBuildFailedEvent -> onImageBuildFinished(event.container, "failed")
+            is ContainerBecameHealthyEvent -> onHealthWaitFinished(event.container, "healthy")
+            is ContainerDidNotBecomeHealthyEvent -> onHealthWaitFinished(event.container, "unhealthy")
+            is ContainerCreatedEvent -> onContainerCreated(event.container)
+            else -> {}
+        }
+    }
+
+    fun onTaskFinished(taskName: String, result: TaskRunOutcome, duration: Duration) {
+        if (!enabled) {
+            return
+        }
+
+        metrics.increment(PerformanceMetricFamilies.taskRuns, mapOf("task" to taskName, "result" to result.label))
+        metrics.observe(PerformanceMetricFamilies.taskDuration, mapOf("task" to taskName), duration.toNanos() / nanosecondsPerSecond)
+    }
+
+    private fun onStepStarting(event: StepStartingEvent) {
+        when (val step = event.step) {
+            is PullImageStep -> imagePullStartTimes[step.source] = timeSource()
+            is BuildImageStep -> imageBuildStartTimes[step.container] = timeSource()
+            is WaitForContainerToBecomeHealthyStep -> healthWaitStartTimes[step.container] = timeSource()
+            else -> {}
+        }
+    }
+
+    private fun onImagePullFinished(source: PullImage, outcome: String, recordDuration: Boolean) {
+        val startTime = imagePullStartTimes.remove(source)
+        metrics.increment(PerformanceMetricFamilies.imagePulls, mapOf("image" to source.imageName, "outcome" to outcome))
+
+        if (recordDuration && startTime != null) {
+            metrics.observe(PerformanceMetricFamilies.imagePullDuration, mapOf("image" to source.imageName), secondsSince(startTime))
+        }
+    }
+
+    private fun onImageBuildFinished(container: Container, result: String) {
+        val startTime = imageBuildStartTimes.remove(container)
+        metrics.increment(PerformanceMetricFamilies.imageBuilds, mapOf("container" to container.name, "result" to result))
+
+        if (startTime != null) {
+            metrics.observe(PerformanceMetricFamilies.imageBuildDuration, mapOf("container" to container.name), secondsSince(startTime))
+        }
+    }
+
+    private fun onHealthWaitFinished(container: Container, result: String) {
+        val startTime = healthWaitStartTimes.remove(container)
+        metrics.increment(PerformanceMetricFamilies.healthWaits, mapOf("container" to container.name, "result" to result))
+
+        if (startTime != null) {
+            metrics.observe(PerformanceMetricFamilies.healthWaitDuration, mapOf("container" to container.name), secondsSince(startTime))
+        }
+    }
+
+    private fun onContainerCreated(container: Container) {
+        container.volumeMounts.filterIsInstance<CacheMount>().forEach { mount ->
+            metrics.increment(PerformanceMetricFamilies.cacheMounts, mapOf("cache" to mount.name, "cache_type" to cacheType.name.lowercase()))
+        }
+    }
+
+    private fun secondsSince(startTime: Long): Double = (timeSource() - startTime) / nanosecondsPerSecond
+
+    companion object {
+        private const val nanosecondsPerSecond = 1_000_000_000.0
+    }
+}
+
+enum class TaskRunOutcome(val label: String) {
+    Succeeded("succeeded"),
+    NonZeroExitCode("non_zero_exit_code"),
+    Failed("failed"),
+}
@@ -17,7 +17,10 @@
 package batect.execution
 
 import batect.config.Container
+import batect.config.ExpressionEvaluationContext
+import batect.config.MemoisationStatistics
 import batect.config.Task
+import batect.ioc.TaskKodein
 import batect.ioc.TaskKodeinFactory
 import batect.logging.Logger
 import batect.telemetry.TelemetryCaptor
@@ -25,6 +28,7 @@ import batect.telemetry.TelemetrySpanBuilder
 import batect.telemetry.addSpan
 import batect.ui.Console
 import batect.ui.EventLogger
+import batect.ui.containerio.ContainerOutputCapture
 import batect.ui.text.Text
 import org.kodein.di.instance
 import java.time.Duration
@@ -35,6 +39,8 @@ data class TaskRunner(
     private val interruptionTrap: InterruptionTrap,
     private val console: Console,
     private val telemetryCaptor: TelemetryCaptor,
+    private val deferredCleanupScheduler: DeferredCleanupScheduler,
+    private val performanceMetricsExporter: PerformanceMetricsExporter,
     private val logger: Logger,
 ) {
     fun run(task: Task, runOptions: RunOptions): TaskRunResult {
@@ -65,6 +71,8 @@ data class TaskRunner(
         val startTime = Instant.now()
 
         taskKodeinFactory.create(task, runOptions).use { kodein ->
+            warnAboutReadinessChecksThatCannotRun(kodein)
+
             val eventLogger = kodein.instance<EventLogger>()
             eventLogger.onTaskStarting(task.name)
             telemetrySpanBuilder.addAttribute("containersInTask", kodein.instance<ContainerDependencyGraph>().allContainers.size)
@@ -76,8 +84,10 @@ data class TaskRunner(
                 data("taskName", task.name)
             }
 
-            interruptionTrap.trapInterruptions(executionManager).use {
-                executionManager.run()
+            kodein.instance<ContainerOutputCapture>().use {
+                interruptionTrap.trapInterruptions(executionManager).use {
+                    executionManager.run()
+                }
             }
 
             val finishTime = Instant.now()
@@ -85,23 +95,65 @@ data class TaskRunner(
             logger.info {
                 message("Task execution completed.")
                 data("taskName", task.name)
+                data("expressionEvaluationStatistics", kodein.instance<ExpressionEvaluationContext>().evaluationStatistics, MemoisationStatistics.serializer())
             }
 
             val stateMachine = kodein.instance<TaskStateMachine>()
             val containers = kodein.instance<ContainerDependencyGraph>().allContainers
+            val deferredCleanupManualCleanup = scheduleDeferredCleanup(stateMachine)
+            val duration = Duration.between(startTime, finishTime)
 
             if (stateMachine.taskHasFailed) {
-                return TaskRunResult(onTaskFailed(eventLogger, task, stateMachine), containers)
+                exportMetrics(kodein.instance(), task, TaskRunOutcome.Failed, duration)
+
+                return TaskRunResult(onTaskFailed(eventLogger, task, stateMachine, deferredCleanupManualCleanup), containers)
             }
 
-            val duration = Duration.between(startTime, finishTime)
+            val outcome = if (stateMachine.taskExitCode == 0L) TaskRunOutcome.Succeeded else TaskRunOutcome.NonZeroExitCode
+            exportMetrics(kodein.instance(), task, outcome, duration)
+
+            return TaskRunResult(onTaskSucceeded(eventLogger, task, stateMachine, duration, runOptions, deferredCleanupManualCleanup), containers)
+        }
+    }
+
+    private fun warnAboutReadinessChecksThatCannotRun(kodein: TaskKodein) {
+        val containersWithReadinessChecks = kodein.instance<ContainerDependencyGraph>().allContainers
+            .filter { it.readinessCheckConfig != null }
+            .sortedBy { it.name }
+
+        if (containersWithReadinessChecks.isEmpty()) {
+            return
+        }
+
+        val reason = kodein.instance<ContainerReadinessChecker>().reasonChecksCannotRun ?: return
 
-            return TaskRunResult(onTaskSucceeded(eventLogger, task, stateMachine, duration, runOptions), containers)
+        containersWithReadinessChecks.forEach { container ->
+            console.println(Text.yellow(Text("The readiness check for ") + Text.bold(container.name) + Text(" will be skipped and the image's health check used instead, because $reason")))
         }
     }
 
-    private fun onTaskFailed(eventLogger: EventLogger, task: Task, stateMachine: TaskStateMachine): Int {
-        eventLogger.onTaskFailed(task.name, stateMachine.postTaskManualCleanup, stateMachine.allEvents)
+    private fun exportMetrics(collector: TaskMetricsCollector, task: Task, outcome: TaskRunOutcome, duration: Duration) {
+        collector.onTaskFinished(task.name, outcome, duration)
+        performanceMetricsExporter.export(collector.metrics)
+    }
+
+    private fun scheduleDeferredCleanup(stateMachine: TaskStateMachine): PostTaskManualCleanup {
+        val deferredCleanup = stateMachine.deferredCleanup ?: return PostTaskManualCleanup.NotRequired
+
+        logger.info {
+            message("Scheduling deferred cleanup.")
+        }
+
+        return deferredCleanupScheduler.schedule(deferredCleanup)
+    }
+
+    private fun onTaskFailed(eventLogger: EventLogger, task: Task, stateMachine: TaskStateMachine, deferredCleanupManualCleanup: PostTaskManualCleanup): Int {
+        val postTaskManualCleanup = when (deferredCleanupManualCleanup) {
+            is PostTaskManualCleanup.Required -> deferredCleanupManualCleanup
+            is PostTaskManualCleanup.NotRequired -> stateMachine.postTaskManualCleanup
+        }
+
+        eventLogger.onTaskFailed(task.name, postTaskManualCleanup, stateMachine.allEvents)
 
         logger.warn {
             message("Task execution failed.")
@@ -111,10 +163,21 @@ data class TaskRunner(
         return -1
     }
 
-    private fun onTaskSucceeded(eventLogger: EventLogger, task: Task, stateMachine: TaskStateMachine, duration: Duration, runOptions: RunOptions): Int {
+    private fun onTaskSucceeded(
+        eventLogger: EventLogger,
+        task: Task,
+        stateMachine: TaskStateMachine,
+        duration: Duration,
+        runOptions: RunOptions,
+        deferredCleanupManualCleanup: PostTaskManualCleanup,
+    ): Int {
         val exitCode = stateMachine.taskExitCode
         eventLogger.onTaskFinished(task.name, exitCode, duration)
 
+        if (deferredCleanupManualCleanup is PostTaskManualCleanup.Required) {
+            eventLogger.onTaskFinishedWithCleanupDisabled(deferredCleanupManualCleanup, stateMachine.allEvents)
+        }
+
         logger.info {
             message("Task execution completed normally.")
             data("taskName", task.name)
@@ -50,6 +50,9 @@ class TaskStateMachine(
     var postTaskManualCleanup: PostTaskManualCleanup = PostTaskManualCleanup.NotRequired
         private set
 
+    var deferredCleanup: DeferredCleanup? = null
+        private set
+
     private val events: MutableSet<TaskEvent> = mutableSetOf()
     private val lock = ReentrantLock()
     private var currentStage: Stage = runStagePlanner.createStage()
@@ -141,6 +144,7 @@ class TaskStateMachine(
 
         val cleanupStage = cleanupStagePlanner.createStage(events, cleanupType)
         currentStage = cleanupStage
+        deferredCleanup = cleanupStage.deferredCleanup
 
         if (taskHasFailed && runOptions.behaviourAfterFailure == CleanupOption.DontCleanup) {
             postTaskManualCleanup = PostTaskManualCleanup.Required.DueToTaskFailureWithCleanupDisabled(cleanupStage.manualCleanupCommands)
@@ -74,7 +74,7 @@ class VolumeMountResolver(
 
     private fun evaluateLocalPath(mount: LocalMount): String {
         try {
-            return mount.localPath.evaluate(expressionEvaluationContext)
+            return expressionEvaluationContext.evaluate(mount.localPath)
         } catch (e: ExpressionEvaluationException) {
             throw VolumeMountResolutionException("Could not resolve volume mount path: expression '${mount.localPath.originalExpression}' could not be evaluated: ${e.message}", e)
         }
@@ -72,7 +72,7 @@ data class ImageBuildProgressEvent(val container: Container, val buildProgress:
 data class ImageBuiltEvent(val container: Container, val image: ImageReference) : TaskEvent()
 
 @Serializable
-data class ImagePulledEvent(val source: PullImage, val image: ImageReference) : TaskEvent()
+data class ImagePulledEvent(val source: PullImage, val image: ImageReference, val alreadyPresent: Boolean = false) : TaskEvent()
 
 @Serializable
 data class ImagePullProgressEvent(val source: PullImage, val progress: AggregatedImagePullProgress) : TaskEvent(isInformationalEvent = true)
@@ -97,6 +97,9 @@ sealed class TaskNetworkReadyEvent : TaskEvent() {
 @Serializable
 data class TaskNetworkCreatedEvent(override val network: NetworkReference) : TaskNetworkReadyEvent()
 
+@Serializable
+data class TaskNetworkLeasedEvent(override val network: NetworkReference) : TaskNetworkReadyEvent()
+
 @Serializable
 data class CustomTaskNetworkCheckedEvent(override val network: NetworkReference) : TaskNetworkReadyEvent()
 
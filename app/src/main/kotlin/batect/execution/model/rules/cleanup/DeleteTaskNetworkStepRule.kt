@@ -37,6 +37,7 @@ import kotlinx.serialization.UseSerializers
 data class DeleteTaskNetworkStepRule(
     val network: NetworkReference,
     @Serializable(with = ContainerNameSetSerializer::class) val containersThatMustBeRemovedFirst: Set<Container>,
+    val leasedFromPool: Boolean = false,
 ) : CleanupTaskStepRule() {
     override fun evaluate(pastEvents: Set<TaskEvent>): TaskStepRuleEvaluationResult {
         val removedContainers = pastEvents
@@ -50,7 +51,9 @@ data class DeleteTaskNetworkStepRule(
         return TaskStepRuleEvaluationResult.NotReady
     }
 
-    override val manualCleanupCommand: String = "docker network rm ${network.id}"
+    // A network leased from the task network pool must not be deleted by hand: the pool recreates it once its containers
+    // have been removed.
+    override val manualCleanupCommand: String? = if (leasedFromPool) null else "docker network rm ${network.id}"
 
     @Transient
     override val manualCleanupSortOrder: ManualCleanupSortOrder = ManualCleanupSortOrder.DeleteTaskNetwork
@@ -16,9 +16,14 @@
 
 package batect.execution.model.stages
 
+import batect.execution.DeferredCleanup
 import batect.execution.model.events.TaskEvent
 import batect.execution.model.rules.cleanup.CleanupTaskStepRule
 
-class CleanupStage(val rules: Set<CleanupTaskStepRule>, val manualCleanupCommands: List<String>) : Stage(rules) {
+class CleanupStage(
+    val rules: Set<CleanupTaskStepRule>,
+    val manualCleanupCommands: List<String>,
+    val deferredCleanup: DeferredCleanup? = null,
+) : Stage(rules) {
     override fun determineIfStageIsComplete(pastEvents: Set<TaskEvent>, stepsStillRunning: Boolean) = !stepsStillRunning
 }
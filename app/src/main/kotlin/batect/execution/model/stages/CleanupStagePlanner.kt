@@ -20,10 +20,13 @@ import batect.config.Container
 import batect.docker.DockerContainer
 import batect.execution.CleanupOption
 import batect.execution.ContainerDependencyGraph
+import batect.execution.DeferredCleanup
 import batect.execution.model.events.ContainerCreatedEvent
 import batect.execution.model.events.ContainerStartedEvent
 import batect.execution.model.events.TaskEvent
 import batect.execution.model.events.TaskNetworkCreatedEvent
+import batect.execution.model.events.TaskNetworkLeasedEvent
+import batect.execution.model.events.TaskNetworkReadyEvent
 import batect.execution.model.events.data
 import batect.execution.model.rules.cleanup.CleanupTaskStepRule
 import batect.execution.model.rules.cleanup.DeleteTaskNetworkStepRule
@@ -33,6 +36,7 @@ import batect.execution.model.rules.data
 import batect.logging.Logger
 import batect.primitives.filterToSet
 import batect.primitives.mapToSet
+import kotlinx.serialization.builtins.nullable
 
 class CleanupStagePlanner(
     private val graph: ContainerDependencyGraph,
@@ -58,14 +62,21 @@ class CleanupStagePlanner(
         val rules = when (cleanupType) {
             CleanupOption.DontCleanup -> stopContainerRules
             CleanupOption.Cleanup -> allRules
+            CleanupOption.DeferCleanup -> emptySet()
         }
 
-        val stage = CleanupStage(rules, manualCleanupCommands)
+        val deferredCleanup = when (cleanupType) {
+            CleanupOption.DeferCleanup -> deferredCleanup(pastEvents, containersCreated, manualCleanupCommands)
+            else -> null
+        }
+
+        val stage = CleanupStage(rules, manualCleanupCommands, deferredCleanup)
 
         logger.info {
             message("Created cleanup stage.")
             data("rules", stage.rules)
             data("manualCleanupCommands", stage.manualCleanupCommands)
+            data("deferredCleanup", stage.deferredCleanup, DeferredCleanup.serializer().nullable)
             data("pastEvents", pastEvents)
         }
 
@@ -74,11 +85,12 @@ class CleanupStagePlanner(
 
     private fun networkCleanupRules(pastEvents: Set<TaskEvent>, containersCreated: Map<Container, DockerContainer>): Set<DeleteTaskNetworkStepRule> =
         pastEvents
-            .filterIsInstance<TaskNetworkCreatedEvent>()
+            .filterIsInstance<TaskNetworkReadyEvent>()
+            .filter { it is TaskNetworkCreatedEvent || it is TaskNetworkLeasedEvent }
             .mapToSet {
                 val containersThatMustBeRemovedFirst = containersCreated.keys.toSet()
 
-                DeleteTaskNetworkStepRule(it.network, containersThatMustBeRemovedFirst)
+                DeleteTaskNetworkStepRule(it.network, containersThatMustBeRemovedFirst, leasedFromPool = it is TaskNetworkLeasedEvent)
             }
 
     private fun stopContainerRules(containersCreated: Map<Container, DockerContainer>, containersStarted: Set<Container>): Set<StopContainerStepRule> =
@@ -99,6 +111,18 @@ class CleanupStagePlanner(
                 RemoveContainerStepRule(container, dockerContainer, containerWasStarted)
             }
 
+    private fun deferredCleanup(pastEvents: Set<TaskEvent>, containersCreated: Map<Container, DockerContainer>, manualCleanupCommands: List<String>): DeferredCleanup? {
+        val containerIds = containersCreated.values.map { it.reference.id }.sorted()
+        val networkIds = pastEvents.filterIsInstance<TaskNetworkCreatedEvent>().map { it.network.id }
+        val pooledNetworkIds = pastEvents.filterIsInstance<TaskNetworkLeasedEvent>().map { it.network.id }
+
+        if (containerIds.isEmpty() && networkIds.isEmpty() && pooledNetworkIds.isEmpty()) {
+            return null
+        }
+
+        return DeferredCleanup(containerIds, networkIds, manualCleanupCommands, pooledNetworkIds = pooledNetworkIds)
+    }
+
     private fun manualCleanupCommands(allRules: Set<CleanupTaskStepRule>): List<String> = allRules
         .map { it to it.manualCleanupCommand }
         .filter { (_, command) -> command != null }
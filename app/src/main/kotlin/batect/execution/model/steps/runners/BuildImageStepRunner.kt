@@ -26,6 +26,8 @@ import batect.config.ExpressionEvaluationException
 import batect.config.FileSecret
 import batect.config.SSHAgent
 import batect.config.TaskSpecialisedConfiguration
+import batect.docker.BuildContextUploadMonitor
+import batect.docker.BuildContextUploadStatistics
 import batect.docker.ImageBuildProgressAggregator
 import batect.dockerclient.BuilderVersion
 import batect.dockerclient.DockerClient
@@ -52,6 +54,7 @@ import batect.primitives.CancellationContext
 import batect.primitives.runBlocking
 import batect.proxies.ProxyEnvironmentVariablesProvider
 import batect.telemetry.TelemetryCaptor
+import batect.telemetry.TelemetrySpanBuilder
 import batect.telemetry.addSpan
 import batect.ui.containerio.ContainerIOStreamingOptions
 import okio.Buffer
@@ -82,17 +85,25 @@ class BuildImageStepRunner(
             val uiStdout = ioStreamingOptions.stdoutForImageBuild(step.container)
             val combinedStdout = if (uiStdout == null) stdoutBuffer else Tee(uiStdout, stdoutBuffer)
 
-            val image = telemetryCaptor.addSpan("BuildImage") {
-                cancellationContext.runBlocking {
-                    val reporter = ImageBuildProgressAggregator()
+            val image = telemetryCaptor.addSpan("BuildImage") { span ->
+                val uploadMonitor = BuildContextUploadMonitor()
 
-                    dockerClient.buildImage(spec, SinkTextOutput(combinedStdout)) { event ->
-                        val progressUpdate = reporter.processProgressUpdate(event)
+                try {
+                    cancellationContext.runBlocking {
+                        val reporter = ImageBuildProgressAggregator()
 
-                        if (progressUpdate != null) {
-                            eventSink.postEvent(ImageBuildProgressEvent(step.container, progressUpdate))
+                        dockerClient.buildImage(spec, SinkTextOutput(combinedStdout)) { event ->
+                            uploadMonitor.processProgressUpdate(event)
+
+                            val progressUpdate = reporter.processProgressUpdate(event)
+
+                            if (progressUpdate != null) {
+                                eventSink.postEvent(ImageBuildProgressEvent(step.container, progressUpdate))
+                            }
                         }
                     }
+                } finally {
+                    reportBuildContextUpload(step, uploadMonitor.statistics, span)
                 }
             }
 
@@ -125,6 +136,23 @@ class BuildImageStepRunner(
         }
     }
 
+    private fun reportBuildContextUpload(step: BuildImageStep, statistics: BuildContextUploadStatistics?, span: TelemetrySpanBuilder) {
+        if (statistics == null) {
+            return
+        }
+
+        span.addAttribute("buildContextBytes", statistics.bytesUploaded.coerceAtMost(Int.MAX_VALUE.toLong()).toInt())
+        span.addAttribute("buildContextUploadDurationMilliseconds", statistics.duration.toMillis().coerceAtMost(Int.MAX_VALUE.toLong()).toInt())
+
+        logger.info {
+            message("Build context uploaded.")
+            data("container", step.container.name)
+            data("bytesUploaded", statistics.bytesUploaded)
+            data("durationMilliseconds", statistics.duration.toMillis())
+            statistics.bytesPerSecond?.let { data("bytesPerSecond", it) }
+        }
+    }
+
     private fun createImageBuildSpec(step: BuildImageStep): ImageBuildSpec {
         val buildConfig = step.container.imageSource as BuildImage
         val pathResolver = pathResolverFactory.createResolver(buildConfig.pathResolutionContext)
@@ -173,7 +201,7 @@ class BuildImageStepRunner(
 
     private fun evaluateBuildDirectory(expression: Expression): String {
         try {
-            return expression.evaluate(expressionEvaluationContext)
+            return expressionEvaluationContext.evaluate(expression)
         } catch (e: ExpressionEvaluationException) {
             throw ImageBuildFailedException("The value for the build directory cannot be evaluated: ${e.message}", e)
         }
@@ -202,7 +230,7 @@ class BuildImageStepRunner(
 
     private fun evaluateBuildArgValue(name: String, expression: Expression): String {
         try {
-            return expression.evaluate(expressionEvaluationContext)
+            return expressionEvaluationContext.evaluate(expression)
         } catch (e: ExpressionEvaluationException) {
             throw ImageBuildFailedException("The value for the build arg '$name' cannot be evaluated: ${e.message}", e)
         }
@@ -216,7 +244,7 @@ class BuildImageStepRunner(
 
     private fun resolveSSHAgentPath(agent: SSHAgent, pathExpression: Expression, index: Int, pathResolver: PathResolver): Path {
         try {
-            val evaluated = pathExpression.evaluate(expressionEvaluationContext)
+            val evaluated = expressionEvaluationContext.evaluate(pathExpression)
 
             when (val resolved = pathResolver.resolve(evaluated)) {
                 is PathResolutionResult.Resolved -> return resolved.absolutePath
@@ -236,7 +264,7 @@ class BuildImageStepRunner(
 
     private fun resolveFileSecretPath(id: String, secret: FileSecret, pathResolver: PathResolver): Path {
         try {
-            val evaluated = secret.sourceFile.evaluate(expressionEvaluationContext)
+            val evaluated = expressionEvaluationContext.evaluate(secret.sourceFile)
 
             when (val resolved = pathResolver.resolve(evaluated)) {
                 is PathResolutionResult.Resolved -> when (resolved.pathType) {
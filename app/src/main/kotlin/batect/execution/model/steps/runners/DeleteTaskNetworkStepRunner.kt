@@ -16,6 +16,7 @@
 
 package batect.execution.model.steps.runners
 
+import batect.docker.TaskNetworkPool
 import batect.dockerclient.DockerClient
 import batect.dockerclient.NetworkDeletionFailedException
 import batect.dockerclient.NetworkReference
@@ -28,9 +29,15 @@ import kotlinx.coroutines.runBlocking
 
 class DeleteTaskNetworkStepRunner(
     private val client: DockerClient,
+    private val networkPool: TaskNetworkPool,
     private val logger: Logger,
 ) {
     fun run(step: DeleteTaskNetworkStep, eventSink: TaskEventSink) {
+        if (networkPool.release(step.network)) {
+            eventSink.postEvent(TaskNetworkDeletedEvent)
+            return
+        }
+
         try {
             runBlocking {
                 client.deleteNetwork(NetworkReference(step.network.id))
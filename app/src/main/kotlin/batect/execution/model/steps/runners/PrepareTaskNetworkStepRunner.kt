@@ -19,6 +19,7 @@ package batect.execution.model.steps.runners
 import batect.cli.CommandLineOptions
 import batect.docker.DockerContainerType
 import batect.docker.DockerResourceNameGenerator
+import batect.docker.TaskNetworkPool
 import batect.dockerclient.DockerClient
 import batect.dockerclient.DockerClientException
 import batect.dockerclient.NetworkCreationFailedException
@@ -27,6 +28,7 @@ import batect.execution.model.events.CustomTaskNetworkCheckedEvent
 import batect.execution.model.events.TaskEventSink
 import batect.execution.model.events.TaskNetworkCreatedEvent
 import batect.execution.model.events.TaskNetworkCreationFailedEvent
+import batect.execution.model.events.TaskNetworkLeasedEvent
 import batect.logging.Logger
 import kotlinx.coroutines.runBlocking
 
@@ -35,6 +37,7 @@ class PrepareTaskNetworkStepRunner(
     private val containerType: DockerContainerType,
     private val client: DockerClient,
     private val commandLineOptions: CommandLineOptions,
+    private val networkPool: TaskNetworkPool,
     private val logger: Logger,
 ) {
     fun run(eventSink: TaskEventSink) {
@@ -47,6 +50,13 @@ class PrepareTaskNetworkStepRunner(
 
     private fun createNewNetwork(eventSink: TaskEventSink) {
         try {
+            val pooledNetwork = networkPool.lease()
+
+            if (pooledNetwork != null) {
+                eventSink.postEvent(TaskNetworkLeasedEvent(pooledNetwork))
+                return
+            }
+
             val driver = when (containerType) {
                 DockerContainerType.Linux -> "bridge"
                 DockerContainerType.Windows -> "nat"
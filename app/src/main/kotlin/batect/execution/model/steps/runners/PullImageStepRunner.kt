@@ -37,6 +37,15 @@ class PullImageStepRunner(
 ) {
     fun run(step: PullImageStep, eventSink: TaskEventSink) {
         try {
+            val existingImage = cancellationContext.runBlocking {
+                findExistingImage(step.source)
+            }
+
+            if (existingImage != null) {
+                eventSink.postEvent(ImagePulledEvent(step.source, existingImage, alreadyPresent = true))
+                return
+            }
+
             val image = cancellationContext.runBlocking {
                 pullImage(step.source, eventSink)
             }
@@ -53,15 +62,15 @@ class PullImageStepRunner(
         }
     }
 
-    private suspend fun pullImage(source: PullImage, eventSink: TaskEventSink): ImageReference {
-        if (!source.imagePullPolicy.forciblyPull) {
-            val existingImage = dockerClient.getImage(source.imageName)
-
-            if (existingImage != null) {
-                return existingImage
-            }
+    private suspend fun findExistingImage(source: PullImage): ImageReference? {
+        if (source.imagePullPolicy.forciblyPull) {
+            return null
         }
 
+        return dockerClient.getImage(source.imageName)
+    }
+
+    private suspend fun pullImage(source: PullImage, eventSink: TaskEventSink): ImageReference {
         val reporter = ImagePullProgressAggregator()
 
         return dockerClient.pullImage(source.imageName) { event ->
@@ -39,6 +39,7 @@ class RunContainerStepRunner(
     fun run(step: RunContainerStep, eventSink: TaskEventSink) {
         try {
             val stdout = ioStreamingOptions.stdoutForContainer(step.container)
+            val stderr = ioStreamingOptions.stderrForContainer(step.container)
             val stdin = ioStreamingOptions.stdinForContainer(step.container)
 
             cancellationContext.runBlocking {
@@ -53,7 +54,7 @@ class RunContainerStepRunner(
                 val exitCode = client.run(
                     step.dockerContainer.reference,
                     stdout,
-                    stdout,
+                    stderr,
                     stdin,
                     startedNotification,
                 )
@@ -16,42 +16,56 @@
 
 package batect.execution.model.steps.runners
 
+import batect.config.ReadinessCheckConfig
+import batect.config.ReadinessCheckType
 import batect.docker.DockerContainer
 import batect.dockerclient.DockerClient
 import batect.dockerclient.DockerClientException
 import batect.dockerclient.Event
 import batect.dockerclient.EventHandlerAction
+import batect.execution.ContainerReadinessChecker
+import batect.execution.ReadinessCheckResult
 import batect.execution.model.events.ContainerBecameHealthyEvent
 import batect.execution.model.events.ContainerDidNotBecomeHealthyEvent
+import batect.execution.model.events.TaskEvent
 import batect.execution.model.events.TaskEventSink
 import batect.execution.model.steps.WaitForContainerToBecomeHealthyStep
 import batect.logging.Logger
 import batect.os.SystemInfo
 import batect.primitives.CancellationContext
 import batect.primitives.runBlocking
+import batect.telemetry.TelemetryCaptor
+import batect.telemetry.addSpan
+import kotlinx.datetime.Clock
 import kotlinx.datetime.Instant
 
 class WaitForContainerToBecomeHealthyStepRunner(
     private val dockerClient: DockerClient,
     private val cancellationContext: CancellationContext,
     private val systemInfo: SystemInfo,
+    private val readinessChecker: ContainerReadinessChecker,
+    private val telemetryCaptor: TelemetryCaptor,
     private val logger: Logger,
 ) {
     fun run(step: WaitForContainerToBecomeHealthyStep, eventSink: TaskEventSink) {
         try {
-            cancellationContext.runBlocking {
-                if (!checkIfContainerHasHealthCheck(step.dockerContainer)) {
-                    eventSink.postEvent(ContainerBecameHealthyEvent(step.container))
-                    return@runBlocking
+            telemetryCaptor.addSpan("WaitForContainerToBecomeHealthy") { span ->
+                val startTime = Clock.System.now()
+                val outcome = cancellationContext.runBlocking { waitForContainer(step) }
+                val duration = Clock.System.now() - startTime
+
+                span.addAttribute("readinessCheckType", outcome.checkType)
+                span.addAttribute("becameHealthy", outcome.event is ContainerBecameHealthyEvent)
+
+                logger.info {
+                    message("Finished waiting for container to become healthy.")
+                    data("container", step.container.name)
+                    data("readinessCheckType", outcome.checkType)
+                    data("becameHealthy", outcome.event is ContainerBecameHealthyEvent)
+                    data("durationInMilliseconds", duration.inWholeMilliseconds)
                 }
 
-                val event = when (waitForHealthStatus(step.dockerContainer)) {
-                    HealthStatus.BecameHealthy -> ContainerBecameHealthyEvent(step.container)
-                    HealthStatus.BecameUnhealthy -> ContainerDidNotBecomeHealthyEvent(step.container, containerBecameUnhealthyMessage(step.dockerContainer))
-                    HealthStatus.Exited -> ContainerDidNotBecomeHealthyEvent(step.container, "The container exited before becoming healthy.")
-                }
-
-                eventSink.postEvent(event)
+                eventSink.postEvent(outcome.event)
             }
         } catch (e: ContainerHealthCheckException) {
             logger.error {
@@ -72,6 +86,45 @@ class WaitForContainerToBecomeHealthyStepRunner(
         }
     }
 
+    private suspend fun waitForContainer(step: WaitForContainerToBecomeHealthyStep): WaitOutcome {
+        val readinessCheck = step.container.readinessCheckConfig
+
+        if (readinessCheck != null) {
+            return waitForReadinessCheck(step, readinessCheck)
+        }
+
+        return waitForHealthCheck(step)
+    }
+
+    private suspend fun waitForHealthCheck(step: WaitForContainerToBecomeHealthyStep): WaitOutcome {
+        if (!checkIfContainerHasHealthCheck(step.dockerContainer)) {
+            return WaitOutcome("none", ContainerBecameHealthyEvent(step.container))
+        }
+
+        val event = when (waitForHealthStatus(step.dockerContainer)) {
+            HealthStatus.BecameHealthy -> ContainerBecameHealthyEvent(step.container)
+            HealthStatus.BecameUnhealthy -> ContainerDidNotBecomeHealthyEvent(step.container, containerBecameUnhealthyMessage(step.dockerContainer))
+            HealthStatus.Exited -> ContainerDidNotBecomeHealthyEvent(step.container, "The container exited before becoming healthy.")
+        }
+
+        return WaitOutcome("healthCheck", event)
+    }
+
+    private suspend fun waitForReadinessCheck(step: WaitForContainerToBecomeHealthyStep, config: ReadinessCheckConfig): WaitOutcome {
+        val checkType = when (config.type) {
+            ReadinessCheckType.Tcp -> "tcp"
+            ReadinessCheckType.Http -> "http"
+        }
+
+        val event = when (val result = readinessChecker.waitForContainerToBecomeReady(step.container, config)) {
+            is ReadinessCheckResult.Ready -> ContainerBecameHealthyEvent(step.container)
+            is ReadinessCheckResult.NotReady -> ContainerDidNotBecomeHealthyEvent(step.container, result.message)
+            is ReadinessCheckResult.Skipped -> return waitForHealthCheck(step)
+        }
+
+        return WaitOutcome(checkType, event)
+    }
+
     private suspend fun checkIfContainerHasHealthCheck(container: DockerContainer): Boolean {
         val inspectionResult = dockerClient.inspectContainer(container.reference)
         val healthcheck = inspectionResult.config.healthcheck
@@ -122,6 +175,8 @@ class WaitForContainerToBecomeHealthyStepRunner(
     }
 }
 
+private data class WaitOutcome(val checkType: String, val event: TaskEvent)
+
 private enum class HealthStatus {
     BecameHealthy,
     BecameUnhealthy,
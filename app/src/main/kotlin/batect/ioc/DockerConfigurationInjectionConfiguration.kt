@@ -17,7 +17,11 @@
 package batect.ioc
 
 import batect.docker.DockerHostNameResolver
+import batect.docker.TaskNetworkPool
+import batect.execution.CacheArchiver
+import batect.execution.CacheHelperContainer
 import batect.execution.CacheManager
+import batect.execution.DeferredCleanupRunner
 import batect.execution.RunAsCurrentUserConfigurationProvider
 import batect.logging.singletonWithLogger
 import batect.proxies.ProxyEnvironmentVariablePreprocessor
@@ -29,11 +33,15 @@ import org.kodein.di.instance
 import org.kodein.di.singleton
 
 val dockerConfigurationModule = DI.Module("Docker configuration scope: root") {
+    bind<CacheArchiver>() with singletonWithLogger { logger -> CacheArchiver(instance(), instance(), instance(), instance(), instance(), instance(), instance(), logger) }
+    bind<CacheHelperContainer>() with singletonWithLogger { logger -> CacheHelperContainer(instance(), logger) }
     bind<CacheManager>() with singleton { CacheManager(instance(), instance(), instance()) }
+    bind<DeferredCleanupRunner>() with singletonWithLogger { logger -> DeferredCleanupRunner(instance(), instance(), instance(), logger) }
     bind<DockerTelemetryCollector>() with singleton { DockerTelemetryCollector(instance(), instance()) }
     bind<DockerHostNameResolver>() with singleton { DockerHostNameResolver(instance(), instance()) }
     bind<RunAsCurrentUserConfigurationProvider>() with singleton { RunAsCurrentUserConfigurationProvider(instance(), instance(), instance(), instance(), instance()) }
     bind<SessionKodeinFactory>() with singleton { SessionKodeinFactory(directDI) }
+    bind<TaskNetworkPool>() with singletonWithLogger { logger -> TaskNetworkPool(commandLineOptions().networkPoolSize, instance(), commandLineOptions().docker, instance(), instance(), logger) }
 
     bind<ProxyEnvironmentVariablesProvider>() with singleton { ProxyEnvironmentVariablesProvider(instance(), instance()) }
     bind<ProxyEnvironmentVariablePreprocessor>() with singletonWithLogger { logger -> ProxyEnvironmentVariablePreprocessor(instance(), logger) }
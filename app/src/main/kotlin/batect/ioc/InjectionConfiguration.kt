@@ -22,6 +22,8 @@ import batect.cli.commands.BackgroundTaskManager
 import batect.cli.commands.CleanupCachesCommand
 import batect.cli.commands.CommandFactory
 import batect.cli.commands.DockerConnectivity
+import batect.cli.commands.ExportCachesCommand
+import batect.cli.commands.FinishDeferredCleanupCommand
 import batect.cli.commands.HelpCommand
 import batect.cli.commands.ListTasksCommand
 import batect.cli.commands.RunTaskCommand
@@ -41,10 +43,14 @@ import batect.config.includes.GitRepositoryCacheCleanupTask
 import batect.config.includes.GitRepositoryCacheNotificationListener
 import batect.config.includes.IncludeResolver
 import batect.config.io.ConfigurationLoader
+import batect.docker.DockerApiMetrics
 import batect.docker.DockerClientConfigurationFactory
 import batect.docker.DockerClientFactory
 import batect.execution.ConfigVariablesProvider
+import batect.execution.DeferredCleanupScheduler
+import batect.execution.DeferredCleanupStore
 import batect.execution.InterruptionTrap
+import batect.execution.PerformanceMetricsExporter
 import batect.execution.TaskSuggester
 import batect.git.GitClient
 import batect.git.LockingRepositoryCloner
@@ -66,6 +72,7 @@ import batect.os.unix.UnixConsoleManager
 import batect.os.windows.WindowsConsoleManager
 import batect.telemetry.AbacusClient
 import batect.telemetry.CIEnvironmentDetector
+import batect.telemetry.DockerApiMetricsReporter
 import batect.telemetry.EnvironmentTelemetryCollector
 import batect.telemetry.TelemetryConfigurationStore
 import batect.telemetry.TelemetryConsent
@@ -128,14 +135,16 @@ private val cliModule = DI.Module("cli") {
     bind<BackgroundTaskManager>() with singleton { BackgroundTaskManager(instance(), instance(), instance()) }
     bind<CleanupCachesCommand>() with singleton { CleanupCachesCommand(instance(), instance(), instance(StreamType.Output), commandLineOptions().cleanCaches) }
     bind<CommandFactory>() with singleton { CommandFactory() }
-    bind<DockerConnectivity>() with singletonWithLogger { logger -> DockerConnectivity(instance(), instance(), instance(StreamType.Error), instance(), instance(), logger) }
+    bind<DockerConnectivity>() with singletonWithLogger { logger -> DockerConnectivity(instance(), instance(), instance(StreamType.Error), instance(), instance(), instance(), logger) }
+    bind<ExportCachesCommand>() with singleton { ExportCachesCommand(instance(), instance(), instance(StreamType.Output), instance(StreamType.Error)) }
+    bind<FinishDeferredCleanupCommand>() with singleton { FinishDeferredCleanupCommand(instance(), instance()) }
     bind<GenerateShellTabCompletionScriptCommand>() with singleton { GenerateShellTabCompletionScriptCommand(instance(), instance(), instance(), instance(), instance(), instance(StreamType.Output), instance(), instance()) }
     bind<GenerateShellTabCompletionTaskInformationCommand>() with singleton { GenerateShellTabCompletionTaskInformationCommand(instance(), instance(StreamType.Output), instance(), instance(), instance()) }
     bind<FishShellTabCompletionScriptGenerator>() with singleton { FishShellTabCompletionScriptGenerator(instance()) }
     bind<FishShellTabCompletionLineGenerator>() with singleton { FishShellTabCompletionLineGenerator() }
     bind<HelpCommand>() with singleton { HelpCommand(instance(), instance(StreamType.Output), instance()) }
     bind<ListTasksCommand>() with singleton { ListTasksCommand(instance(), instance(), instance(StreamType.Output)) }
-    bind<RunTaskCommand>() with singleton { RunTaskCommand(instance(), instance(), instance(), instance(), instance()) }
+    bind<RunTaskCommand>() with singleton { RunTaskCommand(instance(), instance(), instance(), instance(), instance(), instance(StreamType.Output)) }
     bind<UpgradeCommand>() with singletonWithLogger { logger -> UpgradeCommand(instance(), instance(), instance(), instance(), instance(StreamType.Output), instance(StreamType.Error), instance(), instance(), logger) }
     bind<VersionInfoCommand>() with singletonWithLogger { logger -> VersionInfoCommand(instance(), instance(StreamType.Output), instance(), instance(), instance(), instance(), logger) }
     bind<ZshShellTabCompletionOptionGenerator>() with singleton { ZshShellTabCompletionOptionGenerator() }
@@ -152,8 +161,9 @@ private val configModule = DI.Module("config") {
 }
 
 private val dockerModule = DI.Module("docker") {
+    bind<DockerApiMetrics>() with singleton { DockerApiMetrics() }
     bind<DockerClientConfigurationFactory>() with singleton { DockerClientConfigurationFactory(instance()) }
-    bind<DockerClientFactory>() with singleton { DockerClientFactory(instance()) }
+    bind<DockerClientFactory>() with singleton { DockerClientFactory(instance(), commandLineOptions(), instance(), instance()) }
 }
 
 private val gitModule = DI.Module("git") {
@@ -171,7 +181,10 @@ private val iocModule = DI.Module("ioc") {
 
 private val executionModule = DI.Module("execution") {
     bind<ConfigVariablesProvider>() with singleton { ConfigVariablesProvider(commandLineOptions().configVariableOverrides, commandLineOptions().configVariablesSourceFile, instance()) }
+    bind<DeferredCleanupScheduler>() with singletonWithLogger { logger -> DeferredCleanupScheduler(instance(), instance(), ProcessHandle.current().info(), commandLineOptions().docker, logger) }
+    bind<DeferredCleanupStore>() with singletonWithLogger { logger -> DeferredCleanupStore(instance(), logger) }
     bind<InterruptionTrap>() with singleton { InterruptionTrap(instance()) }
+    bind<PerformanceMetricsExporter>() with singletonWithLogger { logger -> PerformanceMetricsExporter(commandLineOptions().metricsFileName, logger) }
     bind<TaskSuggester>() with singleton { TaskSuggester() }
 }
 
@@ -193,6 +206,7 @@ private val osModule = DI.Module("os") {
 private val telemetryModule = DI.Module("telemetry") {
     bind<AbacusClient>() with singletonWithLogger { logger -> AbacusClient(instance(), logger) }
     bind<CIEnvironmentDetector>() with singleton { CIEnvironmentDetector(instance()) }
+    bind<DockerApiMetricsReporter>() with singletonWithLogger { logger -> DockerApiMetricsReporter(instance(), instance(), logger) }
     bind<EnvironmentTelemetryCollector>() with singleton { EnvironmentTelemetryCollector(instance(), instance(), instance(), instance(), instance(), instance(), instance()) }
     bind<TelemetryConfigurationStore>() with singletonWithLogger { logger -> TelemetryConfigurationStore(instance(), logger) }
     bind<TelemetryConsent>() with singleton { TelemetryConsent() }
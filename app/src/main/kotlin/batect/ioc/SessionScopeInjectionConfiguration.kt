@@ -32,6 +32,6 @@ val sessionScopeModule = DI.Module("Session scope: root") {
     bind<SessionRunner>() with singleton { SessionRunner(instance(), instance(), instance(), instance(StreamType.Output), instance(), instance()) }
     bind<TaskExecutionOrderResolver>() with singletonWithLogger { logger -> TaskExecutionOrderResolver(instance(), instance(), instance(), logger) }
     bind<TaskKodeinFactory>() with singleton { TaskKodeinFactory(directDI, instance(), instance(), instance()) }
-    bind<TaskRunner>() with singletonWithLogger { logger -> TaskRunner(instance(), instance(), instance(StreamType.Output), instance(), logger) }
+    bind<TaskRunner>() with singletonWithLogger { logger -> TaskRunner(instance(), instance(), instance(StreamType.Output), instance(), instance(), instance(), logger) }
     bind<TaskSpecialisedConfigurationFactory>() with singletonWithLogger { logger -> TaskSpecialisedConfigurationFactory(instance(), instance(), logger) }
 }
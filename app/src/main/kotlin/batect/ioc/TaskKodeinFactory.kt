@@ -30,6 +30,7 @@ import org.kodein.di.on
 import org.kodein.di.scoped
 import org.kodein.di.singleton
 import org.kodein.di.subDI
+import java.util.concurrent.ConcurrentHashMap
 
 class TaskKodeinFactory(
     private val baseKodein: DirectDI,
@@ -37,9 +38,13 @@ class TaskKodeinFactory(
     private val configVariablesProvider: ConfigVariablesProvider,
     private val taskSpecialisedConfigurationFactory: TaskSpecialisedConfigurationFactory,
 ) {
+    // Tasks with the same config variable values share a context, so that expressions evaluated for one task aren't evaluated again for the next.
+    private val expressionEvaluationContexts = ConcurrentHashMap<Map<String, String?>, ExpressionEvaluationContext>()
+
     fun create(task: Task, runOptions: RunOptions): TaskKodein {
         val taskSpecialisedConfiguration = taskSpecialisedConfigurationFactory.create(task)
-        val expressionEvaluationContext = ExpressionEvaluationContext(hostEnvironmentVariables, configVariablesProvider.build(taskSpecialisedConfiguration))
+        val configVariables = configVariablesProvider.build(taskSpecialisedConfiguration)
+        val expressionEvaluationContext = expressionEvaluationContexts.getOrPut(configVariables) { ExpressionEvaluationContext(hostEnvironmentVariables, configVariables) }
 
         return TaskKodein(
             task,
@@ -21,7 +21,9 @@ import batect.docker.DockerContainerEnvironmentVariableProvider
 import batect.docker.DockerResourceNameGenerator
 import batect.execution.ContainerDependencyGraph
 import batect.execution.ContainerDependencyGraphProvider
+import batect.execution.ContainerReadinessChecker
 import batect.execution.ParallelExecutionManager
+import batect.execution.TaskMetricsCollector
 import batect.execution.TaskStateMachine
 import batect.execution.VolumeMountResolver
 import batect.execution.model.stages.CleanupStagePlanner
@@ -42,12 +44,16 @@ import batect.primitives.CancellationContext
 import batect.ui.EventLogger
 import batect.ui.EventLoggerProvider
 import batect.ui.FailureErrorMessageFormatter
+import batect.ui.containerio.CapturingContainerIOStreamingOptions
 import batect.ui.containerio.ContainerIOStreamingOptions
+import batect.ui.containerio.ContainerOutputCapture
+import batect.ui.interleaved.InterleavedOutputBuffering
 import org.kodein.di.DI
 import org.kodein.di.bind
 import org.kodein.di.instance
 import org.kodein.di.scoped
 import org.kodein.di.singleton
+import java.time.Duration
 
 val taskScopeModule = DI.Module("Task scope: root") {
     import(dockerModule)
@@ -68,8 +74,10 @@ private val executionModule = DI.Module("Task scope: execution") {
     bind<CleanupStagePlanner>() with scoped(TaskScope).singletonWithLogger { logger -> CleanupStagePlanner(instance(), logger) }
     bind<ContainerDependencyGraph>() with scoped(TaskScope).singleton { instance<ContainerDependencyGraphProvider>().createGraph(instance(), context) }
     bind<ContainerDependencyGraphProvider>() with scoped(TaskScope).singletonWithLogger { logger -> ContainerDependencyGraphProvider(logger) }
-    bind<ParallelExecutionManager>() with scoped(TaskScope).singletonWithLogger { logger -> ParallelExecutionManager(instance(), instance(), instance(), instance(), commandLineOptions().maximumLevelOfParallelism, logger) }
+    bind<ContainerReadinessChecker>() with scoped(TaskScope).singletonWithLogger { logger -> ContainerReadinessChecker(instance(), commandLineOptions(), instance(), logger) }
+    bind<ParallelExecutionManager>() with scoped(TaskScope).singletonWithLogger { logger -> ParallelExecutionManager(instance(), instance(), instance(), instance(), instance(), commandLineOptions().maximumLevelOfParallelism, logger) }
     bind<RunStagePlanner>() with scoped(TaskScope).singletonWithLogger { logger -> RunStagePlanner(instance(), logger) }
+    bind<TaskMetricsCollector>() with scoped(TaskScope).singleton { TaskMetricsCollector(commandLineOptions().metricsFileName != null, commandLineOptions().cacheType) }
     bind<TaskStateMachine>() with scoped(TaskScope).singletonWithLogger { logger -> TaskStateMachine(instance(), instance(), instance(), instance(), instance(), logger) }
     bind<TaskStepRunner>() with scoped(TaskScope).singleton { TaskStepRunner(directDI) }
     bind<VolumeMountResolver>() with scoped(TaskScope).singleton { VolumeMountResolver(instance(), instance(), instance(), instance()) }
@@ -78,18 +86,37 @@ private val executionModule = DI.Module("Task scope: execution") {
 private val runnersModule = DI.Module("Task scope: execution.model.steps.runners") {
     bind<BuildImageStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> BuildImageStepRunner(instance(), instance(), instance(), instance(), instance(), instance(), instance(), instance(), instance(), instance(), instance(), logger) }
     bind<CreateContainerStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> CreateContainerStepRunner(instance(), instance(), instance(), instance(), instance(), logger) }
-    bind<PrepareTaskNetworkStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> PrepareTaskNetworkStepRunner(instance(), instance(), instance(), instance(), logger) }
-    bind<DeleteTaskNetworkStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> DeleteTaskNetworkStepRunner(instance(), logger) }
+    bind<PrepareTaskNetworkStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> PrepareTaskNetworkStepRunner(instance(), instance(), instance(), instance(), instance(), logger) }
+    bind<DeleteTaskNetworkStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> DeleteTaskNetworkStepRunner(instance(), instance(), logger) }
     bind<PullImageStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> PullImageStepRunner(instance(), instance(), logger) }
     bind<RemoveContainerStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> RemoveContainerStepRunner(instance(), logger) }
     bind<RunContainerSetupCommandsStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> RunContainerSetupCommandsStepRunner(instance(), instance(), instance(), instance(), instance(), logger) }
     bind<RunContainerStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> RunContainerStepRunner(instance(), instance(), instance(), logger) }
     bind<StopContainerStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> StopContainerStepRunner(instance(), logger) }
-    bind<WaitForContainerToBecomeHealthyStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> WaitForContainerToBecomeHealthyStepRunner(instance(), instance(), instance(), logger) }
+    bind<WaitForContainerToBecomeHealthyStepRunner>() with scoped(TaskScope).singletonWithLogger { logger -> WaitForContainerToBecomeHealthyStepRunner(instance(), instance(), instance(), instance(), instance(), logger) }
 }
 
 private val uiModule = DI.Module("Task scope: ui") {
-    bind<ContainerIOStreamingOptions>() with scoped(TaskScope).singleton { instance<EventLogger>().ioStreamingOptions }
+    bind<ContainerIOStreamingOptions>() with scoped(TaskScope).singleton {
+        val consoleOptions = instance<EventLogger>().ioStreamingOptions
+
+        if (commandLineOptions().captureOutputDirectory == null) {
+            consoleOptions
+        } else {
+            CapturingContainerIOStreamingOptions(consoleOptions, instance(), instance(StreamType.Output), commandLineOptions().suppressConsoleOutputWhileCapturing)
+        }
+    }
+
+    bind<ContainerOutputCapture>() with scoped(TaskScope).singletonWithLogger { logger ->
+        ContainerOutputCapture(
+            context.name,
+            commandLineOptions().captureOutputDirectory,
+            commandLineOptions().captureOutputCompression,
+            commandLineOptions().captureOutputMaximumFileSize.toLong(),
+            logger,
+        )
+    }
+
     bind<EventLogger>() with scoped(TaskScope).singleton { instance<EventLoggerProvider>().getEventLogger(context, instance()) }
     bind<FailureErrorMessageFormatter>() with scoped(TaskScope).singleton { FailureErrorMessageFormatter(instance(), instance()) }
 
@@ -104,6 +131,7 @@ private val uiModule = DI.Module("Task scope: ui") {
             instance(),
             commandLineOptions().requestedOutputStyle,
             commandLineOptions().disableColorOutput,
+            InterleavedOutputBuffering(commandLineOptions().interleavedOutputBufferSize.toLong(), Duration.ofMillis(commandLineOptions().interleavedOutputFlushInterval.toLong())),
         )
     }
 }
@@ -0,0 +1,56 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.telemetry
+
+import batect.docker.DockerApiMetrics
+import batect.docker.DockerApiOperationSummary
+import batect.logging.Logger
+import kotlinx.serialization.builtins.ListSerializer
+
+class DockerApiMetricsReporter(
+    private val metrics: DockerApiMetrics,
+    private val telemetryCaptor: TelemetryCaptor,
+    private val logger: Logger,
+) {
+    fun report() {
+        val summary = metrics.summary
+
+        if (summary.isEmpty()) {
+            return
+        }
+
+        telemetryCaptor.addAttribute("dockerApiCalls", summary.sumOf { it.calls }.toIntAttribute())
+        telemetryCaptor.addAttribute("dockerApiFailedCalls", summary.sumOf { it.failures }.toIntAttribute())
+        telemetryCaptor.addAttribute("dockerApiBytesTransferred", summary.sumOf { it.bytesTransferred }.toIntAttribute())
+        telemetryCaptor.addAttribute("dockerApiTotalDurationMilliseconds", summary.sumOf { it.totalDurationMilliseconds }.toIntAttribute())
+
+        summary.forEach { operation ->
+            val prefix = "dockerApi" + operation.operation.replaceFirstChar { it.uppercaseChar() }
+
+            telemetryCaptor.addAttribute("${prefix}Calls", operation.calls.toIntAttribute())
+            telemetryCaptor.addAttribute("${prefix}TotalDurationMilliseconds", operation.totalDurationMilliseconds.toIntAttribute())
+            telemetryCaptor.addAttribute("${prefix}P95DurationMilliseconds", operation.estimated95thPercentileDurationMilliseconds.toIntAttribute())
+        }
+
+        logger.info {
+            message("Docker API call summary.")
+            data("operations", summary, ListSerializer(DockerApiOperationSummary.serializer()))
+        }
+    }
+
+    private fun Long.toIntAttribute(): Int = this.coerceAtMost(Int.MAX_VALUE.toLong()).toInt()
+}
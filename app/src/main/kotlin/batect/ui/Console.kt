@@ -19,6 +19,7 @@ package batect.ui
 import batect.os.ConsoleDimensions
 import batect.ui.text.Text
 import batect.ui.text.TextRun
+import okio.Buffer
 import java.io.PrintStream
 
 // Reference: https://en.wikipedia.org/wiki/ANSI_escape_code
@@ -45,25 +46,38 @@ class Console(
         text.text.forEach(this::print)
     }
 
-    fun print(text: Text) {
+    fun print(text: Text) = print(render(text))
+
+    fun render(text: TextRun): String = text.text.joinToString("") { render(it) }
+
+    fun render(text: Text): String {
         if (!enableComplexOutput) {
-            print(text.content)
-            return
+            return text.content
         }
 
+        val builder = StringBuilder()
+
         if (text.color != null) {
-            print(colorEscapeSequence(text.color.code))
+            builder.append(colorEscapeSequence(text.color.code))
         }
 
         if (text.bold == true) {
-            print(boldEscapeSequence)
+            builder.append(boldEscapeSequence)
         }
 
-        print(text.content)
+        builder.append(text.content)
 
         if (text.color != null || text.bold == true) {
-            print(resetEscapeSequence)
+            builder.append(resetEscapeSequence)
         }
+
+        return builder.toString()
+    }
+
+    // Writes already-rendered bytes (for example, from render() above) directly to the output, bypassing any formatting.
+    fun write(source: Buffer) {
+        source.writeTo(outputStream)
+        outputStream.flush()
     }
 
     fun printLineLimitedToConsoleWidth(text: TextRun) {
@@ -26,6 +26,7 @@ import batect.ui.fancy.FancyEventLogger
 import batect.ui.fancy.StartupProgressDisplayProvider
 import batect.ui.interleaved.InterleavedEventLogger
 import batect.ui.interleaved.InterleavedOutput
+import batect.ui.interleaved.InterleavedOutputBuffering
 import batect.ui.quiet.QuietEventLogger
 import batect.ui.simple.SimpleEventLogger
 import java.io.PrintStream
@@ -40,6 +41,7 @@ class EventLoggerProvider(
     private val consoleDimensions: ConsoleDimensions,
     private val requestedOutputStyle: OutputStyle?,
     private val disableColorOutput: Boolean,
+    private val interleavedOutputBuffering: InterleavedOutputBuffering,
 ) {
     fun getEventLogger(task: Task, graph: ContainerDependencyGraph): EventLogger {
         return when (requestedOutputStyle) {
@@ -79,7 +81,7 @@ class EventLoggerProvider(
 
     private fun createInterleavedLogger(task: Task, graph: ContainerDependencyGraph): InterleavedEventLogger {
         val containers = graph.allContainers
-        val output = InterleavedOutput(task.name, containers, console)
+        val output = InterleavedOutput(task.name, containers, console, interleavedOutputBuffering)
 
         return InterleavedEventLogger(graph.taskContainerNode.container, containers, output, failureErrorMessageFormatter)
     }
@@ -76,7 +76,7 @@ class FailureErrorMessageFormatter(private val runOptions: RunOptions, systemInf
 
     private val hintToReRunWithCleanupDisabled: TextRun by lazy {
         when (runOptions.behaviourAfterFailure) {
-            CleanupOption.Cleanup -> Text("$newLine${newLine}You can re-run the task with ") + Text.bold("--${CommandLineOptionsParser.disableCleanupAfterFailureFlagName}") + Text(" to leave the created containers running to diagnose the issue.")
+            CleanupOption.Cleanup, CleanupOption.DeferCleanup -> Text("$newLine${newLine}You can re-run the task with ") + Text.bold("--${CommandLineOptionsParser.disableCleanupAfterFailureFlagName}") + Text(" to leave the created containers running to diagnose the issue.")
             CleanupOption.DontCleanup -> TextRun("")
         }
     }
@@ -92,6 +92,7 @@ class FailureErrorMessageFormatter(private val runOptions: RunOptions, systemInf
             is PostTaskManualCleanup.Required.DueToCleanupFailure -> formatManualCleanupMessageAfterCleanupFailure(postTaskManualCleanup.manualCleanupCommands)
             is PostTaskManualCleanup.Required.DueToTaskFailureWithCleanupDisabled -> formatManualCleanupMessageAfterTaskFailureWithCleanupDisabled(postTaskManualCleanup.manualCleanupCommands, events)
             is PostTaskManualCleanup.Required.DueToTaskSuccessWithCleanupDisabled -> formatManualCleanupMessageAfterTaskSuccessWithCleanupDisabled(postTaskManualCleanup.manualCleanupCommands, events)
+            is PostTaskManualCleanup.Required.DueToDeferredCleanupFailure -> formatManualCleanupMessageAfterDeferredCleanupFailure(postTaskManualCleanup.manualCleanupCommands)
         }
     }
 
@@ -167,4 +168,22 @@ class FailureErrorMessageFormatter(private val runOptions: RunOptions, systemInf
             Text(instruction) + Text(newLine) +
             Text.bold(formattedCommands)
     }
+
+    private fun formatManualCleanupMessageAfterDeferredCleanupFailure(cleanupCommands: List<String>): TextRun? {
+        if (cleanupCommands.isEmpty()) {
+            return null
+        }
+
+        val instruction = if (cleanupCommands.size == 1) {
+            "Batect will try again the next time it runs, or you can run the following command to clean up now:"
+        } else {
+            "Batect will try again the next time it runs, or you can run the following commands to clean up now:"
+        }
+
+        val formattedCommands = cleanupCommands.joinToString(newLine)
+
+        return Text.red("Clean up could not be started in the background, so the created containers and other temporary resources may still be running.$newLine") +
+            Text(instruction) + Text(newLine) +
+            Text.bold(formattedCommands)
+    }
 }
@@ -0,0 +1,104 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.containerio
+
+import okio.Buffer
+import okio.BufferedSink
+import okio.buffer
+import okio.gzip
+import okio.sink
+import java.nio.file.Files
+import java.nio.file.Path
+import java.time.Instant
+import kotlin.math.min
+
+// Writes captured output for a single stream of a single container to one or more files, starting a new file each time
+// maximumFileSize bytes of (uncompressed) output have been written. A maximumFileSize of 0 disables rotation.
+//
+// This class is not thread-safe: ContainerOutputCapture only ever uses it from its single writer thread.
+class CapturedOutputFile(
+    private val directory: Path,
+    private val baseName: String,
+    private val compression: OutputCaptureCompression,
+    private val maximumFileSize: Long,
+    private val timeSource: () -> Instant = Instant::now,
+) {
+    private val segments = mutableListOf<Segment>()
+    private var currentSink: BufferedSink? = null
+
+    fun write(source: Buffer) {
+        while (source.size > 0) {
+            val segment = currentSegment()
+            val bytesToWrite = if (maximumFileSize == 0L) source.size else min(source.size, maximumFileSize - segment.uncompressedBytes)
+
+            currentSink!!.write(source, bytesToWrite)
+            segment.uncompressedBytes += bytesToWrite
+            segment.lastWriteAt = timeSource()
+
+            if (maximumFileSize != 0L && segment.uncompressedBytes >= maximumFileSize) {
+                closeCurrentSegment()
+            }
+        }
+    }
+
+    fun close() {
+        closeCurrentSegment()
+    }
+
+    val index: List<CapturedOutputFileIndex>
+        get() = segments.map { segment ->
+            CapturedOutputFileIndex(
+                directory.relativize(segment.path).toString(),
+                segment.uncompressedBytes,
+                if (Files.exists(segment.path)) Files.size(segment.path) else 0,
+                segment.firstWriteAt.toString(),
+                segment.lastWriteAt.toString(),
+            )
+        }
+
+    val totalBytes: Long
+        get() = segments.sumOf { it.uncompressedBytes }
+
+    private fun currentSegment(): Segment {
+        if (currentSink == null) {
+            val path = directory.resolve(fileNameFor(segments.size))
+            val now = timeSource()
+            val fileSink = Files.newOutputStream(path).sink()
+
+            currentSink = when (compression) {
+                OutputCaptureCompression.None -> fileSink.buffer()
+                OutputCaptureCompression.Gzip -> fileSink.gzip().buffer()
+            }
+
+            segments.add(Segment(path, now, now))
+        }
+
+        return segments.last()
+    }
+
+    private fun closeCurrentSegment() {
+        currentSink?.close()
+        currentSink = null
+    }
+
+    private fun fileNameFor(segmentIndex: Int): String = when (segmentIndex) {
+        0 -> "$baseName.log${compression.fileExtension}"
+        else -> "$baseName.$segmentIndex.log${compression.fileExtension}"
+    }
+
+    private data class Segment(val path: Path, val firstWriteAt: Instant, var lastWriteAt: Instant, var uncompressedBytes: Long = 0)
+}
@@ -0,0 +1,44 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.containerio
+
+import kotlinx.serialization.Serializable
+
+@Serializable
+data class CapturedOutputIndex(
+    val task: String,
+    val startedAt: String,
+    val finishedAt: String,
+    val streams: List<CapturedOutputStreamIndex>,
+)
+
+@Serializable
+data class CapturedOutputStreamIndex(
+    val container: String,
+    val stream: String,
+    val totalBytes: Long,
+    val files: List<CapturedOutputFileIndex>,
+)
+
+@Serializable
+data class CapturedOutputFileIndex(
+    val path: String,
+    val uncompressedBytes: Long,
+    val bytesOnDisk: Long,
+    val firstWriteAt: String,
+    val lastWriteAt: String,
+)
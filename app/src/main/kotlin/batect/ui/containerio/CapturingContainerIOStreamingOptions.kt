@@ -0,0 +1,82 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.containerio
+
+import batect.config.Container
+import batect.config.SetupCommand
+import batect.dockerclient.io.SinkTextOutput
+import batect.dockerclient.io.TextInput
+import batect.dockerclient.io.TextOutput
+import batect.io.Tee
+import okio.ForwardingSink
+import okio.Sink
+import okio.sink
+import java.io.PrintStream
+
+// Wraps the I/O streaming options for the selected output style, and additionally sends each container's stdout and stderr
+// to output capture files.
+//
+// A container attached to a TTY keeps writing directly to the system's stdout (unless console output is suppressed), and so
+// its output is not captured: routing it through a sink here would change how the terminal behaves and slow down output.
+// The Docker client has no way to read a container's output a second time, so there is nowhere else to capture it from.
+data class CapturingContainerIOStreamingOptions(
+    private val consoleOptions: ContainerIOStreamingOptions,
+    private val capture: ContainerOutputCapture,
+    private val stdout: PrintStream,
+    private val suppressConsoleOutput: Boolean,
+) : ContainerIOStreamingOptions {
+    override fun terminalTypeForContainer(container: Container): String? = consoleOptions.terminalTypeForContainer(container)
+    override fun stdinForContainer(container: Container): TextInput? = consoleOptions.stdinForContainer(container)
+    override fun useTTYForContainer(container: Container): Boolean = consoleOptions.useTTYForContainer(container)
+    override fun attachStdinForContainer(container: Container): Boolean = consoleOptions.attachStdinForContainer(container)
+
+    override fun stdoutForContainer(container: Container): TextOutput? =
+        withCapture(consoleOptions.stdoutForContainer(container), container, CapturedOutputStream.Stdout)
+
+    override fun stderrForContainer(container: Container): TextOutput? =
+        withCapture(consoleOptions.stderrForContainer(container), container, CapturedOutputStream.Stderr)
+
+    override fun stdoutForContainerSetupCommand(container: Container, setupCommand: SetupCommand, index: Int): Sink? =
+        consoleOptions.stdoutForContainerSetupCommand(container, setupCommand, index)
+
+    override fun stdoutForImageBuild(container: Container): Sink? = consoleOptions.stdoutForImageBuild(container)
+
+    private fun withCapture(consoleOutput: TextOutput?, container: Container, stream: CapturedOutputStream): TextOutput {
+        if (consoleOutput == TextOutput.StandardOutput && !suppressConsoleOutput && useTTYForContainer(container)) {
+            return consoleOutput
+        }
+
+        val captureSink = capture.sinkFor(container, stream)
+
+        if (consoleOutput == null || suppressConsoleOutput) {
+            return SinkTextOutput(captureSink)
+        }
+
+        val consoleSink = when (consoleOutput) {
+            is SinkTextOutput -> consoleOutput.sink
+            TextOutput.StandardOutput -> NonClosingSink(stdout.sink())
+            else -> throw UnsupportedOperationException("Unknown output type ${consoleOutput::class.simpleName}.")
+        }
+
+        return SinkTextOutput(Tee(consoleSink, captureSink))
+    }
+
+    // We must never close the application's own stdout when a container's output stream ends.
+    private class NonClosingSink(delegate: Sink) : ForwardingSink(delegate) {
+        override fun close() = flush()
+    }
+}
@@ -26,6 +26,7 @@ interface ContainerIOStreamingOptions {
     fun terminalTypeForContainer(container: Container): String?
     fun stdinForContainer(container: Container): TextInput?
     fun stdoutForContainer(container: Container): TextOutput?
+    fun stderrForContainer(container: Container): TextOutput?
     fun stdoutForContainerSetupCommand(container: Container, setupCommand: SetupCommand, index: Int): Sink?
     fun stdoutForImageBuild(container: Container): Sink?
     fun useTTYForContainer(container: Container): Boolean
@@ -0,0 +1,157 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.containerio
+
+import batect.config.Container
+import batect.logging.Logger
+import batect.utils.Json
+import okio.Buffer
+import okio.Sink
+import okio.Timeout
+import java.nio.file.Files
+import java.nio.file.Path
+import java.time.Instant
+import java.util.concurrent.ExecutorService
+import java.util.concurrent.Executors
+import java.util.concurrent.TimeUnit
+
+// Captures the output of each container in a task to files in captureDirectory, if set.
+//
+// Writes happen on a single background thread so that capturing output never slows down the console or the container:
+// sinks returned by sinkFor() only ever copy the bytes they are given and queue them for writing.
+class ContainerOutputCapture(
+    private val taskName: String,
+    private val captureDirectory: Path?,
+    private val compression: OutputCaptureCompression,
+    private val maximumFileSize: Long,
+    private val logger: Logger,
+    private val timeSource: () -> Instant = Instant::now,
+) : AutoCloseable {
+    val isEnabled: Boolean = captureDirectory != null
+
+    private val taskDirectory: Path? by lazy { captureDirectory?.resolve(taskName.replace(unsafeFileNameCharacters, "_")) }
+    private val files = LinkedHashMap<Pair<String, CapturedOutputStream>, CapturedOutputFile>()
+    private val startedAt = timeSource()
+    private var writer: ExecutorService? = null
+    private var writeFailed = false
+
+    fun sinkFor(container: Container, stream: CapturedOutputStream): Sink {
+        val directory = taskDirectory ?: throw UnsupportedOperationException("Output capture is not enabled.")
+
+        synchronized(files) {
+            val writer = this.writer ?: createWriter(directory)
+
+            val file = files.getOrPut(container.name to stream) {
+                val baseName = "${container.name}.${stream.name.lowercase()}".replace(unsafeFileNameCharacters, "_")
+
+                CapturedOutputFile(directory, baseName, compression, maximumFileSize, timeSource)
+            }
+
+            return CaptureSink(file, writer)
+        }
+    }
+
+    private fun createWriter(directory: Path): ExecutorService {
+        Files.createDirectories(directory)
+
+        val writer = Executors.newSingleThreadExecutor { runnable -> Thread(runnable, ContainerOutputCapture::class.qualifiedName).also { it.isDaemon = true } }
+        this.writer = writer
+
+        return writer
+    }
+
+    override fun close() {
+        val directory = taskDirectory ?: return
+        val writer = synchronized(files) { writer ?: createWriter(directory) }
+
+        writer.execute { files.values.forEach { it.close() } }
+        writer.shutdown()
+
+        if (!writer.awaitTermination(1, TimeUnit.MINUTES)) {
+            writer.shutdownNow()
+
+            logger.warn {
+                message("Timed out waiting for captured output to be written, not writing index.")
+            }
+
+            return
+        }
+
+        writeIndex(directory)
+    }
+
+    private fun writeIndex(directory: Path) {
+        val index = CapturedOutputIndex(
+            taskName,
+            startedAt.toString(),
+            timeSource().toString(),
+            files.map { (key, file) ->
+                val (containerName, stream) = key
+
+                CapturedOutputStreamIndex(containerName, stream.name.lowercase(), file.totalBytes, file.index)
+            },
+        )
+
+        val indexPath = directory.resolve("index.json")
+        Files.write(indexPath, Json.default.encodeToString(CapturedOutputIndex.serializer(), index).toByteArray(Charsets.UTF_8))
+
+        logger.info {
+            message("Wrote captured output index.")
+            data("path", indexPath.toString())
+        }
+    }
+
+    private fun writeOnWriterThread(file: CapturedOutputFile, chunk: Buffer) {
+        if (writeFailed) {
+            return
+        }
+
+        try {
+            file.write(chunk)
+        } catch (e: Throwable) {
+            writeFailed = true
+
+            logger.error {
+                message("Writing captured output failed, no further output will be captured.")
+                exception(e)
+            }
+        }
+    }
+
+    private inner class CaptureSink(private val file: CapturedOutputFile, private val writer: ExecutorService) : Sink {
+        override fun write(source: Buffer, byteCount: Long) {
+            val chunk = Buffer()
+            chunk.write(source, byteCount)
+
+            writer.execute { writeOnWriterThread(file, chunk) }
+        }
+
+        // The underlying file is flushed and closed when the capture as a whole is closed.
+        override fun flush() {}
+        override fun close() {}
+        override fun timeout(): Timeout = Timeout.NONE
+    }
+
+    companion object {
+        private val unsafeFileNameCharacters = Regex("[^A-Za-z0-9._-]")
+    }
+}
+
+enum class CapturedOutputStream {
+    Stdout,
+    Stderr,
+}
@@ -48,6 +48,8 @@ data class TaskContainerOnlyIOStreamingOptions(
         return null
     }
 
+    override fun stderrForContainer(container: Container): TextOutput? = stdoutForContainer(container)
+
     override fun stdoutForContainerSetupCommand(container: Container, setupCommand: SetupCommand, index: Int): Sink? = null
     override fun stdoutForImageBuild(container: Container): Sink? = null
     override fun useTTYForContainer(container: Container): Boolean = consoleInfo.stdoutIsTTY && container == taskContainer
@@ -22,6 +22,7 @@ import batect.execution.model.events.ContainerRemovedEvent
 import batect.execution.model.events.TaskEvent
 import batect.execution.model.events.TaskNetworkCreatedEvent
 import batect.execution.model.events.TaskNetworkDeletedEvent
+import batect.execution.model.events.TaskNetworkLeasedEvent
 import batect.ui.text.Text
 import batect.ui.text.TextRun
 import batect.utils.pluralize
@@ -36,7 +37,7 @@ class CleanupProgressDisplayLine {
         when (event) {
             is ContainerCreatedEvent -> containersCreated.add(event.container)
             is ContainerRemovedEvent -> containersRemoved.add(event.container)
-            is TaskNetworkCreatedEvent -> networkHasBeenCreated = true
+            is TaskNetworkCreatedEvent, is TaskNetworkLeasedEvent -> networkHasBeenCreated = true
             is TaskNetworkDeletedEvent -> networkHasBeenDeleted = true
             else -> {}
         }
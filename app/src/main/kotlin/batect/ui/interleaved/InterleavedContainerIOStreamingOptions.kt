@@ -33,6 +33,7 @@ data class InterleavedContainerIOStreamingOptions(private val output: Interleave
     override fun stdinForContainer(container: Container): TextInput? = null
     override fun attachStdinForContainer(container: Container): Boolean = false
     override fun stdoutForContainer(container: Container): TextOutput? = SinkTextOutput(InterleavedContainerOutputSink(container, output))
+    override fun stderrForContainer(container: Container): TextOutput? = SinkTextOutput(InterleavedContainerOutputSink(container, output))
     override fun stdoutForContainerSetupCommand(container: Container, setupCommand: SetupCommand, index: Int): Sink? =
         outputStreamWithPrefix(container, "Setup command ${index + 1} | ")
 
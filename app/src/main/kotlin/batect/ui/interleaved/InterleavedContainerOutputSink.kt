@@ -17,42 +17,103 @@
 package batect.ui.interleaved
 
 import batect.config.Container
-import batect.ui.text.Text
 import batect.ui.text.TextRun
 import okio.Buffer
+import okio.ByteString
 import okio.Sink
 import okio.Timeout
 
 data class InterleavedContainerOutputSink(val container: Container, val output: InterleavedOutput, val prefix: TextRun = TextRun()) : Sink {
-    private val buffer = StringBuilder()
+    private val lock = Object()
+    private val renderedPrefix: ByteString by lazy { output.renderedPrefixForContainer(container, prefix) }
+    private val lineSeparator: ByteString by lazy { output.renderedLineSeparator }
+
+    // Bytes received that do not yet form a complete line.
+    private val incompleteLine = Buffer()
+
+    // Complete lines, with the prefix and line separator already applied, that have not yet been written to the output.
+    private val completeLines = Buffer()
+    private var registeredForPeriodicFlush = false
 
     override fun write(source: Buffer, byteCount: Long) {
-        synchronized(buffer) {
-            val text = source.readString(byteCount, Charsets.UTF_8)
-            buffer.append(text)
+        synchronized(lock) {
+            source.read(incompleteLine, byteCount)
+
+            while (true) {
+                val endOfLine = incompleteLine.indexOf(newLine)
+
+                if (endOfLine == -1L) {
+                    break
+                }
+
+                appendLine(endOfLine)
+                incompleteLine.skip(1)
+            }
 
-            while (buffer.contains('\n')) {
-                val endOfLine = buffer.indexOf('\n')
-                writeLine(endOfLine)
+            if (completeLines.size == 0L) {
+                return
             }
+
+            if (completeLines.size >= output.buffering.bufferSize) {
+                writeCompleteLines()
+            } else if (!registeredForPeriodicFlush) {
+                output.registerBufferedSink(this)
+                registeredForPeriodicFlush = true
+            }
+        }
+    }
+
+    override fun flush() {
+        synchronized(lock) {
+            writeCompleteLines()
         }
     }
 
     override fun close() {
-        if (buffer.isNotEmpty()) {
-            writeLine(buffer.lastIndex + 1)
+        synchronized(lock) {
+            if (incompleteLine.size > 0) {
+                appendLine(incompleteLine.size)
+            }
+
+            writeCompleteLines()
+
+            if (registeredForPeriodicFlush) {
+                output.unregisterBufferedSink(this)
+                registeredForPeriodicFlush = false
+            }
         }
     }
 
-    private fun writeLine(endOfLine: Int) {
-        val firstIndex = if (buffer[0] == '\r') 1 else 0
-        val lastIndex = if (endOfLine > 0 && buffer[endOfLine - 1] == '\r') endOfLine - 1 else endOfLine
-        val line = if (firstIndex < lastIndex) buffer.substring(firstIndex, lastIndex) else ""
+    // Moves the first lineLength bytes of incompleteLine to completeLines, stripping any leading or trailing carriage return.
+    private fun appendLine(lineLength: Long) {
+        var start = 0L
+        var end = lineLength
+
+        if (end > 0 && incompleteLine[0] == carriageReturn) {
+            start = 1
+        }
+
+        if (end > start && incompleteLine[end - 1] == carriageReturn) {
+            end -= 1
+        }
+
+        completeLines.write(renderedPrefix)
+        incompleteLine.skip(start)
+        completeLines.write(incompleteLine, end - start)
+        incompleteLine.skip(lineLength - end)
+        completeLines.write(lineSeparator)
+    }
 
-        output.printForContainer(container, prefix + Text(line))
-        buffer.delete(0, endOfLine + 1)
+    private fun writeCompleteLines() {
+        if (completeLines.size > 0) {
+            output.writeRenderedLines(completeLines)
+        }
     }
 
     override fun timeout(): Timeout = Timeout.NONE
-    override fun flush() {}
+
+    companion object {
+        private val newLine: Byte = '\n'.code.toByte()
+        private val carriageReturn: Byte = '\r'.code.toByte()
+    }
 }
@@ -21,12 +21,22 @@ import batect.ui.Console
 import batect.ui.ConsoleColor
 import batect.ui.text.Text
 import batect.ui.text.TextRun
+import okio.Buffer
+import okio.ByteString
+import okio.ByteString.Companion.encodeUtf8
+import java.util.Collections
+import java.util.IdentityHashMap
+import java.util.concurrent.Executors
+import java.util.concurrent.ScheduledExecutorService
+import java.util.concurrent.ScheduledFuture
+import java.util.concurrent.TimeUnit
 import kotlin.math.max
 
 data class InterleavedOutput(
     private val taskName: String,
     private val containers: Set<Container>,
     private val console: Console,
+    val buffering: InterleavedOutputBuffering = InterleavedOutputBuffering(),
 ) {
     private val lock = Object()
 
@@ -54,7 +64,61 @@ data class InterleavedOutput(
     fun printErrorForContainer(container: Container, output: TextRun) = printWithPrefix(containerErrorPrefixes.getValue(container), output, multilineErrorPrefix)
     fun printErrorForTask(output: TextRun) = printWithPrefix(taskErrorPrefix, output, multilineErrorPrefix)
 
+    // Container output is written as raw bytes: each sink renders its prefix once with renderedPrefixForContainer(), and then
+    // hands over batches of complete, already-prefixed lines to writeRenderedLines(). Each batch is written under the same lock
+    // as all other output, so lines from different sources are never split.
+    val renderedLineSeparator: ByteString = System.lineSeparator().encodeUtf8()
+
+    fun renderedPrefixForContainer(container: Container, additionalPrefix: TextRun = TextRun()): ByteString =
+        console.render(containerPrefixes.getValue(container) + additionalPrefix).encodeUtf8()
+
+    fun writeRenderedLines(lines: Buffer) {
+        synchronized(lock) {
+            console.write(lines)
+        }
+    }
+
+    private val bufferedSinks: MutableSet<InterleavedContainerOutputSink> = Collections.newSetFromMap(IdentityHashMap())
+    private val flushScheduler: ScheduledExecutorService by lazy {
+        Executors.newSingleThreadScheduledExecutor { runnable -> Thread(runnable, "batect-interleaved-output-flusher").also { it.isDaemon = true } }
+    }
+
+    private var scheduledFlush: ScheduledFuture<*>? = null
+
+    fun registerBufferedSink(sink: InterleavedContainerOutputSink) {
+        synchronized(bufferedSinks) {
+            bufferedSinks.add(sink)
+
+            if (scheduledFlush == null) {
+                val interval = buffering.flushInterval.toMillis()
+                scheduledFlush = flushScheduler.scheduleAtFixedRate(::flushBufferedSinks, interval, interval, TimeUnit.MILLISECONDS)
+            }
+        }
+    }
+
+    fun unregisterBufferedSink(sink: InterleavedContainerOutputSink) {
+        synchronized(bufferedSinks) {
+            bufferedSinks.remove(sink)
+
+            if (bufferedSinks.isEmpty()) {
+                scheduledFlush?.cancel(false)
+                scheduledFlush = null
+            }
+        }
+    }
+
+    // This must not be called while holding lock, as each sink takes its own lock before taking lock to write its lines.
+    private fun flushBufferedSinks() {
+        val sinks = synchronized(bufferedSinks) { bufferedSinks.toList() }
+
+        sinks.forEach { it.flush() }
+    }
+
     private fun printWithPrefix(prefix: Text, text: TextRun) {
+        if (buffering.isBuffered) {
+            flushBufferedSinks()
+        }
+
         synchronized(lock) {
             text.lines.forEach { line ->
                 console.println(prefix + line)
@@ -65,6 +129,10 @@ data class InterleavedOutput(
     private fun printWithPrefix(prefixForFirstLine: TextRun, text: TextRun, prefixForSubsequentLines: TextRun = prefixForFirstLine) {
         var havePrintedFirstLine = false
 
+        if (buffering.isBuffered) {
+            flushBufferedSinks()
+        }
+
         synchronized(lock) {
             text.lines.forEach { line ->
                 if (!havePrintedFirstLine) {
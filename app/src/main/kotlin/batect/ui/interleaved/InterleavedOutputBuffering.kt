@@ -0,0 +1,39 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.interleaved
+
+import java.time.Duration
+
+// bufferSize is the number of bytes of complete lines each container output stream may hold before writing them to the console.
+// A buffer size of 0 writes lines to the console as soon as they are received.
+// flushInterval is the longest time complete lines may be held in a stream's buffer before they are written to the console.
+data class InterleavedOutputBuffering(
+    val bufferSize: Long = 0,
+    val flushInterval: Duration = Duration.ofMillis(100),
+) {
+    init {
+        if (bufferSize < 0) {
+            throw IllegalArgumentException("Buffer size must not be negative.")
+        }
+
+        if (flushInterval.isNegative || flushInterval.isZero) {
+            throw IllegalArgumentException("Flush interval must be positive.")
+        }
+    }
+
+    val isBuffered: Boolean = bufferSize > 0
+}
@@ -31,6 +31,7 @@ import batect.testutils.equalTo
 import batect.testutils.given
 import batect.testutils.on
 import batect.ui.OutputStyle
+import batect.ui.containerio.OutputCaptureCompression
 import com.google.common.jimfs.Configuration
 import com.google.common.jimfs.Jimfs
 import com.natpryce.hamkrest.and
@@ -232,6 +233,16 @@ object CommandLineOptionsParserSpec : Spek({
             }
         }
 
+        given("--capture-output-only is used without --capture-output-dir") {
+            on("parsing the command line") {
+                val result = parse(listOf("--capture-output-only", "some-task"))
+
+                it("returns an error message") {
+                    assertThat(result, equalTo(CommandLineOptionsParsingResult.Failed("--capture-output-only cannot be used without --capture-output-dir.")))
+                }
+            }
+        }
+
         given("--tag-image and --override-image are used for the same container") {
             on("parsing the command line") {
                 val result = parse(listOf("--tag-image", "some-container=some-container:abc123", "--override-image", "some-container=some-other-container:abc123", "some-task"))
@@ -268,6 +279,10 @@ object CommandLineOptionsParserSpec : Spek({
             listOf("--no-cleanup-after-failure", "some-task") to defaultCommandLineOptions.copy(disableCleanupAfterFailure = true, taskName = "some-task"),
             listOf("--no-cleanup-after-success", "some-task") to defaultCommandLineOptions.copy(disableCleanupAfterSuccess = true, taskName = "some-task"),
             listOf("--no-cleanup", "some-task") to defaultCommandLineOptions.copy(disableCleanupAfterFailure = true, disableCleanupAfterSuccess = true, taskName = "some-task"),
+            listOf("--defer-cleanup", "some-task") to defaultCommandLineOptions.copy(deferCleanup = true, taskName = "some-task"),
+            listOf("--finish-deferred-cleanup=some-cleanup.json") to defaultCommandLineOptions.copy(deferredCleanupToFinish = fileSystem.getPath("/resolved/some-cleanup.json")),
+            listOf("--export-caches=some-dir") to defaultCommandLineOptions.copy(exportCachesDirectory = fileSystem.getPath("/resolved/some-dir")),
+            listOf("--restore-caches=some-dir", "some-task") to defaultCommandLineOptions.copy(restoreCachesDirectory = fileSystem.getPath("/resolved/some-dir"), taskName = "some-task"),
             listOf("--no-proxy-vars", "some-task") to defaultCommandLineOptions.copy(dontPropagateProxyEnvironmentVariables = true, taskName = "some-task"),
             listOf("--config-var", "a=b", "--config-var", "c=d", "some-task") to defaultCommandLineOptions.copy(configVariableOverrides = mapOf("a" to "b", "c" to "d"), taskName = "some-task"),
             listOf("--override-image", "container-1=image-1", "--override-image", "container-2=image-2", "some-task") to defaultCommandLineOptions.copy(
@@ -342,6 +357,18 @@ object CommandLineOptionsParserSpec : Spek({
             listOf("--generate-completion-script=fish") to defaultCommandLineOptions.copy(generateShellTabCompletionScript = Shell.Fish),
             listOf("--generate-completion-task-info=fish") to defaultCommandLineOptions.copy(generateShellTabCompletionTaskInformation = Shell.Fish),
             listOf("--max-parallelism=3", "some-task") to defaultCommandLineOptions.copy(maximumLevelOfParallelism = 3, taskName = "some-task"),
+            listOf("--network-pool-size=4", "some-task") to defaultCommandLineOptions.copy(networkPoolSize = 4, taskName = "some-task"),
+            listOf("--output-buffer-size=65536", "some-task") to defaultCommandLineOptions.copy(interleavedOutputBufferSize = 65536, taskName = "some-task"),
+            listOf("--output-flush-interval=250", "some-task") to defaultCommandLineOptions.copy(interleavedOutputFlushInterval = 250, taskName = "some-task"),
+            listOf("--capture-output-dir=some-dir", "some-task") to defaultCommandLineOptions.copy(captureOutputDirectory = fileSystem.getPath("/resolved/some-dir"), taskName = "some-task"),
+            listOf("--capture-output-dir=some-dir", "--capture-output-compression=gzip", "--capture-output-max-file-size=1000", "--capture-output-only", "some-task") to defaultCommandLineOptions.copy(
+                captureOutputDirectory = fileSystem.getPath("/resolved/some-dir"),
+                captureOutputCompression = OutputCaptureCompression.Gzip,
+                captureOutputMaximumFileSize = 1000,
+                suppressConsoleOutputWhileCapturing = true,
+                taskName = "some-task",
+            ),
+            listOf("--metrics-file=metrics.prom", "some-task") to defaultCommandLineOptions.copy(metricsFileName = fileSystem.getPath("/resolved/metrics.prom"), taskName = "some-task"),
             listOf("--tag-image", "some-container=some-container:abc123", "some-task") to defaultCommandLineOptions.copy(imageTags = mapOf("some-container" to setOf("some-container:abc123")), taskName = "some-task"),
             listOf("--tag-image", "some-container=some-container:abc123", "--tag-image", "some-container=some-other-container:abc123", "some-task") to defaultCommandLineOptions.copy(
                 imageTags = mapOf("some-container" to setOf("some-container:abc123", "some-other-container:abc123")),
@@ -21,6 +21,7 @@ import batect.dockerclient.DockerClient
 import batect.dockerclient.VolumeReference
 import batect.execution.CacheManager
 import batect.execution.CacheType
+import batect.execution.DeferredCleanupRunner
 import batect.testutils.createForEachTest
 import batect.testutils.equalTo
 import batect.testutils.given
@@ -34,12 +35,14 @@ import org.kodein.di.DI
 import org.kodein.di.bind
 import org.kodein.di.instance
 import org.mockito.kotlin.any
+import org.mockito.kotlin.argThat
 import org.mockito.kotlin.doReturn
 import org.mockito.kotlin.inOrder
 import org.mockito.kotlin.mock
 import org.mockito.kotlin.never
 import org.mockito.kotlin.times
 import org.mockito.kotlin.verify
+import org.mockito.kotlin.whenever
 import org.spekframework.spek2.Spek
 import org.spekframework.spek2.style.specification.describe
 import java.nio.file.Files
@@ -67,6 +70,7 @@ object CleanupCachesCommandSpec : Spek({
         }
 
         val console by createForEachTest { mock<Console>() }
+        val deferredCleanupRunner by createForEachTest { mock<DeferredCleanupRunner>() }
 
         beforeEachTest {
             Files.createDirectories(fileSystem.getPath("/caches", "empty-cache"))
@@ -87,6 +91,7 @@ object CleanupCachesCommandSpec : Spek({
                 DI.direct {
                     bind<CacheManager>() with instance(cacheManager)
                     bind<DockerClient>() with instance(dockerClient)
+                    bind<DeferredCleanupRunner>() with instance(deferredCleanupRunner)
                 },
             )
         }
@@ -110,6 +115,17 @@ object CleanupCachesCommandSpec : Spek({
                 verify(dockerClient, never()).deleteVolume(VolumeReference("something-else"))
             }
 
+            it("finishes any pending deferred cleanups before cleaning caches") {
+                inOrder(deferredCleanupRunner, console) {
+                    verify(deferredCleanupRunner).finishAllPending()
+                    verify(console).println("Checking for cache volumes...")
+                }
+            }
+
+            it("does not print a message about deferred cleanups when there were none to finish") {
+                verify(console, never()).println(argThat<String> { startsWith("Finished cleaning up after") })
+            }
+
             itSuspend("prints messages to the console at appropriate moments") {
                 inOrder(console, dockerClient) {
                     verify(console).println("Checking for cache volumes...")
@@ -261,5 +277,27 @@ object CleanupCachesCommandSpec : Spek({
                 verify(dockerClient, never()).deleteVolume(any())
             }
         }
+
+        given("there is one pending deferred cleanup") {
+            beforeEachTest { whenever(deferredCleanupRunner.finishAllPending()).doReturn(1) }
+
+            val command by createForEachTest { CleanupCachesCommand(dockerConnectivity(CacheType.Directory), projectPaths, console, emptySet()) }
+            beforeEachTest { command.run() }
+
+            it("prints a message saying that it was finished") {
+                verify(console).println("Finished cleaning up after 1 previous task.")
+            }
+        }
+
+        given("there are multiple pending deferred cleanups") {
+            beforeEachTest { whenever(deferredCleanupRunner.finishAllPending()).doReturn(2) }
+
+            val command by createForEachTest { CleanupCachesCommand(dockerConnectivity(CacheType.Directory), projectPaths, console, emptySet()) }
+            beforeEachTest { command.run() }
+
+            it("prints a message saying that they were finished") {
+                verify(console).println("Finished cleaning up after 2 previous tasks.")
+            }
+        }
     }
 })
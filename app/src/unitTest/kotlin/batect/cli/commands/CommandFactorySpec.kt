@@ -30,12 +30,15 @@ import org.kodein.di.instance
 import org.mockito.kotlin.mock
 import org.spekframework.spek2.Spek
 import org.spekframework.spek2.style.specification.describe
+import java.nio.file.Paths
 
 object CommandFactorySpec : Spek({
     describe("a command factory") {
         val factory = CommandFactory()
         val kodein = DI.direct {
             bind<CleanupCachesCommand>() with instance(mock())
+            bind<ExportCachesCommand>() with instance(mock())
+            bind<FinishDeferredCleanupCommand>() with instance(mock())
             bind<GenerateShellTabCompletionScriptCommand>() with instance(mock())
             bind<GenerateShellTabCompletionTaskInformationCommand>() with instance(mock())
             bind<HelpCommand>() with instance(mock())
@@ -45,6 +48,17 @@ object CommandFactorySpec : Spek({
             bind<VersionInfoCommand>() with instance(mock())
         }
 
+        given("a set of options with a deferred cleanup to finish") {
+            val options = CommandLineOptions(deferredCleanupToFinish = Paths.get("some-cleanup.json"), taskName = "some-task")
+            val command = factory.createCommand(options, kodein)
+
+            on("creating the command") {
+                it("returns a finish deferred cleanup command") {
+                    assertThat(command, isA<FinishDeferredCleanupCommand>())
+                }
+            }
+        }
+
         given("a set of options with the 'show help' flag set") {
             val options = CommandLineOptions(showHelp = true)
             val command = factory.createCommand(options, kodein)
@@ -111,6 +125,17 @@ object CommandFactorySpec : Spek({
             }
         }
 
+        given("a set of options with a directory to export caches to provided") {
+            val options = CommandLineOptions(exportCachesDirectory = Paths.get("some-dir"))
+            val command = factory.createCommand(options, kodein)
+
+            on("creating the command") {
+                it("returns an export caches command") {
+                    assertThat(command, isA<ExportCachesCommand>())
+                }
+            }
+        }
+
         given("a set of options with the 'generate shell tab completion script' flag set") {
             val options = CommandLineOptions(generateShellTabCompletionScript = Shell.Fish)
             val command = factory.createCommand(options, kodein)
@@ -26,6 +26,7 @@ import batect.dockerclient.DockerClient
 import batect.dockerclient.DockerClientException
 import batect.dockerclient.PingResponse
 import batect.ioc.DockerConfigurationKodeinFactory
+import batect.telemetry.DockerApiMetricsReporter
 import batect.telemetry.DockerTelemetryCollector
 import batect.telemetry.TestTelemetryCaptor
 import batect.testutils.beforeEachTestSuspend
@@ -81,6 +82,7 @@ object DockerConnectivitySpec : Spek({
 
         val errorConsole by createForEachTest { mock<Console>() }
         val telemetryCaptor by createForEachTest { TestTelemetryCaptor() }
+        val dockerApiMetricsReporter by createForEachTest { mock<DockerApiMetricsReporter>() }
         val logger by createLoggerForEachTest()
         val connectivity by createForEachTest {
             DockerConnectivity(
@@ -89,6 +91,7 @@ object DockerConnectivitySpec : Spek({
                 errorConsole,
                 commandLineOptions,
                 telemetryCaptor,
+                dockerApiMetricsReporter,
                 logger,
             )
         }
@@ -137,6 +140,10 @@ object DockerConnectivitySpec : Spek({
                 verify(dockerTelemetryCollector).collectTelemetry(checkResult, expectedBuilderVersion)
             }
 
+            it("reports the Docker API metrics collected while running the task") {
+                verify(dockerApiMetricsReporter).report()
+            }
+
             it("creates the Kodein context with the Docker client created by the factory") {
                 verify(dockerConfigurationKodeinFactory).create(eq(dockerClient), any(), any())
             }
@@ -168,6 +175,10 @@ object DockerConnectivitySpec : Spek({
                 assertThat(ranTask, equalTo(false))
             }
 
+            it("does not report any Docker API metrics") {
+                verifyNoInteractions(dockerApiMetricsReporter)
+            }
+
             it("prints a message to the output") {
                 verify(errorConsole).println(Text.red(expectedErrorMessage))
             }
@@ -0,0 +1,108 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.cli.commands
+
+import batect.cli.CommandLineOptions
+import batect.execution.CacheArchiveException
+import batect.execution.CacheArchiveOutcome
+import batect.execution.CacheArchiveResult
+import batect.execution.CacheArchiver
+import batect.testutils.beforeEachTestSuspend
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.runForEachTest
+import batect.ui.Console
+import batect.ui.text.Text
+import com.google.common.jimfs.Configuration
+import com.google.common.jimfs.Jimfs
+import com.natpryce.hamkrest.assertion.assertThat
+import org.kodein.di.DI
+import org.kodein.di.bind
+import org.kodein.di.instance
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.doThrow
+import org.mockito.kotlin.inOrder
+import org.mockito.kotlin.mock
+import org.mockito.kotlin.whenever
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.time.Duration
+
+object ExportCachesCommandSpec : Spek({
+    describe("an export caches command") {
+        val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
+        val archiveDirectory by createForEachTest { fileSystem.getPath("/archives") }
+        val cacheArchiver by createForEachTest { mock<CacheArchiver>() }
+        val console by createForEachTest { mock<Console>() }
+        val errorConsole by createForEachTest { mock<Console>() }
+
+        val dockerConnectivity by createForEachTest {
+            fakeDockerConnectivity(
+                DI.direct {
+                    bind<CacheArchiver>() with instance(cacheArchiver)
+                },
+            )
+        }
+
+        val command by createForEachTest { ExportCachesCommand(dockerConnectivity, CommandLineOptions(exportCachesDirectory = archiveDirectory), console, errorConsole) }
+
+        given("exporting the caches succeeds") {
+            beforeEachTestSuspend {
+                whenever(cacheArchiver.export(archiveDirectory)).doReturn(
+                    listOf(
+                        CacheArchiveResult("cache-1", CacheArchiveOutcome.Exported, 3000, Duration.ofMillis(2500)),
+                        CacheArchiveResult("cache-2", CacheArchiveOutcome.Unchanged, 1000, Duration.ofMillis(100)),
+                        CacheArchiveResult("cache-3", CacheArchiveOutcome.Exported, 10, Duration.ofMillis(300)),
+                    ),
+                )
+            }
+
+            val exitCode by runForEachTest { command.run() }
+
+            it("prints the result of exporting each cache, followed by a summary") {
+                inOrder(console) {
+                    verify(console).println("Exporting caches to '/archives'...")
+                    verify(console).println("Exported cache 'cache-1' (3.0 KB) in 2.5s.")
+                    verify(console).println("Cache 'cache-2' has not changed since it was last exported.")
+                    verify(console).println("Exported cache 'cache-3' (10 B) in 0.3s.")
+                    verify(console).println("Done! Exported 2 caches, 1 unchanged.")
+                }
+            }
+
+            it("returns a zero exit code") {
+                assertThat(exitCode, equalTo(0))
+            }
+        }
+
+        given("exporting the caches fails") {
+            beforeEachTestSuspend {
+                whenever(cacheArchiver.export(archiveDirectory)).doThrow(CacheArchiveException("Something went wrong."))
+            }
+
+            val exitCode by runForEachTest { command.run() }
+
+            it("prints an error message") {
+                verify(errorConsole).println(Text.red("Could not export caches: Something went wrong."))
+            }
+
+            it("returns a non-zero exit code") {
+                assertThat(exitCode, equalTo(-1))
+            }
+        }
+    }
+})
@@ -0,0 +1,64 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.cli.commands
+
+import batect.cli.CommandLineOptions
+import batect.execution.DeferredCleanupRunner
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.on
+import batect.testutils.runForEachTest
+import com.google.common.jimfs.Configuration
+import com.google.common.jimfs.Jimfs
+import com.natpryce.hamkrest.assertion.assertThat
+import org.kodein.di.DI
+import org.kodein.di.bind
+import org.kodein.di.instance
+import org.mockito.kotlin.mock
+import org.mockito.kotlin.verify
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+
+object FinishDeferredCleanupCommandSpec : Spek({
+    describe("a finish deferred cleanup command") {
+        val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
+        val cleanupPath by createForEachTest { fileSystem.getPath("/project/.batect/deferred-cleanup/some-cleanup.json") }
+        val deferredCleanupRunner by createForEachTest { mock<DeferredCleanupRunner>() }
+
+        val dockerConnectivity by createForEachTest {
+            fakeDockerConnectivity(
+                DI.direct {
+                    bind<DeferredCleanupRunner>() with instance(deferredCleanupRunner)
+                },
+            )
+        }
+
+        val command by createForEachTest { FinishDeferredCleanupCommand(dockerConnectivity, CommandLineOptions(deferredCleanupToFinish = cleanupPath)) }
+
+        on("running the command") {
+            val exitCode by runForEachTest { command.run() }
+
+            it("finishes the given deferred cleanup") {
+                verify(deferredCleanupRunner).finish(cleanupPath)
+            }
+
+            it("returns a zero exit code") {
+                assertThat(exitCode, equalTo(0))
+            }
+        }
+    }
+})
@@ -24,12 +24,21 @@ import batect.config.RawConfiguration
 import batect.config.TaskMap
 import batect.config.io.ConfigurationLoadResult
 import batect.config.io.ConfigurationLoader
+import batect.execution.CacheArchiveException
+import batect.execution.CacheArchiveOutcome
+import batect.execution.CacheArchiveResult
+import batect.execution.CacheArchiver
+import batect.execution.DeferredCleanupRunner
 import batect.execution.SessionRunner
 import batect.ioc.SessionKodeinFactory
 import batect.testutils.createForEachTest
+import batect.testutils.beforeEachTestSuspend
 import batect.testutils.given
+import batect.testutils.itSuspend
 import batect.testutils.runForEachTest
+import batect.ui.Console
 import batect.ui.OutputStyle
+import batect.ui.text.Text
 import batect.updates.UpdateNotifier
 import com.google.common.jimfs.Jimfs
 import com.natpryce.hamkrest.assertion.assertThat
@@ -40,12 +49,15 @@ import org.kodein.di.instance
 import org.mockito.kotlin.any
 import org.mockito.kotlin.anyOrNull
 import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.doThrow
 import org.mockito.kotlin.inOrder
 import org.mockito.kotlin.mock
 import org.mockito.kotlin.never
 import org.mockito.kotlin.verify
+import org.mockito.kotlin.whenever
 import org.spekframework.spek2.Spek
 import org.spekframework.spek2.style.specification.describe
+import java.time.Duration
 
 object RunTaskCommandSpec : Spek({
     describe("a 'run task' command") {
@@ -84,17 +96,23 @@ object RunTaskCommandSpec : Spek({
                 }
             }
 
+            val deferredCleanupRunner by createForEachTest { mock<DeferredCleanupRunner>() }
+            val cacheArchiver by createForEachTest { mock<CacheArchiver>() }
+            val console by createForEachTest { mock<Console>() }
+
             val dockerConnectivity by createForEachTest {
                 fakeDockerConnectivity(
                     DI.direct {
                         bind<SessionKodeinFactory>() with instance(sessionKodeinFactory)
+                        bind<DeferredCleanupRunner>() with instance(deferredCleanupRunner)
+                        bind<CacheArchiver>() with instance(cacheArchiver)
                     },
                 )
             }
 
             given("quiet output mode is not being used") {
                 val commandLineOptions = baseCommandLineOptions.copy(requestedOutputStyle = OutputStyle.Fancy)
-                val command by createForEachTest { RunTaskCommand(commandLineOptions, configLoader, updateNotifier, backgroundTaskManager, dockerConnectivity) }
+                val command by createForEachTest { RunTaskCommand(commandLineOptions, configLoader, updateNotifier, backgroundTaskManager, dockerConnectivity, console) }
                 val exitCode by runForEachTest { command.run() }
 
                 it("runs the task") {
@@ -120,20 +138,85 @@ object RunTaskCommandSpec : Spek({
                     }
                 }
 
+                it("starts finishing any pending deferred cleanups in the background before running the task") {
+                    inOrder(deferredCleanupRunner, sessionRunner) {
+                        verify(deferredCleanupRunner).finishAllPendingInBackground()
+                        verify(sessionRunner).runTaskAndPrerequisites(any())
+                    }
+                }
+
                 it("creates the session Kodein context with the raw configuration") {
                     verify(sessionKodeinFactory).create(config)
                 }
+
+                itSuspend("does not restore any caches") {
+                    verify(cacheArchiver, never()).restore(any())
+                }
             }
 
             given("quiet output mode is being used") {
                 val commandLineOptions = baseCommandLineOptions.copy(requestedOutputStyle = OutputStyle.Quiet)
-                val command by createForEachTest { RunTaskCommand(commandLineOptions, configLoader, updateNotifier, backgroundTaskManager, dockerConnectivity) }
+                val command by createForEachTest { RunTaskCommand(commandLineOptions, configLoader, updateNotifier, backgroundTaskManager, dockerConnectivity, console) }
                 beforeEachTest { command.run() }
 
                 it("does not display any update notifications") {
                     verify(updateNotifier, never()).run()
                 }
             }
+
+            given("caches should be restored before running the task") {
+                val archiveDirectory = fileSystem.getPath("/caches")
+                val commandLineOptions = baseCommandLineOptions.copy(restoreCachesDirectory = archiveDirectory)
+                val command by createForEachTest { RunTaskCommand(commandLineOptions, configLoader, updateNotifier, backgroundTaskManager, dockerConnectivity, console) }
+
+                given("restoring the caches succeeds") {
+                    beforeEachTestSuspend {
+                        whenever(cacheArchiver.restore(archiveDirectory)).doReturn(
+                            listOf(
+                                CacheArchiveResult("cache-1", CacheArchiveOutcome.Restored, 2048, Duration.ofMillis(1500)),
+                                CacheArchiveResult("cache-2", CacheArchiveOutcome.AlreadyUpToDate, 1024, Duration.ofMillis(200)),
+                            ),
+                        )
+                    }
+
+                    val exitCode by runForEachTest { command.run() }
+
+                    itSuspend("restores the caches before running the task") {
+                        inOrder(cacheArchiver, sessionRunner) {
+                            verify(cacheArchiver).restore(archiveDirectory)
+                            verify(sessionRunner).runTaskAndPrerequisites(taskName)
+                        }
+                    }
+
+                    it("prints the result of restoring each cache") {
+                        inOrder(console) {
+                            verify(console).println("Restoring caches from '/caches'...")
+                            verify(console).println("Restored cache 'cache-1' (2.0 KB) in 1.5s.")
+                            verify(console).println("Cache 'cache-2' is already up to date.")
+                        }
+                    }
+
+                    it("returns the exit code of the task") {
+                        assertThat(exitCode, equalTo(expectedTaskExitCode))
+                    }
+                }
+
+                given("restoring the caches fails") {
+                    beforeEachTestSuspend {
+                        whenever(cacheArchiver.restore(archiveDirectory)).doThrow(CacheArchiveException("Something went wrong."))
+                    }
+
+                    val exitCode by runForEachTest { command.run() }
+
+                    it("prints a warning") {
+                        verify(console).println(Text.yellow("Could not restore caches, continuing without them: Something went wrong."))
+                    }
+
+                    it("still runs the task") {
+                        assertThat(exitCode, equalTo(expectedTaskExitCode))
+                    }
+                }
+            }
         }
     }
 })
@@ -170,6 +170,44 @@ object ValueConvertersSpec : Spek({
             }
         }
 
+        describe("non-negative integer value converter") {
+            given("a positive integer") {
+                it("returns the parsed representation of that integer") {
+                    assertThat(
+                        ValueConverters.nonNegativeInteger.convert("1"),
+                        equalTo(ValueConversionResult.ConversionSucceeded(1)),
+                    )
+                }
+            }
+
+            given("zero") {
+                it("returns the parsed representation of zero") {
+                    assertThat(
+                        ValueConverters.nonNegativeInteger.convert("0"),
+                        equalTo(ValueConversionResult.ConversionSucceeded(0)),
+                    )
+                }
+            }
+
+            given("a negative integer") {
+                it("returns an error") {
+                    assertThat(
+                        ValueConverters.nonNegativeInteger.convert("-1"),
+                        equalTo(ValueConversionResult.ConversionFailed("Value must not be negative.")),
+                    )
+                }
+            }
+
+            given("something that is not a number") {
+                it("returns an error") {
+                    assertThat(
+                        ValueConverters.nonNegativeInteger.convert("x"),
+                        equalTo(ValueConversionResult.ConversionFailed("Value is not a valid integer.")),
+                    )
+                }
+            }
+        }
+
         describe("enum value converter") {
             val converter = ValueConverters.enum<OutputStyle>()
 
@@ -39,6 +39,7 @@ import org.mockito.kotlin.doReturn
 import org.mockito.kotlin.mock
 import org.spekframework.spek2.Spek
 import org.spekframework.spek2.style.specification.describe
+import kotlin.time.Duration.Companion.milliseconds
 import kotlin.time.Duration.Companion.seconds
 
 object ContainerSpec : Spek({
@@ -252,6 +253,73 @@ object ContainerSpec : Spek({
             }
         }
 
+        given("the config file has a readiness check with only a type and port") {
+            val yaml = """
+                image: some_image
+                ports:
+                  - "1234:5432"
+                readiness_check:
+                  type: tcp
+                  port: 5432
+            """.trimIndent()
+
+            on("loading the configuration from the config file") {
+                val result by runForEachTest { parser.decodeFromString(Container.Companion, yaml) }
+
+                it("uses the default path, intervals and timeout") {
+                    assertThat(result.readinessCheckConfig, equalTo(ReadinessCheckConfig(ReadinessCheckType.Tcp, 5432, "/", 100.milliseconds, 2.seconds, 60.seconds)))
+                }
+            }
+        }
+
+        given("the config file has a readiness check for a port that is not published") {
+            val yaml = """
+                image: some_image
+                ports:
+                  - "1234:5678"
+                  - "1235:5432/udp"
+                readiness_check:
+                  type: tcp
+                  port: 5432
+            """.trimIndent()
+
+            on("loading the configuration from the config file") {
+                it("throws an appropriate exception") {
+                    assertThat(
+                        { parser.decodeFromString(Container.Companion, yaml) },
+                        throws(withMessage("The readiness check uses port 5432, but that port is not published. Add a TCP port mapping for port 5432 to 'ports'.") and withPath("readiness_check")),
+                    )
+                }
+            }
+        }
+
+        mapOf(
+            "port: 0" to "Port 0 is not a valid port number. It must be between 1 and 65535.",
+            "port: 65536" to "Port 65536 is not a valid port number. It must be between 1 and 65535.",
+            "port: 5432, initial_interval: 0s" to "The initial interval must be greater than zero.",
+            "port: 5432, max_interval: 0s" to "The maximum interval must be greater than zero.",
+            "port: 5432, initial_interval: 5s" to "The initial interval (5s) must not be greater than the maximum interval (2s).",
+            "port: 5432, timeout: 0s" to "The timeout must be greater than zero.",
+        ).forEach { (fields, expectedMessage) ->
+            given("the config file has a readiness check with '$fields'") {
+                val yaml = """
+                    image: some_image
+                    ports:
+                      - "1234:5432"
+                    readiness_check: { type: tcp, $fields }
+                """.trimIndent()
+
+                on("loading the configuration from the config file") {
+                    it("throws an appropriate exception") {
+                        assertThat(
+                            { parser.decodeFromString(Container.Companion, yaml) },
+                            throws(withMessage(expectedMessage) and withPath("readiness_check")),
+                        )
+                    }
+                }
+            }
+        }
+
         given("the config file has all optional fields specified") {
             val yaml = """
                 build_directory: /container-1-build-dir
@@ -319,6 +387,13 @@ object ContainerSpec : Spek({
                 labels:
                   some.key: some_value
                   some.other.key: some_other_value
+                readiness_check:
+                  type: http
+                  port: 5678
+                  path: /health
+                  initial_interval: 50ms
+                  max_interval: 1s
+                  timeout: 30s
             """.trimIndent()
 
             on("loading the configuration from the config file") {
@@ -399,6 +474,7 @@ object ContainerSpec : Spek({
                     assertThat(result.logOptions, equalTo(mapOf("option_1" to "value_1")))
                     assertThat(result.shmSize, equalTo(BinarySize.of(2, BinaryUnit.Gigabyte)))
                     assertThat(result.labels, equalTo(mapOf("some.key" to "some_value", "some.other.key" to "some_other_value")))
+                    assertThat(result.readinessCheckConfig, equalTo(ReadinessCheckConfig(ReadinessCheckType.Http, 5678, "/health", 50.milliseconds, 1.seconds, 30.seconds)))
                 }
             }
         }
@@ -0,0 +1,62 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.config
+
+import batect.os.HostEnvironmentVariables
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.on
+import com.natpryce.hamkrest.assertion.assertThat
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+
+object ExpressionEvaluationContextSpec : Spek({
+    describe("an expression evaluation context") {
+        val context by createForEachTest { ExpressionEvaluationContext(HostEnvironmentVariables("SOME_VAR" to "some value"), mapOf("some-config-var" to "some config value")) }
+
+        on("evaluating an expression") {
+            val value by createForEachTest { context.evaluate(ConcatenatedExpression(EnvironmentVariableReference("SOME_VAR"), LiteralValue("-"), ConfigVariableReference("some-config-var"))) }
+
+            it("returns the value of the expression") {
+                assertThat(value, equalTo("some value-some config value"))
+            }
+        }
+
+        on("evaluating the same expression more than once") {
+            beforeEachTest {
+                repeat(3) { context.evaluate(EnvironmentVariableReference("SOME_VAR")) }
+            }
+
+            it("only evaluates the expression once") {
+                assertThat(context.evaluationStatistics.misses, equalTo(1L))
+                assertThat(context.evaluationStatistics.hits, equalTo(2L))
+            }
+        }
+
+        on("evaluating a literal value") {
+            val value by createForEachTest { context.evaluate(LiteralValue("some literal")) }
+
+            it("returns the literal value") {
+                assertThat(value, equalTo("some literal"))
+            }
+
+            it("does not cache the value") {
+                assertThat(context.evaluationStatistics, equalTo(MemoisationStatistics(hits = 0, misses = 0, timeSavedMicroseconds = 0)))
+            }
+        }
+    }
+})
@@ -0,0 +1,119 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.config
+
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.on
+import batect.testutils.withMessage
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.throws
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+
+object MemoisationCacheSpec : Spek({
+    describe("a memoisation cache") {
+        val timeSource by createForEachTest { FakeTimeSource() }
+        val cache by createForEachTest { MemoisationCache<String, String>(timeSource::now) }
+        val computations by createForEachTest { mutableListOf<String>() }
+
+        fun compute(key: String): String {
+            computations.add(key)
+            timeSource.advanceBy(5_000)
+
+            return "value for $key"
+        }
+
+        given("the value for a key has not been computed before") {
+            on("getting the value") {
+                val value by createForEachTest { cache.getOrCompute("key-1") { compute("key-1") } }
+
+                it("returns the computed value") {
+                    assertThat(value, equalTo("value for key-1"))
+                }
+
+                it("computes the value") {
+                    assertThat(computations, equalTo(listOf("key-1")))
+                }
+
+                it("records a miss") {
+                    assertThat(cache.statistics, equalTo(MemoisationStatistics(hits = 0, misses = 1, timeSavedMicroseconds = 0)))
+                }
+            }
+        }
+
+        given("the value for a key has been computed before") {
+            beforeEachTest { cache.getOrCompute("key-1") { compute("key-1") } }
+
+            on("getting the value again") {
+                val hitValues by createForEachTest { mutableListOf<String>() }
+                val value by createForEachTest { cache.getOrCompute("key-1", onHit = { hitValues.add(it) }) { compute("key-1") } }
+
+                it("returns the previously computed value") {
+                    assertThat(value, equalTo("value for key-1"))
+                }
+
+                it("does not compute the value again") {
+                    assertThat(computations, equalTo(listOf("key-1")))
+                }
+
+                it("notifies the caller that the previously computed value was used") {
+                    assertThat(hitValues, equalTo(listOf("value for key-1")))
+                }
+
+                it("records a hit and the time that would have been taken to compute the value") {
+                    assertThat(cache.statistics, equalTo(MemoisationStatistics(hits = 1, misses = 1, timeSavedMicroseconds = 5)))
+                }
+            }
+
+            on("getting the value for a different key") {
+                val value by createForEachTest { cache.getOrCompute("key-2") { compute("key-2") } }
+
+                it("returns the value for that key") {
+                    assertThat(value, equalTo("value for key-2"))
+                }
+
+                it("computes the value for that key") {
+                    assertThat(computations, equalTo(listOf("key-1", "key-2")))
+                }
+            }
+        }
+
+        given("computing the value for a key fails") {
+            beforeEachTest {
+                runCatching { cache.getOrCompute("key-1") { throw RuntimeException("Something went wrong.") } }
+            }
+
+            on("getting the value again") {
+                it("computes the value again") {
+                    assertThat({ cache.getOrCompute("key-1") { throw RuntimeException("Something else went wrong.") } }, throws<RuntimeException>(withMessage("Something else went wrong.")))
+                }
+            }
+        }
+    }
+})
+
+private class FakeTimeSource {
+    private var current = 0L
+
+    fun now(): Long = current
+
+    fun advanceBy(nanoseconds: Long) {
+        current += nanoseconds
+    }
+}
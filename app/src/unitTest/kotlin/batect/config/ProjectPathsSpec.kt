@@ -48,5 +48,11 @@ object ProjectPathsSpec : Spek({
                 assertThat(paths.cacheDirectory, equalTo(fileSystem.getPath("/work/some-dir/.batect/caches")))
             }
         }
+
+        on("getting the project deferred cleanup directory") {
+            it("returns the absolute path to 'deferred-cleanup' in the project Batect directory") {
+                assertThat(paths.deferredCleanupDirectory, equalTo(fileSystem.getPath("/work/some-dir/.batect/deferred-cleanup")))
+            }
+        }
     }
 })
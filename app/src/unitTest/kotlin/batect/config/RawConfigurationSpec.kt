@@ -210,7 +210,8 @@ object RawConfigurationSpec : Spek({
                                         "log_driver": "the-log-driver",
                                         "log_options": { "option-1": "value-1" },
                                         "image_pull_policy": "Always",
-                                        "shm_size": 2097152
+                                        "shm_size": 2097152,
+                                        "readiness_check": null
                                     }
                                 },
                                 "config_variables": {}
@@ -300,7 +301,8 @@ object RawConfigurationSpec : Spek({
                                         "log_driver": "json-file",
                                         "log_options": {},
                                         "image_pull_policy": "Always",
-                                        "shm_size": null
+                                        "shm_size": null,
+                                        "readiness_check": null
                                     }
                                 },
                                 "config_variables": {}
@@ -19,20 +19,27 @@ package batect.config
 import batect.cli.CommandLineOptions
 import batect.config.io.ConfigurationException
 import batect.execution.ContainerDoesNotExistException
+import batect.logging.Logger
 import batect.os.Command
 import batect.testutils.createForEachTest
 import batect.testutils.equalTo
 import batect.testutils.given
-import batect.testutils.logging.createLoggerForEachTestWithoutCustomSerializers
+import batect.testutils.logging.InMemoryLogSink
+import batect.testutils.logging.hasMessage
+import batect.testutils.logging.withAdditionalData
+import batect.testutils.logging.withLogMessage
 import batect.testutils.pathResolutionContextDoesNotMatter
 import batect.testutils.withMessage
+import com.natpryce.hamkrest.and
 import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.sameInstance
 import com.natpryce.hamkrest.throws
 import org.spekframework.spek2.Spek
 import org.spekframework.spek2.style.specification.describe
 
 object TaskSpecialisedConfigurationFactorySpec : Spek({
-    val logger by createLoggerForEachTestWithoutCustomSerializers()
+    val logSink by createForEachTest { InMemoryLogSink() }
+    val logger by createForEachTest { Logger("some.source", logSink) }
 
     describe("overriding image sources") {
         val container1 = Container("container-1", BuildImage(LiteralValue("some-build-dir"), pathResolutionContextDoesNotMatter()))
@@ -411,6 +418,53 @@ object TaskSpecialisedConfigurationFactorySpec : Spek({
             }
         }
     }
+
+    describe("creating configuration for tasks") {
+        val container1 = Container("container-1", PullImage("image-1"))
+        val container2 = Container("container-2", PullImage("image-2"))
+        val rawConfig = createRawConfiguration(container1, container2)
+        val commandLineOptions = CommandLineOptions(taskName = "the-task")
+        val factory by createForEachTest { TaskSpecialisedConfigurationFactory(rawConfig, commandLineOptions, logger) }
+
+        given("the task does not change any containers") {
+            val task = Task("the-task", TaskRunConfiguration("container-1"))
+            val taskSpecialisedConfig by createForEachTest { factory.create(task) }
+
+            it("reuses the original set of containers") {
+                assertThat(taskSpecialisedConfig.containers, sameInstance(rawConfig.containers))
+            }
+
+            it("does not log the full configuration") {
+                assertThat(logSink, hasMessage(withLogMessage("Created task-specialised configuration, task does not change any containers.") and withAdditionalData("taskName", "the-task")))
+            }
+        }
+
+        given("configuration for the same task is requested more than once") {
+            val task = Task("the-task", TaskRunConfiguration("container-1", command = Command.parse("some-command")))
+            val firstConfig by createForEachTest { factory.create(task) }
+            val secondConfig by createForEachTest { factory.create(task) }
+
+            it("returns the same configuration both times") {
+                assertThat(secondConfig, sameInstance(firstConfig))
+            }
+
+            it("logs that the previously created configuration was reused") {
+                assertThat(logSink, hasMessage(withLogMessage("Reusing previously created task-specialised configuration.") and withAdditionalData("taskName", "the-task")))
+            }
+        }
+
+        given("configuration for two different tasks is requested") {
+            val firstTask = Task("first-task", TaskRunConfiguration("container-1", command = Command.parse("first-command")))
+            val secondTask = Task("second-task", TaskRunConfiguration("container-1", command = Command.parse("second-command")))
+            val firstConfig by createForEachTest { factory.create(firstTask) }
+            val secondConfig by createForEachTest { factory.create(secondTask) }
+
+            it("creates configuration specific to each task") {
+                assertThat(firstConfig.containers.getValue("container-1").command, equalTo(Command.parse("first-command")))
+                assertThat(secondConfig.containers.getValue("container-1").command, equalTo(Command.parse("second-command")))
+            }
+        }
+    }
 })
 
 private fun createRawConfiguration(vararg containers: Container): RawConfiguration = RawConfiguration("my_project", TaskMap(), ContainerMap(*containers))
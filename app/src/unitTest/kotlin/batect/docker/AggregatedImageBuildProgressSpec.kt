@@ -42,6 +42,14 @@ object AggregatedImageBuildProgressSpec : Spek({
                     }
                 }
 
+                given("the step is uploading the build context") {
+                    val event = AggregatedImageBuildProgress(setOf(ActiveImageBuildStep.UploadingBuildContext(1, "[internal] load build context", 1500)))
+
+                    it("returns a description of the active step and how much of the build context has been uploaded") {
+                        assertThat(event.toHumanReadableString(), equalTo("[internal] load build context: 1.5 KB uploaded"))
+                    }
+                }
+
                 given("the step is downloading") {
                     data class TestCase(val description: String, val step: ActiveImageBuildStep.Downloading, val expected: String)
 
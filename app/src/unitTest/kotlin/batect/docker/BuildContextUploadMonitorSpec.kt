@@ -0,0 +1,88 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.docker
+
+import batect.dockerclient.ImageBuildContextUploadProgress
+import batect.dockerclient.StepContextUploadProgress
+import batect.dockerclient.StepStarting
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import com.natpryce.hamkrest.absent
+import com.natpryce.hamkrest.assertion.assertThat
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.time.Duration
+
+object BuildContextUploadMonitorSpec : Spek({
+    describe("a build context upload monitor") {
+        var now = 0L
+        beforeEachTest { now = 1_000_000_000 }
+
+        val monitor by createForEachTest { BuildContextUploadMonitor { now } }
+
+        given("no build context upload progress has been received") {
+            beforeEachTest { monitor.processProgressUpdate(StepStarting(1, "FROM alpine:3.17")) }
+
+            it("does not report any statistics") {
+                assertThat(monitor.statistics, absent())
+            }
+        }
+
+        given("the legacy builder has uploaded the build context") {
+            beforeEachTest {
+                now += 1_000_000_000
+                monitor.processProgressUpdate(ImageBuildContextUploadProgress(1_000_000))
+                now += 1_000_000_000
+                monitor.processProgressUpdate(ImageBuildContextUploadProgress(4_000_000))
+                now += 5_000_000_000
+                monitor.processProgressUpdate(StepStarting(1, "FROM alpine:3.17"))
+            }
+
+            it("reports the size of the build context and the time from the start of the build until the last progress update") {
+                assertThat(monitor.statistics, equalTo(BuildContextUploadStatistics(4_000_000, Duration.ofSeconds(2))))
+            }
+
+            it("reports the upload throughput") {
+                assertThat(monitor.statistics!!.bytesPerSecond, equalTo(2_000_000L))
+            }
+        }
+
+        given("BuildKit has uploaded build context for multiple steps") {
+            beforeEachTest {
+                now += 500_000_000
+                monitor.processProgressUpdate(StepContextUploadProgress(1, 100))
+                monitor.processProgressUpdate(StepContextUploadProgress(1, 300))
+                monitor.processProgressUpdate(StepContextUploadProgress(2, 700))
+                now += 500_000_000
+                monitor.processProgressUpdate(StepContextUploadProgress(2, 900))
+            }
+
+            it("reports the total of the largest value reported for each step") {
+                assertThat(monitor.statistics, equalTo(BuildContextUploadStatistics(1200, Duration.ofSeconds(1))))
+            }
+        }
+
+        given("the build context was uploaded before the first progress update") {
+            beforeEachTest { monitor.processProgressUpdate(ImageBuildContextUploadProgress(100)) }
+
+            it("does not report a throughput") {
+                assertThat(monitor.statistics!!.bytesPerSecond, absent())
+            }
+        }
+    }
+})
@@ -0,0 +1,105 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.docker
+
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.isEmpty
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+
+object DockerApiMetricsSpec : Spek({
+    describe("a set of Docker API metrics") {
+        val metrics by createForEachTest { DockerApiMetrics() }
+
+        fun milliseconds(value: Long): Long = value * 1_000_000
+
+        given("no calls have been recorded") {
+            it("returns an empty summary") {
+                assertThat(metrics.summary, isEmpty)
+            }
+        }
+
+        given("some calls have been recorded") {
+            beforeEachTest {
+                metrics.record("pullImage", milliseconds(3_000), succeeded = true, bytesTransferred = 1000)
+                metrics.record("ping", milliseconds(1), succeeded = true)
+                metrics.record("ping", milliseconds(3), succeeded = true)
+                metrics.record("ping", milliseconds(7), succeeded = false)
+                metrics.record("ping", milliseconds(90_000), succeeded = true)
+            }
+
+            it("returns a summary for each operation, ordered by operation name") {
+                assertThat(metrics.summary.map { it.operation }, equalTo(listOf("ping", "pullImage")))
+            }
+
+            describe("the summary for an operation with multiple calls") {
+                val summary by createForEachTest { metrics.summary.single { it.operation == "ping" } }
+
+                it("reports the number of calls") {
+                    assertThat(summary.calls, equalTo(4L))
+                }
+
+                it("reports the number of failed calls") {
+                    assertThat(summary.failures, equalTo(1L))
+                }
+
+                it("reports no bytes transferred") {
+                    assertThat(summary.bytesTransferred, equalTo(0L))
+                }
+
+                it("reports the total and maximum duration of the calls") {
+                    assertThat(summary.totalDurationMilliseconds, equalTo(90_011L))
+                    assertThat(summary.maximumDurationMilliseconds, equalTo(90_000L))
+                }
+
+                it("counts each call in the bucket for its duration, with calls slower than the largest bucket counted in the overflow bucket") {
+                    val expectedCounts = MutableList(DockerApiMetrics.latencyBucketUpperBoundsMilliseconds.size + 1) { 0L }
+                    expectedCounts[0] = 1 // 1ms: <= 1ms
+                    expectedCounts[2] = 1 // 3ms: <= 5ms
+                    expectedCounts[3] = 1 // 7ms: <= 10ms
+                    expectedCounts[expectedCounts.lastIndex] = 1 // 90s: slower than the largest bucket
+
+                    assertThat(summary.bucketCounts, equalTo(expectedCounts.toList()))
+                }
+
+                it("estimates the median duration as the upper bound of the bucket containing the median call") {
+                    assertThat(summary.estimatedMedianDurationMilliseconds, equalTo(5L))
+                }
+
+                it("estimates the 95th percentile duration as the slowest call when it falls in the overflow bucket") {
+                    assertThat(summary.estimated95thPercentileDurationMilliseconds, equalTo(90_000L))
+                }
+            }
+
+            describe("the summary for an operation with a single call") {
+                val summary by createForEachTest { metrics.summary.single { it.operation == "pullImage" } }
+
+                it("reports the bytes transferred") {
+                    assertThat(summary.bytesTransferred, equalTo(1000L))
+                }
+
+                it("estimates both percentiles as the upper bound of the bucket containing the call") {
+                    assertThat(summary.estimatedMedianDurationMilliseconds, equalTo(5_000L))
+                    assertThat(summary.estimated95thPercentileDurationMilliseconds, equalTo(5_000L))
+                }
+            }
+        }
+    }
+})
@@ -23,6 +23,7 @@ import batect.config.ExpressionEvaluationContext
 import batect.config.ExpressionEvaluationException
 import batect.config.LiteralValue
 import batect.execution.ContainerDependencyGraph
+import batect.os.HostEnvironmentVariables
 import batect.proxies.ProxyEnvironmentVariablesProvider
 import batect.testutils.createForEachTest
 import batect.testutils.given
@@ -143,7 +144,7 @@ object DockerContainerEnvironmentVariableProviderSpec : Spek({
         given("there are references to config variables or host environment variables") {
             val terminalType = null as String?
             val proxyEnvironmentVariablesProvider = mock<ProxyEnvironmentVariablesProvider>()
-            val expressionEvaluationContext = mock<ExpressionEvaluationContext>()
+            val expressionEvaluationContext = ExpressionEvaluationContext(HostEnvironmentVariables(), emptyMap())
             val provider by createForEachTest { DockerContainerEnvironmentVariableProvider(proxyEnvironmentVariablesProvider, expressionEvaluationContext, graph, commandLineOptions) }
 
             beforeEachTest { whenever(commandLineOptions.dontPropagateProxyEnvironmentVariables).doReturn(true) }
@@ -18,9 +18,11 @@ package batect.docker
 
 import batect.dockerclient.BuildComplete
 import batect.dockerclient.BuildFailed
+import batect.dockerclient.ImageBuildContextUploadProgress
 import batect.dockerclient.ImagePullProgressDetail
 import batect.dockerclient.ImagePullProgressUpdate
 import batect.dockerclient.ImageReference
+import batect.dockerclient.StepContextUploadProgress
 import batect.dockerclient.StepDownloadProgressUpdate
 import batect.dockerclient.StepFinished
 import batect.dockerclient.StepOutput
@@ -314,5 +316,50 @@ object ImageBuildProgressAggregatorSpec : Spek({
                 assertThat(nextUpdate, absent())
             }
         }
+
+        on("receiving build context upload progress before any steps have started") {
+            val aggregator by createForEachTest { ImageBuildProgressAggregator() }
+            val nextUpdate by runNullableForEachTest {
+                aggregator.processProgressUpdate(ImageBuildContextUploadProgress(100))
+                aggregator.processProgressUpdate(ImageBuildContextUploadProgress(2500))
+            }
+
+            it("emits a new update with the amount of the build context uploaded so far") {
+                assertThat(nextUpdate, equalTo(AggregatedImageBuildProgress(setOf(ActiveImageBuildStep.UploadingBuildContext(-1, "build context", 2500)))))
+            }
+        }
+
+        on("the first step starting after the build context has been uploaded") {
+            val aggregator by createForEachTest { ImageBuildProgressAggregator() }
+            val nextUpdate by runNullableForEachTest {
+                aggregator.processProgressUpdate(ImageBuildContextUploadProgress(2500))
+                aggregator.processProgressUpdate(StepStarting(1, "FROM postgres:13.0"))
+            }
+
+            it("emits a new update with only that step") {
+                assertThat(nextUpdate, equalTo(AggregatedImageBuildProgress(setOf(ActiveImageBuildStep.NotDownloading(1, "FROM postgres:13.0")))))
+            }
+        }
+
+        on("receiving build context upload progress for a step") {
+            val aggregator by createForEachTest { ImageBuildProgressAggregator() }
+            val nextUpdate by runNullableForEachTest {
+                aggregator.processProgressUpdate(StepStarting(1, "[internal] load build context"))
+                aggregator.processProgressUpdate(StepContextUploadProgress(1, 4096))
+            }
+
+            it("emits a new update with the amount of the build context uploaded so far for that step") {
+                assertThat(nextUpdate, equalTo(AggregatedImageBuildProgress(setOf(ActiveImageBuildStep.UploadingBuildContext(1, "[internal] load build context", 4096)))))
+            }
+        }
+
+        on("receiving build context upload progress for a step that has not started") {
+            val aggregator by createForEachTest { ImageBuildProgressAggregator() }
+            val nextUpdate by runNullableForEachTest { aggregator.processProgressUpdate(StepContextUploadProgress(1, 4096)) }
+
+            it("does not emit a new update") {
+                assertThat(nextUpdate, absent())
+            }
+        }
     }
 })
@@ -0,0 +1,146 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.docker
+
+import batect.dockerclient.ContainerReference
+import batect.dockerclient.DockerClient
+import batect.dockerclient.DockerClientException
+import batect.dockerclient.ImagePullProgressDetail
+import batect.dockerclient.ImagePullProgressReceiver
+import batect.dockerclient.ImagePullProgressUpdate
+import batect.dockerclient.ImageReference
+import batect.dockerclient.ReadyNotification
+import batect.dockerclient.VolumeReference
+import batect.dockerclient.io.SinkTextOutput
+import batect.dockerclient.io.TextOutput
+import batect.testutils.beforeEachTestSuspend
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.runForEachTest
+import batect.testutils.withMessage
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.throws
+import kotlinx.coroutines.runBlocking
+import okio.Buffer
+import org.mockito.kotlin.any
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.doThrow
+import org.mockito.kotlin.eq
+import org.mockito.kotlin.mock
+import org.mockito.kotlin.whenever
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+
+object InstrumentedDockerClientSpec : Spek({
+    describe("an instrumented Docker client") {
+        val delegate by createForEachTest { mock<DockerClient>() }
+        val metrics by createForEachTest { DockerApiMetrics() }
+        val client by createForEachTest { InstrumentedDockerClient(delegate, metrics) }
+
+        fun summaryFor(operation: String): DockerApiOperationSummary = metrics.summary.single { it.operation == operation }
+
+        given("a call to the Docker daemon succeeds") {
+            val volumes = setOf(VolumeReference("some-volume"))
+
+            beforeEachTestSuspend { whenever(delegate.listAllVolumes()).doReturn(volumes) }
+
+            val result by runForEachTest { runBlocking { client.listAllVolumes() } }
+
+            it("returns the result from the underlying client") {
+                assertThat(result, equalTo(volumes))
+            }
+
+            it("records the call as a successful call") {
+                assertThat(summaryFor("listAllVolumes").calls, equalTo(1L))
+                assertThat(summaryFor("listAllVolumes").failures, equalTo(0L))
+            }
+        }
+
+        given("a call to the Docker daemon fails") {
+            beforeEachTestSuspend { whenever(delegate.getImage("some-image")).doThrow(DockerClientException("Something went wrong.")) }
+
+            it("propagates the exception from the underlying client and records the call as a failed call") {
+                assertThat({ runBlocking { client.getImage("some-image") } }, throws<DockerClientException>(withMessage("Something went wrong.")))
+                assertThat(summaryFor("getImage").calls, equalTo(1L))
+                assertThat(summaryFor("getImage").failures, equalTo(1L))
+            }
+        }
+
+        given("an image is pulled") {
+            val image = ImageReference("some-image-id")
+            val updatesReceived by createForEachTest { mutableListOf<ImagePullProgressUpdate>() }
+
+            beforeEachTestSuspend {
+                whenever(delegate.pullImage(eq("some-image"), any())).then { invocation ->
+                    val onProgressUpdate = invocation.getArgument<ImagePullProgressReceiver>(1)
+
+                    onProgressUpdate(ImagePullProgressUpdate("Downloading", ImagePullProgressDetail(10, 100), "layer-1"))
+                    onProgressUpdate(ImagePullProgressUpdate("Downloading", ImagePullProgressDetail(100, 100), "layer-1"))
+                    onProgressUpdate(ImagePullProgressUpdate("Downloading", ImagePullProgressDetail(30, 50), "layer-2"))
+                    onProgressUpdate(ImagePullProgressUpdate("Extracting", ImagePullProgressDetail(50, 50), "layer-2"))
+
+                    image
+                }
+            }
+
+            val result by runForEachTest { runBlocking { client.pullImage("some-image") { updatesReceived.add(it) } } }
+
+            it("returns the image from the underlying client") {
+                assertThat(result, equalTo(image))
+            }
+
+            it("passes all progress updates to the caller") {
+                assertThat(updatesReceived.map { it.message }, equalTo(listOf("Downloading", "Downloading", "Downloading", "Extracting")))
+            }
+
+            it("records the number of bytes downloaded for each layer") {
+                assertThat(summaryFor("pullImage").bytesTransferred, equalTo(130L))
+            }
+        }
+
+        given("a container is run") {
+            val container = ContainerReference("some-container")
+            val stdout by createForEachTest { Buffer() }
+            val stderr by createForEachTest { Buffer() }
+
+            beforeEachTestSuspend {
+                whenever(delegate.run(eq(container), any(), any(), eq(null), any())).then { invocation ->
+                    (invocation.getArgument<TextOutput>(1) as SinkTextOutput).sink.write(Buffer().writeUtf8("hello"), 5)
+                    (invocation.getArgument<TextOutput>(2) as SinkTextOutput).sink.write(Buffer().writeUtf8("oops"), 4)
+
+                    123L
+                }
+            }
+
+            val exitCode by runForEachTest { runBlocking { client.run(container, SinkTextOutput(stdout), SinkTextOutput(stderr), null, ReadyNotification()) } }
+
+            it("returns the exit code from the underlying client") {
+                assertThat(exitCode, equalTo(123L))
+            }
+
+            it("passes the container's output through to the original outputs") {
+                assertThat(stdout.readUtf8(), equalTo("hello"))
+                assertThat(stderr.readUtf8(), equalTo("oops"))
+            }
+
+            it("records the number of bytes of output received from the container") {
+                assertThat(summaryFor("run").bytesTransferred, equalTo(9L))
+            }
+        }
+    }
+})
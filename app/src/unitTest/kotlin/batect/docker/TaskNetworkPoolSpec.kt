@@ -0,0 +1,392 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.docker
+
+import batect.cli.DockerCommandLineOptions
+import batect.dockerclient.DockerClient
+import batect.dockerclient.NetworkCreationFailedException
+import batect.dockerclient.NetworkDeletionFailedException
+import batect.dockerclient.NetworkReference
+import batect.dockerclient.NetworkRetrievalFailedException
+import batect.io.ApplicationPaths
+import batect.testutils.beforeEachTestSuspend
+import batect.testutils.createForEachTest
+import batect.testutils.createLoggerForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.itSuspend
+import batect.testutils.on
+import batect.testutils.runForEachTest
+import batect.testutils.runNullableForEachTest
+import com.google.common.jimfs.Configuration
+import com.google.common.jimfs.Jimfs
+import com.natpryce.hamkrest.assertion.assertThat
+import org.mockito.kotlin.any
+import org.mockito.kotlin.doAnswer
+import org.mockito.kotlin.doThrow
+import org.mockito.kotlin.mock
+import org.mockito.kotlin.never
+import org.mockito.kotlin.times
+import org.mockito.kotlin.verify
+import org.mockito.kotlin.whenever
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.nio.file.Files
+import java.time.Duration
+import java.time.Instant
+
+object TaskNetworkPoolSpec : Spek({
+    describe("a task network pool") {
+        val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
+        val applicationPaths by createForEachTest { ApplicationPaths(fileSystem.getPath("/home/user/.batect")) }
+        val logger by createLoggerForEachTest()
+        var now = Instant.parse("2020-01-01T00:00:00Z")
+
+        // Simulates the daemon: networks are created with an ID based on their name, and can then be found by name.
+        val existingNetworks by createForEachTest { mutableMapOf<String, NetworkReference>() }
+        val client by createForEachTest { mock<DockerClient>() }
+
+        beforeEachTestSuspend {
+            now = Instant.parse("2020-01-01T00:00:00Z")
+
+            whenever(client.createNetwork(any(), any())).doAnswer { invocation ->
+                val name = invocation.getArgument<String>(0)
+                val network = NetworkReference("$name-id-${existingNetworks.size}")
+                existingNetworks[name] = network
+                network
+            }
+
+            whenever(client.getNetworkByNameOrID(any())).doAnswer { invocation -> existingNetworks[invocation.getArgument(0)] }
+        }
+
+        val dockerOptions = DockerCommandLineOptions(host = "unix:///var/run/docker.sock")
+        val poolNamePrefix = "batect-pool-${TaskNetworkPool.daemonKeyFor(dockerOptions)}"
+
+        fun writeStateForFirstSlot(state: String) {
+            val poolDirectory = applicationPaths.rootLocalStorageDirectory.resolve("network-pool").resolve(TaskNetworkPool.daemonKeyFor(dockerOptions))
+
+            Files.createDirectories(poolDirectory)
+            Files.write(poolDirectory.resolve("$poolNamePrefix-0.json"), state.toByteArray(Charsets.UTF_8))
+        }
+
+        fun createPool(size: Int?, options: DockerCommandLineOptions = dockerOptions): TaskNetworkPool =
+            TaskNetworkPool(size, applicationPaths, options, client, DockerContainerType.Linux, logger, Duration.ofHours(1)) { now }
+
+        given("the pool is disabled") {
+            val pool by createForEachTest { createPool(null) }
+
+            on("leasing a network") {
+                val network by runNullableForEachTest { pool.lease() }
+
+                it("does not return a network") {
+                    assertThat(network, equalTo(null))
+                }
+
+                itSuspend("does not create a network") {
+                    verify(client, never()).createNetwork(any(), any())
+                }
+            }
+
+            on("releasing a network") {
+                val released by createForEachTest { pool.release(NetworkReference("some-network")) }
+
+                it("reports that the network was not leased from the pool") {
+                    assertThat(released, equalTo(false))
+                }
+            }
+        }
+
+        given("the pool is enabled with a single network") {
+            val pool by createForEachTest { createPool(1) }
+
+            on("leasing a network for the first time") {
+                val network by runNullableForEachTest { pool.lease() }
+
+                it("returns a newly created network") {
+                    assertThat(network, equalTo(NetworkReference("$poolNamePrefix-0-id-0")))
+                }
+
+                itSuspend("creates the network with the pool's name for the slot and the default driver") {
+                    verify(client).createNetwork("$poolNamePrefix-0", "bridge")
+                }
+            }
+
+            on("leasing a network while the only network in the pool is leased") {
+                beforeEachTest { pool.lease() }
+
+                val secondNetwork by runNullableForEachTest { pool.lease() }
+
+                it("does not return a network") {
+                    assertThat(secondNetwork, equalTo(null))
+                }
+            }
+
+            on("leasing a network after a previous lease was returned") {
+                val firstNetwork by runNullableForEachTest { pool.lease() }
+                val released by createForEachTest { pool.release(firstNetwork!!) }
+                val secondNetwork by runNullableForEachTest { pool.lease() }
+
+                it("reports that the first network was returned to the pool") {
+                    assertThat(released, equalTo(true))
+                }
+
+                it("returns the same network again") {
+                    assertThat(secondNetwork, equalTo(firstNetwork))
+                }
+
+                itSuspend("only creates the network once") {
+                    verify(client, times(1)).createNetwork(any(), any())
+                }
+
+                itSuspend("does not delete the network") {
+                    verify(client, never()).deleteNetwork(any())
+                }
+            }
+
+            on("releasing a network that was not leased from the pool") {
+                val released by createForEachTest { pool.release(NetworkReference("some-other-network")) }
+
+                it("reports that the network was not leased from the pool") {
+                    assertThat(released, equalTo(false))
+                }
+            }
+
+            given("a network with the pool's name exists that was not created by this machine") {
+                beforeEachTest { existingNetworks["$poolNamePrefix-0"] = NetworkReference("some-other-network-id") }
+
+                val network by runNullableForEachTest { pool.lease() }
+
+                it("does not return a network") {
+                    assertThat(network, equalTo(null))
+                }
+
+                itSuspend("does not delete the other network") {
+                    verify(client, never()).deleteNetwork(any())
+                }
+
+                itSuspend("does not create a network") {
+                    verify(client, never()).createNetwork(any(), any())
+                }
+            }
+
+            mapOf(
+                "this machine stopped after creating the network but before recording its ID" to """{"networkId":null,"leased":true,"lastUsed":0}""",
+                "this machine's state for the network cannot be read" to "not valid JSON",
+            ).forEach { (description, state) ->
+                given(description) {
+                    beforeEachTest {
+                        existingNetworks["$poolNamePrefix-0"] = NetworkReference("some-previous-network-id")
+                        writeStateForFirstSlot(state)
+                    }
+
+                    val network by runNullableForEachTest { pool.lease() }
+
+                    itSuspend("deletes the previous network") {
+                        verify(client).deleteNetwork(NetworkReference("some-previous-network-id"))
+                    }
+
+                    it("returns a newly created network") {
+                        assertThat(network, equalTo(NetworkReference("$poolNamePrefix-0-id-1")))
+                    }
+                }
+            }
+
+            given("the Docker daemon cannot be queried for the pool's networks") {
+                beforeEachTestSuspend {
+                    whenever(client.getNetworkByNameOrID(any())).doThrow(NetworkRetrievalFailedException("Something went wrong."))
+                }
+
+                val network by runNullableForEachTest { pool.lease() }
+
+                it("does not return a network") {
+                    assertThat(network, equalTo(null))
+                }
+
+                on("leasing a network once the Docker daemon can be queried again") {
+                    beforeEachTestSuspend {
+                        whenever(client.getNetworkByNameOrID(any())).doAnswer { invocation -> existingNetworks[invocation.getArgument(0)] }
+                    }
+
+                    val secondNetwork by runNullableForEachTest { pool.lease() }
+
+                    it("returns a newly created network") {
+                        assertThat(secondNetwork, equalTo(NetworkReference("$poolNamePrefix-0-id-0")))
+                    }
+                }
+            }
+
+            given("another machine creates a network with the pool's name at the same time") {
+                beforeEachTestSuspend {
+                    whenever(client.createNetwork(any(), any())).doThrow(NetworkCreationFailedException("A network with that name already exists."))
+                }
+
+                val network by runNullableForEachTest { pool.lease() }
+
+                it("does not return a network") {
+                    assertThat(network, equalTo(null))
+                }
+
+                on("leasing a network again once the other machine's network exists") {
+                    beforeEachTest { existingNetworks["$poolNamePrefix-0"] = NetworkReference("some-other-network-id") }
+
+                    val secondNetwork by runNullableForEachTest { pool.lease() }
+
+                    it("does not return a network") {
+                        assertThat(secondNetwork, equalTo(null))
+                    }
+
+                    itSuspend("does not delete the other machine's network") {
+                        verify(client, never()).deleteNetwork(any())
+                    }
+                }
+            }
+
+            given("the network was leased by another process that did not return it") {
+                beforeEachTest { createPool(1).lease() }
+
+                given("the network can be deleted") {
+                    val network by runNullableForEachTest { pool.lease() }
+
+                    itSuspend("deletes the previous network") {
+                        verify(client).deleteNetwork(NetworkReference("$poolNamePrefix-0-id-0"))
+                    }
+
+                    it("returns a newly created network") {
+                        assertThat(network, equalTo(NetworkReference("$poolNamePrefix-0-id-1")))
+                    }
+                }
+
+                given("the network cannot be deleted because it is still in use") {
+                    beforeEachTestSuspend {
+                        whenever(client.deleteNetwork(any())).doThrow(NetworkDeletionFailedException("The network is still in use."))
+                    }
+
+                    val network by runNullableForEachTest { pool.lease() }
+
+                    it("does not return a network") {
+                        assertThat(network, equalTo(null))
+                    }
+                }
+            }
+        }
+
+        describe("returning a network after its cleanup was deferred") {
+            given("the network was leased from the pool by another process") {
+                val leasedNetwork by runNullableForEachTest { createPool(1).lease() }
+
+                given("the process that leased it has finished") {
+                    val returned by runForEachTest { createPool(null).returnAfterDeferredCleanup(leasedNetwork!!) }
+
+                    it("reports that the network was returned") {
+                        assertThat(returned, equalTo(true))
+                    }
+
+                    on("leasing a network again") {
+                        val network by runNullableForEachTest { createPool(1).lease() }
+
+                        it("reuses the network") {
+                            assertThat(network, equalTo(leasedNetwork))
+                        }
+
+                        itSuspend("does not delete the network") {
+                            verify(client, never()).deleteNetwork(any())
+                        }
+                    }
+                }
+            }
+
+            given("the network is still leased by this process") {
+                val pool by createForEachTest { createPool(1) }
+                val leasedNetwork by runNullableForEachTest { pool.lease() }
+                val returned by runForEachTest { pool.returnAfterDeferredCleanup(leasedNetwork!!) }
+
+                it("reports that the network could not be returned yet") {
+                    assertThat(returned, equalTo(false))
+                }
+            }
+
+            given("the pool has no record of the network") {
+                val returned by runForEachTest { createPool(null).returnAfterDeferredCleanup(NetworkReference("some-other-network")) }
+
+                it("reports that there is nothing left to return") {
+                    assertThat(returned, equalTo(true))
+                }
+            }
+        }
+
+        given("pools for two different Docker daemons") {
+            val firstPool by createForEachTest { createPool(1) }
+            val secondPool by createForEachTest { createPool(1, DockerCommandLineOptions(host = "tcp://some-other-host:2376")) }
+
+            on("leasing a network from each pool") {
+                val firstNetwork by runNullableForEachTest { firstPool.lease() }
+                val secondNetwork by runNullableForEachTest { secondPool.lease() }
+
+                it("returns a network from each pool") {
+                    assertThat(firstNetwork == null, equalTo(false))
+                    assertThat(secondNetwork == null, equalTo(false))
+                }
+
+                it("uses different names for each pool's networks") {
+                    assertThat(existingNetworks.keys.size, equalTo(2))
+                }
+            }
+        }
+
+        given("the contexts for two different Docker daemons") {
+            it("uses a different key for each daemon") {
+                assertThat(
+                    TaskNetworkPool.daemonKeyFor(DockerCommandLineOptions(contextName = "some-context")) == TaskNetworkPool.daemonKeyFor(DockerCommandLineOptions(contextName = "other-context")),
+                    equalTo(false),
+                )
+            }
+        }
+
+        given("the pool is enabled with two networks") {
+            val pool by createForEachTest { createPool(2) }
+
+            on("leasing two networks at the same time") {
+                val firstNetwork by runNullableForEachTest { pool.lease() }
+                val secondNetwork by runNullableForEachTest { pool.lease() }
+
+                it("returns a different network for each lease") {
+                    assertThat(firstNetwork, equalTo(NetworkReference("$poolNamePrefix-0-id-0")))
+                    assertThat(secondNetwork, equalTo(NetworkReference("$poolNamePrefix-1-id-1")))
+                }
+            }
+
+            on("returning a network after another network has been idle for longer than the idle timeout") {
+                val firstNetwork by runNullableForEachTest { pool.lease() }
+                val secondNetwork by runNullableForEachTest { pool.lease() }
+
+                beforeEachTest {
+                    pool.release(secondNetwork!!)
+                    now = now.plus(Duration.ofHours(2))
+                    pool.release(firstNetwork!!)
+                }
+
+                itSuspend("deletes the idle network") {
+                    verify(client).deleteNetwork(NetworkReference("$poolNamePrefix-1-id-1"))
+                }
+
+                itSuspend("does not delete the network that was just returned") {
+                    verify(client, never()).deleteNetwork(NetworkReference("$poolNamePrefix-0-id-0"))
+                }
+            }
+        }
+    }
+})
@@ -0,0 +1,217 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.config.PullImage
+import batect.docker.AggregatedImagePullProgress
+import batect.docker.DownloadOperation
+import batect.execution.model.events.ImagePullProgressEvent
+import batect.execution.model.events.TaskEvent
+import batect.execution.model.events.TaskEventSink
+import batect.logging.Logger
+import batect.logging.Severity
+import batect.testutils.createForEachTest
+import batect.testutils.given
+import batect.testutils.logging.InMemoryLogSink
+import batect.testutils.logging.hasMessage
+import batect.testutils.logging.withLogMessage
+import batect.testutils.logging.withSeverity
+import batect.testutils.on
+import com.natpryce.hamkrest.and
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.equalTo
+import org.mockito.kotlin.mock
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.util.Collections
+import java.util.concurrent.CountDownLatch
+import java.util.concurrent.TimeUnit
+import kotlin.concurrent.thread
+
+object AsyncTaskEventDispatcherSpec : Spek({
+    describe("an asynchronous task event dispatcher") {
+        val logSink by createForEachTest { InMemoryLogSink() }
+        val logger by createForEachTest { Logger("some.source", logSink) }
+        val consumer by createForEachTest { RecordingEventSink() }
+
+        val firstEvent by createForEachTest { mock<TaskEvent>() }
+        val secondEvent by createForEachTest { mock<TaskEvent>() }
+        val thirdEvent by createForEachTest { mock<TaskEvent>() }
+
+        fun progressEvent(imageName: String, completedBytes: Long): ImagePullProgressEvent =
+            ImagePullProgressEvent(PullImage(imageName), AggregatedImagePullProgress(DownloadOperation.Downloading, completedBytes, 100))
+
+        given("the consumer processes events immediately") {
+            val dispatcher by createForEachTest { AsyncTaskEventDispatcher(consumer, "test-consumer", logger) }
+
+            on("posting a series of events and then closing the dispatcher") {
+                val events by createForEachTest { (1..200).map { mock<TaskEvent>() } }
+
+                beforeEachTest {
+                    events.forEach { dispatcher.postEvent(it) }
+                    dispatcher.close()
+                }
+
+                it("delivers every event to the consumer in the order they were posted") {
+                    assertThat(consumer.receivedEvents, equalTo(events))
+                }
+
+                it("reports the number of events posted") {
+                    assertThat(dispatcher.statistics.eventsPosted, equalTo(200L))
+                }
+
+                it("reports the name of the consumer in the statistics") {
+                    assertThat(dispatcher.statistics.consumer, equalTo("test-consumer"))
+                }
+            }
+
+            on("posting an event and waiting for it to be delivered") {
+                beforeEachTest {
+                    dispatcher.postEvent(firstEvent)
+                    dispatcher.postEventAndWait(secondEvent)
+                }
+
+                it("delivers that event and all events posted before it before returning") {
+                    assertThat(consumer.receivedEvents, equalTo(listOf(firstEvent, secondEvent)))
+                }
+            }
+
+            on("posting an event after the dispatcher has been closed") {
+                beforeEachTest {
+                    dispatcher.postEvent(firstEvent)
+                    dispatcher.close()
+                    dispatcher.postEvent(secondEvent)
+                }
+
+                it("delivers the event immediately") {
+                    assertThat(consumer.receivedEvents, equalTo(listOf(firstEvent, secondEvent)))
+                }
+            }
+        }
+
+        given("the consumer is busy processing an earlier event") {
+            val dispatcher by createForEachTest { AsyncTaskEventDispatcher(consumer, "test-consumer", logger, capacity = 2) }
+
+            beforeEachTest {
+                consumer.blockUntilReleased()
+                dispatcher.postEvent(firstEvent)
+                consumer.waitForEventToBeReceived()
+            }
+
+            on("posting several progress events for the same image") {
+                val firstProgressEventForImage by createForEachTest { progressEvent("image-a", 10) }
+                val progressEventForOtherImage by createForEachTest { progressEvent("image-b", 20) }
+                val latestProgressEventForImage by createForEachTest { progressEvent("image-a", 30) }
+
+                beforeEachTest {
+                    dispatcher.postEvent(firstProgressEventForImage)
+                    dispatcher.postEvent(progressEventForOtherImage)
+                    dispatcher.postEvent(latestProgressEventForImage)
+                    consumer.release()
+                    dispatcher.close()
+                }
+
+                it("only delivers the latest progress event for that image, in the position of the first progress event") {
+                    assertThat(consumer.receivedEvents, equalTo(listOf(firstEvent, latestProgressEventForImage, progressEventForOtherImage)))
+                }
+
+                it("reports the number of events that were coalesced") {
+                    assertThat(dispatcher.statistics.eventsCoalesced, equalTo(1L))
+                }
+            }
+
+            on("posting more events than the buffer can hold") {
+                val postingFinished by createForEachTest { CountDownLatch(1) }
+                val wasBlocked by createForEachTest {
+                    dispatcher.postEvent(secondEvent)
+                    dispatcher.postEvent(thirdEvent)
+
+                    thread {
+                        dispatcher.postEvent(mock())
+                        postingFinished.countDown()
+                    }
+
+                    val finishedEarly = postingFinished.await(200, TimeUnit.MILLISECONDS)
+                    consumer.release()
+                    postingFinished.await()
+                    dispatcher.close()
+
+                    !finishedEarly
+                }
+
+                it("blocks the poster until the consumer catches up") {
+                    assertThat(wasBlocked, equalTo(true))
+                }
+
+                it("delivers all of the events") {
+                    assertThat(consumer.receivedEvents.size, equalTo(4))
+                }
+
+                it("reports the maximum number of events that were waiting to be delivered") {
+                    assertThat(dispatcher.statistics.maximumQueueDepth, equalTo(2))
+                }
+            }
+        }
+
+        given("the consumer throws an exception while processing an event") {
+            val failingConsumer by createForEachTest { RecordingEventSink(failOn = firstEvent) }
+            val dispatcher by createForEachTest { AsyncTaskEventDispatcher(failingConsumer, "test-consumer", logger) }
+
+            on("posting events") {
+                beforeEachTest {
+                    dispatcher.postEvent(firstEvent)
+                    dispatcher.postEvent(secondEvent)
+                    dispatcher.close()
+                }
+
+                it("continues delivering later events") {
+                    assertThat(failingConsumer.receivedEvents, equalTo(listOf(firstEvent, secondEvent)))
+                }
+
+                it("logs the exception") {
+                    assertThat(logSink, hasMessage(withSeverity(Severity.Error) and withLogMessage("Event consumer threw an exception while processing an event.")))
+                }
+            }
+        }
+    }
+})
+
+private class RecordingEventSink(private val failOn: TaskEvent? = null) : TaskEventSink {
+    val receivedEvents: MutableList<TaskEvent> = Collections.synchronizedList(mutableListOf())
+
+    @Volatile
+    private var releaseSignal = CountDownLatch(0)
+    private val firstEventReceived = CountDownLatch(1)
+
+    fun blockUntilReleased() {
+        releaseSignal = CountDownLatch(1)
+    }
+
+    fun release() = releaseSignal.countDown()
+
+    fun waitForEventToBeReceived() = firstEventReceived.await()
+
+    override fun postEvent(event: TaskEvent) {
+        receivedEvents.add(event)
+        firstEventReceived.countDown()
+        releaseSignal.await()
+
+        if (event == failOn) {
+            throw RuntimeException("Something went wrong.")
+        }
+    }
+}
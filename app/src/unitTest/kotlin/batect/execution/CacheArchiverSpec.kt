@@ -0,0 +1,346 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.config.ProjectPaths
+import batect.docker.DockerContainerType
+import batect.dockerclient.BindMount
+import batect.dockerclient.DockerClient
+import batect.dockerclient.HostMount
+import batect.dockerclient.VolumeMount
+import batect.dockerclient.VolumeReference
+import batect.os.NativeMethods
+import batect.os.OperatingSystem
+import batect.os.SystemInfo
+import batect.testutils.createForEachTest
+import batect.testutils.createLoggerForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.runForEachTest
+import batect.testutils.withMessage
+import batect.utils.Json
+import com.google.common.jimfs.Configuration
+import com.google.common.jimfs.Jimfs
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.throws
+import kotlinx.coroutines.runBlocking
+import okio.Path.Companion.toOkioPath
+import okio.Sink
+import okio.Source
+import okio.buffer
+import org.mockito.kotlin.any
+import org.mockito.kotlin.anyOrNull
+import org.mockito.kotlin.doAnswer
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.mock
+import org.mockito.kotlin.onBlocking
+import org.mockito.kotlin.whenever
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.nio.file.Files
+import java.nio.file.Path
+import kotlin.streams.toList
+
+object CacheArchiverSpec : Spek({
+    describe("a cache archiver") {
+        val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
+        val archiveDirectory by createForEachTest { fileSystem.getPath("/archives") }
+        val manifestPath by createForEachTest { archiveDirectory.resolve("manifest.json") }
+
+        val dockerClient by createForEachTest {
+            mock<DockerClient> {
+                onBlocking { listAllVolumes() } doReturn setOf(
+                    VolumeReference("batect-cache-abc123-cache-1"),
+                    VolumeReference("batect-cache-abc123-cache-2"),
+                    VolumeReference("batect-cache-other-project-cache-3"),
+                    VolumeReference("something-else"),
+                )
+            }
+        }
+
+        val cacheManager by createForEachTest {
+            mock<CacheManager> {
+                on { projectCacheKey } doReturn "abc123"
+                on { cacheType } doReturn CacheType.Volume
+            }
+        }
+
+        val projectPaths by createForEachTest {
+            mock<ProjectPaths> {
+                on { cacheDirectory } doReturn fileSystem.getPath("/project/.batect/caches")
+            }
+        }
+
+        // Simulates the helper container: each cache has a digest and contents, and each command run is recorded.
+        val digests by createForEachTest { mutableMapOf("cache-1" to "digest-1", "cache-2" to "digest-2") }
+        val restoredContents by createForEachTest { mutableMapOf<String, String>() }
+        val commandsRun by createForEachTest { mutableListOf<Pair<String, String>>() }
+        val restoreCommands by createForEachTest { mutableListOf<String>() }
+
+        val helperContainer by createForEachTest {
+            mock<CacheHelperContainer> {
+                onBlocking { run(any(), any(), any(), anyOrNull()) } doAnswer { invocation ->
+                    val mount = invocation.getArgument<BindMount>(0)
+                    val command = invocation.getArgument<List<String>>(1).joinToString(" ")
+                    val stdout = invocation.getArgument<Sink>(2)
+                    val stdin = invocation.getArgument<Source?>(3)
+
+                    val cacheName = listOf("cache-1", "cache-2").single { name ->
+                        val volume = VolumeReference("batect-cache-abc123-$name")
+                        val directory = fileSystem.getPath("/project/.batect/caches/$name").toOkioPath()
+
+                        mount == VolumeMount(volume, "/cache", "ro") || mount == VolumeMount(volume, "/cache", null) ||
+                            mount == HostMount(directory, "/cache", "ro") || mount == HostMount(directory, "/cache", null)
+                    }
+
+                    when {
+                        command.contains("sha256sum") -> {
+                            commandsRun.add(cacheName to "digest")
+                            stdout.buffer().writeUtf8(digests.getValue(cacheName) + "\n").flush()
+                        }
+                        command.startsWith("tar") -> {
+                            commandsRun.add(cacheName to "export")
+                            stdout.buffer().writeUtf8("contents of $cacheName").flush()
+                        }
+                        command.contains("-xzf -") -> {
+                            commandsRun.add(cacheName to "restore")
+                            restoreCommands.add(command)
+                            restoredContents[cacheName] = stdin!!.buffer().readUtf8()
+                        }
+                        else -> throw UnsupportedOperationException("Unexpected command: $command")
+                    }
+
+                    Unit
+                }
+            }
+        }
+
+        val systemInfo by createForEachTest {
+            mock<SystemInfo> {
+                on { operatingSystem } doReturn OperatingSystem.Linux
+            }
+        }
+
+        val nativeMethods by createForEachTest {
+            mock<NativeMethods> {
+                on { getUserId() } doReturn 123
+                on { getGroupId() } doReturn 456
+            }
+        }
+
+        val logger by createLoggerForEachTest()
+
+        fun createArchiver(containerType: DockerContainerType = DockerContainerType.Linux) =
+            CacheArchiver(dockerClient, helperContainer, cacheManager, projectPaths, containerType, systemInfo, nativeMethods, logger)
+
+        fun readManifest(): CacheArchiveManifest =
+            Json.default.decodeFromString(CacheArchiveManifest.serializer(), Files.readAllBytes(manifestPath).toString(Charsets.UTF_8))
+
+        fun writeManifest(manifest: CacheArchiveManifest) {
+            Files.createDirectories(archiveDirectory)
+            Files.write(manifestPath, Json.default.encodeToString(CacheArchiveManifest.serializer(), manifest).toByteArray(Charsets.UTF_8))
+        }
+
+        fun readFile(path: Path): String = Files.readAllBytes(path).toString(Charsets.UTF_8)
+
+        describe("exporting caches") {
+            given("the caches have not been exported before") {
+                val results by runForEachTest { runBlocking { createArchiver().export(archiveDirectory) } }
+
+                it("writes an archive for each of the project's caches, named after the digest of the cache") {
+                    assertThat(readFile(archiveDirectory.resolve("digest-1.tar.gz")), equalTo("contents of cache-1"))
+                    assertThat(readFile(archiveDirectory.resolve("digest-2.tar.gz")), equalTo("contents of cache-2"))
+                }
+
+                it("writes a manifest describing each archive") {
+                    val manifest = readManifest()
+
+                    assertThat(manifest.caches.map { Triple(it.name, it.digest, it.archiveSizeBytes) }, equalTo(listOf(Triple("cache-1", "digest-1", 19L), Triple("cache-2", "digest-2", 19L))))
+                }
+
+                it("returns the result of exporting each cache") {
+                    assertThat(results.map { Triple(it.cacheName, it.outcome, it.archiveSizeBytes) }, equalTo(listOf(Triple("cache-1", CacheArchiveOutcome.Exported, 19L), Triple("cache-2", CacheArchiveOutcome.Exported, 19L))))
+                }
+
+                it("does not leave any partially written files behind") {
+                    val fileNames = Files.list(archiveDirectory).use { paths -> paths.map { it.fileName.toString() }.toList() }.toSet()
+
+                    assertThat(fileNames, equalTo(setOf("digest-1.tar.gz", "digest-2.tar.gz", "manifest.json")))
+                }
+            }
+
+            given("one of the caches has not changed since it was last exported") {
+                beforeEachTest {
+                    writeManifest(
+                        CacheArchiveManifest(
+                            listOf(
+                                CacheArchiveManifestEntry("cache-1", "digest-1", 100, 2000),
+                                CacheArchiveManifestEntry("cache-2", "old-digest-2", 200, 3000),
+                            ),
+                        ),
+                    )
+
+                    Files.write(archiveDirectory.resolve("digest-1.tar.gz"), "previous contents of cache-1".toByteArray(Charsets.UTF_8))
+                    Files.write(archiveDirectory.resolve("old-digest-2.tar.gz"), "previous contents of cache-2".toByteArray(Charsets.UTF_8))
+                    Files.write(archiveDirectory.resolve("some-other-file.tar.gz"), "something that has nothing to do with caches".toByteArray(Charsets.UTF_8))
+                }
+
+                val results by runForEachTest { runBlocking { createArchiver().export(archiveDirectory) } }
+
+                it("does not export the unchanged cache again") {
+                    assertThat(commandsRun, equalTo(listOf("cache-1" to "digest", "cache-2" to "digest", "cache-2" to "export")))
+                }
+
+                it("leaves the archive for the unchanged cache as it was") {
+                    assertThat(readFile(archiveDirectory.resolve("digest-1.tar.gz")), equalTo("previous contents of cache-1"))
+                }
+
+                it("removes the archive for the previous version of the changed cache") {
+                    assertThat(Files.exists(archiveDirectory.resolve("old-digest-2.tar.gz")), equalTo(false))
+                }
+
+                it("does not remove archives that were not created by a previous export") {
+                    assertThat(readFile(archiveDirectory.resolve("some-other-file.tar.gz")), equalTo("something that has nothing to do with caches"))
+                }
+
+                it("keeps the details of the unchanged cache in the manifest") {
+                    assertThat(readManifest().entryFor("cache-1"), equalTo(CacheArchiveManifestEntry("cache-1", "digest-1", 100, 2000)))
+                }
+
+                it("returns the result of exporting each cache") {
+                    assertThat(results.map { it.cacheName to it.outcome }, equalTo(listOf("cache-1" to CacheArchiveOutcome.Unchanged, "cache-2" to CacheArchiveOutcome.Exported)))
+                }
+            }
+
+            given("two caches have the same contents") {
+                beforeEachTest { digests["cache-2"] = "digest-1" }
+
+                runForEachTest { runBlocking { createArchiver().export(archiveDirectory) } }
+
+                it("only exports the contents once") {
+                    assertThat(commandsRun.filter { it.second == "export" }, equalTo(listOf("cache-1" to "export")))
+                }
+
+                it("references the same archive for both caches in the manifest") {
+                    assertThat(readManifest().caches.map { it.archiveFileName }, equalTo(listOf("digest-1.tar.gz", "digest-1.tar.gz")))
+                }
+            }
+
+            given("Windows containers are being used") {
+                it("throws an appropriate exception") {
+                    assertThat(
+                        { runBlocking { createArchiver(DockerContainerType.Windows).export(archiveDirectory) } },
+                        throws<CacheArchiveException>(withMessage("Exporting and restoring caches is not supported with Windows containers.")),
+                    )
+                }
+            }
+        }
+
+        describe("restoring caches") {
+            given("the directory contains exported caches") {
+                beforeEachTest {
+                    writeManifest(
+                        CacheArchiveManifest(
+                            listOf(
+                                CacheArchiveManifestEntry("cache-1", "digest-1", 100, 2000),
+                                CacheArchiveManifestEntry("cache-2", "new-digest-2", 200, 3000),
+                            ),
+                        ),
+                    )
+
+                    Files.write(archiveDirectory.resolve("digest-1.tar.gz"), "archived contents of cache-1".toByteArray(Charsets.UTF_8))
+                    Files.write(archiveDirectory.resolve("new-digest-2.tar.gz"), "archived contents of cache-2".toByteArray(Charsets.UTF_8))
+                }
+
+                given("the archives for all caches exist") {
+                    val results by runForEachTest { runBlocking { createArchiver().restore(archiveDirectory) } }
+
+                    it("only restores the caches that differ from the archived version") {
+                        assertThat(commandsRun, equalTo(listOf("cache-1" to "digest", "cache-2" to "digest", "cache-2" to "restore")))
+                    }
+
+                    it("streams the archive into the cache") {
+                        assertThat(restoredContents, equalTo(mapOf("cache-2" to "archived contents of cache-2")))
+                    }
+
+                    it("returns the result of restoring each cache") {
+                        assertThat(
+                            results.map { Triple(it.cacheName, it.outcome, it.archiveSizeBytes) },
+                            equalTo(listOf(Triple("cache-1", CacheArchiveOutcome.AlreadyUpToDate, 100L), Triple("cache-2", CacheArchiveOutcome.Restored, 200L))),
+                        )
+                    }
+
+                    it("does not change the owner of the restored files") {
+                        assertThat(restoreCommands.single().contains("chown"), equalTo(false))
+                    }
+                }
+
+                given("directory caches are being used") {
+                    beforeEachTest {
+                        whenever(cacheManager.cacheType).doReturn(CacheType.Directory)
+                    }
+
+                    given("the host is not running Windows") {
+                        runForEachTest { runBlocking { createArchiver().restore(archiveDirectory) } }
+
+                        it("restores the caches that differ from the archived version") {
+                            assertThat(restoredContents, equalTo(mapOf("cache-2" to "archived contents of cache-2")))
+                        }
+
+                        it("changes the owner of the restored files to the current user") {
+                            assertThat(restoreCommands.single().endsWith("&& chown -R 123:456 /cache"), equalTo(true))
+                        }
+                    }
+
+                    given("the host is running Windows") {
+                        beforeEachTest {
+                            whenever(systemInfo.operatingSystem).doReturn(OperatingSystem.Windows)
+                        }
+
+                        runForEachTest { runBlocking { createArchiver().restore(archiveDirectory) } }
+
+                        it("does not change the owner of the restored files") {
+                            assertThat(restoreCommands.single().contains("chown"), equalTo(false))
+                        }
+                    }
+                }
+
+                given("the archive for a cache is missing") {
+                    beforeEachTest { Files.delete(archiveDirectory.resolve("new-digest-2.tar.gz")) }
+
+                    it("throws an appropriate exception") {
+                        assertThat(
+                            { runBlocking { createArchiver().restore(archiveDirectory) } },
+                            throws<CacheArchiveException>(withMessage("The archive for cache 'cache-2' ('/archives/new-digest-2.tar.gz') does not exist.")),
+                        )
+                    }
+                }
+            }
+
+            given("the directory does not contain any exported caches") {
+                beforeEachTest { Files.createDirectories(archiveDirectory) }
+
+                it("throws an appropriate exception") {
+                    assertThat(
+                        { runBlocking { createArchiver().restore(archiveDirectory) } },
+                        throws<CacheArchiveException>(withMessage("The directory '/archives' does not contain any exported caches.")),
+                    )
+                }
+            }
+        }
+    }
+})
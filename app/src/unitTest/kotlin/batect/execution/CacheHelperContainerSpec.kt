@@ -0,0 +1,158 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.dockerclient.BindMount
+import batect.dockerclient.ContainerCreationSpec
+import batect.dockerclient.ContainerReference
+import batect.dockerclient.DockerClient
+import batect.dockerclient.ImageReference
+import batect.dockerclient.VolumeMount
+import batect.dockerclient.VolumeReference
+import batect.testutils.beforeEachTestSuspend
+import batect.testutils.createForEachTest
+import batect.testutils.createLoggerForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.itSuspend
+import batect.testutils.withMessage
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.throws
+import kotlinx.coroutines.runBlocking
+import okio.Buffer
+import org.mockito.kotlin.any
+import org.mockito.kotlin.anyOrNull
+import org.mockito.kotlin.argumentCaptor
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.eq
+import org.mockito.kotlin.inOrder
+import org.mockito.kotlin.mock
+import org.mockito.kotlin.never
+import org.mockito.kotlin.verify
+import org.mockito.kotlin.whenever
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+
+object CacheHelperContainerSpec : Spek({
+    describe("a cache helper container") {
+        val image = ImageReference("the-helper-image")
+        val container = ContainerReference("the-helper-container")
+        val mount = VolumeMount(VolumeReference("batect-cache-abc123-cache-1"), "/cache", "ro")
+        val command = listOf("tar", "-czf", "-", ".")
+
+        val dockerClient by createForEachTest {
+            mock<DockerClient> {
+                onBlocking { createContainer(any()) } doReturn container
+                onBlocking { run(any(), any(), any(), anyOrNull(), any()) } doReturn 0L
+            }
+        }
+
+        val logger by createLoggerForEachTest()
+        val helperContainer by createForEachTest { CacheHelperContainer(dockerClient, logger) }
+
+        fun createdSpec(): ContainerCreationSpec = runBlocking {
+            val captor = argumentCaptor<ContainerCreationSpec>()
+            verify(dockerClient).createContainer(captor.capture())
+            captor.firstValue
+        }
+
+        given("the helper image has already been pulled") {
+            beforeEachTestSuspend {
+                whenever(dockerClient.getImage(CacheHelperContainer.imageName)).doReturn(image)
+            }
+
+            given("no input is provided") {
+                beforeEachTestSuspend { helperContainer.run(mount, command, Buffer()) }
+
+                itSuspend("does not pull the image again") {
+                    verify(dockerClient, never()).pullImage(any(), any())
+                }
+
+                it("creates a container from the helper image") {
+                    assertThat(createdSpec().image, equalTo(image))
+                }
+
+                it("creates the container with the given command") {
+                    assertThat(createdSpec().command, equalTo(command))
+                }
+
+                it("mounts the cache into the container") {
+                    assertThat(createdSpec().bindMounts, equalTo(setOf<BindMount>(mount)))
+                }
+
+                it("does not attach stdin to the container") {
+                    assertThat(createdSpec().attachStdin, equalTo(false))
+                }
+
+                itSuspend("runs the container without any input, then removes it") {
+                    inOrder(dockerClient) {
+                        verify(dockerClient).run(eq(container), any(), any(), eq(null), any())
+                        verify(dockerClient).removeContainer(container, force = true, removeVolumes = false)
+                    }
+                }
+            }
+
+            given("input is provided") {
+                beforeEachTestSuspend { helperContainer.run(mount, command, Buffer(), Buffer().writeUtf8("some input")) }
+
+                it("attaches stdin to the container") {
+                    assertThat(createdSpec().attachStdin, equalTo(true))
+                }
+
+                itSuspend("runs the container with the input") {
+                    verify(dockerClient).run(eq(container), any(), any(), any(), any())
+                }
+            }
+
+            given("the command exits with a non-zero exit code") {
+                beforeEachTestSuspend {
+                    whenever(dockerClient.run(any(), any(), any(), anyOrNull(), any())).doReturn(2L)
+                }
+
+                it("throws an appropriate exception") {
+                    assertThat(
+                        { runBlocking { helperContainer.run(mount, command, Buffer()) } },
+                        throws<CacheArchiveException>(withMessage("Command 'tar -czf - .' exited with code 2.")),
+                    )
+                }
+
+                itSuspend("removes the container") {
+                    assertThat({ runBlocking { helperContainer.run(mount, command, Buffer()) } }, throws<CacheArchiveException>())
+
+                    verify(dockerClient).removeContainer(container, force = true, removeVolumes = false)
+                }
+            }
+        }
+
+        given("the helper image has not been pulled") {
+            beforeEachTestSuspend {
+                whenever(dockerClient.getImage(CacheHelperContainer.imageName)).doReturn(null)
+                whenever(dockerClient.pullImage(eq(CacheHelperContainer.imageName), any())).doReturn(image)
+
+                helperContainer.run(mount, command, Buffer())
+            }
+
+            itSuspend("pulls the image") {
+                verify(dockerClient).pullImage(eq(CacheHelperContainer.imageName), any())
+            }
+
+            it("creates a container from the pulled image") {
+                assertThat(createdSpec().image, equalTo(image))
+            }
+        }
+    }
+})
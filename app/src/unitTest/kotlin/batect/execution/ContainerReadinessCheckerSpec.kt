@@ -0,0 +1,297 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.cli.CommandLineOptions
+import batect.config.Container
+import batect.config.PortMapping
+import batect.config.PortRange
+import batect.config.ReadinessCheckConfig
+import batect.config.ReadinessCheckType
+import batect.docker.DockerClientConfigurationFactory
+import batect.dockerclient.DockerClientConfiguration
+import batect.testutils.createForEachTest
+import batect.testutils.createLoggerForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.imageSourceDoesNotMatter
+import batect.testutils.on
+import batect.testutils.runForEachTest
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.containsSubstring
+import com.natpryce.hamkrest.has
+import com.natpryce.hamkrest.isA
+import com.sun.net.httpserver.HttpServer
+import kotlinx.coroutines.runBlocking
+import okhttp3.OkHttpClient
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.mock
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.Suite
+import org.spekframework.spek2.style.specification.describe
+import java.net.InetSocketAddress
+import java.net.ServerSocket
+import java.util.concurrent.atomic.AtomicInteger
+import kotlin.concurrent.thread
+import kotlin.time.Duration.Companion.milliseconds
+
+object ContainerReadinessCheckerSpec : Spek({
+    describe("a container readiness checker") {
+        val containerPort = 8080
+        val fastPolling = ReadinessCheckConfig(ReadinessCheckType.Tcp, containerPort, initialInterval = 10.milliseconds, maximumInterval = 50.milliseconds, timeout = 500.milliseconds)
+
+        val logger by createLoggerForEachTest()
+        val httpClient = OkHttpClient()
+
+        fun containerPublishing(localPort: Int): Container = Container("some-container", imageSourceDoesNotMatter(), portMappings = setOf(PortMapping(localPort, containerPort)))
+
+        fun unusedPort(): Int = ServerSocket(0).use { it.localPort }
+
+        fun createChecker(commandLineOptions: CommandLineOptions = CommandLineOptions(), dockerHost: String = "unix:///var/run/docker.sock"): ContainerReadinessChecker {
+            val dockerClientConfigurationFactory = mock<DockerClientConfigurationFactory> {
+                on { createConfiguration() } doReturn DockerClientConfiguration.Builder(dockerHost).build()
+            }
+
+            return ContainerReadinessChecker(httpClient, commandLineOptions, dockerClientConfigurationFactory, logger)
+        }
+
+        given("port mappings are disabled") {
+            val checker by createForEachTest { createChecker(CommandLineOptions(disablePortMappings = true)) }
+
+            it("reports that readiness checks cannot run and explains why") {
+                assertThat(checker.reasonChecksCannotRun, equalTo("port mappings are disabled with --disable-ports."))
+            }
+
+            on("waiting for the container to become ready") {
+                val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(containerPublishing(1234), fastPolling) } }
+
+                it("reports that the check was skipped and explains why") {
+                    assertThat(
+                        result,
+                        equalTo(ReadinessCheckResult.Skipped("The readiness check for container 'some-container' cannot run because port mappings are disabled with --disable-ports.")),
+                    )
+                }
+            }
+        }
+
+        given("the Docker daemon is not reachable over TCP") {
+            val checker by createForEachTest { createChecker(dockerHost = "ssh://user@some-remote-host") }
+
+            it("reports that readiness checks cannot run and explains why") {
+                assertThat(checker.reasonChecksCannotRun, equalTo("the Docker daemon 'ssh://user@some-remote-host' is not reachable over TCP, so its published ports cannot be reached."))
+            }
+
+            on("waiting for the container to become ready") {
+                val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(containerPublishing(1234), fastPolling) } }
+
+                it("reports that the check was skipped and explains why") {
+                    assertThat(
+                        result,
+                        equalTo(ReadinessCheckResult.Skipped("The readiness check for container 'some-container' cannot run because the Docker daemon 'ssh://user@some-remote-host' is not reachable over TCP, so its published ports cannot be reached.")),
+                    )
+                }
+            }
+        }
+
+        given("the Docker daemon is reachable over TCP") {
+            val checker by createForEachTest { createChecker(dockerHost = "tcp://127.0.0.1:2376") }
+            val server by createForEachTest { ServerSocket(0) }
+
+            afterEachTest { server.close() }
+
+            it("reports that readiness checks can run") {
+                assertThat(checker.reasonChecksCannotRun, equalTo(null))
+            }
+
+            on("waiting for the container to become ready") {
+                val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(containerPublishing(server.localPort), fastPolling) } }
+
+                it("probes the published port on the daemon's host and reports that the container is ready") {
+                    assertThat(result, equalTo(ReadinessCheckResult.Ready))
+                }
+            }
+        }
+
+        given("the Docker daemon is reachable over a local socket") {
+            val checker by createForEachTest { createChecker() }
+
+            it("reports that readiness checks can run") {
+                assertThat(checker.reasonChecksCannotRun, equalTo(null))
+            }
+
+            given("the checked port is not published") {
+                val container = Container("some-container", imageSourceDoesNotMatter(), portMappings = setOf(PortMapping(1234, 9999), PortMapping(1235, containerPort, "udp")))
+
+                on("waiting for the container to become ready") {
+                    val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(container, fastPolling) } }
+
+                    it("reports that the check was skipped and explains why") {
+                        assertThat(
+                            result,
+                            equalTo(ReadinessCheckResult.Skipped("The readiness check for container 'some-container' cannot run because container port 8080 is not published to the host. Add a TCP port mapping for port 8080 to the container's 'ports'.")),
+                        )
+                    }
+                }
+            }
+
+            given("a TCP readiness check") {
+                given("something is listening on the published port") {
+                    val server by createForEachTest { ServerSocket(0) }
+
+                    afterEachTest { server.close() }
+
+                    on("waiting for the container to become ready") {
+                        val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(containerPublishing(server.localPort), fastPolling) } }
+
+                        it("reports that the container is ready") {
+                            assertThat(result, equalTo(ReadinessCheckResult.Ready))
+                        }
+                    }
+                }
+
+                given("the published port is part of a range") {
+                    val server by createForEachTest { ServerSocket(0) }
+                    val container by createForEachTest {
+                        Container("some-container", imageSourceDoesNotMatter(), portMappings = setOf(PortMapping(PortRange(server.localPort - 2, server.localPort + 1), PortRange(containerPort - 2, containerPort + 1))))
+                    }
+
+                    afterEachTest { server.close() }
+
+                    on("waiting for the container to become ready") {
+                        val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(container, fastPolling) } }
+
+                        it("probes the corresponding local port and reports that the container is ready") {
+                            assertThat(result, equalTo(ReadinessCheckResult.Ready))
+                        }
+                    }
+                }
+
+                given("connections to the published port are accepted and then immediately closed") {
+                    val server by createForEachTest { ServerSocket(0) }
+
+                    beforeEachTest {
+                        thread(isDaemon = true) {
+                            while (!server.isClosed) {
+                                try {
+                                    server.accept().close()
+                                } catch (e: Exception) {
+                                    // Server was closed.
+                                }
+                            }
+                        }
+                    }
+
+                    afterEachTest { server.close() }
+
+                    on("waiting for the container to become ready") {
+                        val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(containerPublishing(server.localPort), fastPolling) } }
+
+                        it("reports that the container is not ready after the timeout elapses") {
+                            assertThat(result, isA<ReadinessCheckResult.NotReady>(has(ReadinessCheckResult.NotReady::message, containsSubstring("The TCP readiness check on port 8080 did not succeed within 500ms"))))
+                        }
+
+                        it("includes the reason the last attempt failed") {
+                            assertThat(result, isA<ReadinessCheckResult.NotReady>(has(ReadinessCheckResult.NotReady::message, containsSubstring("was closed immediately."))))
+                        }
+                    }
+                }
+
+                given("nothing is listening on the published port") {
+                    on("waiting for the container to become ready") {
+                        val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(containerPublishing(unusedPort()), fastPolling) } }
+
+                        it("reports that the container is not ready after the timeout elapses") {
+                            assertThat(result, isA<ReadinessCheckResult.NotReady>(has(ReadinessCheckResult.NotReady::message, containsSubstring("The TCP readiness check on port 8080 did not succeed within 500ms"))))
+                        }
+                    }
+                }
+            }
+
+            given("an HTTP readiness check") {
+                val httpCheck = fastPolling.copy(type = ReadinessCheckType.Http, path = "/health")
+                val requestCount by createForEachTest { AtomicInteger(0) }
+                val requestedPaths by createForEachTest { mutableListOf<String>() }
+
+                fun Suite.startServer(statusForRequest: (Int) -> Int) = createForEachTest {
+                    HttpServer.create(InetSocketAddress(0), 0).apply {
+                        createContext("/") { exchange ->
+                            synchronized(requestedPaths) { requestedPaths.add(exchange.requestURI.path) }
+                            exchange.sendResponseHeaders(statusForRequest(requestCount.incrementAndGet()), -1)
+                            exchange.close()
+                        }
+
+                        start()
+                    }
+                }
+
+                given("the server responds successfully after some failed attempts") {
+                    val server by startServer { requestNumber -> if (requestNumber < 3) 503 else 200 }
+
+                    afterEachTest { server.stop(0) }
+
+                    on("waiting for the container to become ready") {
+                        val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(containerPublishing(server.address.port), httpCheck) } }
+
+                        it("reports that the container is ready") {
+                            assertThat(result, equalTo(ReadinessCheckResult.Ready))
+                        }
+
+                        it("keeps polling until the server responds successfully") {
+                            assertThat(requestCount.get(), equalTo(3))
+                        }
+
+                        it("requests the configured path") {
+                            assertThat(requestedPaths.toSet(), equalTo(setOf("/health")))
+                        }
+                    }
+                }
+
+                given("the server responds with a redirect") {
+                    val server by startServer { 302 }
+
+                    afterEachTest { server.stop(0) }
+
+                    on("waiting for the container to become ready") {
+                        val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(containerPublishing(server.address.port), httpCheck) } }
+
+                        it("reports that the container is ready") {
+                            assertThat(result, equalTo(ReadinessCheckResult.Ready))
+                        }
+                    }
+                }
+
+                given("the server never responds successfully") {
+                    val server by startServer { 500 }
+
+                    afterEachTest { server.stop(0) }
+
+                    on("waiting for the container to become ready") {
+                        val result by runForEachTest { runBlocking { checker.waitForContainerToBecomeReady(containerPublishing(server.address.port), httpCheck) } }
+
+                        it("reports that the container is not ready and includes the last response received") {
+                            assertThat(result, isA<ReadinessCheckResult.NotReady>(has(ReadinessCheckResult.NotReady::message, containsSubstring("GET http://localhost:${server.address.port}/health returned HTTP 500."))))
+                        }
+
+                        it("retries with backoff rather than polling continuously") {
+                            assertThat(requestCount.get() in 2..20, equalTo(true))
+                        }
+                    }
+                }
+            }
+        }
+    }
+})
@@ -0,0 +1,276 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.config.ProjectPaths
+import batect.docker.TaskNetworkPool
+import batect.dockerclient.ContainerReference
+import batect.dockerclient.ContainerRemovalFailedException
+import batect.dockerclient.ContainerStopFailedException
+import batect.dockerclient.DockerClient
+import batect.dockerclient.NetworkDeletionFailedException
+import batect.dockerclient.NetworkReference
+import batect.testutils.beforeEachTestSuspend
+import batect.testutils.createForEachTest
+import batect.testutils.createLoggerForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.itSuspend
+import batect.testutils.runForEachTest
+import batect.utils.Json
+import com.google.common.jimfs.Configuration
+import com.google.common.jimfs.Jimfs
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.isEmpty
+import org.mockito.kotlin.any
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.inOrder
+import org.mockito.kotlin.mock
+import org.mockito.kotlin.never
+import org.mockito.kotlin.verify
+import org.mockito.kotlin.whenever
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.nio.file.Files
+import java.nio.file.Path
+import kotlin.time.Duration.Companion.seconds
+
+object DeferredCleanupRunnerSpec : Spek({
+    describe("a deferred cleanup runner") {
+        val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
+        val projectPaths by createForEachTest {
+            mock<ProjectPaths> {
+                on { deferredCleanupDirectory } doReturn fileSystem.getPath("/project/.batect/deferred-cleanup")
+            }
+        }
+
+        val logger by createLoggerForEachTest()
+        val store by createForEachTest { DeferredCleanupStore(projectPaths, logger) }
+        val dockerClient by createForEachTest { mock<DockerClient>() }
+        val networkPool by createForEachTest {
+            mock<TaskNetworkPool> {
+                on { returnAfterDeferredCleanup(any()) } doReturn true
+            }
+        }
+
+        val runner by createForEachTest { DeferredCleanupRunner(dockerClient, store, networkPool, logger) }
+
+        val container1 = ContainerReference("container-1")
+        val container2 = ContainerReference("container-2")
+        val network = NetworkReference("network-1")
+        val cleanup = DeferredCleanup(listOf(container1.id, container2.id), listOf(network.id), listOf("docker rm container-1"))
+
+        fun read(path: Path): DeferredCleanup = Json.default.decodeFromString(DeferredCleanup.serializer(), Files.readAllBytes(path).toString(Charsets.UTF_8))
+
+        describe("finishing a single cleanup") {
+            val path by createForEachTest { store.record(cleanup) }
+
+            given("all resources can be cleaned up") {
+                val result by runForEachTest { runner.finish(path) }
+
+                itSuspend("stops and then removes each container") {
+                    inOrder(dockerClient) {
+                        verify(dockerClient).stopContainer(container1, 10.seconds)
+                        verify(dockerClient).removeContainer(container1, force = true, removeVolumes = true)
+                    }
+
+                    inOrder(dockerClient) {
+                        verify(dockerClient).stopContainer(container2, 10.seconds)
+                        verify(dockerClient).removeContainer(container2, force = true, removeVolumes = true)
+                    }
+                }
+
+                itSuspend("deletes the network after removing the containers") {
+                    inOrder(dockerClient) {
+                        verify(dockerClient).removeContainer(container1, force = true, removeVolumes = true)
+                        verify(dockerClient).deleteNetwork(network)
+                    }
+
+                    inOrder(dockerClient) {
+                        verify(dockerClient).removeContainer(container2, force = true, removeVolumes = true)
+                        verify(dockerClient).deleteNetwork(network)
+                    }
+                }
+
+                it("returns true") {
+                    assertThat(result, equalTo(true))
+                }
+
+                it("removes the record of the cleanup") {
+                    assertThat(Files.exists(path), equalTo(false))
+                }
+            }
+
+            given("a container has already stopped") {
+                beforeEachTestSuspend {
+                    whenever(dockerClient.stopContainer(container1, 10.seconds)).thenThrow(ContainerStopFailedException("Container already stopped"))
+
+                    runner.finish(path)
+                }
+
+                itSuspend("still removes the container") {
+                    verify(dockerClient).removeContainer(container1, force = true, removeVolumes = true)
+                }
+
+                it("removes the record of the cleanup") {
+                    assertThat(Files.exists(path), equalTo(false))
+                }
+            }
+
+            given("a container cannot be removed") {
+                beforeEachTestSuspend {
+                    whenever(dockerClient.removeContainer(container1, force = true, removeVolumes = true)).thenThrow(ContainerRemovalFailedException("Something went wrong"))
+
+                    runner.finish(path)
+                }
+
+                itSuspend("removes the other container") {
+                    verify(dockerClient).removeContainer(container2, force = true, removeVolumes = true)
+                }
+
+                itSuspend("does not try to delete the network") {
+                    verify(dockerClient, never()).deleteNetwork(any())
+                }
+
+                it("records the remaining resources to clean up, and that an attempt has been made") {
+                    assertThat(read(path), equalTo(DeferredCleanup(listOf(container1.id), listOf(network.id), cleanup.manualCleanupCommands, attempts = 1)))
+                }
+            }
+
+            given("the network cannot be deleted") {
+                beforeEachTestSuspend {
+                    whenever(dockerClient.deleteNetwork(network)).thenThrow(NetworkDeletionFailedException("Something went wrong"))
+                }
+
+                given("this is not the last attempt") {
+                    beforeEachTest { runner.finish(path) }
+
+                    it("records the remaining resources to clean up") {
+                        assertThat(read(path), equalTo(DeferredCleanup(emptyList(), listOf(network.id), cleanup.manualCleanupCommands, attempts = 1)))
+                    }
+                }
+
+                given("this is the last attempt") {
+                    beforeEachTest {
+                        runner.finish(path)
+                        runner.finish(path)
+                        runner.finish(path)
+                    }
+
+                    it("gives up and removes the record of the cleanup") {
+                        assertThat(Files.exists(path), equalTo(false))
+                    }
+                }
+            }
+
+            given("the network was leased from the task network pool") {
+                val pooledNetwork = NetworkReference("pooled-network")
+                val pooledCleanup = DeferredCleanup(listOf(container1.id), emptyList(), emptyList(), pooledNetworkIds = listOf(pooledNetwork.id))
+                val pooledPath by createForEachTest { store.record(pooledCleanup) }
+
+                given("the network can be returned to the pool") {
+                    beforeEachTest { runner.finish(pooledPath) }
+
+                    itSuspend("returns the network to the pool after removing the containers") {
+                        inOrder(dockerClient, networkPool) {
+                            verify(dockerClient).removeContainer(container1, force = true, removeVolumes = true)
+                            verify(networkPool).returnAfterDeferredCleanup(pooledNetwork)
+                        }
+                    }
+
+                    itSuspend("does not delete the network") {
+                        verify(dockerClient, never()).deleteNetwork(pooledNetwork)
+                    }
+
+                    it("removes the record of the cleanup") {
+                        assertThat(Files.exists(pooledPath), equalTo(false))
+                    }
+                }
+
+                given("the network cannot be returned to the pool yet") {
+                    beforeEachTest {
+                        whenever(networkPool.returnAfterDeferredCleanup(pooledNetwork)).doReturn(false)
+
+                        runner.finish(pooledPath)
+                    }
+
+                    it("records the network as still to be returned") {
+                        assertThat(read(pooledPath), equalTo(DeferredCleanup(emptyList(), emptyList(), emptyList(), attempts = 1, pooledNetworkIds = listOf(pooledNetwork.id))))
+                    }
+                }
+
+                given("a container cannot be removed") {
+                    beforeEachTestSuspend {
+                        whenever(dockerClient.removeContainer(container1, force = true, removeVolumes = true)).thenThrow(ContainerRemovalFailedException("Something went wrong"))
+
+                        runner.finish(pooledPath)
+                    }
+
+                    it("does not return the network to the pool") {
+                        verify(networkPool, never()).returnAfterDeferredCleanup(any())
+                    }
+                }
+            }
+
+            given("the cleanup has already been finished") {
+                beforeEachTest { Files.delete(path) }
+
+                val result by runForEachTest { runner.finish(path) }
+
+                it("returns false") {
+                    assertThat(result, equalTo(false))
+                }
+
+                itSuspend("does not remove any containers") {
+                    verify(dockerClient, never()).removeContainer(any(), any(), any())
+                }
+            }
+        }
+
+        describe("finishing all pending cleanups") {
+            given("there are no pending cleanups") {
+                val count by runForEachTest { runner.finishAllPending() }
+
+                it("returns zero") {
+                    assertThat(count, equalTo(0))
+                }
+            }
+
+            given("there are multiple pending cleanups") {
+                beforeEachTest {
+                    store.record(DeferredCleanup(listOf(container1.id), emptyList(), emptyList()))
+                    store.record(DeferredCleanup(listOf(container2.id), emptyList(), emptyList()))
+                }
+
+                val count by runForEachTest { runner.finishAllPending() }
+
+                it("returns the number of cleanups finished") {
+                    assertThat(count, equalTo(2))
+                }
+
+                itSuspend("cleans up the resources from each cleanup") {
+                    verify(dockerClient).removeContainer(container1, force = true, removeVolumes = true)
+                    verify(dockerClient).removeContainer(container2, force = true, removeVolumes = true)
+                }
+
+                it("removes the records of each cleanup") {
+                    assertThat(store.listPending(), isEmpty)
+                }
+            }
+        }
+    }
+})
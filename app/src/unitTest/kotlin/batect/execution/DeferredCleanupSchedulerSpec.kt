@@ -0,0 +1,201 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.cli.DockerCommandLineOptions
+import batect.os.ProcessRunner
+import batect.testutils.createForEachTest
+import batect.testutils.createLoggerForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.runForEachTest
+import com.natpryce.hamkrest.assertion.assertThat
+import org.mockito.kotlin.any
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.doThrow
+import org.mockito.kotlin.mock
+import org.mockito.kotlin.never
+import org.mockito.kotlin.verify
+import org.mockito.kotlin.whenever
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.nio.file.Paths
+import java.util.Optional
+
+object DeferredCleanupSchedulerSpec : Spek({
+    describe("a deferred cleanup scheduler") {
+        val cleanup = DeferredCleanup(listOf("container-1"), listOf("network-1"), listOf("docker rm container-1"))
+        val recordedPath = Paths.get("/project/.batect/deferred-cleanup/some-cleanup.json")
+
+        val processRunner by createForEachTest { mock<ProcessRunner>() }
+        val dockerOptions = DockerCommandLineOptions(contextName = "default", host = "unix:///var/run/docker.sock", configDirectory = Paths.get("/home/user/.docker"))
+        val logger by createLoggerForEachTest()
+
+        fun processInfo(command: String?, arguments: Array<String>?): ProcessHandle.Info = mock {
+            on { command() } doReturn Optional.ofNullable(command)
+            on { arguments() } doReturn Optional.ofNullable(arguments)
+        }
+
+        given("the cleanup can be recorded") {
+            val store by createForEachTest {
+                mock<DeferredCleanupStore> {
+                    on { record(cleanup) } doReturn recordedPath
+                }
+            }
+
+            given("the current process was started from a JAR") {
+                val currentProcess by createForEachTest { processInfo("/usr/bin/java", arrayOf("-Xshare:auto", "-jar", "/batect.jar", "the-task", "--", "some-arg")) }
+                val scheduler by createForEachTest { DeferredCleanupScheduler(store, processRunner, currentProcess, dockerOptions, logger) }
+                val result by runForEachTest { scheduler.schedule(cleanup) }
+
+                it("starts a copy of the current process with only the option to finish the cleanup and the options to connect to Docker") {
+                    verify(processRunner).startDetached(
+                        listOf(
+                            "/usr/bin/java",
+                            "-Xshare:auto",
+                            "-jar",
+                            "/batect.jar",
+                            "--finish-deferred-cleanup=$recordedPath",
+                            "--docker-host=unix:///var/run/docker.sock",
+                            "--docker-config=/home/user/.docker",
+                        ),
+                    )
+                }
+
+                it("reports that no manual cleanup is required") {
+                    assertThat(result, equalTo(PostTaskManualCleanup.NotRequired))
+                }
+            }
+
+            given("the current process was started from a JAR and connects to Docker with TLS") {
+                val currentProcess by createForEachTest { processInfo("/usr/bin/java", arrayOf("-jar", "/batect.jar", "--log-file=/tmp/batect.log", "the-task")) }
+                val tlsDockerOptions = dockerOptions.copy(
+                    host = "tcp://1.2.3.4:2376",
+                    useTLS = true,
+                    verifyTLS = true,
+                    tlsCACertificatePath = Paths.get("/certs/ca.pem"),
+                    tlsCertificatePath = Paths.get("/certs/cert.pem"),
+                    tlsKeyPath = Paths.get("/certs/key.pem"),
+                )
+
+                val scheduler by createForEachTest { DeferredCleanupScheduler(store, processRunner, currentProcess, tlsDockerOptions, logger) }
+
+                beforeEachTest { scheduler.schedule(cleanup) }
+
+                it("starts a copy of the current process with the TLS options, but not any other options from the current process") {
+                    verify(processRunner).startDetached(
+                        listOf(
+                            "/usr/bin/java",
+                            "-jar",
+                            "/batect.jar",
+                            "--finish-deferred-cleanup=$recordedPath",
+                            "--docker-host=tcp://1.2.3.4:2376",
+                            "--docker-config=/home/user/.docker",
+                            "--docker-tls-verify",
+                            "--docker-tls-ca-cert=/certs/ca.pem",
+                            "--docker-tls-cert=/certs/cert.pem",
+                            "--docker-tls-key=/certs/key.pem",
+                        ),
+                    )
+                }
+            }
+
+            given("the current process was started from a JAR and uses a Docker CLI context") {
+                val currentProcess by createForEachTest { processInfo("/usr/bin/java", arrayOf("-jar", "/batect.jar", "the-task")) }
+                val scheduler by createForEachTest { DeferredCleanupScheduler(store, processRunner, currentProcess, dockerOptions.copy(contextName = "my-context"), logger) }
+
+                beforeEachTest { scheduler.schedule(cleanup) }
+
+                it("starts a copy of the current process with the Docker context") {
+                    verify(processRunner).startDetached(
+                        listOf(
+                            "/usr/bin/java",
+                            "-jar",
+                            "/batect.jar",
+                            "--finish-deferred-cleanup=$recordedPath",
+                            "--docker-context=my-context",
+                            "--docker-config=/home/user/.docker",
+                        ),
+                    )
+                }
+            }
+
+            given("the arguments of the current process are not available") {
+                val currentProcess by createForEachTest { processInfo("/usr/bin/java", null) }
+                val scheduler by createForEachTest { DeferredCleanupScheduler(store, processRunner, currentProcess, dockerOptions, logger) }
+                val result by runForEachTest { scheduler.schedule(cleanup) }
+
+                it("does not start any process") {
+                    verify(processRunner, never()).startDetached(any())
+                }
+
+                it("reports that manual cleanup is required") {
+                    assertThat(result, equalTo(PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(cleanup.manualCleanupCommands)))
+                }
+            }
+
+            given("the current process was not started from a JAR") {
+                val currentProcess by createForEachTest { processInfo("/usr/bin/java", arrayOf("-cp", "/batect.jar", "batect.ApplicationKt")) }
+                val scheduler by createForEachTest { DeferredCleanupScheduler(store, processRunner, currentProcess, dockerOptions, logger) }
+                val result by runForEachTest { scheduler.schedule(cleanup) }
+
+                it("does not start any process") {
+                    verify(processRunner, never()).startDetached(any())
+                }
+
+                it("reports that manual cleanup is required") {
+                    assertThat(result, equalTo(PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(cleanup.manualCleanupCommands)))
+                }
+            }
+
+            given("the background process cannot be started") {
+                val currentProcess by createForEachTest { processInfo("/usr/bin/java", arrayOf("-jar", "/batect.jar", "the-task")) }
+                val scheduler by createForEachTest { DeferredCleanupScheduler(store, processRunner, currentProcess, dockerOptions, logger) }
+
+                beforeEachTest {
+                    doThrow(RuntimeException("Something went wrong")).whenever(processRunner).startDetached(any())
+                }
+
+                val result by runForEachTest { scheduler.schedule(cleanup) }
+
+                it("reports that manual cleanup is required") {
+                    assertThat(result, equalTo(PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(cleanup.manualCleanupCommands)))
+                }
+            }
+        }
+
+        given("the cleanup cannot be recorded") {
+            val store by createForEachTest {
+                mock<DeferredCleanupStore> {
+                    on { record(cleanup) } doThrow RuntimeException("Something went wrong")
+                }
+            }
+
+            val currentProcess by createForEachTest { processInfo("/usr/bin/java", arrayOf("-jar", "/batect.jar", "the-task")) }
+            val scheduler by createForEachTest { DeferredCleanupScheduler(store, processRunner, currentProcess, dockerOptions, logger) }
+            val result by runForEachTest { scheduler.schedule(cleanup) }
+
+            it("does not start any process") {
+                verify(processRunner, never()).startDetached(any())
+            }
+
+            it("reports that manual cleanup is required") {
+                assertThat(result, equalTo(PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(cleanup.manualCleanupCommands)))
+            }
+        }
+    }
+})
@@ -0,0 +1,134 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.config.ProjectPaths
+import batect.testutils.createForEachTest
+import batect.testutils.createLoggerForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.on
+import batect.testutils.runForEachTest
+import batect.utils.Json
+import com.google.common.jimfs.Configuration
+import com.google.common.jimfs.Jimfs
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.isEmpty
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.mock
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.nio.file.Files
+import java.nio.file.Path
+
+object DeferredCleanupStoreSpec : Spek({
+    describe("a deferred cleanup store") {
+        val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
+        val directory by createForEachTest { fileSystem.getPath("/project/.batect/deferred-cleanup") }
+        val projectPaths by createForEachTest {
+            mock<ProjectPaths> {
+                on { deferredCleanupDirectory } doReturn directory
+            }
+        }
+
+        val logger by createLoggerForEachTest()
+        val store by createForEachTest { DeferredCleanupStore(projectPaths, logger) }
+        val cleanup = DeferredCleanup(listOf("container-1", "container-2"), listOf("network-1"), listOf("docker rm container-1"))
+
+        fun read(path: Path): DeferredCleanup = Json.default.decodeFromString(DeferredCleanup.serializer(), Files.readAllBytes(path).toString(Charsets.UTF_8))
+
+        given("nothing has been recorded") {
+            on("listing pending cleanups") {
+                val pending by runForEachTest { store.listPending() }
+
+                it("returns an empty list") {
+                    assertThat(pending, isEmpty)
+                }
+            }
+        }
+
+        on("recording a cleanup") {
+            val path by runForEachTest { store.record(cleanup) }
+
+            it("writes the cleanup to a file in the deferred cleanup directory") {
+                assertThat(path.parent, equalTo(directory))
+                assertThat(read(path), equalTo(cleanup))
+            }
+
+            it("includes the cleanup in the list of pending cleanups") {
+                assertThat(store.listPending(), equalTo(listOf(path)))
+            }
+
+            it("does not leave any temporary files behind") {
+                assertThat(Files.list(directory).use { it.count() }, equalTo(1L))
+            }
+        }
+
+        describe("finishing a cleanup") {
+            val path by createForEachTest { store.record(cleanup) }
+
+            given("the action finishes all of the cleanup") {
+                var cleanupSeen: DeferredCleanup? = null
+                val result by runForEachTest { store.withExclusiveAccess(path) { cleanupSeen = it; null } }
+
+                it("provides the recorded cleanup to the action") {
+                    assertThat(cleanupSeen, equalTo(cleanup))
+                }
+
+                it("returns true") {
+                    assertThat(result, equalTo(true))
+                }
+
+                it("deletes the file") {
+                    assertThat(Files.exists(path), equalTo(false))
+                }
+
+                it("no longer lists the cleanup as pending") {
+                    assertThat(store.listPending(), isEmpty)
+                }
+            }
+
+            given("the action leaves some cleanup remaining") {
+                val remaining = DeferredCleanup(listOf("container-2"), listOf("network-1"), listOf("docker rm container-1"), attempts = 1)
+                val result by runForEachTest { store.withExclusiveAccess(path) { remaining } }
+
+                it("returns true") {
+                    assertThat(result, equalTo(true))
+                }
+
+                it("replaces the contents of the file with the remaining cleanup") {
+                    assertThat(read(path), equalTo(remaining))
+                }
+            }
+
+            given("the cleanup has already been finished") {
+                beforeEachTest { Files.delete(path) }
+
+                var actionCalled = false
+                val result by runForEachTest { store.withExclusiveAccess(path) { actionCalled = true; null } }
+
+                it("returns false") {
+                    assertThat(result, equalTo(false))
+                }
+
+                it("does not call the action") {
+                    assertThat(actionCalled, equalTo(false))
+                }
+            }
+        }
+    }
+})
@@ -65,12 +65,13 @@ object ParallelExecutionManagerSpec : Spek({
 
         val taskStepRunner by createForEachTest { mock<TaskStepRunner>() }
         val stateMachine by createForEachTest { mock<TaskStateMachine>() }
+        val taskMetricsCollector by createForEachTest { mock<TaskMetricsCollector>() }
         val telemetryCaptor by createForEachTest { TestTelemetryCaptor() }
         val logger by createLoggerForEachTest()
 
         given("there is no maximum level of parallelism set") {
             val maximumLevelOfParallelism: Int? = null
-            val executionManager by createForEachTest { ParallelExecutionManager(eventLogger, taskStepRunner, stateMachine, telemetryCaptor, maximumLevelOfParallelism, logger) }
+            val executionManager by createForEachTest { ParallelExecutionManager(eventLogger, taskStepRunner, stateMachine, taskMetricsCollector, telemetryCaptor, maximumLevelOfParallelism, logger) }
 
             given("a single step is provided by the state machine") {
                 val step by createForEachTest { createMockTaskStep() }
@@ -89,6 +90,10 @@ object ParallelExecutionManagerSpec : Spek({
                                 verify(taskStepRunner).run(eq(step), eq(executionManager))
                             }
 
+                            it("passes the step starting event to the metrics collector") {
+                                verify(taskMetricsCollector).postEvent(StepStartingEvent(step))
+                            }
+
                             it("logs the step to the event logger and then runs it") {
                                 inOrder(eventLogger, taskStepRunner) {
                                     verify(eventLogger).postEvent(StepStartingEvent(step))
@@ -126,6 +131,10 @@ object ParallelExecutionManagerSpec : Spek({
                                 verify(eventLogger).postEvent(eventToPost)
                             }
 
+                            it("passes the posted event to the metrics collector") {
+                                verify(taskMetricsCollector).postEvent(eventToPost)
+                            }
+
                             it("does not forward the posted event to the state machine") {
                                 verify(stateMachine, never()).postEvent(any())
                             }
@@ -167,10 +176,14 @@ object ParallelExecutionManagerSpec : Spek({
                                 verify(stateMachine).postEvent(eventToPost)
                             }
 
-                            it("logs the posted event to the event logger before forwarding it to the state machine") {
-                                inOrder(eventLogger, stateMachine) {
+                            it("passes the posted event to the metrics collector") {
+                                verify(taskMetricsCollector).postEvent(eventToPost)
+                            }
+
+                            it("logs the posted event to the event logger after the step starting event") {
+                                inOrder(eventLogger) {
+                                    verify(eventLogger).postEvent(StepStartingEvent(step))
                                     verify(eventLogger).postEvent(eventToPost)
-                                    verify(stateMachine).postEvent(eventToPost)
                                 }
                             }
 
@@ -390,7 +403,7 @@ object ParallelExecutionManagerSpec : Spek({
 
         given("there is a maximum level of parallelism set") {
             val maximumLevelOfParallelism = 2
-            val executionManager by createForEachTest { ParallelExecutionManager(eventLogger, taskStepRunner, stateMachine, telemetryCaptor, maximumLevelOfParallelism, logger) }
+            val executionManager by createForEachTest { ParallelExecutionManager(eventLogger, taskStepRunner, stateMachine, taskMetricsCollector, telemetryCaptor, maximumLevelOfParallelism, logger) }
 
             given("the state machine provides more steps than the configured level of parallelism initially") {
                 val stepsRunningInParallel by createForEachTest { AtomicInteger(0) }
@@ -0,0 +1,122 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.logging.Logger
+import batect.logging.Severity
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.logging.InMemoryLogSink
+import batect.testutils.logging.hasMessage
+import batect.testutils.logging.withLogMessage
+import batect.testutils.logging.withSeverity
+import batect.testutils.on
+import com.google.common.jimfs.Configuration
+import com.google.common.jimfs.Jimfs
+import com.natpryce.hamkrest.and
+import com.natpryce.hamkrest.assertion.assertThat
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.nio.file.Files
+import kotlin.streams.toList
+
+object PerformanceMetricsExporterSpec : Spek({
+    describe("a performance metrics exporter") {
+        val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
+        val metricsFile by createForEachTest { fileSystem.getPath("/metrics/batect.prom") }
+        val logSink by createForEachTest { InMemoryLogSink() }
+        val logger by createForEachTest { Logger("some.source", logSink) }
+        val labels = mapOf("task" to "build", "result" to "succeeded")
+
+        val metrics by createForEachTest {
+            PerformanceMetrics().apply { increment(PerformanceMetricFamilies.taskRuns, labels) }
+        }
+
+        fun readMetricsFile(): PerformanceMetrics = PerformanceMetrics.parse(Files.readAllBytes(metricsFile).toString(Charsets.UTF_8))
+
+        given("no metrics file was requested") {
+            val exporter by createForEachTest { PerformanceMetricsExporter(null, logger) }
+
+            on("exporting metrics") {
+                beforeEachTest { exporter.export(metrics) }
+
+                it("does not write anything") {
+                    assertThat(Files.exists(fileSystem.getPath("/metrics")), equalTo(false))
+                }
+            }
+        }
+
+        given("a metrics file was requested") {
+            val exporter by createForEachTest { PerformanceMetricsExporter(metricsFile, logger, lockAttempts = 3, lockRetryIntervalMilliseconds = 1) }
+
+            given("the metrics file does not exist yet") {
+                on("exporting metrics") {
+                    beforeEachTest { exporter.export(metrics) }
+
+                    it("writes the metrics to the file in the Prometheus text format") {
+                        assertThat(Files.readAllBytes(metricsFile).toString(Charsets.UTF_8), equalTo(metrics.render()))
+                    }
+
+                    it("does not leave the temporary file behind") {
+                        val files = Files.list(metricsFile.parent).use { it.map { path -> path.fileName.toString() }.toList() }
+
+                        assertThat(files.toSet(), equalTo(setOf("batect.prom", "batect.prom.lock")))
+                    }
+                }
+
+                on("exporting metrics with no values") {
+                    beforeEachTest { exporter.export(PerformanceMetrics()) }
+
+                    it("does not create the file") {
+                        assertThat(Files.exists(metricsFile), equalTo(false))
+                    }
+                }
+            }
+
+            given("the metrics file already contains values from a previous run") {
+                beforeEachTest {
+                    Files.createDirectories(metricsFile.parent)
+                    Files.write(metricsFile, PerformanceMetrics().apply { increment(PerformanceMetricFamilies.taskRuns, labels, 4.0) }.render().toByteArray(Charsets.UTF_8))
+                }
+
+                on("exporting metrics") {
+                    beforeEachTest { exporter.export(metrics) }
+
+                    it("adds the new values to the existing values") {
+                        assertThat(readMetricsFile().counterValue(PerformanceMetricFamilies.taskRuns, labels), equalTo(5.0))
+                    }
+                }
+            }
+
+            given("the metrics file cannot be written") {
+                beforeEachTest {
+                    Files.createDirectories(metricsFile)
+                    Files.write(metricsFile.resolve("something"), byteArrayOf())
+                }
+
+                on("exporting metrics") {
+                    beforeEachTest { exporter.export(metrics) }
+
+                    it("logs a warning rather than throwing") {
+                        assertThat(logSink, hasMessage(withSeverity(Severity.Warning) and withLogMessage("Could not write metrics file.")))
+                    }
+                }
+            }
+        }
+    }
+})
@@ -0,0 +1,207 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.on
+import batect.testutils.runForEachTest
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.containsSubstring
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+
+object PerformanceMetricsSpec : Spek({
+    describe("a set of performance metrics") {
+        val taskLabels = mapOf("task" to "build", "result" to "succeeded")
+
+        given("no values have been recorded") {
+            val metrics by createForEachTest { PerformanceMetrics() }
+
+            it("is empty") {
+                assertThat(metrics.isEmpty, equalTo(true))
+            }
+
+            it("renders to an empty string") {
+                assertThat(metrics.render(), equalTo(""))
+            }
+        }
+
+        given("a counter has been incremented") {
+            val metrics by createForEachTest {
+                PerformanceMetrics().apply {
+                    increment(PerformanceMetricFamilies.taskRuns, taskLabels)
+                    increment(PerformanceMetricFamilies.taskRuns, taskLabels)
+                    increment(PerformanceMetricFamilies.taskRuns, mapOf("task" to "build", "result" to "failed"))
+                }
+            }
+
+            it("reports the value of each series") {
+                assertThat(metrics.counterValue(PerformanceMetricFamilies.taskRuns, taskLabels), equalTo(2.0))
+                assertThat(metrics.counterValue(PerformanceMetricFamilies.taskRuns, mapOf("task" to "build", "result" to "failed")), equalTo(1.0))
+            }
+
+            on("rendering the metrics") {
+                val rendered by runForEachTest { metrics.render() }
+
+                it("renders the counter in the Prometheus text format, with series sorted by their labels") {
+                    assertThat(
+                        rendered,
+                        equalTo(
+                            """
+                                |# HELP batect_task_runs_total Number of tasks run, by task and result.
+                                |# TYPE batect_task_runs_total counter
+                                |batect_task_runs_total{task="build",result="failed"} 1
+                                |batect_task_runs_total{task="build",result="succeeded"} 2
+                                |
+                            """.trimMargin(),
+                        ),
+                    )
+                }
+            }
+        }
+
+        given("values have been observed for a histogram") {
+            val labels = mapOf("task" to "build")
+            val metrics by createForEachTest {
+                PerformanceMetrics().apply {
+                    observe(PerformanceMetricFamilies.taskDuration, labels, 0.5)
+                    observe(PerformanceMetricFamilies.taskDuration, labels, 45.0)
+                    observe(PerformanceMetricFamilies.taskDuration, labels, 5000.0)
+                }
+            }
+
+            it("reports the number of values observed") {
+                assertThat(metrics.histogramCount(PerformanceMetricFamilies.taskDuration, labels), equalTo(3L))
+            }
+
+            on("rendering the metrics") {
+                val rendered by runForEachTest { metrics.render() }
+
+                it("declares the histogram") {
+                    assertThat(rendered, containsSubstring("# TYPE batect_task_duration_seconds histogram\n"))
+                }
+
+                it("renders cumulative bucket counts, including values that fall exactly on a bucket's upper bound") {
+                    assertThat(rendered, containsSubstring("batect_task_duration_seconds_bucket{task=\"build\",le=\"0.1\"} 0\n"))
+                    assertThat(rendered, containsSubstring("batect_task_duration_seconds_bucket{task=\"build\",le=\"0.5\"} 1\n"))
+                    assertThat(rendered, containsSubstring("batect_task_duration_seconds_bucket{task=\"build\",le=\"30.0\"} 1\n"))
+                    assertThat(rendered, containsSubstring("batect_task_duration_seconds_bucket{task=\"build\",le=\"60.0\"} 2\n"))
+                    assertThat(rendered, containsSubstring("batect_task_duration_seconds_bucket{task=\"build\",le=\"3600.0\"} 2\n"))
+                }
+
+                it("includes values larger than the largest bucket in the +Inf bucket") {
+                    assertThat(rendered, containsSubstring("batect_task_duration_seconds_bucket{task=\"build\",le=\"+Inf\"} 3\n"))
+                }
+
+                it("renders the sum and count of the observed values") {
+                    assertThat(rendered, containsSubstring("batect_task_duration_seconds_sum{task=\"build\"} 5045.5\n"))
+                    assertThat(rendered, containsSubstring("batect_task_duration_seconds_count{task=\"build\"} 3\n"))
+                }
+            }
+        }
+
+        given("a label value contains characters that must be escaped") {
+            val labels = mapOf("task" to "a \"quoted\" \\ task\nwith a newline", "result" to "succeeded")
+            val metrics by createForEachTest {
+                PerformanceMetrics().apply { increment(PerformanceMetricFamilies.taskRuns, labels) }
+            }
+
+            it("escapes the label value when rendering") {
+                assertThat(metrics.render(), containsSubstring("""batect_task_runs_total{task="a \"quoted\" \\ task\nwith a newline",result="succeeded"} 1"""))
+            }
+
+            it("restores the original label value when parsing the rendered metrics") {
+                assertThat(PerformanceMetrics.parse(metrics.render()).counterValue(PerformanceMetricFamilies.taskRuns, labels), equalTo(1.0))
+            }
+        }
+
+        describe("parsing and combining previously rendered metrics") {
+            val imageLabels = mapOf("image" to "alpine:3.17")
+
+            val existing by createForEachTest {
+                PerformanceMetrics().apply {
+                    increment(PerformanceMetricFamilies.taskRuns, taskLabels)
+                    observe(PerformanceMetricFamilies.imagePullDuration, imageLabels, 3.0)
+                }
+            }
+
+            val new by createForEachTest {
+                PerformanceMetrics().apply {
+                    increment(PerformanceMetricFamilies.taskRuns, taskLabels)
+                    increment(PerformanceMetricFamilies.imagePulls, imageLabels + ("outcome" to "already_present"))
+                    observe(PerformanceMetricFamilies.imagePullDuration, imageLabels, 20.0)
+                }
+            }
+
+            on("adding new values to the parsed metrics") {
+                val combined by runForEachTest {
+                    PerformanceMetrics.parse(existing.render()).apply { add(new) }
+                }
+
+                it("adds counter values together") {
+                    assertThat(combined.counterValue(PerformanceMetricFamilies.taskRuns, taskLabels), equalTo(2.0))
+                }
+
+                it("includes series that only appear in the new values") {
+                    assertThat(combined.counterValue(PerformanceMetricFamilies.imagePulls, imageLabels + ("outcome" to "already_present")), equalTo(1.0))
+                }
+
+                it("combines histograms") {
+                    val expected = PerformanceMetrics().apply {
+                        observe(PerformanceMetricFamilies.imagePullDuration, imageLabels, 3.0)
+                        observe(PerformanceMetricFamilies.imagePullDuration, imageLabels, 20.0)
+                    }
+
+                    assertThat(combined.histogramCount(PerformanceMetricFamilies.imagePullDuration, imageLabels), equalTo(2L))
+                    assertThat(combined.render(), containsSubstring(expected.render()))
+                }
+            }
+
+            on("parsing a file that contains samples this version of Batect does not know about") {
+                val parsed by runForEachTest {
+                    PerformanceMetrics.parse(
+                        """
+                            |# HELP something_else_total Something else.
+                            |# TYPE something_else_total counter
+                            |something_else_total{thing="a"} 4
+                            |batect_task_runs_total{task="build",result="succeeded"} 7
+                            |batect_task_duration_seconds_bucket{task="build",le="0.1"} 1
+                            |batect_task_duration_seconds_bucket{task="build",le="+Inf"} 1
+                            |batect_task_duration_seconds_sum{task="build"} 0.05
+                            |batect_task_duration_seconds_count{task="build"} 1
+                            |not a valid line
+                        """.trimMargin(),
+                    )
+                }
+
+                it("keeps the samples it recognises") {
+                    assertThat(parsed.counterValue(PerformanceMetricFamilies.taskRuns, taskLabels), equalTo(7.0))
+                }
+
+                it("drops histograms whose buckets do not match the current buckets") {
+                    assertThat(parsed.histogramCount(PerformanceMetricFamilies.taskDuration, mapOf("task" to "build")), equalTo(null))
+                }
+
+                it("drops samples for unknown metrics") {
+                    assertThat(parsed.render(), !containsSubstring("something_else"))
+                }
+            }
+        }
+    }
+})
@@ -31,9 +31,10 @@ object RunOptionsSpec : Spek({
             val disableCleanupAfterFailureOnCommandLine: Boolean,
             val expectedBehaviourAfterSuccess: CleanupOption,
             val expectedBehaviourAfterFailure: CleanupOption,
+            val deferCleanupOnCommandLine: Boolean = false,
         ) {
             val description =
-                "the task ${if (isMainTask) "is" else "isn't"} the main task, cleanup after success ${if (disableCleanupAfterSuccessOnCommandLine) "is" else "isn't"} disabled and cleanup after failure ${if (disableCleanupAfterFailureOnCommandLine) "is" else "isn't"} disabled"
+                "the task ${if (isMainTask) "is" else "isn't"} the main task, cleanup after success ${if (disableCleanupAfterSuccessOnCommandLine) "is" else "isn't"} disabled, cleanup after failure ${if (disableCleanupAfterFailureOnCommandLine) "is" else "isn't"} disabled and cleanup ${if (deferCleanupOnCommandLine) "is" else "isn't"} deferred"
         }
 
         setOf(
@@ -93,9 +94,49 @@ object RunOptionsSpec : Spek({
                 expectedBehaviourAfterSuccess = CleanupOption.DontCleanup,
                 expectedBehaviourAfterFailure = CleanupOption.DontCleanup,
             ),
+            TestCase(
+                isMainTask = false,
+                disableCleanupAfterSuccessOnCommandLine = false,
+                disableCleanupAfterFailureOnCommandLine = false,
+                deferCleanupOnCommandLine = true,
+                expectedBehaviourAfterSuccess = CleanupOption.Cleanup,
+                expectedBehaviourAfterFailure = CleanupOption.Cleanup,
+            ),
+            TestCase(
+                isMainTask = false,
+                disableCleanupAfterSuccessOnCommandLine = false,
+                disableCleanupAfterFailureOnCommandLine = true,
+                deferCleanupOnCommandLine = true,
+                expectedBehaviourAfterSuccess = CleanupOption.Cleanup,
+                expectedBehaviourAfterFailure = CleanupOption.DontCleanup,
+            ),
+            TestCase(
+                isMainTask = true,
+                disableCleanupAfterSuccessOnCommandLine = false,
+                disableCleanupAfterFailureOnCommandLine = false,
+                deferCleanupOnCommandLine = true,
+                expectedBehaviourAfterSuccess = CleanupOption.DeferCleanup,
+                expectedBehaviourAfterFailure = CleanupOption.DeferCleanup,
+            ),
+            TestCase(
+                isMainTask = true,
+                disableCleanupAfterSuccessOnCommandLine = true,
+                disableCleanupAfterFailureOnCommandLine = false,
+                deferCleanupOnCommandLine = true,
+                expectedBehaviourAfterSuccess = CleanupOption.DontCleanup,
+                expectedBehaviourAfterFailure = CleanupOption.DeferCleanup,
+            ),
+            TestCase(
+                isMainTask = true,
+                disableCleanupAfterSuccessOnCommandLine = false,
+                disableCleanupAfterFailureOnCommandLine = true,
+                deferCleanupOnCommandLine = true,
+                expectedBehaviourAfterSuccess = CleanupOption.DeferCleanup,
+                expectedBehaviourAfterFailure = CleanupOption.DontCleanup,
+            ),
         ).forEach { testCase ->
             given(testCase.description) {
-                val commandLineOptions = CommandLineOptions(disableCleanupAfterSuccess = testCase.disableCleanupAfterSuccessOnCommandLine, disableCleanupAfterFailure = testCase.disableCleanupAfterFailureOnCommandLine)
+                val commandLineOptions = CommandLineOptions(disableCleanupAfterSuccess = testCase.disableCleanupAfterSuccessOnCommandLine, disableCleanupAfterFailure = testCase.disableCleanupAfterFailureOnCommandLine, deferCleanup = testCase.deferCleanupOnCommandLine)
                 val runOptions = RunOptions(testCase.isMainTask, commandLineOptions)
 
                 it("reports the expected behaviour after success") {
@@ -0,0 +1,209 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.execution
+
+import batect.config.CacheMount
+import batect.config.Container
+import batect.config.PullImage
+import batect.config.TmpfsMount
+import batect.docker.DockerContainer
+import batect.dockerclient.ContainerReference
+import batect.dockerclient.ImageReference
+import batect.execution.model.events.ContainerBecameHealthyEvent
+import batect.execution.model.events.ContainerCreatedEvent
+import batect.execution.model.events.ContainerDidNotBecomeHealthyEvent
+import batect.execution.model.events.ImageBuildFailedEvent
+import batect.execution.model.events.ImageBuiltEvent
+import batect.execution.model.events.ImagePullFailedEvent
+import batect.execution.model.events.ImagePulledEvent
+import batect.execution.model.events.StepStartingEvent
+import batect.execution.model.steps.BuildImageStep
+import batect.execution.model.steps.PullImageStep
+import batect.execution.model.steps.WaitForContainerToBecomeHealthyStep
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.imageSourceDoesNotMatter
+import batect.testutils.on
+import com.natpryce.hamkrest.assertion.assertThat
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.time.Duration
+
+object TaskMetricsCollectorSpec : Spek({
+    describe("a task metrics collector") {
+        val source = PullImage("alpine:3.17")
+        val container = Container("build-env", imageSourceDoesNotMatter(), volumeMounts = setOf(CacheMount("gradle-cache", "/root/.gradle"), TmpfsMount("/tmp")))
+        val dockerContainer = DockerContainer(ContainerReference("some-id"), "some-name")
+        val image = ImageReference("some-image-id")
+
+        var now = 0L
+
+        beforeEachTest { now = 0L }
+
+        fun histogramSumFor(metrics: PerformanceMetrics, family: HistogramFamily, labels: Map<String, String>): String =
+            metrics.render().lineSequence().single { it.startsWith("${family.name}_sum{") && it.contains(labels.entries.joinToString(",") { (key, value) -> "$key=\"$value\"" }) }.substringAfterLast(' ')
+
+        given("the collector is enabled") {
+            val collector by createForEachTest { TaskMetricsCollector(true, CacheType.Volume) { now } }
+
+            given("an image is pulled") {
+                on("the pull succeeding") {
+                    beforeEachTest {
+                        collector.postEvent(StepStartingEvent(PullImageStep(source)))
+                        now = 12_500_000_000
+                        collector.postEvent(ImagePulledEvent(source, image))
+                    }
+
+                    it("counts the image as pulled") {
+                        assertThat(collector.metrics.counterValue(PerformanceMetricFamilies.imagePulls, mapOf("image" to "alpine:3.17", "outcome" to "pulled")), equalTo(1.0))
+                    }
+
+                    it("records the time taken to pull the image") {
+                        assertThat(histogramSumFor(collector.metrics, PerformanceMetricFamilies.imagePullDuration, mapOf("image" to "alpine:3.17")), equalTo("12.5"))
+                    }
+                }
+
+                on("the image already being present") {
+                    beforeEachTest {
+                        collector.postEvent(StepStartingEvent(PullImageStep(source)))
+                        now = 100_000_000
+                        collector.postEvent(ImagePulledEvent(source, image, alreadyPresent = true))
+                    }
+
+                    it("counts the image as already present") {
+                        assertThat(collector.metrics.counterValue(PerformanceMetricFamilies.imagePulls, mapOf("image" to "alpine:3.17", "outcome" to "already_present")), equalTo(1.0))
+                    }
+
+                    it("does not record a pull duration") {
+                        assertThat(collector.metrics.histogramCount(PerformanceMetricFamilies.imagePullDuration, mapOf("image" to "alpine:3.17")), equalTo(null))
+                    }
+                }
+
+                on("the pull failing") {
+                    beforeEachTest {
+                        collector.postEvent(StepStartingEvent(PullImageStep(source)))
+                        collector.postEvent(ImagePullFailedEvent(source, "Something went wrong."))
+                    }
+
+                    it("counts the pull as failed") {
+                        assertThat(collector.metrics.counterValue(PerformanceMetricFamilies.imagePulls, mapOf("image" to "alpine:3.17", "outcome" to "failed")), equalTo(1.0))
+                    }
+                }
+            }
+
+            given("an image is built") {
+                on("the build succeeding") {
+                    beforeEachTest {
+                        collector.postEvent(StepStartingEvent(BuildImageStep(container)))
+                        now = 30_000_000_000
+                        collector.postEvent(ImageBuiltEvent(container, image))
+                    }
+
+                    it("counts the build as succeeded") {
+                        assertThat(collector.metrics.counterValue(PerformanceMetricFamilies.imageBuilds, mapOf("container" to "build-env", "result" to "succeeded")), equalTo(1.0))
+                    }
+
+                    it("records the time taken to build the image") {
+                        assertThat(histogramSumFor(collector.metrics, PerformanceMetricFamilies.imageBuildDuration, mapOf("container" to "build-env")), equalTo("30"))
+                    }
+                }
+
+                on("the build failing") {
+                    beforeEachTest {
+                        collector.postEvent(StepStartingEvent(BuildImageStep(container)))
+                        now = 2_000_000_000
+                        collector.postEvent(ImageBuildFailedEvent(container, "Something went wrong."))
+                    }
+
+                    it("counts the build as failed") {
+                        assertThat(collector.metrics.counterValue(PerformanceMetricFamilies.imageBuilds, mapOf("container" to "build-env", "result" to "failed")), equalTo(1.0))
+                    }
+
+                    it("records the time taken before the build failed") {
+                        assertThat(histogramSumFor(collector.metrics, PerformanceMetricFamilies.imageBuildDuration, mapOf("container" to "build-env")), equalTo("2"))
+                    }
+                }
+            }
+
+            given("the task waits for a container to become healthy") {
+                beforeEachTest {
+                    collector.postEvent(StepStartingEvent(WaitForContainerToBecomeHealthyStep(container, dockerContainer)))
+                    now = 4_000_000_000
+                }
+
+                on("the container becoming healthy") {
+                    beforeEachTest { collector.postEvent(ContainerBecameHealthyEvent(container)) }
+
+                    it("counts the container as healthy") {
+                        assertThat(collector.metrics.counterValue(PerformanceMetricFamilies.healthWaits, mapOf("container" to "build-env", "result" to "healthy")), equalTo(1.0))
+                    }
+
+                    it("records the time spent waiting") {
+                        assertThat(histogramSumFor(collector.metrics, PerformanceMetricFamilies.healthWaitDuration, mapOf("container" to "build-env")), equalTo("4"))
+                    }
+                }
+
+                on("the container not becoming healthy") {
+                    beforeEachTest { collector.postEvent(ContainerDidNotBecomeHealthyEvent(container, "Something went wrong.")) }
+
+                    it("counts the container as unhealthy") {
+                        assertThat(collector.metrics.counterValue(PerformanceMetricFamilies.healthWaits, mapOf("container" to "build-env", "result" to "unhealthy")), equalTo(1.0))
+                    }
+                }
+            }
+
+            on("a container with a cache mount being created") {
+                beforeEachTest { collector.postEvent(ContainerCreatedEvent(container, dockerContainer)) }
+
+                it("counts the use of each cache, but not other kinds of mounts") {
+                    assertThat(collector.metrics.counterValue(PerformanceMetricFamilies.cacheMounts, mapOf("cache" to "gradle-cache", "cache_type" to "volume")), equalTo(1.0))
+                    assertThat(collector.metrics.render().lines().count { it.startsWith("batect_cache_mounts_total{") }, equalTo(1))
+                }
+            }
+
+            on("the task finishing") {
+                beforeEachTest { collector.onTaskFinished("the-task", TaskRunOutcome.NonZeroExitCode, Duration.ofMillis(1500)) }
+
+                it("counts the task run with its result") {
+                    assertThat(collector.metrics.counterValue(PerformanceMetricFamilies.taskRuns, mapOf("task" to "the-task", "result" to "non_zero_exit_code")), equalTo(1.0))
+                }
+
+                it("records the duration of the task") {
+                    assertThat(histogramSumFor(collector.metrics, PerformanceMetricFamilies.taskDuration, mapOf("task" to "the-task")), equalTo("1.5"))
+                }
+            }
+        }
+
+        given("the collector is disabled") {
+            val collector by createForEachTest { TaskMetricsCollector(false, CacheType.Volume) { now } }
+
+            on("receiving events and the task finishing") {
+                beforeEachTest {
+                    collector.postEvent(StepStartingEvent(PullImageStep(source)))
+                    collector.postEvent(ImagePulledEvent(source, image))
+                    collector.postEvent(ContainerCreatedEvent(container, dockerContainer))
+                    collector.onTaskFinished("the-task", TaskRunOutcome.Succeeded, Duration.ofSeconds(1))
+                }
+
+                it("does not record anything") {
+                    assertThat(collector.metrics.isEmpty, equalTo(true))
+                }
+            }
+        }
+    }
+})
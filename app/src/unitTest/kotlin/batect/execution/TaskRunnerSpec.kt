@@ -17,11 +17,16 @@
 package batect.execution
 
 import batect.config.Container
+import batect.config.ExpressionEvaluationContext
+import batect.config.PortMapping
+import batect.config.ReadinessCheckConfig
+import batect.config.ReadinessCheckType
 import batect.config.Task
 import batect.config.TaskRunConfiguration
 import batect.execution.model.events.TaskNetworkDeletedEvent
 import batect.ioc.TaskKodein
 import batect.ioc.TaskKodeinFactory
+import batect.os.HostEnvironmentVariables
 import batect.telemetry.TestTelemetryCaptor
 import batect.testutils.createForEachTest
 import batect.testutils.createLoggerForEachTest
@@ -31,6 +36,7 @@ import batect.testutils.on
 import batect.testutils.runForEachTest
 import batect.ui.Console
 import batect.ui.EventLogger
+import batect.ui.containerio.ContainerOutputCapture
 import batect.ui.text.Text
 import com.natpryce.hamkrest.assertion.assertThat
 import com.natpryce.hamkrest.equalTo
@@ -46,6 +52,7 @@ import org.mockito.kotlin.doReturn
 import org.mockito.kotlin.eq
 import org.mockito.kotlin.inOrder
 import org.mockito.kotlin.mock
+import org.mockito.kotlin.never
 import org.mockito.kotlin.verify
 import org.mockito.kotlin.verifyNoInteractions
 import org.mockito.kotlin.whenever
@@ -68,7 +75,9 @@ object TaskRunnerSpec : Spek({
         val console by createForEachTest { mock<Console>() }
         val telemetryCaptor by createForEachTest { TestTelemetryCaptor() }
         val logger by createLoggerForEachTest()
-        val taskRunner by createForEachTest { TaskRunner(taskKodeinFactory, interruptionTrap, console, telemetryCaptor, logger) }
+        val deferredCleanupScheduler by createForEachTest { mock<DeferredCleanupScheduler>() }
+        val performanceMetricsExporter by createForEachTest { mock<PerformanceMetricsExporter>() }
+        val taskRunner by createForEachTest { TaskRunner(taskKodeinFactory, interruptionTrap, console, telemetryCaptor, deferredCleanupScheduler, performanceMetricsExporter, logger) }
 
         describe("running a task") {
             given("the task has a container to run") {
@@ -91,6 +100,8 @@ object TaskRunnerSpec : Spek({
                 }
 
                 val executionManager by createForEachTest { mock<ParallelExecutionManager>() }
+                val taskMetricsCollector by createForEachTest { TaskMetricsCollector(true, CacheType.Volume) }
+                val outputCapture by createForEachTest { mock<ContainerOutputCapture>() }
 
                 val dependencyGraph by createForEachTest {
                     mock<ContainerDependencyGraph> {
@@ -98,6 +109,8 @@ object TaskRunnerSpec : Spek({
                     }
                 }
 
+                val readinessChecker by createForEachTest { mock<ContainerReadinessChecker>() }
+
                 beforeEachTest {
                     whenever(taskKodeinFactory.create(any(), any())).thenReturn(
                         TaskKodein(
@@ -107,11 +120,60 @@ object TaskRunnerSpec : Spek({
                                 bind<TaskStateMachine>() with instance(stateMachine)
                                 bind<ParallelExecutionManager>() with instance(executionManager)
                                 bind<ContainerDependencyGraph>() with instance(dependencyGraph)
+                                bind<ContainerOutputCapture>() with instance(outputCapture)
+                                bind<ContainerReadinessChecker>() with instance(readinessChecker)
+                                bind<TaskMetricsCollector>() with instance(taskMetricsCollector)
+                                bind<ExpressionEvaluationContext>() with instance(ExpressionEvaluationContext(HostEnvironmentVariables(), emptyMap()))
                             },
                         ),
                     )
                 }
 
+                given("a container in the task has a readiness check") {
+                    val containerWithReadinessCheck = Container("some-container-with-readiness-check", imageSourceDoesNotMatter(), portMappings = setOf(PortMapping(1234, 8080)), readinessCheckConfig = ReadinessCheckConfig(ReadinessCheckType.Tcp, 8080))
+
+                    beforeEachTest {
+                        whenever(dependencyGraph.allContainers).doReturn(containers + containerWithReadinessCheck)
+                    }
+
+                    given("readiness checks cannot run") {
+                        beforeEachTest {
+                            whenever(readinessChecker.reasonChecksCannotRun).doReturn("port mappings are disabled with --disable-ports.")
+                        }
+
+                        on("running the task") {
+                            beforeEachTest { taskRunner.run(task, runOptions) }
+
+                            it("warns that the readiness check will be skipped before the task starts") {
+                                inOrder(console, eventLogger) {
+                                    verify(console).println(
+                                        Text.yellow(
+                                            Text("The readiness check for ") + Text.bold("some-container-with-readiness-check") +
+                                                Text(" will be skipped and the image's health check used instead, because port mappings are disabled with --disable-ports."),
+                                        ),
+                                    )
+
+                                    verify(eventLogger).onTaskStarting("some-task")
+                                }
+                            }
+                        }
+                    }
+
+                    given("readiness checks can run") {
+                        beforeEachTest {
+                            whenever(readinessChecker.reasonChecksCannotRun).doReturn(null)
+                        }
+
+                        on("running the task") {
+                            beforeEachTest { taskRunner.run(task, runOptions) }
+
+                            it("does not print any warnings") {
+                                verifyNoInteractions(console)
+                            }
+                        }
+                    }
+                }
+
                 given("the task succeeds") {
                     beforeEachTest {
                         whenever(stateMachine.taskHasFailed).thenReturn(false)
@@ -131,6 +193,14 @@ object TaskRunnerSpec : Spek({
                                 verify(executionManager).run()
                             }
 
+                            it("closes the output capture after running the task and before reporting the result") {
+                                inOrder(executionManager, outputCapture, eventLogger) {
+                                    verify(executionManager).run()
+                                    verify(outputCapture).close()
+                                    verify(eventLogger).onTaskFinished(eq("some-task"), eq(100), any())
+                                }
+                            }
+
                             it("logs that the task is starting before running the task") {
                                 inOrder(eventLogger, executionManager) {
                                     verify(eventLogger).onTaskStarting("some-task")
@@ -165,6 +235,16 @@ object TaskRunnerSpec : Spek({
                                 verifyNoInteractions(console)
                             }
 
+                            it("does not schedule any deferred cleanup") {
+                                verifyNoInteractions(deferredCleanupScheduler)
+                            }
+
+                            it("records the result and duration of the task and exports the task's metrics") {
+                                assertThat(taskMetricsCollector.metrics.counterValue(PerformanceMetricFamilies.taskRuns, mapOf("task" to "some-task", "result" to "non_zero_exit_code")), equalTo(1.0))
+                                assertThat(taskMetricsCollector.metrics.histogramCount(PerformanceMetricFamilies.taskDuration, mapOf("task" to "some-task")), equalTo(1L))
+                                verify(performanceMetricsExporter).export(taskMetricsCollector.metrics)
+                            }
+
                             it("creates a telemetry span for the task and includes the number of containers in the task") {
                                 assertThat(telemetryCaptor.allSpans, hasSize(equalTo(1)))
 
@@ -176,6 +256,64 @@ object TaskRunnerSpec : Spek({
                         }
                     }
 
+                    given("cleanup after success is deferred") {
+                        val runOptionsWithCleanupDeferred = runOptions.copy(behaviourAfterSuccess = CleanupOption.DeferCleanup)
+                        val deferredCleanup = DeferredCleanup(listOf("container-1"), listOf("network-1"), listOf("do this to clean up"))
+
+                        beforeEachTest {
+                            whenever(stateMachine.deferredCleanup).doReturn(deferredCleanup)
+                        }
+
+                        given("the deferred cleanup is scheduled successfully") {
+                            beforeEachTest {
+                                whenever(deferredCleanupScheduler.schedule(deferredCleanup)).doReturn(PostTaskManualCleanup.NotRequired)
+                            }
+
+                            on("running the task") {
+                                val result by runForEachTest { taskRunner.run(task, runOptionsWithCleanupDeferred) }
+
+                                it("schedules the deferred cleanup after running the task and before reporting the result") {
+                                    inOrder(executionManager, deferredCleanupScheduler, eventLogger) {
+                                        verify(executionManager).run()
+                                        verify(deferredCleanupScheduler).schedule(deferredCleanup)
+                                        verify(eventLogger).onTaskFinished(eq("some-task"), eq(100), any())
+                                    }
+                                }
+
+                                it("does not log any manual cleanup instructions") {
+                                    verify(eventLogger, never()).onTaskFinishedWithCleanupDisabled(any(), any())
+                                }
+
+                                it("returns the exit code from the task") {
+                                    assertThat(result.exitCode, equalTo(100))
+                                }
+                            }
+                        }
+
+                        given("the deferred cleanup could not be scheduled") {
+                            val postTaskCleanup = PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(listOf("do this to clean up"))
+
+                            beforeEachTest {
+                                whenever(deferredCleanupScheduler.schedule(deferredCleanup)).doReturn(postTaskCleanup)
+                            }
+
+                            on("running the task") {
+                                val result by runForEachTest { taskRunner.run(task, runOptionsWithCleanupDeferred) }
+
+                                it("logs that the task finished, then logs the manual cleanup instructions") {
+                                    inOrder(eventLogger) {
+                                        verify(eventLogger).onTaskFinished(eq("some-task"), eq(100), any())
+                                        verify(eventLogger).onTaskFinishedWithCleanupDisabled(postTaskCleanup, allTaskEvents)
+                                    }
+                                }
+
+                                it("returns the exit code from the task") {
+                                    assertThat(result.exitCode, equalTo(100))
+                                }
+                            }
+                        }
+                    }
+
                     given("cleanup after success is disabled") {
                         val runOptionsWithCleanupDisabled = runOptions.copy(behaviourAfterSuccess = CleanupOption.DontCleanup)
                         val postTaskCleanup = PostTaskManualCleanup.Required.DueToTaskSuccessWithCleanupDisabled(listOf("do this to clean up"))
@@ -241,6 +379,11 @@ object TaskRunnerSpec : Spek({
                             assertThat(result.exitCode, !equalTo(0))
                         }
 
+                        it("records that the task failed and exports the task's metrics") {
+                            assertThat(taskMetricsCollector.metrics.counterValue(PerformanceMetricFamilies.taskRuns, mapOf("task" to "some-task", "result" to "failed")), equalTo(1.0))
+                            verify(performanceMetricsExporter).export(taskMetricsCollector.metrics)
+                        }
+
                         it("returns all containers started as part of the task") {
                             assertThat(result.containers, equalTo(containers))
                         }
@@ -249,6 +392,25 @@ object TaskRunnerSpec : Spek({
                             verifyNoInteractions(console)
                         }
                     }
+
+                    given("cleanup after failure is deferred but could not be scheduled") {
+                        val deferredCleanup = DeferredCleanup(listOf("container-1"), listOf("network-1"), listOf("do this to clean up"))
+                        val deferredCleanupFailure = PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(listOf("do this to clean up"))
+
+                        beforeEachTest {
+                            whenever(stateMachine.postTaskManualCleanup).thenReturn(PostTaskManualCleanup.NotRequired)
+                            whenever(stateMachine.deferredCleanup).doReturn(deferredCleanup)
+                            whenever(deferredCleanupScheduler.schedule(deferredCleanup)).doReturn(deferredCleanupFailure)
+                        }
+
+                        on("running the task") {
+                            beforeEachTest { taskRunner.run(task, runOptions.copy(behaviourAfterFailure = CleanupOption.DeferCleanup)) }
+
+                            it("logs that the task failed with the manual cleanup instructions for the deferred cleanup") {
+                                verify(eventLogger).onTaskFailed("some-task", deferredCleanupFailure, allTaskEvents)
+                            }
+                        }
+                    }
                 }
             }
 
@@ -255,6 +255,36 @@ object TaskStateMachineSpec : Spek({
                                     }
                                 }
                             }
+
+                            given("cleanup after success is deferred") {
+                                val deferredCleanup = DeferredCleanup(listOf("some-container-id"), listOf("some-network-id"), cleanupCommands)
+
+                                beforeEachTest {
+                                    whenever(runOptions.behaviourAfterSuccess) doReturn CleanupOption.DeferCleanup
+                                    whenever(cleanupStage.deferredCleanup) doReturn deferredCleanup
+                                    whenever(cleanupStage.popNextStep(setOf(event), stepsStillRunning)).doReturn(StageComplete)
+                                }
+
+                                on("getting the next step to execute") {
+                                    val result by runNullableForEachTest { stateMachine.popNextStep(stepsStillRunning) }
+
+                                    it("does not return a step") {
+                                        assertThat(result, absent())
+                                    }
+
+                                    it("sends all previous events to the cleanup stage planner") {
+                                        verify(cleanupStagePlanner).createStage(setOf(event), CleanupOption.DeferCleanup)
+                                    }
+
+                                    it("provides the cleanup to finish later") {
+                                        assertThat(stateMachine.deferredCleanup, equalTo(deferredCleanup))
+                                    }
+
+                                    it("indicates that manual cleanup is not required") {
+                                        assertThat(stateMachine.postTaskManualCleanup, equalTo(PostTaskManualCleanup.NotRequired))
+                                    }
+                                }
+                            }
                         }
                     }
                 }
@@ -78,12 +78,25 @@ object DeleteTaskNetworkStepRuleSpec : Spek({
             }
         }
 
-        on("getting the manual cleanup instruction") {
-            val rule = DeleteTaskNetworkStepRule(network, emptySet())
-            val instruction = rule.manualCleanupCommand
+        given("the network was created for the task") {
+            on("getting the manual cleanup instruction") {
+                val rule = DeleteTaskNetworkStepRule(network, emptySet())
+                val instruction = rule.manualCleanupCommand
 
-            it("returns the appropriate Docker CLI command to use") {
-                assertThat(instruction, equalTo("docker network rm the-network"))
+                it("returns the appropriate Docker CLI command to use") {
+                    assertThat(instruction, equalTo("docker network rm the-network"))
+                }
+            }
+        }
+
+        given("the network was leased from the task network pool") {
+            on("getting the manual cleanup instruction") {
+                val rule = DeleteTaskNetworkStepRule(network, emptySet(), leasedFromPool = true)
+                val instruction = rule.manualCleanupCommand
+
+                it("does not return a command") {
+                    assertThat(instruction, equalTo(null))
+                }
             }
         }
 
@@ -101,6 +114,7 @@ object DeleteTaskNetworkStepRuleSpec : Spek({
                         |   "type": "${rule::class.qualifiedName}",
                         |   "network": {"id": "the-network"},
                         |   "containersThatMustBeRemovedFirst": ["container-1", "container-2"],
+                        |   "leasedFromPool": false,
                         |   "manualCleanupCommand": "docker network rm the-network"
                         |}
                         """.trimMargin(),
@@ -30,10 +30,12 @@ import batect.dockerclient.ContainerReference
 import batect.dockerclient.NetworkReference
 import batect.execution.CleanupOption
 import batect.execution.ContainerDependencyGraph
+import batect.execution.DeferredCleanup
 import batect.execution.model.events.ContainerCreatedEvent
 import batect.execution.model.events.ContainerStartedEvent
 import batect.execution.model.events.TaskEvent
 import batect.execution.model.events.TaskNetworkCreatedEvent
+import batect.execution.model.events.TaskNetworkLeasedEvent
 import batect.execution.model.rules.cleanup.CleanupTaskStepRule
 import batect.execution.model.rules.cleanup.DeleteTaskNetworkStepRule
 import batect.execution.model.rules.cleanup.RemoveContainerStepRule
@@ -44,6 +46,7 @@ import batect.testutils.given
 import batect.testutils.on
 import batect.testutils.pathResolutionContextDoesNotMatter
 import batect.testutils.runForEachTest
+import com.natpryce.hamkrest.absent
 import com.natpryce.hamkrest.assertion.assertThat
 import com.natpryce.hamkrest.equalTo
 import com.natpryce.hamkrest.hasElement
@@ -93,6 +96,20 @@ object CleanupStagePlannerSpec : Spek({
                     }
                 }
             }
+
+            given("cleanup is being deferred") {
+                on("creating the stage") {
+                    val stage by runForEachTest { planner.createStage(events, CleanupOption.DeferCleanup) }
+
+                    it("has no rules") {
+                        assertThat(stage.rules, isEmpty)
+                    }
+
+                    it("has nothing to clean up later") {
+                        assertThat(stage.deferredCleanup, absent())
+                    }
+                }
+            }
         }
 
         given("the task network was created") {
@@ -362,6 +379,92 @@ object CleanupStagePlannerSpec : Spek({
                             }
                         }
                     }
+
+                    given("cleanup is being deferred") {
+                        on("creating the stage") {
+                            val stage by runForEachTest { planner.createStage(events, CleanupOption.DeferCleanup) }
+
+                            it("has no rules") {
+                                assertThat(stage.rules, isEmpty)
+                            }
+
+                            it("provides manual cleanup commands to remove the network and the containers") {
+                                assertThat(stage.manualCleanupCommands, equalTo(expectedCleanupCommands))
+                            }
+
+                            it("records the containers and network to clean up later") {
+                                assertThat(
+                                    stage.deferredCleanup,
+                                    equalTo(
+                                        DeferredCleanup(
+                                            listOf("container-1-id", "container-2-id", "task-container-id"),
+                                            listOf("the-network"),
+                                            expectedCleanupCommands,
+                                        ),
+                                    ),
+                                )
+                            }
+                        }
+                    }
+                }
+            }
+        }
+
+        given("the task network was leased from the task network pool") {
+            val network = NetworkReference("the-pooled-network")
+            val dockerContainer = DockerContainer(ContainerReference("some-container-id"), "some-container-name")
+            val expectedCleanupCommands = listOf("docker rm --force --volumes some-container-id")
+
+            beforeEachTest {
+                events.add(TaskNetworkLeasedEvent(network))
+                events.add(ContainerCreatedEvent(taskContainer, dockerContainer))
+                events.add(ContainerStartedEvent(taskContainer))
+            }
+
+            given("automatic cleanup is being performed") {
+                on("creating the stage") {
+                    val stage by runForEachTest { planner.createStage(events, CleanupOption.Cleanup) }
+
+                    itHasExactlyTheRules(
+                        { stage },
+                        mapOf(
+                            "return the task network to the pool" to DeleteTaskNetworkStepRule(network, setOf(taskContainer), leasedFromPool = true),
+                            "stop the container" to StopContainerStepRule(taskContainer, dockerContainer, emptySet()),
+                            "remove the container after it is stopped" to RemoveContainerStepRule(taskContainer, dockerContainer, true),
+                        ),
+                    )
+
+                    it("only provides a manual cleanup command to remove the container") {
+                        assertThat(stage.manualCleanupCommands, equalTo(expectedCleanupCommands))
+                    }
+                }
+            }
+
+            given("cleanup is being deferred") {
+                on("creating the stage") {
+                    val stage by runForEachTest { planner.createStage(events, CleanupOption.DeferCleanup) }
+
+                    it("has no rules") {
+                        assertThat(stage.rules, isEmpty)
+                    }
+
+                    it("only provides a manual cleanup command to remove the container") {
+                        assertThat(stage.manualCleanupCommands, equalTo(expectedCleanupCommands))
+                    }
+
+                    it("records the network to be returned to the pool later, rather than deleted") {
+                        assertThat(
+                            stage.deferredCleanup,
+                            equalTo(
+                                DeferredCleanup(
+                                    listOf("some-container-id"),
+                                    emptyList(),
+                                    expectedCleanupCommands,
+                                    pooledNetworkIds = listOf("the-pooled-network"),
+                                ),
+                            ),
+                        )
+                    }
                 }
             }
         }
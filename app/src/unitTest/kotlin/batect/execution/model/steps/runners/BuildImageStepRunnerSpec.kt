@@ -35,6 +35,7 @@ import batect.dockerclient.BuilderVersion
 import batect.dockerclient.DockerClient
 import batect.dockerclient.EnvironmentBuildSecret
 import batect.dockerclient.FileBuildSecret
+import batect.dockerclient.ImageBuildContextUploadProgress
 import batect.dockerclient.ImageBuildFailedException
 import batect.dockerclient.ImageBuildProgressReceiver
 import batect.dockerclient.ImageReference
@@ -64,7 +65,9 @@ import batect.testutils.on
 import batect.testutils.pathResolutionContextDoesNotMatter
 import batect.ui.containerio.ContainerIOStreamingOptions
 import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.hasElement
 import com.natpryce.hamkrest.hasSize
+import kotlinx.serialization.json.JsonPrimitive
 import okio.Buffer
 import okio.Path.Companion.toOkioPath
 import okio.buffer
@@ -184,6 +187,7 @@ object BuildImageStepRunnerSpec : Spek({
                                 }
 
                                 val onStatusUpdate = invocation.getArgument<ImageBuildProgressReceiver>(2)
+                                onStatusUpdate(ImageBuildContextUploadProgress(1500))
                                 onStatusUpdate(StepStarting(1, "First step"))
 
                                 image
@@ -240,7 +244,8 @@ object BuildImageStepRunnerSpec : Spek({
                         verify(dockerClient).buildImage(argWhere { it.buildArgs == expectedArgs }, any(), any())
                     }
 
-                    it("emits a 'image build progress' event for each update received from Docker") {
+                    it("emits a 'image build progress' event for each update received from Docker, including build context upload progress") {
+                        verify(eventSink).postEvent(ImageBuildProgressEvent(container, AggregatedImageBuildProgress(setOf(ActiveImageBuildStep.UploadingBuildContext(-1, "build context", 1500)))))
                         verify(eventSink).postEvent(ImageBuildProgressEvent(container, AggregatedImageBuildProgress(setOf(ActiveImageBuildStep.NotDownloading(1, "First step")))))
                     }
 
@@ -258,6 +263,12 @@ object BuildImageStepRunnerSpec : Spek({
                         val span = telemetryCaptor.allSpans.single()
                         assertThat(span.type, equalTo("BuildImage"))
                     }
+
+                    it("records the size of the build context and how long it took to upload in the telemetry span") {
+                        val span = telemetryCaptor.allSpans.single()
+                        assertThat(span.attributes["buildContextBytes"], equalTo(JsonPrimitive(1500)))
+                        assertThat(span.attributes.keys, hasElement("buildContextUploadDurationMilliseconds"))
+                    }
                 }
 
                 given("the image pull policy is set to 'if not present'") {
@@ -16,6 +16,7 @@
 
 package batect.execution.model.steps.runners
 
+import batect.docker.TaskNetworkPool
 import batect.dockerclient.DockerClient
 import batect.dockerclient.NetworkDeletionFailedException
 import batect.dockerclient.NetworkReference
@@ -28,7 +29,9 @@ import batect.testutils.createForEachTest
 import batect.testutils.createLoggerForEachTest
 import batect.testutils.itSuspend
 import batect.testutils.on
+import org.mockito.kotlin.any
 import org.mockito.kotlin.mock
+import org.mockito.kotlin.never
 import org.mockito.kotlin.verify
 import org.mockito.kotlin.whenever
 import org.spekframework.spek2.Spek
@@ -41,9 +44,26 @@ object DeleteTaskNetworkStepRunnerSpec : Spek({
 
         val dockerClient by createForEachTest { mock<DockerClient>() }
         val eventSink by createForEachTest { mock<TaskEventSink>() }
+        val networkPool by createForEachTest { mock<TaskNetworkPool>() }
         val logger by createLoggerForEachTest()
 
-        val runner by createForEachTest { DeleteTaskNetworkStepRunner(dockerClient, logger) }
+        val runner by createForEachTest { DeleteTaskNetworkStepRunner(dockerClient, networkPool, logger) }
+
+        on("when the network was leased from the network pool") {
+            beforeEachTest {
+                whenever(networkPool.release(network)).thenReturn(true)
+
+                runner.run(step, eventSink)
+            }
+
+            itSuspend("does not delete the network") {
+                verify(dockerClient, never()).deleteNetwork(any())
+            }
+
+            it("emits a 'network deleted' event") {
+                verify(eventSink).postEvent(TaskNetworkDeletedEvent)
+            }
+        }
 
         on("when deleting the network succeeds") {
             beforeEachTest { runner.run(step, eventSink) }
@@ -19,6 +19,7 @@ package batect.execution.model.steps.runners
 import batect.cli.CommandLineOptions
 import batect.docker.DockerContainerType
 import batect.docker.DockerResourceNameGenerator
+import batect.docker.TaskNetworkPool
 import batect.dockerclient.DockerClient
 import batect.dockerclient.NetworkCreationFailedException
 import batect.dockerclient.NetworkReference
@@ -28,6 +29,7 @@ import batect.execution.model.events.CustomTaskNetworkCheckedEvent
 import batect.execution.model.events.TaskEventSink
 import batect.execution.model.events.TaskNetworkCreatedEvent
 import batect.execution.model.events.TaskNetworkCreationFailedEvent
+import batect.execution.model.events.TaskNetworkLeasedEvent
 import batect.testutils.beforeEachTestSuspend
 import batect.testutils.createForEachTest
 import batect.testutils.createLoggerForEachTest
@@ -37,6 +39,7 @@ import org.mockito.kotlin.any
 import org.mockito.kotlin.doReturn
 import org.mockito.kotlin.doThrow
 import org.mockito.kotlin.mock
+import org.mockito.kotlin.never
 import org.mockito.kotlin.verify
 import org.mockito.kotlin.whenever
 import org.spekframework.spek2.Spek
@@ -52,6 +55,7 @@ object PrepareTaskNetworkStepRunnerSpec : Spek({
 
         val dockerClient by createForEachTest { mock<DockerClient>() }
         val eventSink by createForEachTest { mock<TaskEventSink>() }
+        val networkPool by createForEachTest { mock<TaskNetworkPool>() }
         val logger by createLoggerForEachTest()
 
         given("no network to use is provided on the command line") {
@@ -65,7 +69,7 @@ object PrepareTaskNetworkStepRunnerSpec : Spek({
                 }
 
                 given("the active container type is Linux") {
-                    val runner by createForEachTest { PrepareTaskNetworkStepRunner(nameGenerator, DockerContainerType.Linux, dockerClient, commandLineOptions, logger) }
+                    val runner by createForEachTest { PrepareTaskNetworkStepRunner(nameGenerator, DockerContainerType.Linux, dockerClient, commandLineOptions, networkPool, logger) }
 
                     beforeEachTest {
                         runner.run(eventSink)
@@ -81,7 +85,7 @@ object PrepareTaskNetworkStepRunnerSpec : Spek({
                 }
 
                 given("the active container type is Windows") {
-                    val runner by createForEachTest { PrepareTaskNetworkStepRunner(nameGenerator, DockerContainerType.Windows, dockerClient, commandLineOptions, logger) }
+                    val runner by createForEachTest { PrepareTaskNetworkStepRunner(nameGenerator, DockerContainerType.Windows, dockerClient, commandLineOptions, networkPool, logger) }
 
                     beforeEachTest {
                         runner.run(eventSink)
@@ -97,8 +101,26 @@ object PrepareTaskNetworkStepRunnerSpec : Spek({
                 }
             }
 
+            given("a network can be leased from the network pool") {
+                val runner by createForEachTest { PrepareTaskNetworkStepRunner(nameGenerator, DockerContainerType.Linux, dockerClient, commandLineOptions, networkPool, logger) }
+
+                beforeEachTest {
+                    whenever(networkPool.lease()).doReturn(NetworkReference("pooled-network"))
+
+                    runner.run(eventSink)
+                }
+
+                it("emits a 'network leased' event with the leased network") {
+                    verify(eventSink).postEvent(TaskNetworkLeasedEvent(NetworkReference("pooled-network")))
+                }
+
+                itSuspend("does not create a new network") {
+                    verify(dockerClient, never()).createNetwork(any(), any())
+                }
+            }
+
             given("creating the network fails") {
-                val runner by createForEachTest { PrepareTaskNetworkStepRunner(nameGenerator, DockerContainerType.Linux, dockerClient, commandLineOptions, logger) }
+                val runner by createForEachTest { PrepareTaskNetworkStepRunner(nameGenerator, DockerContainerType.Linux, dockerClient, commandLineOptions, networkPool, logger) }
 
                 beforeEachTestSuspend {
                     whenever(dockerClient.createNetwork(any(), any())).doThrow(NetworkCreationFailedException("Something went wrong."))
@@ -114,7 +136,7 @@ object PrepareTaskNetworkStepRunnerSpec : Spek({
 
         given("a network to use is provided on the command line") {
             val commandLineOptions = CommandLineOptions(existingNetworkToUse = "my-network")
-            val runner by createForEachTest { PrepareTaskNetworkStepRunner(nameGenerator, DockerContainerType.Linux, dockerClient, commandLineOptions, logger) }
+            val runner by createForEachTest { PrepareTaskNetworkStepRunner(nameGenerator, DockerContainerType.Linux, dockerClient, commandLineOptions, networkPool, logger) }
 
             given("the network exists") {
                 beforeEachTestSuspend {
@@ -126,6 +148,10 @@ object PrepareTaskNetworkStepRunnerSpec : Spek({
                 it("emits a 'custom network checked' event") {
                     verify(eventSink).postEvent(CustomTaskNetworkCheckedEvent(NetworkReference("the-network-id")))
                 }
+
+                it("does not lease a network from the network pool") {
+                    verify(networkPool, never()).lease()
+                }
             }
 
             given("the network does not exist") {
@@ -102,8 +102,8 @@ object PullImageStepRunnerSpec : Spek({
                         runner.run(step, eventSink)
                     }
 
-                    it("emits a 'image pulled' event") {
-                        verify(eventSink).postEvent(ImagePulledEvent(source, image))
+                    it("emits a 'image pulled' event indicating that the image was already present") {
+                        verify(eventSink).postEvent(ImagePulledEvent(source, image, alreadyPresent = true))
                     }
 
                     itSuspend("does not pull the image again") {
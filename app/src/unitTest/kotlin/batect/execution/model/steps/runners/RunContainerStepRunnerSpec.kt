@@ -57,6 +57,7 @@ object RunContainerStepRunnerSpec : Spek({
         val step = RunContainerStep(container, dockerContainer)
 
         val stdout = SinkTextOutput(mock<Sink>())
+        val stderr = SinkTextOutput(mock<Sink>())
         val stdin = SourceTextInput(mock<Source>())
 
         val dockerClient by createForEachTest { mock<DockerClient>() }
@@ -64,6 +65,7 @@ object RunContainerStepRunnerSpec : Spek({
         val ioStreamingOptions by createForEachTest {
             mock<ContainerIOStreamingOptions>() {
                 on { stdoutForContainer(container) } doReturn stdout
+                on { stderrForContainer(container) } doReturn stderr
                 on { stdinForContainer(container) } doReturn stdin
             }
         }
@@ -86,8 +88,8 @@ object RunContainerStepRunnerSpec : Spek({
                 runner.run(step, eventSink)
             }
 
-            itSuspend("runs the container with the stdin and stdout provided by the I/O streaming options") {
-                verify(dockerClient).run(eq(ContainerReference("some-id")), eq(stdout), eq(stdout), eq(stdin), any())
+            itSuspend("runs the container with the stdin, stdout and stderr provided by the I/O streaming options") {
+                verify(dockerClient).run(eq(ContainerReference("some-id")), eq(stdout), eq(stderr), eq(stdin), any())
             }
 
             it("emits a 'container started' event") {
@@ -17,6 +17,8 @@
 package batect.execution.model.steps.runners
 
 import batect.config.Container
+import batect.config.ReadinessCheckConfig
+import batect.config.ReadinessCheckType
 import batect.docker.DockerContainer
 import batect.dockerclient.Actor
 import batect.dockerclient.ContainerConfig
@@ -32,12 +34,15 @@ import batect.dockerclient.DockerClient
 import batect.dockerclient.Event
 import batect.dockerclient.EventHandler
 import batect.dockerclient.EventHandlerAction
+import batect.execution.ContainerReadinessChecker
+import batect.execution.ReadinessCheckResult
 import batect.execution.model.events.ContainerBecameHealthyEvent
 import batect.execution.model.events.ContainerDidNotBecomeHealthyEvent
 import batect.execution.model.events.TaskEventSink
 import batect.execution.model.steps.WaitForContainerToBecomeHealthyStep
 import batect.os.SystemInfo
 import batect.primitives.CancellationContext
+import batect.telemetry.TestTelemetryCaptor
 import batect.testutils.beforeEachTestSuspend
 import batect.testutils.createForEachTest
 import batect.testutils.createLoggerForEachTest
@@ -47,9 +52,11 @@ import batect.testutils.imageSourceDoesNotMatter
 import batect.testutils.itSuspend
 import batect.testutils.on
 import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.hasSize
 import kotlinx.coroutines.runBlocking
 import kotlinx.datetime.Clock
 import kotlinx.datetime.Instant
+import kotlinx.serialization.json.JsonPrimitive
 import org.mockito.kotlin.any
 import org.mockito.kotlin.anyOrNull
 import org.mockito.kotlin.doAnswer
@@ -75,9 +82,11 @@ object WaitForContainerToBecomeHealthyStepRunnerSpec : Spek({
             on { lineSeparator } doReturn "SYSTEM_LINE_SEPARATOR"
         }
 
+        val readinessChecker by createForEachTest { mock<ContainerReadinessChecker>() }
+        val telemetryCaptor by createForEachTest { TestTelemetryCaptor() }
         val eventSink by createForEachTest { mock<TaskEventSink>() }
         val logger by createLoggerForEachTest()
-        val runner by createForEachTest { WaitForContainerToBecomeHealthyStepRunner(dockerClient, cancellationContext, systemInfo, logger) }
+        val runner by createForEachTest { WaitForContainerToBecomeHealthyStepRunner(dockerClient, cancellationContext, systemInfo, readinessChecker, telemetryCaptor, logger) }
 
         fun createDummyInspectionResult(config: ContainerHealthcheckConfig?, state: ContainerHealthState?): ContainerInspectionResult =
             ContainerInspectionResult(
@@ -106,6 +115,101 @@ object WaitForContainerToBecomeHealthyStepRunnerSpec : Spek({
                 itSuspend("does not wait for any events") {
                     verify(dockerClient, never()).streamEvents(anyOrNull(), anyOrNull(), any(), any())
                 }
+
+                it("records a span in telemetry for the wait") {
+                    assertThat(telemetryCaptor.allSpans, hasSize(equalTo(1)))
+
+                    val span = telemetryCaptor.allSpans.single()
+                    assertThat(span.type, equalTo("WaitForContainerToBecomeHealthy"))
+                    assertThat(span.attributes["readinessCheckType"], equalTo(JsonPrimitive("none")))
+                    assertThat(span.attributes["becameHealthy"], equalTo(JsonPrimitive(true)))
+                }
+            }
+        }
+
+        given("the container has a readiness check") {
+            val readinessCheckConfig = ReadinessCheckConfig(ReadinessCheckType.Http, 8080, "/health")
+            val containerWithReadinessCheck = Container("some-container", imageSourceDoesNotMatter(), readinessCheckConfig = readinessCheckConfig)
+            val stepWithReadinessCheck = WaitForContainerToBecomeHealthyStep(containerWithReadinessCheck, dockerContainer)
+
+            given("the container becomes ready") {
+                beforeEachTestSuspend {
+                    whenever(readinessChecker.waitForContainerToBecomeReady(containerWithReadinessCheck, readinessCheckConfig)).doReturn(ReadinessCheckResult.Ready)
+                }
+
+                on("running the step") {
+                    beforeEachTest {
+                        runner.run(stepWithReadinessCheck, eventSink)
+                    }
+
+                    it("emits a 'container became healthy' event") {
+                        verify(eventSink).postEvent(ContainerBecameHealthyEvent(containerWithReadinessCheck))
+                    }
+
+                    itSuspend("does not check for a health check in the image") {
+                        verify(dockerClient, never()).inspectContainer(any<ContainerReference>())
+                    }
+
+                    itSuspend("does not wait for any events") {
+                        verify(dockerClient, never()).streamEvents(anyOrNull(), anyOrNull(), any(), any())
+                    }
+
+                    it("records the type of readiness check and the outcome in telemetry") {
+                        val span = telemetryCaptor.allSpans.single()
+                        assertThat(span.type, equalTo("WaitForContainerToBecomeHealthy"))
+                        assertThat(span.attributes["readinessCheckType"], equalTo(JsonPrimitive("http")))
+                        assertThat(span.attributes["becameHealthy"], equalTo(JsonPrimitive(true)))
+                    }
+                }
+            }
+
+            given("the container does not become ready") {
+                beforeEachTestSuspend {
+                    whenever(readinessChecker.waitForContainerToBecomeReady(containerWithReadinessCheck, readinessCheckConfig)).doReturn(ReadinessCheckResult.NotReady("The HTTP readiness check did not succeed."))
+                }
+
+                on("running the step") {
+                    beforeEachTest {
+                        runner.run(stepWithReadinessCheck, eventSink)
+                    }
+
+                    it("emits a 'container did not become healthy' event with the message from the readiness check") {
+                        verify(eventSink).postEvent(ContainerDidNotBecomeHealthyEvent(containerWithReadinessCheck, "The HTTP readiness check did not succeed."))
+                    }
+
+                    it("records the outcome in telemetry") {
+                        val span = telemetryCaptor.allSpans.single()
+                        assertThat(span.attributes["becameHealthy"], equalTo(JsonPrimitive(false)))
+                    }
+                }
+            }
+
+            given("the readiness check is skipped") {
+                beforeEachTestSuspend {
+                    whenever(readinessChecker.waitForContainerToBecomeReady(containerWithReadinessCheck, readinessCheckConfig)).doReturn(ReadinessCheckResult.Skipped("Port mappings are disabled."))
+                }
+
+                given("the container has no health check") {
+                    beforeEachTestSuspend {
+                        whenever(dockerClient.inspectContainer(ContainerReference("some-id")))
+                            .doReturn(createDummyInspectionResult(ContainerHealthcheckConfig(emptyList(), 0.seconds, 0.seconds, 0.seconds, 0), null))
+                    }
+
+                    on("running the step") {
+                        beforeEachTest {
+                            runner.run(stepWithReadinessCheck, eventSink)
+                        }
+
+                        it("falls back to treating the container as healthy straight away") {
+                            verify(eventSink).postEvent(ContainerBecameHealthyEvent(containerWithReadinessCheck))
+                        }
+
+                        it("records that no readiness check was used in telemetry") {
+                            val span = telemetryCaptor.allSpans.single()
+                            assertThat(span.attributes["readinessCheckType"], equalTo(JsonPrimitive("none")))
+                        }
+                    }
+                }
             }
         }
 
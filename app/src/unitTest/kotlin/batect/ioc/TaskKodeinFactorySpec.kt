@@ -28,6 +28,7 @@ import batect.testutils.on
 import batect.testutils.runForEachTest
 import com.natpryce.hamkrest.assertion.assertThat
 import com.natpryce.hamkrest.equalTo
+import com.natpryce.hamkrest.sameInstance
 import org.kodein.di.DI
 import org.kodein.di.bind
 import org.kodein.di.instance
@@ -36,6 +37,7 @@ import org.kodein.di.singleton
 import org.mockito.kotlin.any
 import org.mockito.kotlin.doReturn
 import org.mockito.kotlin.mock
+import org.mockito.kotlin.whenever
 import org.spekframework.spek2.Spek
 import org.spekframework.spek2.style.specification.describe
 
@@ -88,6 +90,18 @@ object TaskKodeinFactorySpec : Spek({
                 assertThat(extendedKodein.instance<ExpressionEvaluationContext>(), equalTo(ExpressionEvaluationContext(hostEnvironmentVariables, configVariables)))
             }
         }
+
+        on("creating task Kodein contexts for two tasks with the same config variables") {
+            val otherTask by createForEachTest { mock<Task>() }
+            beforeEachTest { whenever(taskSpecialisedConfigurationFactory.create(otherTask)).doReturn(taskSpecialisedConfig) }
+
+            val firstKodein by runForEachTest { factory.create(task, mock()) }
+            val secondKodein by runForEachTest { factory.create(otherTask, mock()) }
+
+            it("shares the expression evaluation context between both tasks") {
+                assertThat(secondKodein.instance<ExpressionEvaluationContext>(), sameInstance(firstKodein.instance<ExpressionEvaluationContext>()))
+            }
+        }
     }
 })
 
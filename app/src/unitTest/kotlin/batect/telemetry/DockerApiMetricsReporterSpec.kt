@@ -0,0 +1,89 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.telemetry
+
+import batect.docker.DockerApiMetrics
+import batect.logging.Logger
+import batect.logging.Severity
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.logging.InMemoryLogSink
+import batect.testutils.logging.hasMessage
+import batect.testutils.logging.withAdditionalDataAndAnyValue
+import batect.testutils.logging.withLogMessage
+import batect.testutils.logging.withSeverity
+import com.natpryce.hamkrest.and
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.isEmpty
+import kotlinx.serialization.json.JsonPrimitive
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+
+object DockerApiMetricsReporterSpec : Spek({
+    describe("a Docker API metrics reporter") {
+        val metrics by createForEachTest { DockerApiMetrics() }
+        val telemetryCaptor by createForEachTest { TestTelemetryCaptor() }
+        val logSink by createForEachTest { InMemoryLogSink() }
+        val reporter by createForEachTest { DockerApiMetricsReporter(metrics, telemetryCaptor, Logger("some.source", logSink)) }
+
+        given("no Docker API calls were recorded") {
+            beforeEachTest { reporter.report() }
+
+            it("does not add any attributes to the telemetry session") {
+                assertThat(telemetryCaptor.allAttributes, equalTo(emptyMap()))
+            }
+
+            it("does not log anything") {
+                assertThat(logSink.loggedMessages, isEmpty)
+            }
+        }
+
+        given("some Docker API calls were recorded") {
+            beforeEachTest {
+                metrics.record("createContainer", 20_000_000, succeeded = true)
+                metrics.record("pullImage", 3_000_000_000, succeeded = true, bytesTransferred = 1234)
+                metrics.record("pullImage", 1_000_000_000, succeeded = false)
+
+                reporter.report()
+            }
+
+            it("adds the totals across all operations as attributes on the telemetry session") {
+                assertThat(telemetryCaptor.allAttributes["dockerApiCalls"], equalTo(JsonPrimitive(3)))
+                assertThat(telemetryCaptor.allAttributes["dockerApiFailedCalls"], equalTo(JsonPrimitive(1)))
+                assertThat(telemetryCaptor.allAttributes["dockerApiBytesTransferred"], equalTo(JsonPrimitive(1234)))
+                assertThat(telemetryCaptor.allAttributes["dockerApiTotalDurationMilliseconds"], equalTo(JsonPrimitive(4020)))
+            }
+
+            it("adds the number of calls and total duration for each operation as attributes on the telemetry session") {
+                assertThat(telemetryCaptor.allAttributes["dockerApiCreateContainerCalls"], equalTo(JsonPrimitive(1)))
+                assertThat(telemetryCaptor.allAttributes["dockerApiCreateContainerTotalDurationMilliseconds"], equalTo(JsonPrimitive(20)))
+                assertThat(telemetryCaptor.allAttributes["dockerApiPullImageCalls"], equalTo(JsonPrimitive(2)))
+                assertThat(telemetryCaptor.allAttributes["dockerApiPullImageTotalDurationMilliseconds"], equalTo(JsonPrimitive(4000)))
+            }
+
+            it("adds the estimated 95th percentile duration for each operation as an attribute on the telemetry session") {
+                assertThat(telemetryCaptor.allAttributes["dockerApiCreateContainerP95DurationMilliseconds"], equalTo(JsonPrimitive(25)))
+                assertThat(telemetryCaptor.allAttributes["dockerApiPullImageP95DurationMilliseconds"], equalTo(JsonPrimitive(5000)))
+            }
+
+            it("logs a summary of the calls") {
+                assertThat(logSink, hasMessage(withLogMessage("Docker API call summary.") and withSeverity(Severity.Info) and withAdditionalDataAndAnyValue("operations")))
+            }
+        }
+    }
+})
@@ -21,6 +21,7 @@ import batect.os.Dimensions
 import batect.testutils.createForEachTest
 import batect.testutils.given
 import batect.testutils.on
+import batect.testutils.runForEachTest
 import batect.testutils.withMessage
 import batect.testutils.withPlatformSpecificLineSeparator
 import batect.ui.text.Text
@@ -28,6 +29,7 @@ import batect.ui.text.TextRun
 import com.natpryce.hamkrest.assertion.assertThat
 import com.natpryce.hamkrest.equalTo
 import com.natpryce.hamkrest.throws
+import okio.Buffer
 import org.mockito.kotlin.doReturn
 import org.mockito.kotlin.mock
 import org.spekframework.spek2.Spek
@@ -199,6 +201,26 @@ object ConsoleSpec : Spek({
                 }
             }
 
+            on("rendering some bold and coloured text elements") {
+                val rendered by runForEachTest { console.render(Text.bold(Text.red("red") + Text.white("white"))) }
+
+                it("returns the text with the appropriate escape codes") {
+                    assertThat(rendered, equalTo("${redText}${boldText}red${reset}${whiteText}${boldText}white$reset"))
+                }
+
+                it("does not write anything to the output") {
+                    assertThat(output.toString(), equalTo(""))
+                }
+            }
+
+            on("writing pre-rendered bytes") {
+                beforeEachTest { console.write(Buffer().writeUtf8("${redText}Some text$reset\n")) }
+
+                it("writes the bytes directly to the output") {
+                    assertThat(output.toString(), equalTo("${redText}Some text$reset\n"))
+                }
+            }
+
             describe("moving the cursor up") {
                 on("moving the cursor up one line") {
                     beforeEachTest { console.moveCursorUp() }
@@ -320,6 +342,14 @@ object ConsoleSpec : Spek({
                 }
             }
 
+            on("rendering coloured text") {
+                val rendered by runForEachTest { console.render(TextRun(Text.white("the white text"))) }
+
+                it("returns the text without any escape codes") {
+                    assertThat(rendered, equalTo("the white text"))
+                }
+            }
+
             on("moving the cursor up") {
                 it("throws an appropriate exception") {
                     assertThat({ console.moveCursorUp(1) }, throws<UnsupportedOperationException>(withMessage("Cannot move the cursor when complex output is disabled.")))
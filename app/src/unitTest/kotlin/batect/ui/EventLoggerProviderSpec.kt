@@ -36,6 +36,7 @@ import batect.ui.fancy.StartupProgressDisplayProvider
 import batect.ui.interleaved.InterleavedContainerIOStreamingOptions
 import batect.ui.interleaved.InterleavedEventLogger
 import batect.ui.interleaved.InterleavedOutput
+import batect.ui.interleaved.InterleavedOutputBuffering
 import batect.ui.quiet.QuietEventLogger
 import batect.ui.simple.SimpleEventLogger
 import com.natpryce.hamkrest.assertion.assertThat
@@ -54,6 +55,7 @@ object EventLoggerProviderSpec : Spek({
         val console = mock<Console>()
         val errorConsole = mock<Console>()
         val stdout = mock<PrintStream>()
+        val interleavedOutputBuffering = InterleavedOutputBuffering(bufferSize = 1024)
         val consoleInfo by createForEachTest { mock<ConsoleInfo>() }
         val consoleDimensions by createForEachTest { mock<ConsoleDimensions>() }
 
@@ -176,7 +178,7 @@ object EventLoggerProviderSpec : Spek({
 
             it("sets the I/O streaming options to the expected value") {
                 val containers = setOf(container1, container2)
-                val output = InterleavedOutput("the-task", containers, console)
+                val output = InterleavedOutput("the-task", containers, console, interleavedOutputBuffering)
                 assertThat(logger.ioStreamingOptions, equalTo(InterleavedContainerIOStreamingOptions(output)))
             }
         }
@@ -186,7 +188,7 @@ object EventLoggerProviderSpec : Spek({
 
             beforeEachTest { whenever(consoleInfo.supportsInteractivity).doReturn(true) }
 
-            val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, false) }
+            val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, false, interleavedOutputBuffering) }
 
             itReturnsAQuietEventLogger { provider.getEventLogger(task, graph) }
         }
@@ -196,7 +198,7 @@ object EventLoggerProviderSpec : Spek({
 
             beforeEachTest { whenever(consoleInfo.supportsInteractivity).doReturn(true) }
 
-            val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, false) }
+            val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, false, interleavedOutputBuffering) }
 
             itReturnsASimpleEventLogger { provider.getEventLogger(task, graph) }
         }
@@ -206,7 +208,7 @@ object EventLoggerProviderSpec : Spek({
 
             beforeEachTest { whenever(consoleInfo.supportsInteractivity).doReturn(true) }
 
-            val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, false) }
+            val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, false, interleavedOutputBuffering) }
 
             itReturnsAFancyEventLogger(startupProgressDisplay) { provider.getEventLogger(task, graph) }
         }
@@ -216,7 +218,7 @@ object EventLoggerProviderSpec : Spek({
 
             beforeEachTest { whenever(consoleInfo.supportsInteractivity).doReturn(true) }
 
-            val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, false) }
+            val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, false, interleavedOutputBuffering) }
 
             itReturnsAnInterleavedEventLogger { provider.getEventLogger(task, graph) }
         }
@@ -232,7 +234,7 @@ object EventLoggerProviderSpec : Spek({
                     whenever(consoleDimensions.current).doReturn(Dimensions(123, 456))
                 }
 
-                val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, disableColorOutput) }
+                val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, disableColorOutput, interleavedOutputBuffering) }
 
                 itReturnsASimpleEventLogger { provider.getEventLogger(task, graph) }
             }
@@ -246,7 +248,7 @@ object EventLoggerProviderSpec : Spek({
                     given("the console's dimensions are available") {
                         beforeEachTest { whenever(consoleDimensions.current).doReturn(Dimensions(123, 456)) }
 
-                        val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, disableColorOutput) }
+                        val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, disableColorOutput, interleavedOutputBuffering) }
 
                         itReturnsAFancyEventLogger(startupProgressDisplay) { provider.getEventLogger(task, graph) }
                     }
@@ -254,7 +256,7 @@ object EventLoggerProviderSpec : Spek({
                     given("the console's dimensions are not available") {
                         beforeEachTest { whenever(consoleDimensions.current).doReturn(null) }
 
-                        val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, disableColorOutput) }
+                        val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, disableColorOutput, interleavedOutputBuffering) }
 
                         itReturnsASimpleEventLogger { provider.getEventLogger(task, graph) }
                     }
@@ -266,7 +268,7 @@ object EventLoggerProviderSpec : Spek({
                         whenever(consoleDimensions.current).doReturn(Dimensions(123, 456))
                     }
 
-                    val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, disableColorOutput) }
+                    val provider by createForEachTest { EventLoggerProvider(failureErrorMessageFormatter, console, errorConsole, stdout, startupProgressDisplayProvider, consoleInfo, consoleDimensions, requestedOutputStyle, disableColorOutput, interleavedOutputBuffering) }
 
                     itReturnsASimpleEventLogger { provider.getEventLogger(task, graph) }
                 }
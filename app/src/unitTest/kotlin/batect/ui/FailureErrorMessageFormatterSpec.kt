@@ -563,5 +563,46 @@ object FailureErrorMessageFormatterSpec : Spek({
                 }
             }
         }
+
+        describe("formatting a message to display after deferred cleanup could not be started") {
+            val formatter = FailureErrorMessageFormatter(mock(), systemInfo)
+
+            given("there are no cleanup commands") {
+                on("formatting the message") {
+                    val message = formatter.formatManualCleanupMessage(PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(emptyList()), emptySet())
+
+                    it("does not return a message") {
+                        assertThat(message, absent())
+                    }
+                }
+            }
+
+            given("there is one cleanup command") {
+                on("formatting the message") {
+                    val message = formatter.formatManualCleanupMessage(PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(listOf("docker network rm some-network")), emptySet())
+                    val expectedMessage = Text.red("Clean up could not be started in the background, so the created containers and other temporary resources may still be running.\n") +
+                        Text("Batect will try again the next time it runs, or you can run the following command to clean up now:\n") +
+                        Text.bold("docker network rm some-network")
+
+                    it("returns an appropriate message") {
+                        assertThat(message, equivalentTo(expectedMessage.withPlatformSpecificLineSeparator()))
+                    }
+                }
+            }
+
+            given("there are multiple cleanup commands") {
+                on("formatting the message") {
+                    val message = formatter.formatManualCleanupMessage(PostTaskManualCleanup.Required.DueToDeferredCleanupFailure(listOf("docker rm some-container", "docker network rm some-network")), emptySet())
+                    val expectedMessage = Text.red("Clean up could not be started in the background, so the created containers and other temporary resources may still be running.\n") +
+                        Text("Batect will try again the next time it runs, or you can run the following commands to clean up now:\n") +
+                        Text.bold("docker rm some-container\n") +
+                        Text.bold("docker network rm some-network")
+
+                    it("returns an appropriate message") {
+                        assertThat(message, equivalentTo(expectedMessage.withPlatformSpecificLineSeparator()))
+                    }
+                }
+            }
+        }
     }
 })
@@ -0,0 +1,113 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.containerio
+
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import com.google.common.jimfs.Configuration
+import com.google.common.jimfs.Jimfs
+import com.natpryce.hamkrest.assertion.assertThat
+import okio.Buffer
+import okio.buffer
+import okio.gzip
+import okio.source
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.nio.file.Files
+import java.time.Instant
+
+object CapturedOutputFileSpec : Spek({
+    describe("a captured output file") {
+        val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
+        val directory by createForEachTest { fileSystem.getPath("/capture").also { Files.createDirectories(it) } }
+        val now = Instant.parse("2020-01-02T03:04:05Z")
+
+        given("no compression and no maximum file size") {
+            val file by createForEachTest { CapturedOutputFile(directory, "container.stdout", OutputCaptureCompression.None, 0, { now }) }
+
+            beforeEachTest {
+                file.write(Buffer().writeUtf8("Line 1\n"))
+                file.write(Buffer().writeUtf8("Line 2\n"))
+                file.close()
+            }
+
+            it("writes all output to a single file") {
+                assertThat(Files.readAllBytes(directory.resolve("container.stdout.log")).toString(Charsets.UTF_8), equalTo("Line 1\nLine 2\n"))
+            }
+
+            it("reports the total number of bytes written") {
+                assertThat(file.totalBytes, equalTo(14L))
+            }
+
+            it("includes the file in the index") {
+                assertThat(file.index, equalTo(listOf(CapturedOutputFileIndex("container.stdout.log", 14, 14, now.toString(), now.toString()))))
+            }
+        }
+
+        given("no compression and a maximum file size") {
+            val file by createForEachTest { CapturedOutputFile(directory, "container.stdout", OutputCaptureCompression.None, 10, { now }) }
+
+            beforeEachTest {
+                file.write(Buffer().writeUtf8("0123456789abcdefghij01234"))
+                file.close()
+            }
+
+            it("starts a new file each time the maximum file size is reached") {
+                assertThat(Files.readAllBytes(directory.resolve("container.stdout.log")).toString(Charsets.UTF_8), equalTo("0123456789"))
+                assertThat(Files.readAllBytes(directory.resolve("container.stdout.1.log")).toString(Charsets.UTF_8), equalTo("abcdefghij"))
+                assertThat(Files.readAllBytes(directory.resolve("container.stdout.2.log")).toString(Charsets.UTF_8), equalTo("01234"))
+            }
+
+            it("includes each file in the index") {
+                assertThat(file.index.map { it.path to it.uncompressedBytes }, equalTo(listOf("container.stdout.log" to 10L, "container.stdout.1.log" to 10L, "container.stdout.2.log" to 5L)))
+            }
+        }
+
+        given("gzip compression") {
+            val file by createForEachTest { CapturedOutputFile(directory, "container.stdout", OutputCaptureCompression.Gzip, 0, { now }) }
+
+            beforeEachTest {
+                file.write(Buffer().writeUtf8("Some output\n".repeat(100)))
+                file.close()
+            }
+
+            it("writes compressed output to a file with a .gz extension") {
+                val content = Files.newInputStream(directory.resolve("container.stdout.log.gz")).source().gzip().buffer().use { it.readUtf8() }
+
+                assertThat(content, equalTo("Some output\n".repeat(100)))
+            }
+
+            it("reports both the uncompressed size and the size on disk in the index") {
+                val entry = file.index.single()
+
+                assertThat(entry.uncompressedBytes, equalTo(1200L))
+                assertThat(entry.bytesOnDisk, equalTo(Files.size(directory.resolve("container.stdout.log.gz"))))
+            }
+        }
+
+        given("no output is written") {
+            val file by createForEachTest { CapturedOutputFile(directory, "container.stdout", OutputCaptureCompression.None, 0, { now }) }
+
+            beforeEachTest { file.close() }
+
+            it("does not create any files") {
+                assertThat(Files.list(directory).count(), equalTo(0L))
+            }
+        }
+    }
+})
@@ -0,0 +1,188 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.containerio
+
+import batect.config.Container
+import batect.dockerclient.io.SinkTextOutput
+import batect.dockerclient.io.TextInput
+import batect.dockerclient.io.TextOutput
+import batect.testutils.createForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.imageSourceDoesNotMatter
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.isA
+import okio.Buffer
+import org.mockito.kotlin.any
+import org.mockito.kotlin.doReturn
+import org.mockito.kotlin.mock
+import org.mockito.kotlin.never
+import org.mockito.kotlin.verify
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.io.ByteArrayOutputStream
+import java.io.PrintStream
+
+object CapturingContainerIOStreamingOptionsSpec : Spek({
+    describe("a set of I/O streaming options that captures container output") {
+        val container = Container("some-container", imageSourceDoesNotMatter())
+        val consoleStdout by createForEachTest { Buffer() }
+        val consoleStderr by createForEachTest { Buffer() }
+        val capturedStdout by createForEachTest { Buffer() }
+        val capturedStderr by createForEachTest { Buffer() }
+        val systemStdout by createForEachTest { ByteArrayOutputStream() }
+
+        val capture by createForEachTest {
+            mock<ContainerOutputCapture> {
+                on { sinkFor(container, CapturedOutputStream.Stdout) } doReturn capturedStdout
+                on { sinkFor(container, CapturedOutputStream.Stderr) } doReturn capturedStderr
+            }
+        }
+
+        fun TextOutput?.writeText(text: String) {
+            val buffer = Buffer().writeUtf8(text)
+            (this as SinkTextOutput).sink.write(buffer, buffer.size)
+        }
+
+        given("the console options stream output to a sink") {
+            val consoleOptions by createForEachTest {
+                mock<ContainerIOStreamingOptions> {
+                    on { stdoutForContainer(container) } doReturn SinkTextOutput(consoleStdout)
+                    on { stderrForContainer(container) } doReturn SinkTextOutput(consoleStderr)
+                    on { terminalTypeForContainer(container) } doReturn "some-terminal"
+                    on { stdinForContainer(container) } doReturn TextInput.StandardInput
+                    on { useTTYForContainer(container) } doReturn true
+                    on { attachStdinForContainer(container) } doReturn true
+                }
+            }
+
+            given("console output is not suppressed") {
+                val options by createForEachTest { CapturingContainerIOStreamingOptions(consoleOptions, capture, PrintStream(systemStdout), false) }
+
+                it("sends the container's stdout to both the console and the capture") {
+                    options.stdoutForContainer(container).writeText("Some output")
+
+                    assertThat(consoleStdout.readUtf8(), equalTo("Some output"))
+                    assertThat(capturedStdout.readUtf8(), equalTo("Some output"))
+                }
+
+                it("sends the container's stderr to both the console and the capture") {
+                    options.stderrForContainer(container).writeText("Some error")
+
+                    assertThat(consoleStderr.readUtf8(), equalTo("Some error"))
+                    assertThat(capturedStderr.readUtf8(), equalTo("Some error"))
+                }
+
+                it("returns the terminal type from the console options") {
+                    assertThat(options.terminalTypeForContainer(container), equalTo("some-terminal"))
+                }
+
+                it("returns the stdin source from the console options") {
+                    assertThat(options.stdinForContainer(container), equalTo(TextInput.StandardInput))
+                }
+
+                it("returns whether to use a TTY from the console options") {
+                    assertThat(options.useTTYForContainer(container), equalTo(true))
+                }
+
+                it("returns whether to attach stdin from the console options") {
+                    assertThat(options.attachStdinForContainer(container), equalTo(true))
+                }
+            }
+
+            given("console output is suppressed") {
+                val options by createForEachTest { CapturingContainerIOStreamingOptions(consoleOptions, capture, PrintStream(systemStdout), true) }
+
+                it("sends the container's stdout only to the capture") {
+                    options.stdoutForContainer(container).writeText("Some output")
+
+                    assertThat(consoleStdout.size, equalTo(0L))
+                    assertThat(capturedStdout.readUtf8(), equalTo("Some output"))
+                }
+            }
+        }
+
+        given("the console options stream output to the system's stdout") {
+            given("the container is not attached to a TTY") {
+                val consoleOptions by createForEachTest {
+                    mock<ContainerIOStreamingOptions> {
+                        on { stdoutForContainer(container) } doReturn TextOutput.StandardOutput
+                        on { useTTYForContainer(container) } doReturn false
+                    }
+                }
+
+                val options by createForEachTest { CapturingContainerIOStreamingOptions(consoleOptions, capture, PrintStream(systemStdout), false) }
+
+                it("sends the container's stdout to both the system's stdout and the capture") {
+                    val output = options.stdoutForContainer(container)
+                    output.writeText("Some output")
+                    (output as SinkTextOutput).sink.close()
+
+                    assertThat(systemStdout.toString(Charsets.UTF_8), equalTo("Some output"))
+                    assertThat(capturedStdout.readUtf8(), equalTo("Some output"))
+                }
+            }
+
+            given("the container is attached to a TTY") {
+                val consoleOptions by createForEachTest {
+                    mock<ContainerIOStreamingOptions> {
+                        on { stdoutForContainer(container) } doReturn TextOutput.StandardOutput
+                        on { useTTYForContainer(container) } doReturn true
+                    }
+                }
+
+                given("console output is not suppressed") {
+                    val options by createForEachTest { CapturingContainerIOStreamingOptions(consoleOptions, capture, PrintStream(systemStdout), false) }
+
+                    it("sends the container's stdout directly to the system's stdout") {
+                        assertThat(options.stdoutForContainer(container), equalTo(TextOutput.StandardOutput))
+                    }
+
+                    it("does not capture the container's stdout") {
+                        options.stdoutForContainer(container)
+
+                        verify(capture, never()).sinkFor(any(), any())
+                    }
+                }
+
+                given("console output is suppressed") {
+                    val options by createForEachTest { CapturingContainerIOStreamingOptions(consoleOptions, capture, PrintStream(systemStdout), true) }
+
+                    it("sends the container's stdout only to the capture") {
+                        options.stdoutForContainer(container).writeText("Some output")
+
+                        assertThat(systemStdout.size(), equalTo(0))
+                        assertThat(capturedStdout.readUtf8(), equalTo("Some output"))
+                    }
+                }
+            }
+        }
+
+        given("the console options do not stream output for the container") {
+            val consoleOptions by createForEachTest { mock<ContainerIOStreamingOptions>() }
+            val options by createForEachTest { CapturingContainerIOStreamingOptions(consoleOptions, capture, PrintStream(systemStdout), false) }
+
+            it("still captures the container's output") {
+                val output = options.stdoutForContainer(container)
+                output.writeText("Some output")
+
+                assertThat(output, isA<SinkTextOutput>())
+                assertThat(capturedStdout.readUtf8(), equalTo("Some output"))
+            }
+        }
+    }
+})
@@ -0,0 +1,167 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.containerio
+
+import batect.config.Container
+import batect.testutils.createForEachTest
+import batect.testutils.createLoggerForEachTest
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.imageSourceDoesNotMatter
+import batect.testutils.withMessage
+import com.google.common.jimfs.Configuration
+import com.google.common.jimfs.Jimfs
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.throws
+import okio.Buffer
+import okio.Sink
+import org.araqnid.hamkrest.json.equivalentTo
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.nio.file.Files
+import java.time.Instant
+
+object ContainerOutputCaptureSpec : Spek({
+    describe("container output capture") {
+        val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
+        val logger by createLoggerForEachTest()
+        val container1 = Container("container-1", imageSourceDoesNotMatter())
+        val container2 = Container("container-2", imageSourceDoesNotMatter())
+        val now = Instant.parse("2020-01-02T03:04:05Z")
+
+        given("output capture is enabled") {
+            val captureDirectory by createForEachTest { fileSystem.getPath("/capture") }
+            val capture by createForEachTest { ContainerOutputCapture("some:task", captureDirectory, OutputCaptureCompression.None, 0, logger, { now }) }
+            val taskDirectory by createForEachTest { captureDirectory.resolve("some_task") }
+
+            it("reports that it is enabled") {
+                assertThat(capture.isEnabled, equalTo(true))
+            }
+
+            describe("writing output for multiple containers and streams") {
+                beforeEachTest {
+                    val container1Stdout = capture.sinkFor(container1, CapturedOutputStream.Stdout)
+                    val container1Stderr = capture.sinkFor(container1, CapturedOutputStream.Stderr)
+                    val container2Stdout = capture.sinkFor(container2, CapturedOutputStream.Stdout)
+
+                    container1Stdout.writeText("Container 1 stdout\n")
+                    container1Stderr.writeText("Container 1 stderr\n")
+                    container2Stdout.writeText("Container 2 stdout\n")
+                    container1Stdout.writeText("More container 1 stdout\n")
+
+                    capture.close()
+                }
+
+                it("writes each container's stdout to a separate file in a directory for the task") {
+                    assertThat(Files.readAllBytes(taskDirectory.resolve("container-1.stdout.log")).toString(Charsets.UTF_8), equalTo("Container 1 stdout\nMore container 1 stdout\n"))
+                    assertThat(Files.readAllBytes(taskDirectory.resolve("container-2.stdout.log")).toString(Charsets.UTF_8), equalTo("Container 2 stdout\n"))
+                }
+
+                it("writes each container's stderr to a separate file") {
+                    assertThat(Files.readAllBytes(taskDirectory.resolve("container-1.stderr.log")).toString(Charsets.UTF_8), equalTo("Container 1 stderr\n"))
+                }
+
+                it("writes an index of all files written") {
+                    val index = Files.readAllBytes(taskDirectory.resolve("index.json")).toString(Charsets.UTF_8)
+
+                    assertThat(
+                        index,
+                        equivalentTo(
+                            """
+                                {
+                                    "task": "some:task",
+                                    "startedAt": "2020-01-02T03:04:05Z",
+                                    "finishedAt": "2020-01-02T03:04:05Z",
+                                    "streams": [
+                                        {
+                                            "container": "container-1",
+                                            "stream": "stdout",
+                                            "totalBytes": 43,
+                                            "files": [
+                                                { "path": "container-1.stdout.log", "uncompressedBytes": 43, "bytesOnDisk": 43, "firstWriteAt": "2020-01-02T03:04:05Z", "lastWriteAt": "2020-01-02T03:04:05Z" }
+                                            ]
+                                        },
+                                        {
+                                            "container": "container-1",
+                                            "stream": "stderr",
+                                            "totalBytes": 19,
+                                            "files": [
+                                                { "path": "container-1.stderr.log", "uncompressedBytes": 19, "bytesOnDisk": 19, "firstWriteAt": "2020-01-02T03:04:05Z", "lastWriteAt": "2020-01-02T03:04:05Z" }
+                                            ]
+                                        },
+                                        {
+                                            "container": "container-2",
+                                            "stream": "stdout",
+                                            "totalBytes": 19,
+                                            "files": [
+                                                { "path": "container-2.stdout.log", "uncompressedBytes": 19, "bytesOnDisk": 19, "firstWriteAt": "2020-01-02T03:04:05Z", "lastWriteAt": "2020-01-02T03:04:05Z" }
+                                            ]
+                                        }
+                                    ]
+                                }
+                            """.trimIndent(),
+                        ),
+                    )
+                }
+            }
+
+            describe("closing the capture without any output having been requested") {
+                beforeEachTest { capture.close() }
+
+                it("writes an empty index") {
+                    val index = Files.readAllBytes(taskDirectory.resolve("index.json")).toString(Charsets.UTF_8)
+
+                    assertThat(
+                        index,
+                        equivalentTo(
+                            """
+                                {
+                                    "task": "some:task",
+                                    "startedAt": "2020-01-02T03:04:05Z",
+                                    "finishedAt": "2020-01-02T03:04:05Z",
+                                    "streams": []
+                                }
+                            """.trimIndent(),
+                        ),
+                    )
+                }
+            }
+        }
+
+        given("output capture is disabled") {
+            val capture by createForEachTest { ContainerOutputCapture("some-task", null, OutputCaptureCompression.None, 0, logger, { now }) }
+
+            it("reports that it is not enabled") {
+                assertThat(capture.isEnabled, equalTo(false))
+            }
+
+            it("throws an exception when a sink is requested") {
+                assertThat({ capture.sinkFor(container1, CapturedOutputStream.Stdout) }, throws<UnsupportedOperationException>(withMessage("Output capture is not enabled.")))
+            }
+
+            it("does nothing when closed") {
+                capture.close()
+            }
+        }
+    }
+})
+
+private fun Sink.writeText(text: String) {
+    val buffer = Buffer().writeUtf8(text)
+
+    this.write(buffer, buffer.size)
+}
@@ -56,6 +56,10 @@ object TaskContainerOnlyIOStreamingOptionsSpec : Spek({
                 assertThat(options.stdoutForContainer(taskContainer), equalTo(TextOutput.StandardOutput))
             }
 
+            it("returns the system's stdout stream as the stderr stream for the container") {
+                assertThat(options.stderrForContainer(taskContainer), equalTo(TextOutput.StandardOutput))
+            }
+
             on("getting the stdin source for the container") {
                 val source by runNullableForEachTest { options.stdinForContainer(taskContainer) }
 
@@ -104,6 +108,10 @@ object TaskContainerOnlyIOStreamingOptionsSpec : Spek({
                 assertThat(options.stdoutForContainer(container), absent())
             }
 
+            it("does not return a stderr stream for the container") {
+                assertThat(options.stderrForContainer(container), absent())
+            }
+
             it("does not return a stdin stream for the container") {
                 assertThat(options.stdinForContainer(container), absent())
             }
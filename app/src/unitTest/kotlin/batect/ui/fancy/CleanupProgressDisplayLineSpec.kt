@@ -24,6 +24,7 @@ import batect.execution.model.events.ContainerCreatedEvent
 import batect.execution.model.events.ContainerRemovedEvent
 import batect.execution.model.events.TaskNetworkCreatedEvent
 import batect.execution.model.events.TaskNetworkDeletedEvent
+import batect.execution.model.events.TaskNetworkLeasedEvent
 import batect.testutils.createForEachTest
 import batect.testutils.equivalentTo
 import batect.testutils.imageSourceDoesNotMatter
@@ -71,6 +72,20 @@ object CleanupProgressDisplayLineSpec : Spek({
                 }
             }
 
+            describe("when there is only a network leased from the task network pool to clean up") {
+                beforeEachTest {
+                    cleanupDisplay.onEventPosted(TaskNetworkLeasedEvent(NetworkReference("some-network")))
+                }
+
+                on("and the network hasn't been returned yet") {
+                    val output by runForEachTest { cleanupDisplay.print() }
+
+                    it("prints that the network still needs to be cleaned up") {
+                        assertThat(output, equivalentTo(Text.white("Cleaning up: removing task network...")))
+                    }
+                }
+            }
+
             describe("when there is a container and the network to clean up") {
                 val container = Container("some-container", imageSourceDoesNotMatter())
 
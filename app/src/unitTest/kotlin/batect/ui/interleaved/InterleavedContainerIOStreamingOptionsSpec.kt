@@ -80,6 +80,19 @@ object InterleavedContainerIOStreamingOptionsSpec : Spek({
             }
         }
 
+        on("getting the stderr stream to use") {
+            it("returns an interleaved output stream") {
+                assertThat(
+                    options.stderrForContainer(container),
+                    present(
+                        isA<SinkTextOutput>(
+                            has(SinkTextOutput::sink, equalTo(InterleavedContainerOutputSink(container, output))),
+                        ),
+                    ),
+                )
+            }
+        }
+
         on("determining if a TTY should be used for a container") {
             it("returns that a TTY should not be used") {
                 assertThat(options.useTTYForContainer(container), equalTo(false))
@@ -17,187 +17,247 @@
 package batect.ui.interleaved
 
 import batect.config.Container
+import batect.os.ConsoleDimensions
 import batect.testutils.createForEachTest
+import batect.testutils.given
 import batect.testutils.imageSourceDoesNotMatter
+import batect.testutils.withPlatformSpecificLineSeparator
+import batect.ui.Console
 import batect.ui.text.Text
 import batect.ui.text.TextRun
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.equalTo
 import okio.Buffer
 import okio.Sink
-import org.mockito.kotlin.any
-import org.mockito.kotlin.inOrder
 import org.mockito.kotlin.mock
-import org.mockito.kotlin.never
-import org.mockito.kotlin.reset
-import org.mockito.kotlin.verify
-import org.mockito.kotlin.verifyNoMoreInteractions
 import org.spekframework.spek2.Spek
 import org.spekframework.spek2.style.specification.describe
+import java.io.ByteArrayOutputStream
+import java.io.PrintStream
 
 object InterleavedContainerOutputSinkSpec : Spek({
     describe("a container output sink for interleaved output") {
         val container = Container("some-container", imageSourceDoesNotMatter())
-        val output by createForEachTest { mock<InterleavedOutput>() }
-        val prefix = Text.bold(TextRun("Some prefix"))
-        val sink by createForEachTest { InterleavedContainerOutputSink(container, output, prefix) }
+        val consoleOutput by createForEachTest { ByteArrayOutputStream() }
+        val console by createForEachTest { Console(PrintStream(consoleOutput), enableComplexOutput = false, consoleDimensions = mock<ConsoleDimensions>()) }
+        val prefix = Text.bold(TextRun("Some prefix: "))
 
-        describe("writing output") {
-            describe("when zero bytes are written") {
-                beforeEachTest { sink.write(Buffer(), 0) }
+        fun linesWithPrefix(vararg lines: String): String = lines.joinToString("") { "some-container | Some prefix: $it\n" }.withPlatformSpecificLineSeparator()
 
-                it("does not write anything to the output") {
-                    verify(output, never()).printForContainer(any(), any())
-                }
-            }
+        given("output is not buffered") {
+            val output by createForEachTest { InterleavedOutput("task", setOf(container), console, InterleavedOutputBuffering(bufferSize = 0)) }
+            val sink by createForEachTest { InterleavedContainerOutputSink(container, output, prefix) }
 
-            describe("when bytes ending a blank line are written") {
-                beforeEachTest { sink.writeText("\n") }
+            describe("writing output") {
+                describe("when zero bytes are written") {
+                    beforeEachTest { sink.write(Buffer(), 0) }
 
-                it("writes a blank line to the output without the trailing new line character and with the prefix prepended") {
-                    verify(output).printForContainer(container, prefix + Text(""))
+                    it("does not write anything to the output") {
+                        assertThat(consoleOutput.toString(), equalTo(""))
+                    }
                 }
-            }
 
-            describe("when bytes ending a new line are written") {
-                beforeEachTest { sink.writeText("Some text\n") }
+                describe("when bytes ending a blank line are written") {
+                    beforeEachTest { sink.writeText("\n") }
 
-                it("writes the text to the output without the trailing new line character and with the prefix prepended") {
-                    verify(output).printForContainer(container, prefix + Text("Some text"))
+                    it("writes a blank line to the output without the trailing new line character and with the prefix prepended") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("")))
+                    }
                 }
-            }
 
-            describe("when bytes ending a new line and a carriage return are written") {
-                beforeEachTest { sink.writeText("Some text\r\n") }
+                describe("when bytes ending a new line are written") {
+                    beforeEachTest { sink.writeText("Some text\n") }
 
-                it("writes the text to the output without the trailing new line or carriage return characters and with the prefix prepended") {
-                    verify(output).printForContainer(container, prefix + Text("Some text"))
+                    it("writes the text to the output with the prefix prepended") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Some text")))
+                    }
                 }
-            }
 
-            describe("when bytes starting with a carriage return and ending a new line are written") {
-                beforeEachTest { sink.writeText("\rSome text\n") }
+                describe("when bytes ending a new line and a carriage return are written") {
+                    beforeEachTest { sink.writeText("Some text\r\n") }
 
-                it("writes the text to the output without the leading carriage return or trailing new line character and with the prefix prepended") {
-                    verify(output).printForContainer(container, prefix + Text("Some text"))
+                    it("writes the text to the output without the trailing carriage return character and with the prefix prepended") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Some text")))
+                    }
                 }
-            }
 
-            describe("when bytes containing multiple new lines are written") {
-                beforeEachTest { sink.writeText("Line 1\nLine 2\n") }
+                describe("when bytes starting with a carriage return and ending a new line are written") {
+                    beforeEachTest { sink.writeText("\rSome text\n") }
 
-                it("writes both lines to the output with the prefix prepended") {
-                    inOrder(output) {
-                        verify(output).printForContainer(container, prefix + Text("Line 1"))
-                        verify(output).printForContainer(container, prefix + Text("Line 2"))
+                    it("writes the text to the output without the leading carriage return character and with the prefix prepended") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Some text")))
                     }
                 }
-            }
 
-            describe("when bytes containing a new line are written") {
-                beforeEachTest { sink.writeText("Line 1\nStart of line 2...") }
+                describe("when bytes containing multiple new lines are written") {
+                    beforeEachTest { sink.writeText("Line 1\nLine 2\n") }
 
-                it("writes only the complete lines of text to the output with the prefix prepended") {
-                    verify(output).printForContainer(container, prefix + Text("Line 1"))
-                    verifyNoMoreInteractions(output)
+                    it("writes both lines to the output with the prefix prepended") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Line 1", "Line 2")))
+                    }
                 }
-            }
 
-            describe("when bytes not containing a new line are written") {
-                beforeEachTest { sink.writeText("Not yet...") }
+                describe("when bytes containing a new line are written") {
+                    beforeEachTest { sink.writeText("Line 1\nStart of line 2...") }
 
-                it("does not write anything to the output") {
-                    verify(output, never()).printForContainer(any(), any())
+                    it("writes only the complete lines of text to the output with the prefix prepended") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Line 1")))
+                    }
                 }
-            }
 
-            describe("when bytes not containing a new line are written and then a new line is written") {
-                beforeEachTest {
-                    sink.writeText("Not yet...")
-                    sink.writeText("now!\n")
+                describe("when bytes not containing a new line are written") {
+                    beforeEachTest { sink.writeText("Not yet...") }
+
+                    it("does not write anything to the output") {
+                        assertThat(consoleOutput.toString(), equalTo(""))
+                    }
                 }
 
-                it("writes the text to the output without the trailing new line character") {
-                    verify(output).printForContainer(container, prefix + Text("Not yet...now!"))
+                describe("when bytes not containing a new line are written and then a new line is written") {
+                    beforeEachTest {
+                        sink.writeText("Not yet...")
+                        sink.writeText("now!\n")
+                    }
+
+                    it("writes the complete line to the output") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Not yet...now!")))
+                    }
                 }
-            }
 
-            describe("when bytes containing a new line are written and then more bytes containing a new line are written") {
-                beforeEachTest {
-                    sink.writeText("Line 1\nLine")
-                    sink.writeText(" 2\n")
+                describe("when bytes containing a new line are written and then more bytes containing a new line are written") {
+                    beforeEachTest {
+                        sink.writeText("Line 1\nLine")
+                        sink.writeText(" 2\n")
+                    }
+
+                    it("writes both complete lines to the output with the prefix prepended") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Line 1", "Line 2")))
+                    }
                 }
 
-                it("writes both complete lines to the output with the prefix prepended") {
-                    inOrder(output) {
-                        verify(output).printForContainer(container, prefix + Text("Line 1"))
-                        verify(output).printForContainer(container, prefix + Text("Line 2"))
+                describe("when a multi-byte character is split across writes") {
+                    beforeEachTest {
+                        val bytes = "Caf\u00e9\n".toByteArray(Charsets.UTF_8)
+
+                        sink.write(Buffer().write(bytes, 0, 4), 4)
+                        sink.write(Buffer().write(bytes, 4, bytes.size - 4), (bytes.size - 4).toLong())
+                    }
+
+                    it("writes the complete character to the output") {
+                        assertThat(consoleOutput.toString(Charsets.UTF_8.name()), equalTo(linesWithPrefix("Caf\u00e9")))
                     }
                 }
             }
-        }
 
-        describe("closing the sink") {
-            describe("when no output has been written") {
-                beforeEachTest { sink.close() }
+            describe("closing the sink") {
+                describe("when no output has been written") {
+                    beforeEachTest { sink.close() }
 
-                it("does not write anything to the output") {
-                    verify(output, never()).printForContainer(any(), any())
+                    it("does not write anything to the output") {
+                        assertThat(consoleOutput.toString(), equalTo(""))
+                    }
                 }
-            }
 
-            describe("when no incomplete lines have been written") {
-                beforeEachTest {
-                    sink.writeText("Line 1\n")
-                    reset(output)
+                describe("when no incomplete lines have been written") {
+                    beforeEachTest {
+                        sink.writeText("Line 1\n")
+                        sink.close()
+                    }
 
-                    sink.close()
+                    it("does not write anything further to the output") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Line 1")))
+                    }
                 }
 
-                it("does not write anything to the output") {
-                    verify(output, never()).printForContainer(any(), any())
+                describe("when an incomplete line has been written") {
+                    beforeEachTest {
+                        sink.writeText("Wait for it...")
+                        sink.close()
+                    }
+
+                    it("writes the remaining text to the output with the prefix prepended") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Wait for it...")))
+                    }
                 }
-            }
 
-            describe("when an incomplete line has been written") {
-                beforeEachTest {
-                    sink.writeText("Wait for it...")
-                    sink.close()
+                describe("when an incomplete line consisting of a single leading carriage return has been written") {
+                    beforeEachTest {
+                        sink.writeText("\r")
+                        sink.close()
+                    }
+
+                    it("writes a blank line to the output with the prefix prepended and without the carriage return") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("")))
+                    }
                 }
 
-                it("writes the remaining text to the output with the prefix prepended") {
-                    verify(output).printForContainer(container, prefix + Text("Wait for it..."))
+                describe("when an incomplete line with a leading carriage return has been written") {
+                    beforeEachTest {
+                        sink.writeText("\rWait for it...")
+                        sink.close()
+                    }
+
+                    it("writes the remaining text to the output with the prefix prepended and without the leading carriage return") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Wait for it...")))
+                    }
+                }
+
+                describe("when an incomplete line with a trailing carriage return has been written") {
+                    beforeEachTest {
+                        sink.writeText("Wait for it...\r")
+                        sink.close()
+                    }
+
+                    it("writes the remaining text to the output with the prefix prepended and without the trailing carriage return") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Wait for it...")))
+                    }
                 }
             }
+        }
+
+        given("output is buffered") {
+            val output by createForEachTest { InterleavedOutput("task", setOf(container), console, InterleavedOutputBuffering(bufferSize = 100)) }
+            val sink by createForEachTest { InterleavedContainerOutputSink(container, output, prefix) }
 
-            describe("when an incomplete line consisting of a single leading carriage return has been written") {
-                beforeEachTest {
-                    sink.writeText("\r")
-                    sink.close()
+            describe("when complete lines smaller than the buffer size are written") {
+                beforeEachTest { sink.writeText("Line 1\nLine 2\n") }
+
+                it("does not write anything to the output") {
+                    assertThat(consoleOutput.toString(), equalTo(""))
                 }
 
-                it("writes an blank line to the output with the prefix prepended and without the carriage return") {
-                    verify(output).printForContainer(container, prefix + Text(""))
+                describe("and then the sink is flushed") {
+                    beforeEachTest { sink.flush() }
+
+                    it("writes all buffered lines to the output") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Line 1", "Line 2")))
+                    }
                 }
-            }
 
-            describe("when an incomplete line with a leading carriage return has been written") {
-                beforeEachTest {
-                    sink.writeText("\rWait for it...")
-                    sink.close()
+                describe("and then the sink is closed") {
+                    beforeEachTest { sink.close() }
+
+                    it("writes all buffered lines to the output") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Line 1", "Line 2")))
+                    }
                 }
 
-                it("writes the remaining text to the output with the prefix prepended and without the leading carriage return") {
-                    verify(output).printForContainer(container, prefix + Text("Wait for it..."))
+                describe("and then output for the task is printed") {
+                    beforeEachTest { output.printForTask(TextRun("Some task output")) }
+
+                    it("writes all buffered lines to the output before the task output") {
+                        assertThat(consoleOutput.toString(), equalTo(linesWithPrefix("Line 1", "Line 2") + "${"task".padEnd(14)} | Some task output\n".withPlatformSpecificLineSeparator()))
+                    }
                 }
             }
 
-            describe("when an incomplete line with a trailing carriage return has been written") {
-                beforeEachTest {
-                    sink.writeText("Wait for it...\r")
-                    sink.close()
-                }
+            describe("when complete lines reaching the buffer size are written") {
+                val lines = (1..5).map { "This is line number $it" }
+
+                beforeEachTest { sink.writeText(lines.joinToString("\n", postfix = "\n")) }
 
-                it("writes the remaining text to the output with the prefix prepended and without the trailing carriage return") {
-                    verify(output).printForContainer(container, prefix + Text("Wait for it..."))
+                it("writes all complete lines to the output") {
+                    assertThat(consoleOutput.toString(), equalTo(linesWithPrefix(*lines.toTypedArray())))
                 }
             }
         }
@@ -0,0 +1,58 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.ui.interleaved
+
+import batect.testutils.equalTo
+import batect.testutils.given
+import batect.testutils.withMessage
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.throws
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.time.Duration
+
+object InterleavedOutputBufferingSpec : Spek({
+    describe("interleaved output buffering settings") {
+        given("a buffer size of zero") {
+            val buffering = InterleavedOutputBuffering(bufferSize = 0)
+
+            it("reports that output is not buffered") {
+                assertThat(buffering.isBuffered, equalTo(false))
+            }
+        }
+
+        given("a positive buffer size") {
+            val buffering = InterleavedOutputBuffering(bufferSize = 1024)
+
+            it("reports that output is buffered") {
+                assertThat(buffering.isBuffered, equalTo(true))
+            }
+        }
+
+        given("a negative buffer size") {
+            it("throws an appropriate exception") {
+                assertThat({ InterleavedOutputBuffering(bufferSize = -1) }, throws<IllegalArgumentException>(withMessage("Buffer size must not be negative.")))
+            }
+        }
+
+        given("a flush interval of zero") {
+            it("throws an appropriate exception") {
+                assertThat({ InterleavedOutputBuffering(flushInterval = Duration.ZERO) }, throws<IllegalArgumentException>(withMessage("Flush interval must be positive.")))
+            }
+        }
+    }
+})
@@ -22,14 +22,20 @@ import batect.testutils.equalTo
 import batect.testutils.given
 import batect.testutils.imageSourceDoesNotMatter
 import batect.testutils.on
+import batect.testutils.runForEachTest
 import batect.ui.Console
 import batect.ui.ConsoleColor
 import batect.ui.text.Text
 import batect.ui.text.TextRun
 import com.natpryce.hamkrest.assertion.assertThat
+import okio.Buffer
+import okio.ByteString.Companion.encodeUtf8
+import org.mockito.kotlin.any
+import org.mockito.kotlin.doReturn
 import org.mockito.kotlin.inOrder
 import org.mockito.kotlin.mock
 import org.mockito.kotlin.verify
+import org.mockito.kotlin.whenever
 import org.spekframework.spek2.Spek
 import org.spekframework.spek2.style.specification.describe
 
@@ -111,6 +117,30 @@ object InterleavedOutputSpec : Spek({
                 }
             }
 
+            on("rendering the prefix for a container") {
+                beforeEachTest { whenever(console.render(any<TextRun>())).doReturn("rendered prefix") }
+
+                val prefix by runForEachTest { output.renderedPrefixForContainer(container1, TextRun(Text.white("Extra | "))) }
+
+                it("renders the container's prefix followed by the additional prefix") {
+                    verify(console).render(Text.black(Text.bold("c1    | ")) + Text.white("Extra | "))
+                }
+
+                it("returns the rendered prefix as UTF-8 bytes") {
+                    assertThat(prefix, equalTo("rendered prefix".encodeUtf8()))
+                }
+            }
+
+            on("writing rendered lines") {
+                val lines = Buffer().writeUtf8("Line 1\nLine 2\n")
+
+                beforeEachTest { output.writeRenderedLines(lines) }
+
+                it("writes the lines to the console") {
+                    verify(console).write(lines)
+                }
+            }
+
             on("getting the prefix width") {
                 it("returns the size of the task's output prefix") {
                     assertThat(output.prefixWidth, equalTo("short | ".length))
@@ -0,0 +1,174 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.buildtools
+
+import groovy.json.JsonOutput
+import groovy.json.JsonSlurper
+import org.gradle.api.DefaultTask
+import org.gradle.api.GradleException
+import org.gradle.api.file.RegularFileProperty
+import org.gradle.api.provider.Property
+import org.gradle.api.tasks.Input
+import org.gradle.api.tasks.InputFile
+import org.gradle.api.tasks.Internal
+import org.gradle.api.tasks.OutputFile
+import org.gradle.api.tasks.PathSensitive
+import org.gradle.api.tasks.PathSensitivity
+import org.gradle.api.tasks.TaskAction
+import java.io.File
+import kotlin.math.abs
+
+abstract class JmhBaselineComparisonTask : DefaultTask() {
+    @get:InputFile
+    @get:PathSensitive(PathSensitivity.NONE)
+    abstract val resultsFile: RegularFileProperty
+
+    // Not declared as an @InputFile: Gradle would then reject a missing baseline before the task runs, hiding the message
+    // below that explains how to create one. The baseline is registered as an input in init() only if it exists.
+    @get:Internal
+    abstract val baselineFile: RegularFileProperty
+
+    // A benchmark is only flagged if it is worse than the baseline by more than this percentage and the difference is larger
+    // than the combined error margins reported by JMH, so that noisy benchmarks don't fail the build.
+    @get:Input
+    abstract val regressionThresholdPercentage: Property<Double>
+
+    @get:Input
+    abstract val failOnRegression: Property<Boolean>
+
+    @get:OutputFile
+    abstract val reportFile: RegularFileProperty
+
+    init {
+        regressionThresholdPercentage.convention(10.0)
+        failOnRegression.convention(true)
+
+        inputs.files(baselineFile.map { file -> listOfNotNull(file.asFile.takeIf { it.exists() }) }.orElse(emptyList()))
+            .withPropertyName("existingBaselineFile")
+            .withPathSensitivity(PathSensitivity.NONE)
+    }
+
+    @TaskAction
+    fun run() {
+        val baseline = baselineFile.orNull?.asFile
+
+        if (baseline == null || !baseline.exists()) {
+            throw GradleException("No JMH baseline found at ${baseline ?: "(not set)"}. Run the 'jmh' task followed by 'jmhUpdateBaseline' to create one.")
+        }
+
+        val current = loadResults(resultsFile.get().asFile)
+        val previous = loadResults(baseline)
+        val threshold = regressionThresholdPercentage.get()
+
+        val comparisons = current.mapNotNull { (key, result) -> previous[key]?.let { compare(key, it, result, threshold) } }
+        val newBenchmarks = current.keys - previous.keys
+        val missingBenchmarks = previous.keys - current.keys
+
+        comparisons.forEach { logger.lifecycle(it.describe()) }
+        newBenchmarks.sorted().forEach { logger.lifecycle("NEW       $it") }
+        missingBenchmarks.sorted().forEach { logger.lifecycle("MISSING   $it") }
+
+        writeReport(comparisons, newBenchmarks, missingBenchmarks, threshold)
+
+        val regressions = comparisons.filter { it.isRegression }
+
+        if (regressions.isEmpty()) {
+            logger.lifecycle("No benchmarks regressed by more than $threshold% compared to the baseline.")
+            return
+        }
+
+        val message = "${regressions.size} benchmark(s) regressed by more than $threshold% compared to the baseline:\n" +
+            regressions.joinToString("\n") { "  " + it.describe() }
+
+        if (failOnRegression.get()) {
+            throw GradleException(message)
+        }
+
+        logger.warn(message)
+    }
+
+    private fun loadResults(file: File): Map<String, BenchmarkResult> {
+        @Suppress("UNCHECKED_CAST")
+        val entries = JsonSlurper().parse(file) as List<Map<String, Any?>>
+
+        return entries.associate { entry ->
+            @Suppress("UNCHECKED_CAST")
+            val params = (entry["params"] as Map<String, Any?>?).orEmpty()
+
+            @Suppress("UNCHECKED_CAST")
+            val primaryMetric = entry["primaryMetric"] as Map<String, Any?>
+            val paramsDescription = if (params.isEmpty()) "" else params.entries.sortedBy { it.key }.joinToString(",", "(", ")") { "${it.key}=${it.value}" }
+            val key = "${entry["benchmark"]}$paramsDescription [${entry["mode"]}]"
+
+            key to BenchmarkResult(
+                entry["mode"] as String,
+                (primaryMetric["score"] as Number).toDouble(),
+                (primaryMetric["scoreError"] as? Number)?.toDouble()?.takeUnless { it.isNaN() } ?: 0.0,
+                primaryMetric["scoreUnit"] as String,
+            )
+        }
+    }
+
+    private fun compare(key: String, baseline: BenchmarkResult, current: BenchmarkResult, threshold: Double): BenchmarkComparison {
+        // Throughput is the only JMH mode where a higher score is better: all other modes measure time per operation.
+        val higherIsBetter = current.mode == "thrpt"
+        val worseBy = if (higherIsBetter) baseline.score - current.score else current.score - baseline.score
+        val percentageWorse = if (baseline.score == 0.0) 0.0 else worseBy / baseline.score * 100
+        val exceedsErrorMargins = abs(current.score - baseline.score) > baseline.error + current.error
+
+        return BenchmarkComparison(key, baseline, current, percentageWorse, percentageWorse > threshold && exceedsErrorMargins)
+    }
+
+    private fun writeReport(comparisons: List<BenchmarkComparison>, newBenchmarks: Set<String>, missingBenchmarks: Set<String>, threshold: Double) {
+        val report = mapOf(
+            "regressionThresholdPercentage" to threshold,
+            "comparisons" to comparisons.map {
+                mapOf(
+                    "benchmark" to it.key,
+                    "unit" to it.current.unit,
+                    "baselineScore" to it.baseline.score,
+                    "baselineError" to it.baseline.error,
+                    "currentScore" to it.current.score,
+                    "currentError" to it.current.error,
+                    "percentageWorse" to it.percentageWorse,
+                    "regression" to it.isRegression,
+                )
+            },
+            "newBenchmarks" to newBenchmarks.sorted(),
+            "missingBenchmarks" to missingBenchmarks.sorted(),
+        )
+
+        reportFile.get().asFile.writeText(JsonOutput.prettyPrint(JsonOutput.toJson(report)))
+    }
+
+    private data class BenchmarkResult(val mode: String, val score: Double, val error: Double, val unit: String)
+
+    private data class BenchmarkComparison(
+        val key: String,
+        val baseline: BenchmarkResult,
+        val current: BenchmarkResult,
+        val percentageWorse: Double,
+        val isRegression: Boolean,
+    ) {
+        fun describe(): String {
+            val status = if (isRegression) "REGRESSED" else "OK       "
+            val change = if (percentageWorse >= 0) "%.1f%% worse".format(percentageWorse) else "%.1f%% better".format(-percentageWorse)
+
+            return "$status $key: ${"%.3f".format(current.score)} ${current.unit} (baseline ${"%.3f".format(baseline.score)} ${baseline.unit}, $change)"
+        }
+    }
+}
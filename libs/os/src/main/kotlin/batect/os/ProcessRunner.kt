@@ -112,6 +112,31 @@ class ProcessRunner(private val logger: Logger) {
         }
     }
 
+    // NOTESTS (for detaching the process)
+    // The started process is not waited for, and keeps running after this process exits.
+    fun startDetached(command: Iterable<String>) {
+        logger.debug {
+            message("Starting detached process.")
+            data("command", command.toList())
+        }
+
+        runAndConvertExceptions(command.first()) {
+            val process = ProcessBuilder(command.toList())
+                .redirectOutput(ProcessBuilder.Redirect.DISCARD)
+                .redirectError(ProcessBuilder.Redirect.DISCARD)
+                .redirectInput(ProcessBuilder.Redirect.PIPE)
+                .start()
+
+            process.outputStream.close()
+
+            logger.debug {
+                message("Detached process started.")
+                data("command", command.toList())
+                data("pid", process.pid())
+            }
+        }
+    }
+
     private inline fun <T> runAndConvertExceptions(executableName: String, action: () -> T): T {
         try {
             return action()
@@ -22,18 +22,20 @@ import okhttp3.OkHttpClient
 import okhttp3.Request
 import okhttp3.RequestBody.Companion.toRequestBody
 import java.time.Duration
+import java.util.concurrent.atomic.AtomicBoolean
 
 class AbacusClient(
     private val client: OkHttpClient,
     private val logger: Logger,
+    baseUrl: String = "https://${System.getenv().getOrDefault("BATECT_TELEMETRY_HOST", "api.abacus.batect.dev")}",
 ) {
-    private val host = System.getenv().getOrDefault("BATECT_TELEMETRY_HOST", "api.abacus.batect.dev")
-    private val url = "https://$host/v1/sessions"
+    private val url = "$baseUrl/v1/sessions"
+    private val batchUrl = "$baseUrl/v1/sessions/batch"
     private val jsonMediaType = "application/json".toMediaType()
+    private val ndjsonMediaType = "application/x-ndjson".toMediaType()
+    private val batchUploadsUnsupported = AtomicBoolean(false)
 
     fun upload(sessionJson: ByteArray, timeoutAfter: Duration? = null) {
-        val clientWithTimeout = if (timeoutAfter == null) client else client.newBuilder().callTimeout(timeoutAfter).build()
-
         val request = Request.Builder()
             .method("PUT", sessionJson.toRequestBody(jsonMediaType))
             .url(url)
@@ -44,23 +46,101 @@ class AbacusClient(
             data("url", url)
         }
 
+        execute(request, timeoutAfter) { successful, code, message ->
+            logger.info {
+                message("Finished uploading session.")
+                data("successful", successful)
+                data("httpResponseCode", code)
+                data("httpResponseMessage", message)
+            }
+        }
+    }
+
+    // compressedBatch must be in the format produced by TelemetrySessionBatch: gzip-compressed, newline-delimited JSON sessions.
+    //
+    // If the service doesn't support batch uploads (for example, because BATECT_TELEMETRY_HOST points to an older
+    // deployment), each session in the batch is uploaded individually instead, and batch uploads aren't attempted again.
+    fun uploadBatch(compressedBatch: ByteArray, timeoutAfter: Duration? = null) {
+        if (batchUploadsUnsupported.get()) {
+            uploadIndividually(compressedBatch, timeoutAfter)
+            return
+        }
+
+        val request = Request.Builder()
+            .method("PUT", compressedBatch.toRequestBody(ndjsonMediaType))
+            .header("Content-Encoding", "gzip")
+            .url(batchUrl)
+            .build()
+
+        logger.info {
+            message("Uploading session batch.")
+            data("url", batchUrl)
+            data("compressedSizeInBytes", compressedBatch.size)
+        }
+
+        val startTime = System.nanoTime()
+
+        val code = execute(request, timeoutAfter, batchUploadsUnsupportedStatusCodes) { successful, code, message ->
+            logger.info {
+                message("Finished uploading session batch.")
+                data("successful", successful)
+                data("httpResponseCode", code)
+                data("httpResponseMessage", message)
+            }
+        }
+
+        if (code in batchUploadsUnsupportedStatusCodes) {
+            logger.warn {
+                message("Service does not support uploading session batches, uploading sessions individually.")
+                data("httpResponseCode", code)
+            }
+
+            batchUploadsUnsupported.set(true)
+            uploadIndividually(compressedBatch, timeoutAfter?.minusNanos(System.nanoTime() - startTime))
+        }
+    }
+
+    private fun uploadIndividually(compressedBatch: ByteArray, timeoutAfter: Duration?) {
+        val deadline = timeoutAfter?.let { System.nanoTime() + it.toNanos() }
+
+        TelemetrySessionBatch.splitSessions(compressedBatch).forEach { session ->
+            val remainingTime = deadline?.let { Duration.ofNanos(it - System.nanoTime()) }
+
+            if (remainingTime != null && (remainingTime.isNegative || remainingTime.isZero)) {
+                throw AbacusClientException("Timed out uploading sessions individually.")
+            }
+
+            upload(session, remainingTime)
+        }
+    }
+
+    // Returns the HTTP status code of the response. Unsuccessful responses throw an exception, unless their status code is in allowedFailureStatusCodes.
+    private fun execute(
+        request: Request,
+        timeoutAfter: Duration?,
+        allowedFailureStatusCodes: Set<Int> = emptySet(),
+        onResponse: (successful: Boolean, code: Int, message: String) -> Unit,
+    ): Int {
+        val clientWithTimeout = if (timeoutAfter == null) client else client.newBuilder().callTimeout(timeoutAfter).build()
+
         try {
             clientWithTimeout.newCall(request).execute().use { response ->
-                logger.info {
-                    message("Finished uploading session.")
-                    data("successful", response.isSuccessful)
-                    data("httpResponseCode", response.code)
-                    data("httpResponseMessage", response.message)
-                }
+                onResponse(response.isSuccessful, response.code, response.message)
 
-                if (!response.isSuccessful && response.code != 304) {
+                if (!response.isSuccessful && response.code != 304 && response.code !in allowedFailureStatusCodes) {
                     throw AbacusClientException("The server returned HTTP ${response.code}.")
                 }
+
+                return response.code
             }
         } catch (e: Throwable) {
-            throw AbacusClientException("HTTP PUT $url failed: ${e.message}", e)
+            throw AbacusClientException("HTTP ${request.method} ${request.url} failed: ${e.message}", e)
         }
     }
+
+    companion object {
+        private val batchUploadsUnsupportedStatusCodes = setOf(404, 415)
+    }
 }
 
 class AbacusClientException(message: String, cause: Throwable? = null) : RuntimeException(message, cause)
@@ -0,0 +1,56 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.telemetry
+
+import kotlinx.serialization.json.Json
+import java.io.ByteArrayInputStream
+import java.io.ByteArrayOutputStream
+import java.util.zip.GZIPInputStream
+import java.util.zip.GZIPOutputStream
+
+// A batch is a gzip-compressed file containing one JSON-encoded session per line. The same bytes are stored on disk
+// and used as the body of the upload request, so uploading a batch doesn't need to decompress or re-encode anything.
+object TelemetrySessionBatch {
+    private val json = Json.Default
+
+    fun encodeSession(session: TelemetrySession): ByteArray = json.encodeToString(TelemetrySession.serializer(), session).toByteArray(Charsets.UTF_8)
+
+    fun encode(encodedSessions: List<ByteArray>): ByteArray {
+        val output = ByteArrayOutputStream()
+
+        GZIPOutputStream(output).use { gzip ->
+            encodedSessions.forEach { session ->
+                gzip.write(session)
+                gzip.write('\n'.code)
+            }
+        }
+
+        return output.toByteArray()
+    }
+
+    fun decode(batch: ByteArray): List<TelemetrySession> =
+        splitSessions(batch).map { json.decodeFromString(TelemetrySession.serializer(), it.toString(Charsets.UTF_8)) }
+
+    // Returns each session in the batch as it was originally encoded, without parsing it.
+    fun splitSessions(batch: ByteArray): List<ByteArray> =
+        GZIPInputStream(ByteArrayInputStream(batch)).bufferedReader(Charsets.UTF_8).useLines { lines ->
+            lines
+                .filter { it.isNotBlank() }
+                .map { it.toByteArray(Charsets.UTF_8) }
+                .toList()
+        }
+}
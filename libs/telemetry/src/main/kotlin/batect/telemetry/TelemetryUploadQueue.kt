@@ -19,8 +19,15 @@ package batect.telemetry
 import batect.io.ApplicationPaths
 import batect.logging.Logger
 import kotlinx.serialization.json.Json
+import java.nio.channels.FileChannel
+import java.nio.channels.FileLock
+import java.nio.channels.OverlappingFileLockException
 import java.nio.file.Files
+import java.nio.file.NoSuchFileException
 import java.nio.file.Path
+import java.nio.file.StandardCopyOption
+import java.nio.file.StandardOpenOption
+import java.util.UUID
 import kotlin.streams.asSequence
 
 class TelemetryUploadQueue(
@@ -38,29 +45,152 @@ class TelemetryUploadQueue(
             data("path", path)
         }
 
-        val bytes = json.encodeToString(TelemetrySession.serializer(), session).toByteArray(Charsets.UTF_8)
+        val bytes = TelemetrySessionBatch.encodeSession(session)
 
         if (!Files.exists(path.parent)) {
             Files.createDirectories(path.parent)
         }
 
-        Files.write(path, bytes)
+        // Write the session to a temporary file first so that compaction in another process never sees a partially-written session.
+        writeAtomically(path, bytes)
 
         return path
     }
 
-    fun getAll(): Set<Path> {
+    fun getAll(): Set<Path> = listFiles(sessionFilePrefix, sessionFileSuffix)
+
+    fun getAllBatches(): Set<Path> = listFiles(batchFilePrefix, batchFileSuffix)
+
+    // Combines individual sessions into batches of at most maximumBatchSizeInBytes (before compression), oldest sessions first, and
+    // returns all batches waiting to be uploaded.
+    // If another process is already compacting the queue, this leaves the individual sessions for that process and only returns
+    // the batches that already exist.
+    fun compact(maximumBatchSizeInBytes: Int = defaultMaximumBatchSizeInBytes): Set<Path> {
+        if (getAll().isNotEmpty()) {
+            withCompactionLock { compactSessions(maximumBatchSizeInBytes) }
+        }
+
+        return getAllBatches()
+    }
+
+    fun readBatch(path: Path): List<TelemetrySession> = TelemetrySessionBatch.decode(Files.readAllBytes(path))
+
+    private fun compactSessions(maximumBatchSizeInBytes: Int) {
+        val sessions = getAll().mapNotNull { path -> readSessionForCompaction(path) }
+            .sortedBy { it.session.sessionStartTime }
+
+        if (sessions.isEmpty()) {
+            return
+        }
+
+        val batches = mutableListOf<List<QueuedSession>>()
+        var currentBatch = mutableListOf<QueuedSession>()
+        var currentBatchSize = 0
+
+        sessions.forEach { session ->
+            if (currentBatch.isNotEmpty() && currentBatchSize + session.bytes.size + 1 > maximumBatchSizeInBytes) {
+                batches.add(currentBatch)
+                currentBatch = mutableListOf()
+                currentBatchSize = 0
+            }
+
+            currentBatch.add(session)
+            currentBatchSize += session.bytes.size + 1
+        }
+
+        batches.add(currentBatch)
+        batches.forEach { writeBatch(it) }
+
+        logger.info {
+            message("Compacted telemetry sessions into batches.")
+            data("sessionCount", sessions.size)
+            data("batchCount", batches.size)
+        }
+    }
+
+    private fun readSessionForCompaction(path: Path): QueuedSession? {
+        val bytes = try {
+            Files.readAllBytes(path)
+        } catch (e: NoSuchFileException) {
+            // The session was uploaded and removed from the queue by another process (see TelemetryManager) since we listed the queue.
+            return null
+        }
+
+        val session = try {
+            json.decodeFromString(TelemetrySession.serializer(), bytes.toString(Charsets.UTF_8))
+        } catch (e: Throwable) {
+            logger.warn {
+                message("Could not parse telemetry session, deleting it rather than adding it to a batch.")
+                data("path", path)
+                exception(e)
+            }
+
+            pop(path)
+
+            return null
+        }
+
+        // Re-encode the session to guarantee it occupies exactly one line in the batch.
+        return QueuedSession(path, session, TelemetrySessionBatch.encodeSession(session))
+    }
+
+    private fun writeBatch(sessions: List<QueuedSession>) {
+        val path = telemetryDirectory.resolve("$batchFilePrefix${UUID.randomUUID()}$batchFileSuffix")
+
+        writeAtomically(path, TelemetrySessionBatch.encode(sessions.map { it.bytes }))
+
+        logger.info {
+            message("Saved telemetry session batch to disk.")
+            data("path", path)
+            data("sessionCount", sessions.size)
+        }
+
+        sessions.forEach { Files.deleteIfExists(it.path) }
+    }
+
+    private fun withCompactionLock(block: () -> Unit) {
+        FileChannel.open(telemetryDirectory.resolve("compaction.lock"), StandardOpenOption.CREATE, StandardOpenOption.WRITE).use { channel ->
+            val lock = tryLock(channel)
+
+            if (lock == null) {
+                logger.info {
+                    message("Another process is already compacting the telemetry upload queue, not compacting.")
+                }
+
+                return
+            }
+
+            lock.use { block() }
+        }
+    }
+
+    private fun tryLock(channel: FileChannel): FileLock? = try {
+        channel.tryLock()
+    } catch (e: OverlappingFileLockException) {
+        null
+    }
+
+    private fun writeAtomically(path: Path, bytes: ByteArray) {
+        val temporaryPath = path.resolveSibling("${path.fileName}.tmp")
+
+        Files.write(temporaryPath, bytes)
+        Files.move(temporaryPath, path, StandardCopyOption.ATOMIC_MOVE, StandardCopyOption.REPLACE_EXISTING)
+    }
+
+    private fun listFiles(prefix: String, suffix: String): Set<Path> {
         if (!Files.exists(telemetryDirectory)) {
             return emptySet()
         }
 
-        return Files.list(telemetryDirectory).asSequence()
-            .filter {
-                val fileName = it.fileName.toString()
+        return Files.list(telemetryDirectory).use { files ->
+            files.asSequence()
+                .filter {
+                    val fileName = it.fileName.toString()
 
-                fileName.startsWith("session-") && fileName.endsWith(".json")
-            }
-            .toSet()
+                    fileName.startsWith(prefix) && fileName.endsWith(suffix)
+                }
+                .toSet()
+        }
     }
 
     fun pop(path: Path) {
@@ -80,4 +210,15 @@ class TelemetryUploadQueue(
 
         Files.delete(path)
     }
+
+    private class QueuedSession(val path: Path, val session: TelemetrySession, val bytes: ByteArray)
+
+    companion object {
+        const val defaultMaximumBatchSizeInBytes: Int = 1024 * 1024
+
+        private const val sessionFilePrefix = "session-"
+        private const val sessionFileSuffix = ".json"
+        private const val batchFilePrefix = "batch-"
+        private const val batchFileSuffix = ".ndjson.gz"
+    }
 }
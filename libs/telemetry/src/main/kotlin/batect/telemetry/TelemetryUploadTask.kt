@@ -17,10 +17,14 @@
 package batect.telemetry
 
 import batect.logging.Logger
-import kotlinx.serialization.json.Json
 import java.nio.file.Files
 import java.nio.file.Path
+import java.time.Duration
 import java.time.ZonedDateTime
+import java.util.concurrent.ConcurrentLinkedQueue
+import java.util.concurrent.atomic.AtomicBoolean
+import java.util.concurrent.atomic.AtomicInteger
+import java.util.concurrent.atomic.AtomicLong
 import kotlin.concurrent.thread
 
 class TelemetryUploadTask(
@@ -31,9 +35,10 @@ class TelemetryUploadTask(
     private val logger: Logger,
     private val threadRunner: ThreadRunner = defaultThreadRunner,
     private val timeSource: TimeSource = ZonedDateTime::now,
+    private val limits: TelemetryUploadLimits = TelemetryUploadLimits(),
 ) {
-    private val json = Json.Default
     private val circuitBreaker = CircuitBreaker(5)
+    private val reportedCircuitBreakerFailedOpen = AtomicBoolean(false)
 
     fun start() {
         if (!telemetryConsent.telemetryAllowed) {
@@ -49,9 +54,10 @@ class TelemetryUploadTask(
 
     private fun runOnThread() {
         try {
-            val sessionPaths = telemetryUploadQueue.getAll()
+            val deadline = timeSource().plus(limits.maximumDuration)
+            val batchPaths = telemetryUploadQueue.compact(limits.maximumBatchSizeInBytes)
 
-            if (sessionPaths.isEmpty()) {
+            if (batchPaths.isEmpty()) {
                 logger.info {
                     message("No sessions to upload.")
                 }
@@ -59,62 +65,88 @@ class TelemetryUploadTask(
                 return
             }
 
-            sessionPaths.shuffled().forEach {
+            val pendingBatches = ConcurrentLinkedQueue(batchPaths.shuffled())
+            val bytesUploaded = AtomicLong(0)
+            val uploaderCount = minOf(limits.maximumConcurrentUploads, batchPaths.size)
+
+            repeat(uploaderCount) {
+                threadRunner { uploadBatches(pendingBatches, deadline, bytesUploaded) }
+            }
+        } catch (e: Throwable) {
+            logUnhandledException(e)
+        }
+    }
+
+    private fun uploadBatches(pendingBatches: ConcurrentLinkedQueue<Path>, deadline: ZonedDateTime, bytesUploaded: AtomicLong) {
+        try {
+            while (true) {
+                val batchPath = pendingBatches.poll() ?: return
+
                 if (!circuitBreaker.allowRequests) {
-                    logger.warn {
-                        message("Telemetry upload task circuit breaker has failed open, not uploading any further sessions.")
+                    reportCircuitBreakerFailedOpen()
+                    return
+                }
+
+                val remainingTime = Duration.between(timeSource(), deadline)
+
+                if (remainingTime.isNegative || remainingTime.isZero) {
+                    logger.info {
+                        message("Telemetry upload time budget exhausted, not uploading any further session batches.")
                     }
 
-                    telemetrySessionBuilder.addEvent("TelemetryUploadCircuitBreakerFailedOpen", emptyMap())
+                    return
+                }
+
+                val bytes = Files.readAllBytes(batchPath)
+
+                if (bytesUploaded.addAndGet(bytes.size.toLong()) > limits.maximumBytesPerInvocation) {
+                    logger.info {
+                        message("Telemetry upload size budget exhausted, not uploading any further session batches.")
+                    }
 
                     return
                 }
 
-                upload(it)
+                upload(batchPath, bytes, remainingTime)
             }
         } catch (e: Throwable) {
-            logger.error {
-                message("Unhandled exception while uploading telemetry sessions.")
-                exception(e)
-            }
+            logUnhandledException(e)
         }
     }
 
-    private fun upload(sessionPath: Path) {
+    private fun upload(batchPath: Path, bytes: ByteArray, timeout: Duration) {
         logger.info {
-            message("Uploading session.")
-            data("sessionPath", sessionPath)
+            message("Uploading session batch.")
+            data("batchPath", batchPath)
         }
 
-        val bytes = Files.readAllBytes(sessionPath)
-
         try {
             telemetrySessionBuilder.addSpan("UploadTelemetrySession") {
-                abacusClient.upload(bytes)
+                abacusClient.uploadBatch(bytes, timeout)
             }
 
-            telemetryUploadQueue.pop(sessionPath)
+            telemetryUploadQueue.pop(batchPath)
 
             logger.info {
-                message("Session uploaded successfully.")
-                data("sessionPath", sessionPath)
+                message("Session batch uploaded successfully.")
+                data("batchPath", batchPath)
             }
         } catch (e: Throwable) {
             telemetrySessionBuilder.addUnhandledExceptionEvent(e, isUserFacing = false)
 
-            handleFailedUpload(sessionPath, bytes, e)
+            handleFailedUpload(batchPath, e)
         }
     }
 
-    private fun handleFailedUpload(sessionPath: Path, bytes: ByteArray, uploadException: Throwable) {
+    private fun handleFailedUpload(batchPath: Path, uploadException: Throwable) {
         circuitBreaker.recordFailure()
 
-        val session = try {
-            json.decodeFromString(TelemetrySession.serializer(), bytes.toString(Charsets.UTF_8))
+        val sessions = try {
+            telemetryUploadQueue.readBatch(batchPath)
         } catch (parsingException: Throwable) {
             logger.error {
-                message("Session upload failed, and parsing session to determine age failed.")
-                data("sessionPath", sessionPath)
+                message("Session batch upload failed, and parsing batch to determine age failed.")
+                data("batchPath", batchPath)
                 exception("uploadException", uploadException)
                 exception("parsingException", parsingException)
             }
@@ -127,43 +159,72 @@ class TelemetryUploadTask(
         val now = timeSource()
         val threshold = now.minusDays(30)
 
-        if (session.sessionStartTime >= threshold) {
+        if (sessions.any { it.sessionStartTime >= threshold }) {
             logger.warn {
-                message("Session upload failed. Session is less than 30 days old and so won't be deleted.")
-                data("sessionPath", sessionPath)
+                message("Session batch upload failed. Batch contains sessions less than 30 days old and so won't be deleted.")
+                data("batchPath", batchPath)
                 exception(uploadException)
             }
 
             return
         }
 
-        telemetryUploadQueue.pop(sessionPath)
+        telemetryUploadQueue.pop(batchPath)
 
         logger.warn {
-            message("Session upload failed. Session is more than 30 days old and so has been deleted.")
-            data("sessionPath", sessionPath)
+            message("Session batch upload failed. All sessions in batch are more than 30 days old and so it has been deleted.")
+            data("batchPath", batchPath)
             exception(uploadException)
         }
 
         telemetrySessionBuilder.addEvent("DeletedOldTelemetrySessionThatFailedToUpload", emptyMap())
     }
 
+    private fun reportCircuitBreakerFailedOpen() {
+        if (!reportedCircuitBreakerFailedOpen.compareAndSet(false, true)) {
+            return
+        }
+
+        logger.warn {
+            message("Telemetry upload task circuit breaker has failed open, not uploading any further sessions.")
+        }
+
+        telemetrySessionBuilder.addEvent("TelemetryUploadCircuitBreakerFailedOpen", emptyMap())
+    }
+
+    private fun logUnhandledException(e: Throwable) {
+        logger.error {
+            message("Unhandled exception while uploading telemetry sessions.")
+            exception(e)
+        }
+    }
+
     companion object {
         private val defaultThreadRunner: ThreadRunner = { block -> thread(isDaemon = true, name = TelemetryUploadTask::class.qualifiedName, block = block) }
     }
 }
 
+// The upload runs on daemon threads, so it never holds up the application exiting. These limits stop it from competing with
+// the user's task for longer than necessary when there's a large backlog of sessions: anything not uploaded within them
+// stays in the queue for next time.
+data class TelemetryUploadLimits(
+    val maximumConcurrentUploads: Int = 3,
+    val maximumBatchSizeInBytes: Int = TelemetryUploadQueue.defaultMaximumBatchSizeInBytes,
+    val maximumBytesPerInvocation: Long = 4L * 1024 * 1024,
+    val maximumDuration: Duration = Duration.ofSeconds(20),
+)
+
 typealias ThreadRunner = (BackgroundProcess) -> Unit
 typealias BackgroundProcess = () -> Unit
 typealias TimeSource = () -> ZonedDateTime
 
 private class CircuitBreaker(private val maximumFailures: Int) {
-    private var failuresSoFar = 0
+    private val failuresSoFar = AtomicInteger(0)
 
     fun recordFailure() {
-        failuresSoFar += 1
+        failuresSoFar.incrementAndGet()
     }
 
     val allowRequests: Boolean
-        get() = failuresSoFar < maximumFailures
+        get() = failuresSoFar.get() < maximumFailures
 }
@@ -35,6 +35,7 @@ import org.mockito.kotlin.argThat
 import org.mockito.kotlin.doReturn
 import org.mockito.kotlin.doThrow
 import org.mockito.kotlin.mock
+import org.mockito.kotlin.times
 import org.mockito.kotlin.verify
 import org.mockito.kotlin.whenever
 import org.spekframework.spek2.Spek
@@ -132,9 +133,96 @@ object AbacusClientSpec : Spek({
                 }
             }
         }
+
+        describe("uploading a batch of sessions") {
+            val uploadUrl = "https://api.abacus.batect.dev/v1/sessions/batch"
+            val batchBytes = TelemetrySessionBatch.encode(listOf("{}".toByteArray(Charsets.UTF_8)))
+
+            given("the service returns a successful response") {
+                beforeEachTest {
+                    httpClient.mock("PUT", uploadUrl, "", 201)
+
+                    client.uploadBatch(batchBytes)
+                }
+
+                it("sets the content type to newline-delimited JSON") {
+                    verify(httpClient).newCall(argThat { body!!.contentType().toString() == "application/x-ndjson" })
+                }
+
+                it("marks the request body as gzip-compressed") {
+                    verify(httpClient).newCall(argThat { header("Content-Encoding") == "gzip" })
+                }
+
+                it("uploads the compressed batch as-is in the request body") {
+                    verify(httpClient).newCall(
+                        org.mockito.kotlin.check { request ->
+                            val buffer = Buffer()
+                            request.body!!.writeTo(buffer)
+                            assertThat(buffer.readByteArray().toList(), equalTo(batchBytes.toList()))
+                        },
+                    )
+                }
+            }
+
+            setOf(404, 415).forEach { statusCode ->
+                given("the service does not support batch uploads and returns a HTTP $statusCode response") {
+                    val sessionUploadUrl = "https://api.abacus.batect.dev/v1/sessions"
+                    val batchOfTwoSessions = TelemetrySessionBatch.encode(listOf("{\"id\":1}", "{\"id\":2}").map { it.toByteArray(Charsets.UTF_8) })
+
+                    beforeEachTest {
+                        httpClient.mock("PUT", uploadUrl, "", statusCode)
+                        httpClient.mock("PUT", sessionUploadUrl, "", 201)
+
+                        client.uploadBatch(batchOfTwoSessions)
+                    }
+
+                    it("uploads each session in the batch individually") {
+                        verify(httpClient).newCall(argThat { url.toString() == sessionUploadUrl && bodyAsString() == "{\"id\":1}" })
+                        verify(httpClient).newCall(argThat { url.toString() == sessionUploadUrl && bodyAsString() == "{\"id\":2}" })
+                    }
+
+                    it("does not attempt to upload a further batch to the batch endpoint") {
+                        client.uploadBatch(batchOfTwoSessions)
+
+                        verify(httpClient, times(1)).newCall(argThat { url.toString() == uploadUrl })
+                    }
+                }
+            }
+
+            given("the service returns a non-successful response code") {
+                beforeEachTest {
+                    httpClient.mock("PUT", uploadUrl, "", 503)
+                }
+
+                it("throws an appropriate exception") {
+                    assertThat({ client.uploadBatch(batchBytes) }, throws<AbacusClientException>(withMessage("HTTP PUT $uploadUrl failed: The server returned HTTP 503.")))
+                }
+            }
+        }
+
+        describe("uploading to a different service URL") {
+            val customClient by createForEachTest { AbacusClient(httpClient, logger, "http://localhost:1234") }
+
+            beforeEachTest {
+                httpClient.mock("PUT", "http://localhost:1234/v1/sessions/batch", "", 201)
+
+                customClient.uploadBatch(TelemetrySessionBatch.encode(emptyList()))
+            }
+
+            it("sends the request to that service") {
+                verify(httpClient).newCall(argThat { url.toString() == "http://localhost:1234/v1/sessions/batch" })
+            }
+        }
     }
 })
 
+private fun Request.bodyAsString(): String {
+    val buffer = Buffer()
+    body!!.writeTo(buffer)
+
+    return buffer.readString(Charsets.UTF_8)
+}
+
 internal fun requestWithBody(expectedBody: String) = org.mockito.kotlin.check<Request> { request ->
     val buffer = Buffer()
     request.body!!.writeTo(buffer)
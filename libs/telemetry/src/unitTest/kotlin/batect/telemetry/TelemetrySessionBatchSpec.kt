@@ -0,0 +1,77 @@
+/*
+    Copyright 2017-2022 Charles Korn.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+*/
+
+package batect.telemetry
+
+import batect.testutils.equalTo
+import batect.testutils.given
+import com.natpryce.hamkrest.assertion.assertThat
+import com.natpryce.hamkrest.isEmpty
+import kotlinx.serialization.json.JsonPrimitive
+import org.spekframework.spek2.Spek
+import org.spekframework.spek2.style.specification.describe
+import java.io.ByteArrayInputStream
+import java.time.ZoneOffset
+import java.time.ZonedDateTime
+import java.util.UUID
+import java.util.zip.GZIPInputStream
+
+object TelemetrySessionBatchSpec : Spek({
+    describe("a telemetry session batch") {
+        val session1 = TelemetrySession(
+            UUID.fromString("8a1058f8-e41e-4c78-aa42-663b78d15122"),
+            UUID.fromString("07ab839b-ac26-475a-966a-77d18d00ac61"),
+            ZonedDateTime.of(2020, 8, 7, 3, 49, 10, 678, ZoneOffset.UTC),
+            ZonedDateTime.of(2020, 8, 7, 3, 51, 11, 678, ZoneOffset.UTC),
+            "my-app",
+            "1.0.0",
+            mapOf("someString" to JsonPrimitive("a string\nwith a line break")),
+            emptyList(),
+            emptyList(),
+        )
+
+        val session2 = session1.copy(sessionId = UUID.fromString("9b4b3a4c-7d0f-4a5e-9a3c-2d3e4f5a6b7c"))
+
+        given("some sessions") {
+            val batch = TelemetrySessionBatch.encode(listOf(session1, session2).map { TelemetrySessionBatch.encodeSession(it) })
+
+            it("stores each session on its own line in a gzip-compressed stream") {
+                val lines = GZIPInputStream(ByteArrayInputStream(batch)).bufferedReader(Charsets.UTF_8).readLines()
+
+                assertThat(lines.size, equalTo(2))
+            }
+
+            it("can be decoded to the original sessions") {
+                assertThat(TelemetrySessionBatch.decode(batch), equalTo(listOf(session1, session2)))
+            }
+
+            it("can be split into the originally encoded sessions") {
+                assertThat(
+                    TelemetrySessionBatch.splitSessions(batch).map { it.toString(Charsets.UTF_8) },
+                    equalTo(listOf(session1, session2).map { TelemetrySessionBatch.encodeSession(it).toString(Charsets.UTF_8) }),
+                )
+            }
+        }
+
+        given("no sessions") {
+            val batch = TelemetrySessionBatch.encode(emptyList())
+
+            it("can be decoded to an empty list of sessions") {
+                assertThat(TelemetrySessionBatch.decode(batch), isEmpty)
+            }
+        }
+    }
+})
@@ -258,5 +258,99 @@ object TelemetryUploadQueueSpec : Spek({
                 }
             }
         }
+
+        describe("compacting the queue into batches") {
+            fun createSession(startTime: ZonedDateTime): TelemetrySession = TelemetrySession(
+                UUID.randomUUID(),
+                UUID.fromString("07ab839b-ac26-475a-966a-77d18d00ac61"),
+                startTime,
+                startTime.plusSeconds(10),
+                "my-app",
+                "1.0.0",
+                emptyMap(),
+                emptyList(),
+                emptyList(),
+            )
+
+            given("the queue directory does not exist") {
+                it("returns an empty set of batches") {
+                    assertThat(queue.compact(), isEmpty)
+                }
+            }
+
+            given("the queue contains some sessions") {
+                val oldestSession = createSession(ZonedDateTime.of(2020, 8, 7, 3, 0, 0, 0, ZoneOffset.UTC))
+                val middleSession = createSession(ZonedDateTime.of(2020, 8, 8, 3, 0, 0, 0, ZoneOffset.UTC))
+                val newestSession = createSession(ZonedDateTime.of(2020, 8, 9, 3, 0, 0, 0, ZoneOffset.UTC))
+
+                beforeEachTest {
+                    queue.add(middleSession)
+                    queue.add(newestSession)
+                    queue.add(oldestSession)
+                }
+
+                given("all of the sessions fit in a single batch") {
+                    val batches by runForEachTest { queue.compact() }
+
+                    it("returns a single batch") {
+                        assertThat(batches.size, equalTo(1))
+                    }
+
+                    it("stores all of the sessions in the batch, oldest first") {
+                        assertThat(queue.readBatch(batches.single()), equalTo(listOf(oldestSession, middleSession, newestSession)))
+                    }
+
+                    it("removes the individual sessions from the queue") {
+                        assertThat(queue.getAll(), isEmpty)
+                    }
+
+                    it("includes the batch in the list of all batches") {
+                        assertThat(queue.getAllBatches(), equalTo(batches))
+                    }
+                }
+
+                given("the sessions do not all fit in a single batch") {
+                    val sessionSize = TelemetrySessionBatch.encodeSession(oldestSession).size + 1
+                    val batches by runForEachTest { queue.compact(sessionSize * 2) }
+
+                    it("splits the sessions into batches no larger than the maximum size, oldest sessions first") {
+                        assertThat(batches.map { queue.readBatch(it) }.sortedBy { it.size }, equalTo(listOf(listOf(newestSession), listOf(oldestSession, middleSession))))
+                    }
+
+                    it("removes the individual sessions from the queue") {
+                        assertThat(queue.getAll(), isEmpty)
+                    }
+                }
+
+                given("the queue already contains a batch") {
+                    val existingBatches by runForEachTest { queue.compact() }
+
+                    beforeEachTest { queue.add(createSession(ZonedDateTime.of(2020, 8, 10, 3, 0, 0, 0, ZoneOffset.UTC))) }
+
+                    val batches by runForEachTest { queue.compact() }
+
+                    it("returns both the existing batch and the new batch") {
+                        assertThat(batches.size, equalTo(2))
+                        assertThat(batches.containsAll(existingBatches), equalTo(true))
+                    }
+                }
+
+                given("one of the sessions cannot be parsed") {
+                    val invalidSessionPath by createForEachTest { telemetryDirectory.resolve("session-invalid.json") }
+
+                    beforeEachTest { Files.write(invalidSessionPath, byteArrayOf(0x01, 0x02, 0x03)) }
+
+                    val batches by runForEachTest { queue.compact() }
+
+                    it("stores the other sessions in a batch") {
+                        assertThat(queue.readBatch(batches.single()), equalTo(listOf(oldestSession, middleSession, newestSession)))
+                    }
+
+                    it("removes the session that cannot be parsed") {
+                        assertThat(Files.exists(invalidSessionPath), equalTo(false))
+                    }
+                }
+            }
+        }
     }
 })
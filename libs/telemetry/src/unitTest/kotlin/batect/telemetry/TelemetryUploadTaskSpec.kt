@@ -16,6 +16,7 @@
 
 package batect.telemetry
 
+import batect.io.ApplicationPaths
 import batect.logging.Logger
 import batect.logging.Severity
 import batect.testutils.createForEachTest
@@ -32,11 +33,18 @@ import com.google.common.jimfs.Configuration
 import com.google.common.jimfs.Jimfs
 import com.natpryce.hamkrest.and
 import com.natpryce.hamkrest.assertion.assertThat
-import kotlinx.serialization.json.Json
+import com.natpryce.hamkrest.greaterThan
+import com.natpryce.hamkrest.greaterThanOrEqualTo
+import com.natpryce.hamkrest.isEmpty
+import com.natpryce.hamkrest.lessThanOrEqualTo
+import com.sun.net.httpserver.HttpServer
+import okhttp3.OkHttpClient
 import org.mockito.kotlin.any
 import org.mockito.kotlin.anyOrNull
+import org.mockito.kotlin.doAnswer
 import org.mockito.kotlin.doReturn
 import org.mockito.kotlin.doThrow
+import org.mockito.kotlin.eq
 import org.mockito.kotlin.inOrder
 import org.mockito.kotlin.mock
 import org.mockito.kotlin.never
@@ -46,403 +54,464 @@ import org.mockito.kotlin.verifyNoInteractions
 import org.mockito.kotlin.whenever
 import org.spekframework.spek2.Spek
 import org.spekframework.spek2.style.specification.describe
+import java.net.InetSocketAddress
 import java.nio.file.Files
 import java.nio.file.Path
+import java.time.Duration
 import java.time.ZoneOffset
 import java.time.ZonedDateTime
 import java.util.UUID
+import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.Executors
+import java.util.concurrent.atomic.AtomicInteger
+import kotlin.concurrent.thread
 
 object TelemetryUploadTaskSpec : Spek({
     describe("a telemetry upload task") {
         val telemetryConsent by createForEachTest { mock<TelemetryConsent>() }
-        val telemetryUploadQueue by createForEachTest { mock<TelemetryUploadQueue>() }
-        val abacusClient by createForEachTest { mock<AbacusClient>() }
         val telemetrySessionBuilder by createForEachTest { mock<TelemetrySessionBuilder>() }
         val logSink by createForEachTest { InMemoryLogSink() }
         val logger by createForEachTest { Logger("Test logger", logSink) }
         val now = ZonedDateTime.of(2020, 5, 13, 6, 30, 0, 0, ZoneOffset.UTC)
-        val timeSource: TimeSource = { now }
-        var ranOnThread = false
-
-        val threadRunner: ThreadRunner by createForEachTest {
-            {
-                    block: BackgroundProcess ->
-                ranOnThread = true
-                block()
-            }
-        }
-
         val fileSystem by createForEachTest { Jimfs.newFileSystem(Configuration.unix()) }
-        val uploadTask by createForEachTest { TelemetryUploadTask(telemetryConsent, telemetryUploadQueue, abacusClient, telemetrySessionBuilder, logger, threadRunner, timeSource) }
-
-        beforeEachTest { ranOnThread = false }
-
-        fun runWithSessions(vararg sessions: Path) {
-            whenever(telemetryUploadQueue.getAll()).doReturn(sessions.toSet())
-
-            uploadTask.start()
-        }
-
-        fun createSession(path: Path, startTime: ZonedDateTime): ByteArray {
-            val session = TelemetrySession(
-                UUID.fromString("8a1058f8-e41e-4c78-aa42-663b78d15122"),
-                UUID.fromString("07ab839b-ac26-475a-966a-77d18d00ac61"),
-                startTime,
-                startTime.plusSeconds(25),
-                "my-app-$path",
-                "1.0.0",
-                emptyMap(),
-                emptyList(),
-                emptyList(),
-            )
-
-            val bytes = Json.Default.encodeToString(TelemetrySession.serializer(), session).toByteArray(Charsets.UTF_8)
 
-            Files.write(path, bytes)
+        fun createSession(startTime: ZonedDateTime): TelemetrySession = TelemetrySession(
+            UUID.randomUUID(),
+            UUID.fromString("07ab839b-ac26-475a-966a-77d18d00ac61"),
+            startTime,
+            startTime.plusSeconds(25),
+            "my-app",
+            "1.0.0",
+            emptyMap(),
+            emptyList(),
+            emptyList(),
+        )
+
+        describe("with a mock upload queue and Abacus client") {
+            val telemetryUploadQueue by createForEachTest { mock<TelemetryUploadQueue>() }
+            val abacusClient by createForEachTest { mock<AbacusClient>() }
+            var threadsStarted = 0
+
+            val threadRunner: ThreadRunner by createForEachTest {
+                {
+                        block: BackgroundProcess ->
+                    threadsStarted++
+                    block()
+                }
+            }
 
-            return bytes
-        }
+            beforeEachTest { threadsStarted = 0 }
 
-        given("telemetry is not enabled") {
-            beforeEachTest {
-                whenever(telemetryConsent.telemetryAllowed).thenReturn(false)
+            fun runWithBatches(vararg batches: Path, timeSource: TimeSource = { now }, limits: TelemetryUploadLimits = TelemetryUploadLimits()) {
+                whenever(telemetryUploadQueue.compact(any())).doReturn(batches.toSet())
+                whenever(telemetryUploadQueue.readBatch(any())).doAnswer { invocation -> TelemetrySessionBatch.decode(Files.readAllBytes(invocation.getArgument<Path>(0))) }
 
-                runWithSessions(fileSystem.getPath("some-session.json"))
+                TelemetryUploadTask(telemetryConsent, telemetryUploadQueue, abacusClient, telemetrySessionBuilder, logger, threadRunner, timeSource, limits).start()
             }
 
-            it("does not start a background thread") {
-                assertThat(ranOnThread, equalTo(false))
-            }
+            fun createBatch(path: Path, vararg sessionStartTimes: ZonedDateTime): ByteArray {
+                val bytes = TelemetrySessionBatch.encode(sessionStartTimes.map { TelemetrySessionBatch.encodeSession(createSession(it)) })
 
-            it("does not query the upload queue") {
-                verifyNoInteractions(telemetryUploadQueue)
-            }
+                Files.write(path, bytes)
 
-            it("does not upload anything") {
-                verifyNoInteractions(abacusClient)
+                return bytes
             }
 
-            it("logs a message explaining that telemetry is not allowed") {
-                assertThat(logSink, hasMessage(withLogMessage("Telemetry not allowed, not starting telemetry upload task.") and withSeverity(Severity.Info)))
-            }
-        }
+            given("telemetry is not enabled") {
+                beforeEachTest {
+                    whenever(telemetryConsent.telemetryAllowed).thenReturn(false)
 
-        given("telemetry is enabled") {
-            beforeEachTest {
-                whenever(telemetryConsent.telemetryAllowed).thenReturn(true)
-            }
+                    runWithBatches(fileSystem.getPath("batch-1.ndjson.gz"))
+                }
 
-            given("there are no sessions in the queue") {
-                beforeEachTest {
-                    runWithSessions()
+                it("does not start a background thread") {
+                    assertThat(threadsStarted, equalTo(0))
                 }
 
-                it("starts a background thread") {
-                    assertThat(ranOnThread, equalTo(true))
+                it("does not query the upload queue") {
+                    verifyNoInteractions(telemetryUploadQueue)
                 }
 
-                it("logs a message explaining that there are no sessions to upload") {
-                    assertThat(logSink, hasMessage(withLogMessage("No sessions to upload.") and withSeverity(Severity.Info)))
+                it("does not upload anything") {
+                    verifyNoInteractions(abacusClient)
                 }
-            }
 
-            given("there is a single session in the queue") {
-                val sessionPath by createForEachTest { fileSystem.getPath("session-1.json") }
+                it("logs a message explaining that telemetry is not allowed") {
+                    assertThat(logSink, hasMessage(withLogMessage("Telemetry not allowed, not starting telemetry upload task.") and withSeverity(Severity.Info)))
+                }
+            }
 
-                given("uploading the session succeeds") {
-                    val sessionBytes by createForEachTest { createSession(sessionPath, now.minusDays(50)) }
+            given("telemetry is enabled") {
+                beforeEachTest {
+                    whenever(telemetryConsent.telemetryAllowed).thenReturn(true)
+                }
 
+                given("there are no sessions in the queue") {
                     beforeEachTest {
-                        runWithSessions(sessionPath)
+                        runWithBatches()
                     }
 
                     it("starts a background thread") {
-                        assertThat(ranOnThread, equalTo(true))
+                        assertThat(threadsStarted, equalTo(1))
                     }
 
-                    it("uploads the session with the default timeout before deleting it") {
-                        inOrder(abacusClient, telemetryUploadQueue) {
-                            verify(abacusClient).upload(sessionBytes)
-                            verify(telemetryUploadQueue).pop(sessionPath)
-                        }
-                    }
-
-                    it("logs a message confirming that the session has been uploaded successfully") {
-                        assertThat(
-                            logSink,
-                            hasMessage(
-                                withLogMessage("Session uploaded successfully.")
-                                    and withSeverity(Severity.Info)
-                                    and withAdditionalData("sessionPath", sessionPath.toString()),
-                            ),
-                        )
+                    it("logs a message explaining that there are no sessions to upload") {
+                        assertThat(logSink, hasMessage(withLogMessage("No sessions to upload.") and withSeverity(Severity.Info)))
                     }
                 }
 
-                given("uploading the session fails") {
-                    val exception = AbacusClientException("Something went wrong.")
-
-                    beforeEachTest {
-                        whenever(abacusClient.upload(any(), anyOrNull())).doThrow(exception)
-                    }
+                given("there is a single batch in the queue") {
+                    val batchPath by createForEachTest { fileSystem.getPath("batch-1.ndjson.gz") }
 
-                    given("the session is less than 30 days old") {
-                        val sessionBytes by createForEachTest { createSession(sessionPath, now.minusDays(29)) }
+                    given("uploading the batch succeeds") {
+                        val batchBytes by createForEachTest { createBatch(batchPath, now.minusDays(50)) }
 
                         beforeEachTest {
-                            runWithSessions(sessionPath)
+                            runWithBatches(batchPath)
                         }
 
-                        it("starts a background thread") {
-                            assertThat(ranOnThread, equalTo(true))
+                        it("compacts the queue into batches of the configured size") {
+                            verify(telemetryUploadQueue).compact(TelemetryUploadQueue.defaultMaximumBatchSizeInBytes)
                         }
 
-                        it("attempts to upload the session") {
-                            verify(abacusClient).upload(sessionBytes)
+                        it("starts a background thread to compact the queue and a single thread to upload the batch") {
+                            assertThat(threadsStarted, equalTo(2))
                         }
 
-                        it("does not delete the session") {
-                            verify(telemetryUploadQueue, never()).pop(any())
+                        it("uploads the batch with the remaining time budget as the timeout before deleting it") {
+                            inOrder(abacusClient, telemetryUploadQueue) {
+                                verify(abacusClient).uploadBatch(batchBytes, Duration.ofSeconds(20))
+                                verify(telemetryUploadQueue).pop(batchPath)
+                            }
                         }
 
-                        it("logs a warning that the upload failed") {
+                        it("logs a message confirming that the batch has been uploaded successfully") {
                             assertThat(
                                 logSink,
                                 hasMessage(
-                                    withLogMessage("Session upload failed. Session is less than 30 days old and so won't be deleted.")
-                                        and withSeverity(Severity.Warning)
-                                        and withAdditionalData("sessionPath", sessionPath.toString())
-                                        and withException(exception),
-                                ),
-                            )
-                        }
-
-                        it("reports the exception in telemetry") {
-                            verify(telemetrySessionBuilder).addEvent(
-                                CommonEvents.UnhandledException,
-                                mapOf(
-                                    CommonAttributes.Exception to AttributeValue(exception),
-                                    CommonAttributes.ExceptionCaughtAt to AttributeValue("batect.telemetry.TelemetryUploadTask.upload"),
-                                    CommonAttributes.IsUserFacingException to AttributeValue(false),
+                                    withLogMessage("Session batch uploaded successfully.")
+                                        and withSeverity(Severity.Info)
+                                        and withAdditionalData("batchPath", batchPath.toString()),
                                 ),
                             )
                         }
                     }
 
-                    given("the session is more than 30 days old") {
-                        val sessionBytes by createForEachTest { createSession(sessionPath, now.minusDays(31)) }
+                    given("uploading the batch fails") {
+                        val exception = AbacusClientException("Something went wrong.")
 
                         beforeEachTest {
-                            runWithSessions(sessionPath)
+                            whenever(abacusClient.uploadBatch(any(), anyOrNull())).doThrow(exception)
                         }
 
-                        it("starts a background thread") {
-                            assertThat(ranOnThread, equalTo(true))
-                        }
+                        given("the batch contains a session less than 30 days old") {
+                            beforeEachTest {
+                                createBatch(batchPath, now.minusDays(31), now.minusDays(29))
+                                runWithBatches(batchPath)
+                            }
+
+                            it("does not delete the batch") {
+                                verify(telemetryUploadQueue, never()).pop(any())
+                            }
 
-                        it("attempts to upload the session") {
-                            verify(abacusClient).upload(sessionBytes)
+                            it("logs a warning that the upload failed") {
+                                assertThat(
+                                    logSink,
+                                    hasMessage(
+                                        withLogMessage("Session batch upload failed. Batch contains sessions less than 30 days old and so won't be deleted.")
+                                            and withSeverity(Severity.Warning)
+                                            and withAdditionalData("batchPath", batchPath.toString())
+                                            and withException(exception),
+                                    ),
+                                )
+                            }
+
+                            it("reports the exception in telemetry") {
+                                verify(telemetrySessionBuilder).addEvent(
+                                    CommonEvents.UnhandledException,
+                                    mapOf(
+                                        CommonAttributes.Exception to AttributeValue(exception),
+                                        CommonAttributes.ExceptionCaughtAt to AttributeValue("batect.telemetry.TelemetryUploadTask.upload"),
+                                        CommonAttributes.IsUserFacingException to AttributeValue(false),
+                                    ),
+                                )
+                            }
                         }
 
-                        it("deletes the session") {
-                            verify(telemetryUploadQueue).pop(sessionPath)
+                        given("all sessions in the batch are more than 30 days old") {
+                            beforeEachTest {
+                                createBatch(batchPath, now.minusDays(31), now.minusDays(40))
+                                runWithBatches(batchPath)
+                            }
+
+                            it("deletes the batch") {
+                                verify(telemetryUploadQueue).pop(batchPath)
+                            }
+
+                            it("logs a warning that the upload failed") {
+                                assertThat(
+                                    logSink,
+                                    hasMessage(
+                                        withLogMessage("Session batch upload failed. All sessions in batch are more than 30 days old and so it has been deleted.")
+                                            and withSeverity(Severity.Warning)
+                                            and withAdditionalData("batchPath", batchPath.toString())
+                                            and withException(exception),
+                                    ),
+                                )
+                            }
+
+                            it("reports the fact that it deleted the batch in telemetry") {
+                                verify(telemetrySessionBuilder).addEvent("DeletedOldTelemetrySessionThatFailedToUpload", emptyMap())
+                            }
                         }
 
-                        it("logs a warning that the upload failed") {
-                            assertThat(
-                                logSink,
-                                hasMessage(
-                                    withLogMessage("Session upload failed. Session is more than 30 days old and so has been deleted.")
-                                        and withSeverity(Severity.Warning)
-                                        and withAdditionalData("sessionPath", sessionPath.toString())
-                                        and withException(exception),
-                                ),
-                            )
+                        given("the batch cannot be parsed") {
+                            beforeEachTest {
+                                Files.write(batchPath, byteArrayOf(0x01, 0x02, 0x03))
+
+                                runWithBatches(batchPath)
+                            }
+
+                            it("does not delete the batch") {
+                                verify(telemetryUploadQueue, never()).pop(any())
+                            }
+
+                            it("logs an error that both uploading the batch and parsing it failed") {
+                                assertThat(
+                                    logSink,
+                                    hasMessage(
+                                        withLogMessage("Session batch upload failed, and parsing batch to determine age failed.")
+                                            and withSeverity(Severity.Error)
+                                            and withAdditionalData("batchPath", batchPath.toString())
+                                            and withException("uploadException", exception)
+                                            and withAdditionalDataAndAnyValue("parsingException"),
+                                    ),
+                                )
+                            }
                         }
+                    }
+                }
 
-                        it("reports the exception in telemetry") {
-                            verify(telemetrySessionBuilder).addEvent(
-                                CommonEvents.UnhandledException,
-                                mapOf(
-                                    CommonAttributes.Exception to AttributeValue(exception),
-                                    CommonAttributes.ExceptionCaughtAt to AttributeValue("batect.telemetry.TelemetryUploadTask.upload"),
-                                    CommonAttributes.IsUserFacingException to AttributeValue(false),
-                                ),
-                            )
+                given("there are more batches in the queue than the maximum number of concurrent uploads") {
+                    val batchPaths by createForEachTest { (1..6).map { fileSystem.getPath("batch-$it.ndjson.gz") } }
+
+                    given("there are no errors while uploading any batches") {
+                        val batchesUploadedFirst by createForEachTest { mutableSetOf<Byte>() }
+
+                        beforeEachTest {
+                            batchPaths.forEachIndexed { index, path -> Files.write(path, byteArrayOf(index.toByte())) }
+
+                            val uploadOrder = mutableListOf<Byte>()
+
+                            whenever(abacusClient.uploadBatch(any(), anyOrNull())).then { invocation ->
+                                uploadOrder.add((invocation.arguments[0] as ByteArray)[0])
+                            }
+
+                            for (i in 1..100) {
+                                uploadOrder.clear()
+
+                                runWithBatches(*batchPaths.take(3).toTypedArray())
+
+                                batchesUploadedFirst.add(uploadOrder.first())
+                            }
                         }
 
-                        it("reports the fact that it deleted the exception in telemetry") {
-                            verify(telemetrySessionBuilder).addEvent("DeletedOldTelemetrySessionThatFailedToUpload", emptyMap())
+                        it("uploads them in a random order") {
+                            assertThat(batchesUploadedFirst, equalTo(setOf<Byte>(0, 1, 2)))
                         }
                     }
 
-                    given("the session cannot be parsed") {
-                        val sessionBytes = byteArrayOf(0x01, 0x02, 0x03)
+                    given("uploading all batches succeeds") {
+                        beforeEachTest {
+                            batchPaths.forEach { createBatch(it, now) }
+                            runWithBatches(*batchPaths.toTypedArray())
+                        }
+
+                        it("starts the maximum number of concurrent uploads") {
+                            assertThat(threadsStarted, equalTo(1 + 3))
+                        }
+
+                        it("uploads and deletes all batches") {
+                            verify(abacusClient, times(6)).uploadBatch(any(), anyOrNull())
+                            batchPaths.forEach { verify(telemetryUploadQueue).pop(it) }
+                        }
+                    }
 
+                    given("all batches fail to upload") {
                         beforeEachTest {
-                            Files.write(sessionPath, sessionBytes)
+                            batchPaths.forEach { createBatch(it, now) }
 
-                            runWithSessions(sessionPath)
+                            whenever(abacusClient.uploadBatch(any(), anyOrNull())).thenThrow(AbacusClientException("Something went wrong."))
+
+                            runWithBatches(*batchPaths.toTypedArray())
                         }
 
-                        it("starts a background thread") {
-                            assertThat(ranOnThread, equalTo(true))
+                        it("stops attempting to upload batches after the fifth upload failure") {
+                            verify(abacusClient, times(5)).uploadBatch(any(), anyOrNull())
                         }
 
-                        it("attempts to upload the session") {
-                            verify(abacusClient).upload(sessionBytes)
+                        it("reports that the circuit breaker has failed open in telemetry") {
+                            verify(telemetrySessionBuilder, times(1)).addEvent("TelemetryUploadCircuitBreakerFailedOpen", emptyMap())
                         }
+                    }
 
-                        it("does not delete the session") {
-                            verify(telemetryUploadQueue, never()).pop(any())
+                    given("the time budget runs out") {
+                        beforeEachTest {
+                            batchPaths.forEach { createBatch(it, now) }
+
+                            var calls = 0L
+
+                            runWithBatches(*batchPaths.toTypedArray(), timeSource = { now.plusSeconds(15 * calls++) })
                         }
 
-                        it("logs a warning that both uploading the session and parsing it failed") {
-                            assertThat(
-                                logSink,
-                                hasMessage(
-                                    withLogMessage("Session upload failed, and parsing session to determine age failed.")
-                                        and withSeverity(Severity.Error)
-                                        and withAdditionalData("sessionPath", sessionPath.toString())
-                                        and withException("uploadException", exception)
-                                        and withAdditionalDataAndAnyValue("parsingException"),
-                                ),
-                            )
+                        it("only uploads the batches started within the budget, with a timeout that ends when the budget runs out") {
+                            verify(abacusClient, times(1)).uploadBatch(any(), eq(Duration.ofSeconds(5)))
+                            verify(abacusClient, times(1)).uploadBatch(any(), anyOrNull())
                         }
 
-                        it("reports the exception in telemetry") {
-                            verify(telemetrySessionBuilder).addEvent(
-                                CommonEvents.UnhandledException,
-                                mapOf(
-                                    CommonAttributes.Exception to AttributeValue(exception),
-                                    CommonAttributes.ExceptionCaughtAt to AttributeValue("batect.telemetry.TelemetryUploadTask.upload"),
-                                    CommonAttributes.IsUserFacingException to AttributeValue(false),
-                                ),
-                            )
+                        it("logs a message explaining that the time budget has been exhausted") {
+                            assertThat(logSink, hasMessage(withLogMessage("Telemetry upload time budget exhausted, not uploading any further session batches.")))
                         }
                     }
-                }
-            }
 
-            given("there are two sessions in the queue") {
-                val session1Path by createForEachTest { fileSystem.getPath("session-1.json") }
-                val session2Path by createForEachTest { fileSystem.getPath("session-2.json") }
+                    given("the size budget runs out") {
+                        beforeEachTest {
+                            val batchSize = batchPaths.map { createBatch(it, now).size }.maxOrNull()!!
 
-                given("uploading both of them succeeds") {
-                    val session1Bytes by createForEachTest { createSession(session1Path, now.minusDays(50)) }
-                    val session2Bytes by createForEachTest { createSession(session2Path, now.minusDays(50)) }
+                            runWithBatches(*batchPaths.toTypedArray(), limits = TelemetryUploadLimits(maximumBytesPerInvocation = batchSize * 2L))
+                        }
 
-                    beforeEachTest {
-                        runWithSessions(session1Path, session2Path)
-                    }
+                        it("stops uploading batches once the budget has been used") {
+                            verify(abacusClient, times(2)).uploadBatch(any(), anyOrNull())
+                        }
 
-                    it("starts a background thread") {
-                        assertThat(ranOnThread, equalTo(true))
+                        it("logs a message explaining that the size budget has been exhausted") {
+                            assertThat(logSink, hasMessage(withLogMessage("Telemetry upload size budget exhausted, not uploading any further session batches.")))
+                        }
                     }
+                }
+            }
+        }
 
-                    it("uploads both sessions") {
-                        verify(abacusClient).upload(session1Bytes)
-                        verify(abacusClient).upload(session2Bytes)
-                    }
+        describe("uploading to a local stand-in for the telemetry service") {
+            val applicationPaths by createForEachTest {
+                mock<ApplicationPaths> {
+                    on { rootLocalStorageDirectory } doReturn fileSystem.getPath("/home/user/.batect")
+                }
+            }
 
-                    it("deletes both sessions") {
-                        verify(telemetryUploadQueue).pop(session1Path)
-                        verify(telemetryUploadQueue).pop(session2Path)
+            val queue by createForEachTest { TelemetryUploadQueue(applicationPaths, logger) }
+            val sessionsReceived by createForEachTest { ConcurrentHashMap.newKeySet<UUID>() }
+            val requestsReceived by createForEachTest { AtomicInteger(0) }
+            val uploadsInProgress by createForEachTest { AtomicInteger(0) }
+            val maximumUploadsInProgress by createForEachTest { AtomicInteger(0) }
+            val requestsToFail by createForEachTest { AtomicInteger(0) }
+
+            val server by createForEachTest {
+                HttpServer.create(InetSocketAddress(0), 0).apply {
+                    executor = Executors.newCachedThreadPool()
+
+                    createContext("/v1/sessions/batch") { exchange ->
+                        requestsReceived.incrementAndGet()
+                        maximumUploadsInProgress.accumulateAndGet(uploadsInProgress.incrementAndGet(), ::maxOf)
+
+                        try {
+                            val body = exchange.requestBody.readBytes()
+                            Thread.sleep(20)
+
+                            if (requestsToFail.getAndDecrement() > 0 || exchange.requestHeaders.getFirst("Content-Encoding") != "gzip") {
+                                exchange.sendResponseHeaders(503, -1)
+                            } else {
+                                TelemetrySessionBatch.decode(body).forEach { sessionsReceived.add(it.sessionId) }
+                                exchange.sendResponseHeaders(201, -1)
+                            }
+                        } finally {
+                            uploadsInProgress.decrementAndGet()
+                            exchange.close()
+                        }
                     }
+
+                    start()
                 }
+            }
 
-                given("uploading one of them fails") {
-                    val session1Bytes by createForEachTest { createSession(session1Path, now.minusDays(20)) }
-                    val session2Bytes by createForEachTest { createSession(session2Path, now.minusDays(20)) }
+            afterEachTest { server.stop(0) }
 
-                    beforeEachTest {
-                        whenever(abacusClient.upload(session2Bytes)).thenThrow(AbacusClientException("Something went wrong."))
+            val abacusClient by createForEachTest { AbacusClient(OkHttpClient(), logger, "http://localhost:${server.address.port}") }
 
-                        runWithSessions(session1Path, session2Path)
-                    }
+            fun runUploadToCompletion() {
+                val threads = mutableListOf<Thread>()
+                val threadRunner: ThreadRunner = { block -> synchronized(threads) { threads.add(thread(isDaemon = true) { block() }) } }
+                val limits = TelemetryUploadLimits(maximumBatchSizeInBytes = 4096)
 
-                    it("attempts to upload both sessions") {
-                        verify(abacusClient).upload(session1Bytes)
-                        verify(abacusClient).upload(session2Bytes)
-                    }
+                TelemetryUploadTask(telemetryConsent, queue, abacusClient, telemetrySessionBuilder, logger, threadRunner, ZonedDateTime::now, limits).start()
 
-                    it("deletes the session that succeeded") {
-                        verify(telemetryUploadQueue).pop(session1Path)
-                    }
+                do {
+                    val started = synchronized(threads) { threads.toList() }
+                    started.forEach { it.join(10_000) }
+                } while (started.size != synchronized(threads) { threads.size })
+            }
 
-                    it("does not delete the session that failed") {
-                        verify(telemetryUploadQueue, never()).pop(session2Path)
-                    }
-                }
+            val sessionIds by createForEachTest {
+                (1..250)
+                    .map { createSession(ZonedDateTime.now(ZoneOffset.UTC)) }
+                    .onEach { queue.add(it) }
+                    .map { it.sessionId }
+                    .toSet()
             }
 
-            given("there are more than five sessions in the queue") {
-                val session1Path by createForEachTest { fileSystem.getPath("session-1.json") }
-                val session2Path by createForEachTest { fileSystem.getPath("session-2.json") }
-                val session3Path by createForEachTest { fileSystem.getPath("session-3.json") }
-                val session4Path by createForEachTest { fileSystem.getPath("session-4.json") }
-                val session5Path by createForEachTest { fileSystem.getPath("session-5.json") }
-                val session6Path by createForEachTest { fileSystem.getPath("session-6.json") }
+            beforeEachTest { whenever(telemetryConsent.telemetryAllowed).thenReturn(true) }
+
+            given("the service accepts all uploads") {
+                beforeEachTest {
+                    runUploadToCompletion()
+                }
 
-                given("there are no errors while uploading any sessions") {
-                    val sessionsUploadedFirst by createForEachTest { mutableSetOf<Path>() }
+                it("uploads every session exactly once") {
+                    assertThat(sessionsReceived, equalTo(sessionIds))
+                }
 
-                    beforeEachTest {
-                        Files.write(session1Path, byteArrayOf(0x01))
-                        Files.write(session2Path, byteArrayOf(0x02))
-                        Files.write(session3Path, byteArrayOf(0x03))
-                        Files.write(session4Path, byteArrayOf(0x04))
-                        Files.write(session5Path, byteArrayOf(0x05))
-                        Files.write(session6Path, byteArrayOf(0x06))
-
-                        val sessionUploadOrder = mutableListOf<Path>()
-
-                        whenever(abacusClient.upload(any(), anyOrNull())).then { invocation ->
-                            val bytes = invocation.arguments[0] as ByteArray
-
-                            val session = when (bytes[0]) {
-                                0x01.toByte() -> session1Path
-                                0x02.toByte() -> session2Path
-                                0x03.toByte() -> session3Path
-                                0x04.toByte() -> session4Path
-                                0x05.toByte() -> session5Path
-                                0x06.toByte() -> session6Path
-                                else -> throw RuntimeException("Unknown session uploaded.")
-                            }
+                it("combines sessions into batches rather than uploading each one individually") {
+                    assertThat(requestsReceived.get(), greaterThan(1) and lessThanOrEqualTo(sessionIds.size / 10))
+                }
 
-                            sessionUploadOrder.add(session)
-                        }
+                it("never uploads more batches at once than the maximum number of concurrent uploads") {
+                    assertThat(maximumUploadsInProgress.get(), lessThanOrEqualTo(TelemetryUploadLimits().maximumConcurrentUploads))
+                }
 
-                        for (i in 1..100) {
-                            sessionUploadOrder.clear()
+                it("leaves nothing in the queue") {
+                    assertThat(queue.getAll(), isEmpty)
+                    assertThat(queue.getAllBatches(), isEmpty)
+                }
+            }
 
-                            runWithSessions(session1Path, session2Path, session3Path)
+            given("the service is unavailable") {
+                beforeEachTest {
+                    requestsToFail.set(Int.MAX_VALUE)
+                    runUploadToCompletion()
+                }
 
-                            sessionsUploadedFirst.add(sessionUploadOrder.first())
-                        }
-                    }
+                it("stops uploading once five uploads have failed, allowing for uploads that were already in progress") {
+                    assertThat(requestsReceived.get(), greaterThanOrEqualTo(5) and lessThanOrEqualTo(5 + TelemetryUploadLimits().maximumConcurrentUploads - 1))
+                }
 
-                    it("uploads them in a random order") {
-                        assertThat(sessionsUploadedFirst, equalTo(setOf(session1Path, session2Path, session3Path)))
-                    }
+                it("keeps all sessions in the queue") {
+                    assertThat(queue.getAll(), isEmpty)
+                    assertThat(queue.getAllBatches().flatMap { queue.readBatch(it) }.map { it.sessionId }.toSet(), equalTo(sessionIds))
                 }
 
-                given("all sessions fail to upload") {
+                given("the service becomes available again before the next upload") {
                     beforeEachTest {
-                        createSession(session1Path, now)
-                        createSession(session2Path, now)
-                        createSession(session3Path, now)
-                        createSession(session4Path, now)
-                        createSession(session5Path, now)
-                        createSession(session6Path, now)
-
-                        whenever(abacusClient.upload(any(), anyOrNull())).thenThrow(AbacusClientException("Something went wrong."))
+                        requestsToFail.set(0)
+                        runUploadToCompletion()
+                    }
 
-                        runWithSessions(session1Path, session2Path, session3Path, session4Path, session5Path, session6Path)
+                    it("uploads every session that was previously queued") {
+                        assertThat(sessionsReceived, equalTo(sessionIds))
                     }
 
-                    it("stops attempting to upload sessions after the fifth upload failure") {
-                        verify(abacusClient, times(5)).upload(any(), anyOrNull())
+                    it("leaves nothing in the queue") {
+                        assertThat(queue.getAllBatches(), isEmpty)
                     }
                 }
             }
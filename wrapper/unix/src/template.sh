@@ -12,6 +12,7 @@
     CHECKSUM="${BATECT_DOWNLOAD_CHECKSUM:-CHECKSUM-GOES-HERE}"
     DOWNLOAD_URL_ROOT=${BATECT_DOWNLOAD_URL_ROOT:-"https://updates.batect.dev/v1/files"}
     DOWNLOAD_URL=${BATECT_DOWNLOAD_URL:-"$DOWNLOAD_URL_ROOT/$VERSION/batect-$VERSION.jar"}
+    DELTA_URL_ROOT=${BATECT_DELTA_URL_ROOT:-"$DOWNLOAD_URL_ROOT/$VERSION/deltas"}
     QUIET_DOWNLOAD=${BATECT_QUIET_DOWNLOAD:-false}
 
     BATECT_WRAPPER_CACHE_DIR=${BATECT_CACHE_DIR:-"$HOME/.batect/cache"}
@@ -41,18 +42,107 @@
         mkdir -p "$VERSION_CACHE_DIR"
         temp_file=$(mktemp)
 
+        if ! downloadDelta "$temp_file"; then
+            downloadFullVersion "$temp_file"
+        fi
+
+        mv "$temp_file" "$JAR_PATH"
+    }
+
+    function downloadFullVersion() {
+        local target_file="$1"
+
         if [[ $QUIET_DOWNLOAD == 'true' ]]; then
-            curl --silent --fail --show-error --location --output "$temp_file" --retry 3 --retry-connrefused "$DOWNLOAD_URL"
+            curl --silent --fail --show-error --location --output "$target_file" --retry 3 --retry-connrefused "$DOWNLOAD_URL"
         else
             echo "Downloading Batect version $VERSION from $DOWNLOAD_URL..."
-            curl -# --fail --show-error --location --output "$temp_file" --retry 3 --retry-connrefused "$DOWNLOAD_URL"
+            curl -# --fail --show-error --location --output "$target_file" --retry 3 --retry-connrefused "$DOWNLOAD_URL"
         fi
+    }
 
-        mv "$temp_file" "$JAR_PATH"
+    # If an earlier version is already cached, try to download just the differences between it and this version and apply them
+    # to the cached version. If anything goes wrong (no delta is available, bspatch is not installed, or the result does not
+    # match the expected checksum), return non-zero so that we fall back to downloading the full version.
+    function downloadDelta() {
+        local target_file="$1"
+
+        # A custom download URL usually points to a mirror, which may not have deltas, so only use them if the mirror's delta location is also set.
+        if [[ -n "${BATECT_DOWNLOAD_URL:-}" && -z "${BATECT_DELTA_URL_ROOT:-}" ]]; then
+            return 1
+        fi
+
+        if ! hash bspatch 2>/dev/null; then
+            return 1
+        fi
+
+        local base_version
+        base_version=$(findNewestCachedVersion)
+
+        if [[ -z "$base_version" ]]; then
+            return 1
+        fi
+
+        local base_jar_path="$BATECT_WRAPPER_CACHE_DIR/$base_version/batect-$base_version.jar"
+        local delta_url="$DELTA_URL_ROOT/batect-$base_version-to-$VERSION.bsdiff"
+        local delta_file
+        delta_file=$(mktemp)
+
+        # Most combinations of versions won't have a delta, so don't mention deltas at all unless one was downloaded.
+        if ! curl --silent --fail --location --output "$delta_file" --retry 3 --retry-connrefused "$delta_url"; then
+            rm -f "$delta_file"
+            return 1
+        fi
+
+        if [[ $QUIET_DOWNLOAD != 'true' ]]; then
+            echo "Downloading Batect version $VERSION as an update to version $base_version from $delta_url..."
+        fi
+
+        if ! bspatch "$base_jar_path" "$target_file" "$delta_file" >/dev/null 2>&1; then
+            rm -f "$delta_file"
+            showDeltaFallbackMessage "Applying the update to version $base_version failed."
+            return 1
+        fi
+
+        rm -f "$delta_file"
+
+        if [[ "$(getChecksum "$target_file")" != "$CHECKSUM" ]]; then
+            showDeltaFallbackMessage "Applying the update to version $base_version did not produce the expected version."
+            return 1
+        fi
+
+        return 0
+    }
+
+    function showDeltaFallbackMessage() {
+        if [[ $QUIET_DOWNLOAD != 'true' ]]; then
+            echo "$1 Downloading the full version instead."
+        fi
+    }
+
+    # Finds the most recently downloaded version in the cache (other than this version), or nothing if there are no other versions.
+    function findNewestCachedVersion() {
+        local newest_jar_path=""
+        local newest_version=""
+
+        for candidate_jar_path in "$BATECT_WRAPPER_CACHE_DIR"/*/batect-*.jar; do
+            local candidate_version
+            candidate_version=$(basename "$(dirname "$candidate_jar_path")")
+
+            if [[ ! -f "$candidate_jar_path" || "$candidate_version" == "$VERSION" || "$candidate_jar_path" != "$BATECT_WRAPPER_CACHE_DIR/$candidate_version/batect-$candidate_version.jar" ]]; then
+                continue
+            fi
+
+            if [[ -z "$newest_jar_path" || "$candidate_jar_path" -nt "$newest_jar_path" ]]; then
+                newest_jar_path="$candidate_jar_path"
+                newest_version="$candidate_version"
+            fi
+        done
+
+        echo "$newest_version"
     }
 
     function checkChecksum() {
-        local_checksum=$(getLocalChecksum)
+        local_checksum=$(getChecksum "$JAR_PATH")
 
         if [[ "$local_checksum" != "$CHECKSUM" ]]; then
             echo "The downloaded version of Batect does not have the expected checksum. Delete '$JAR_PATH' and then re-run this script to download it again."
@@ -60,11 +150,13 @@
         fi
     }
 
-    function getLocalChecksum() {
+    function getChecksum() {
+        local path="$1"
+
         if [[ "$(uname)" == "Darwin" ]]; then
-            shasum -a 256 "$JAR_PATH" | cut -d' ' -f1
+            shasum -a 256 "$path" | cut -d' ' -f1
         else
-            sha256sum "$JAR_PATH" | cut -d' ' -f1
+            sha256sum "$path" | cut -d' ' -f1
         fi
     }
 
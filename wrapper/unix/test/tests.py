@@ -32,12 +32,14 @@ class WrapperScriptTests(unittest.TestCase):
     minimum_script_dependencies_with_default_bash = minimum_script_dependencies + [default_bash]
 
     def setUp(self):
+        self.delta_dir = tempfile.mkdtemp()
         self.start_server()
         self.cache_dir = tempfile.mkdtemp()
 
     def tearDown(self):
         self.stop_server()
         shutil.rmtree(self.cache_dir)
+        shutil.rmtree(self.delta_dir)
 
     def download_url(self, path):
         return "http://localhost:" + str(self.http_port) + "/test/" + path
@@ -257,6 +259,138 @@ class WrapperScriptTests(unittest.TestCase):
         self.assertNotIn("The Java application has started.", output)
         self.assertNotEqual(result_after_corruption.returncode, 0)
 
+    def test_delta_download(self):
+        self.create_cached_version("0.1.0")
+        self.create_delta("0.1.0", "test/testapp.jar")
+
+        result = self.run_script(["arg 1", "arg 2"])
+        output = result.stdout.decode()
+
+        self.assertIn("Downloading Batect version VERSION-GOES-HERE as an update to version 0.1.0", output)
+        self.assertNotIn("Downloading the full version instead.", output)
+        self.assertIn("BATECT_WRAPPER_DID_DOWNLOAD is: true\n", output)
+        self.assertIn("I received 2 arguments.\narg 1\narg 2\n", output)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn(self.delta_path("0.1.0"), QuietHTTPHandler.requested_paths)
+        self.assertNotIn("/test/testapp.jar", QuietHTTPHandler.requested_paths)
+        self.assertEqual(self.get_checksum_of_cached_version(), self.get_checksum_of_test_app())
+
+    def test_delta_download_uses_newest_cached_version(self):
+        self.create_cached_version("0.1.0")
+        self.create_cached_version("0.2.0")
+        self.create_delta("0.2.0", "test/testapp.jar")
+        os.utime(self.cached_jar_path("0.1.0"), (0, 0))
+
+        result = self.run_script([])
+        output = result.stdout.decode()
+
+        self.assertIn("Downloading Batect version VERSION-GOES-HERE as an update to version 0.2.0", output)
+        self.assertIn("The Java application has started.", output)
+        self.assertEqual(result.returncode, 0)
+        self.assertNotIn("/test/testapp.jar", QuietHTTPHandler.requested_paths)
+
+    def test_delta_download_is_quiet(self):
+        self.create_cached_version("0.1.0")
+        self.create_delta("0.1.0", "test/testapp.jar")
+
+        result = self.run_script([], quiet_download="true")
+        output = result.stdout.decode()
+
+        self.assertNotIn("Downloading Batect", output)
+        self.assertIn("The Java application has started.", output)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn(self.delta_path("0.1.0"), QuietHTTPHandler.requested_paths)
+
+    def test_delta_not_available(self):
+        self.create_cached_version("0.1.0")
+
+        result = self.run_script([])
+        output = result.stdout.decode()
+
+        self.assertNotIn("as an update to version", output)
+        self.assertNotIn("Downloading the full version instead.", output)
+        self.assertIn("Downloading Batect version VERSION-GOES-HERE from {}...".format(self.default_download_url()), output)
+        self.assertIn("The Java application has started.", output)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn(self.delta_path("0.1.0"), QuietHTTPHandler.requested_paths)
+        self.assertIn("/test/testapp.jar", QuietHTTPHandler.requested_paths)
+        self.assertEqual(self.get_checksum_of_cached_version(), self.get_checksum_of_test_app())
+
+    def test_delta_produces_wrong_version(self):
+        self.create_cached_version("0.1.0")
+        self.create_delta("0.1.0", "test/brokenapp.txt")
+
+        result = self.run_script([])
+        output = result.stdout.decode()
+
+        self.assertIn("Applying the update to version 0.1.0 did not produce the expected version. Downloading the full version instead.", output)
+        self.assertIn("The Java application has started.", output)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("/test/testapp.jar", QuietHTTPHandler.requested_paths)
+        self.assertEqual(self.get_checksum_of_cached_version(), self.get_checksum_of_test_app())
+
+    def test_delta_is_corrupt(self):
+        self.create_cached_version("0.1.0")
+
+        with open(os.path.join(self.delta_dir, os.path.basename(self.delta_path("0.1.0"))), "wb") as f:
+            f.write(b"this is not a valid delta")
+
+        result = self.run_script([])
+        output = result.stdout.decode()
+
+        self.assertIn("Applying the update to version 0.1.0 failed. Downloading the full version instead.", output)
+        self.assertIn("The Java application has started.", output)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(self.get_checksum_of_cached_version(), self.get_checksum_of_test_app())
+
+    def test_delta_not_used_if_bspatch_not_available(self):
+        self.create_cached_version("0.1.0")
+        self.create_delta("0.1.0", "test/testapp.jar")
+        path_dir = self.create_limited_path_for_specific_java_version("8")
+
+        result = self.run_script([], path=path_dir)
+        output = result.stdout.decode()
+
+        self.assertNotIn("as an update to version", output)
+        self.assertIn("The Java application has started.", output)
+        self.assertEqual(result.returncode, 0)
+        self.assertNotIn(self.delta_path("0.1.0"), QuietHTTPHandler.requested_paths)
+
+    def test_delta_not_used_if_download_url_overridden_without_delta_url_root(self):
+        self.create_cached_version("0.1.0")
+        self.create_delta("0.1.0", "test/testapp.jar")
+
+        result = self.run_script([], set_delta_url_root=False)
+        output = result.stdout.decode()
+
+        self.assertNotIn("as an update to version", output)
+        self.assertIn("The Java application has started.", output)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual([p for p in QuietHTTPHandler.requested_paths if p.startswith("/deltas/")], [])
+        self.assertIn("/test/testapp.jar", QuietHTTPHandler.requested_paths)
+
+    def create_cached_version(self, version):
+        os.makedirs(os.path.join(self.cache_dir, version))
+
+        # The previous version must differ from the current one, otherwise the delta would be trivial.
+        with open("test/testapp.jar", "rb") as source, open(self.cached_jar_path(version), "wb") as target:
+            target.write(source.read()[:-100])
+            target.write(b"some content that only appears in version " + version.encode())
+
+    def cached_jar_path(self, version):
+        return os.path.join(self.cache_dir, version, "batect-{}.jar".format(version))
+
+    def create_delta(self, from_version, to_file):
+        delta_file = os.path.join(self.delta_dir, os.path.basename(self.delta_path(from_version)))
+        subprocess.run(["bsdiff", self.cached_jar_path(from_version), to_file, delta_file], check=True)
+
+    def delta_path(self, from_version):
+        return "/deltas/batect-{}-to-VERSION-GOES-HERE.bsdiff".format(from_version)
+
+    def get_checksum_of_cached_version(self):
+        with open(self.cached_jar_path("VERSION-GOES-HERE"), "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
     def corrupt_cached_file(self):
         with open(self.cache_dir + "/VERSION-GOES-HERE/batect-VERSION-GOES-HERE.jar", "a+") as f:
             f.truncate(10)
@@ -295,7 +429,8 @@ class WrapperScriptTests(unittest.TestCase):
             path=os.environ["PATH"],
             java_home=None,
             quiet_download=None,
-            with_java_tool_options=None
+            with_java_tool_options=None,
+            set_delta_url_root=True
     ):
         if download_url is None:
             download_url = self.default_download_url()
@@ -307,6 +442,9 @@ class WrapperScriptTests(unittest.TestCase):
             "PATH": path
         }
 
+        if set_delta_url_root:
+            env["BATECT_DELTA_URL_ROOT"] = "http://localhost:" + str(self.http_port) + "/deltas"
+
         if java_home is not None:
             env["JAVA_HOME"] = java_home
 
@@ -333,6 +471,8 @@ class WrapperScriptTests(unittest.TestCase):
         return os.path.join(self.get_script_dir(), "template.sh")
 
     def start_server(self):
+        QuietHTTPHandler.delta_dir = self.delta_dir
+        QuietHTTPHandler.requested_paths = []
         self.server = http.server.HTTPServer(("", self.http_port), QuietHTTPHandler)
         threading.Thread(target=self.server.serve_forever, daemon=True).start()
 
@@ -342,6 +482,20 @@ class WrapperScriptTests(unittest.TestCase):
 
 
 class QuietHTTPHandler(http.server.SimpleHTTPRequestHandler):
+    delta_dir = None
+    requested_paths = []
+
+    def do_GET(self):
+        QuietHTTPHandler.requested_paths.append(self.path)
+        super().do_GET()
+
+    # Serve deltas from a temporary directory rather than the working directory, so tests can create them as needed.
+    def translate_path(self, path):
+        if path.startswith("/deltas/"):
+            return os.path.join(self.delta_dir, os.path.basename(path))
+
+        return super().translate_path(path)
+
     def log_message(self, format, *args):
         pass
 